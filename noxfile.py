@@ -102,6 +102,7 @@ def pytest(session):
         "pytest",
         *pytest_args,
         "--ignore=tests/e2e",
+        "--ignore=tests/benchmarks",
         "--cov=wecom_bot_mcp_server",
         "--cov-report=xml:coverage.xml",
         "--cov-report=term-missing",
@@ -147,6 +148,24 @@ def e2e_real(session):
     )
 
 
+@nox.session
+def benchmark(session):
+    """Run the benchmarks against a local WeCom stand-in and write the results as JSON."""
+    # Install test dependencies
+    session.install("pytest", "pytest-asyncio", "anyio")
+    session.install("-e", ".")
+
+    session.run(
+        "pytest",
+        "tests/benchmarks",
+        "-v",
+        "-m",
+        "benchmark",
+        "--tb=short",
+        env={"WECOM_BENCHMARK": "1"},
+    )
+
+
 @nox.session
 def build(session):
     """Build the package."""
@@ -9,11 +9,18 @@ from wecom_bot_mcp_server.bot_config import get_bot_registry
 from wecom_bot_mcp_server.bot_config import list_available_bots
 from wecom_bot_mcp_server.errors import ErrorCode
 from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComExpiredError
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
 from wecom_bot_mcp_server.file import send_wecom_file
 from wecom_bot_mcp_server.image import send_wecom_image
 from wecom_bot_mcp_server.message import MESSAGE_HISTORY_KEY
 from wecom_bot_mcp_server.message import send_message
 from wecom_bot_mcp_server.message import send_wecom_template_card
+from wecom_bot_mcp_server.scheduler import cancel_scheduled
+from wecom_bot_mcp_server.scheduler import list_scheduled
+from wecom_bot_mcp_server.scheduler import schedule_message
+from wecom_bot_mcp_server.stats import get_stats
 
 __all__ = [
     "MESSAGE_HISTORY_KEY",
@@ -21,10 +28,17 @@ __all__ = [
     "BotRegistry",
     "ErrorCode",
     "WeComError",
+    "WeComExpiredError",
+    "WeComQueueFullError",
+    "WeComTimeoutError",
     "__version__",
+    "cancel_scheduled",
     "get_bot_registry",
+    "get_stats",
     "list_available_bots",
+    "list_scheduled",
     "mcp",
+    "schedule_message",
     "send_message",
     "send_wecom_file",
     "send_wecom_image",
@@ -1,5 +1,10 @@
 """Application configuration for WeCom Bot MCP Server."""
 
+# Import built-in modules
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from contextlib import asynccontextmanager
+
 # Import third-party modules
 from mcp.server.fastmcp import FastMCP
 
@@ -81,8 +86,81 @@ Bots can be configured via environment variables:
 - Use `list_wecom_bots` to discover available bots before sending
 """
 
+
+# Users of the background services (open MCP sessions, and the HTTP server while it listens)
+_service_users = 0
+_services: AsyncExitStack | None = None
+
+
+@asynccontextmanager
+async def background_services() -> AsyncIterator[None]:
+    """Run the server's background services while the block runs.
+
+    Nested and concurrent uses share one set of services, which start with the first
+    user and stop with the last: the event loop monitor, the shared NotifyBridge
+    clients and the message scheduler. When the services stop, pending digests are
+    sent, the send queue stops admitting sends and drains (see ``shutdown``), and the
+    scheduler and the shared clients are closed. Buffered trace spans are exported last.
+
+    """
+    # Import local modules
+    from wecom_bot_mcp_server.connections import shared_connections
+    from wecom_bot_mcp_server.loop_monitor import monitor_event_loop
+    from wecom_bot_mcp_server.scheduler import start_scheduler
+    from wecom_bot_mcp_server.scheduler import stop_scheduler
+    from wecom_bot_mcp_server.send_queue import get_send_queue
+    from wecom_bot_mcp_server.shutdown import drain_sends
+    from wecom_bot_mcp_server.tracing import flush_tracing
+
+    global _service_users, _services
+    if _services is None:
+        services = AsyncExitStack()
+        services.push_async_callback(flush_tracing)
+        await services.enter_async_context(monitor_event_loop())
+        await services.enter_async_context(shared_connections())
+        services.push_async_callback(stop_scheduler)
+        get_send_queue().open()
+        await start_scheduler()
+        services.push_async_callback(drain_sends)
+        _services = services
+    _service_users += 1
+    try:
+        yield
+    finally:
+        _service_users -= 1
+        if _service_users == 0:
+            await stop_background_services()
+
+
+async def stop_background_services() -> None:
+    """Stop the background services now, even if they still have users (e.g. on SIGTERM)."""
+    # Import third-party modules
+    import anyio
+
+    global _services
+    if _services is None:
+        return
+    services, _services = _services, None
+    # The server may be stopping because it was cancelled (e.g. Ctrl-C): shut down cleanly anyway
+    with anyio.CancelScope(shield=True):
+        await services.aclose()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Run the server's background services while an MCP session is open.
+
+    Args:
+        server: The FastMCP server
+
+    """
+    async with background_services():
+        yield
+
+
 # Initialize FastMCP server
 mcp = FastMCP(
     name=APP_NAME,
     instructions=APP_DESCRIPTION,
+    lifespan=lifespan,
 )
@@ -0,0 +1,537 @@
+"""Load generator for WeCom Bot MCP Server (``wecom-bot-mcp-server bench``).
+
+Replays a traffic mix described in a YAML spec against the server as an MCP
+client, either by spawning the server over stdio or by connecting to one running
+in HTTP mode, and prints a latency histogram, an error breakdown and the
+achieved throughput.
+
+The load is open-loop: calls are started on a precomputed arrival schedule
+whether or not earlier calls have finished, and latency is measured from the
+scheduled arrival, so a slow server shows up as latency instead of silently
+lowering the offered load.
+
+Example spec::
+
+    duration: 60            # seconds of load
+    qps: 5                  # target arrival rate
+    arrival: poisson        # poisson (default) or uniform
+    bots: {alerts: 3, ci: 1}  # bot ids (list or weights), spread over calls
+    server:
+      url: http://127.0.0.1:8000/mcp   # omit to spawn the server over stdio
+      env: {WECOM_MCP_ALLOWED_ROOT: /data}
+    simulator:              # spawn mode only: point every bot at a local simulator
+      rate_limit: 20
+      latency_ms: 80
+    mix:
+      - tool: send_message
+        weight: 8
+        arguments: {content: "Build {n} finished", msg_type: markdown}
+      - tool: send_wecom_image
+        weight: 1
+        arguments: {image_path: ./chart.png}
+
+``{n}`` (call number) and ``{bot}`` in string arguments are substituted per call.
+"""
+
+# Import built-in modules
+import argparse
+import asyncio
+from collections import Counter
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import timedelta
+import json
+import math
+import os
+from pathlib import Path
+import random
+import re
+import sys
+import time
+from typing import Any
+
+# Import third-party modules
+from mcp.client.session import ClientSession
+from mcp.types import CallToolResult
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+
+# Constants
+ARRIVALS = ("poisson", "uniform")
+DEFAULT_MAX_INFLIGHT = 1000
+DEFAULT_CALL_TIMEOUT = 60.0
+# Upper bounds of the printed latency histogram, in milliseconds
+HISTOGRAM_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+HISTOGRAM_WIDTH = 40
+_ERRCODE_PATTERN = re.compile(r"errcode (-?\d+)")
+_TOOL_ERROR_PREFIX = re.compile(r"^Error executing tool \S+: ")
+
+
+@dataclass
+class ToolMix:
+    """One entry of the traffic mix."""
+
+    tool: str
+    weight: float = 1.0
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BenchSpec:
+    """Load profile parsed from a YAML spec."""
+
+    mix: list[ToolMix]
+    duration: float = 60.0
+    qps: float = 1.0
+    arrival: str = "poisson"
+    bots: dict[str, float] = field(default_factory=dict)
+    server_url: str | None = None
+    server_env: dict[str, str] = field(default_factory=dict)
+    simulator: dict[str, Any] | None = None
+    max_inflight: int = DEFAULT_MAX_INFLIGHT
+    timeout: float = DEFAULT_CALL_TIMEOUT
+    seed: int | None = None
+
+
+@dataclass
+class Sample:
+    """Outcome of one call."""
+
+    tool: str
+    bot: str | None
+    latency: float
+    error: str | None = None
+
+
+def _invalid(message: str) -> WeComError:
+    return WeComError(f"Invalid bench spec: {message}", ErrorCode.VALIDATION_ERROR)
+
+
+def parse_spec(data: Any) -> BenchSpec:
+    """Build a load profile from parsed YAML.
+
+    Args:
+        data: Parsed spec document
+
+    Returns:
+        BenchSpec: Load profile
+
+    Raises:
+        WeComError: If the spec is invalid
+
+    """
+    if not isinstance(data, dict):
+        raise _invalid("expected a mapping")
+    raw_mix = data.get("mix")
+    if not isinstance(raw_mix, list) or not raw_mix:
+        raise _invalid("'mix' must be a non-empty list")
+    mix = []
+    for entry in raw_mix:
+        if not isinstance(entry, dict) or not isinstance(entry.get("tool"), str):
+            raise _invalid("every mix entry needs a 'tool'")
+        weight = float(entry.get("weight", 1))
+        if weight <= 0:
+            raise _invalid(f"weight of '{entry['tool']}' must be positive")
+        arguments = entry.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            raise _invalid(f"arguments of '{entry['tool']}' must be a mapping")
+        mix.append(ToolMix(entry["tool"], weight, arguments))
+
+    raw_bots = data.get("bots") or {}
+    if isinstance(raw_bots, list):
+        raw_bots = dict.fromkeys(raw_bots, 1)
+    if not isinstance(raw_bots, dict):
+        raise _invalid("'bots' must be a list of bot ids or a mapping of bot id to weight")
+    bots = {str(bot): float(weight) for bot, weight in raw_bots.items()}
+
+    server = data.get("server") or {}
+    if not isinstance(server, dict):
+        raise _invalid("'server' must be a mapping")
+    simulator = data.get("simulator")
+    if simulator is not None:
+        if server.get("url"):
+            raise _invalid("'simulator' only applies when the server is spawned (no 'server.url')")
+        simulator = simulator if isinstance(simulator, dict) else {}
+
+    spec = BenchSpec(
+        mix=mix,
+        duration=float(data.get("duration", 60)),
+        qps=float(data.get("qps", 1)),
+        arrival=str(data.get("arrival", "poisson")),
+        bots=bots,
+        server_url=server.get("url"),
+        server_env={str(k): str(v) for k, v in (server.get("env") or {}).items()},
+        simulator=simulator,
+        max_inflight=int(data.get("max_inflight", DEFAULT_MAX_INFLIGHT)),
+        timeout=float(data.get("timeout", DEFAULT_CALL_TIMEOUT)),
+        seed=data.get("seed"),
+    )
+    if spec.duration <= 0 or spec.qps <= 0:
+        raise _invalid("'duration' and 'qps' must be positive")
+    if spec.arrival not in ARRIVALS:
+        raise _invalid(f"'arrival' must be one of: {', '.join(ARRIVALS)}")
+    return spec
+
+
+def load_spec(path: str | Path) -> BenchSpec:
+    """Read a load profile from a YAML (or JSON) file.
+
+    Args:
+        path: Spec file
+
+    Returns:
+        BenchSpec: Load profile
+
+    Raises:
+        WeComError: If the file cannot be read or the spec is invalid
+
+    """
+    path = Path(path)
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as e:
+        raise _invalid(f"cannot read {path}: {e}") from e
+    if path.suffix == ".json":
+        return parse_spec(json.loads(text))
+    try:
+        # Import third-party modules
+        import yaml
+    except ImportError as e:
+        raise _invalid("reading YAML specs requires PyYAML (pip install wecom-bot-mcp-server[bench])") from e
+    return parse_spec(yaml.safe_load(text))
+
+
+def arrival_times(spec: BenchSpec, rng: random.Random) -> list[float]:
+    """Compute the open-loop arrival schedule.
+
+    Args:
+        spec: Load profile
+        rng: Random source
+
+    Returns:
+        list: Arrival offsets in seconds from the start
+
+    """
+    times: list[float] = []
+    now = 0.0
+    while True:
+        now += rng.expovariate(spec.qps) if spec.arrival == "poisson" else 1 / spec.qps
+        if now >= spec.duration:
+            return times
+        times.append(now)
+
+
+def _substitute(value: Any, n: int, bot: str | None) -> Any:
+    if isinstance(value, str):
+        return value.replace("{n}", str(n)).replace("{bot}", bot or "")
+    if isinstance(value, dict):
+        return {key: _substitute(item, n, bot) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, n, bot) for item in value]
+    return value
+
+
+def build_call(spec: BenchSpec, n: int, rng: random.Random) -> tuple[str, str | None, dict[str, Any]]:
+    """Pick the tool, bot and arguments of the n-th call.
+
+    Args:
+        spec: Load profile
+        n: Call number
+        rng: Random source
+
+    Returns:
+        tuple: Tool name, bot id (None for the default bot) and arguments
+
+    """
+    entry = rng.choices(spec.mix, weights=[entry.weight for entry in spec.mix])[0]
+    bot = rng.choices(list(spec.bots), weights=list(spec.bots.values()))[0] if spec.bots else None
+    arguments = _substitute(entry.arguments, n, bot)
+    if bot is not None:
+        arguments.setdefault("bot_id", bot)
+    return entry.tool, arguments.get("bot_id"), arguments
+
+
+def classify_error(result: CallToolResult) -> str:
+    """Group a failed call by WeCom errcode, or by its message.
+
+    Args:
+        result: Result of a failed tool call
+
+    Returns:
+        str: Error category
+
+    """
+    text = " ".join(getattr(item, "text", "") for item in result.content).strip()
+    match = _ERRCODE_PATTERN.search(text)
+    if match:
+        return f"errcode {match.group(1)}"
+    text = _TOOL_ERROR_PREFIX.sub("", text)
+    # Keep the innermost message of "Error sending ...: Failed to ...: <cause>"
+    return text.rsplit(": ", 1)[-1][:80] or "unknown error"
+
+
+async def run_load(session: ClientSession, spec: BenchSpec) -> tuple[list[Sample], float]:
+    """Drive the open-loop load through an MCP session.
+
+    Args:
+        session: Initialized MCP client session
+        spec: Load profile
+
+    Returns:
+        tuple: Call outcomes and elapsed seconds
+
+    """
+    rng = random.Random(spec.seed)
+    schedule = arrival_times(spec, rng)
+    samples: list[Sample] = []
+    tasks: list[asyncio.Task[None]] = []
+    inflight = 0
+    timeout = timedelta(seconds=spec.timeout)
+    start = time.perf_counter()
+
+    async def fire(tool: str, bot: str | None, arguments: dict[str, Any], scheduled: float) -> None:
+        nonlocal inflight
+        error = None
+        try:
+            result = await session.call_tool(tool, arguments, read_timeout_seconds=timeout)
+            if result.isError:
+                error = classify_error(result)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:80]
+        finally:
+            inflight -= 1
+        samples.append(Sample(tool, bot, time.perf_counter() - scheduled, error))
+
+    for n, offset in enumerate(schedule):
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tool, bot, arguments = build_call(spec, n, rng)
+        if inflight >= spec.max_inflight:
+            samples.append(Sample(tool, bot, 0.0, "dropped (max_inflight reached)"))
+            continue
+        inflight += 1
+        tasks.append(asyncio.create_task(fire(tool, bot, arguments, scheduled)))
+
+    await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - start
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile.
+
+    Args:
+        values: Values
+        q: Quantile between 0 and 1
+
+    Returns:
+        float: Percentile (0.0 for no values)
+
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(samples: list[Sample], elapsed: float, spec: BenchSpec) -> dict[str, Any]:
+    """Summarize a run.
+
+    Args:
+        samples: Call outcomes
+        elapsed: Run time in seconds
+        spec: Load profile
+
+    Returns:
+        dict: Counts, throughput, latency percentiles, histogram, errors and per-tool results
+
+    """
+    latencies = [sample.latency for sample in samples if sample.error is None]
+    histogram: Counter[float] = Counter()
+    for latency in latencies:
+        ms = latency * 1000
+        histogram[next((bound for bound in HISTOGRAM_BOUNDS_MS if ms <= bound), math.inf)] += 1
+
+    per_tool = {}
+    for tool in sorted({sample.tool for sample in samples}):
+        tool_samples = [sample for sample in samples if sample.tool == tool]
+        ok = [sample.latency for sample in tool_samples if sample.error is None]
+        per_tool[tool] = {
+            "calls": len(tool_samples),
+            "errors": len(tool_samples) - len(ok),
+            "p50_ms": round(percentile(ok, 0.5) * 1000, 1),
+            "p99_ms": round(percentile(ok, 0.99) * 1000, 1),
+        }
+
+    return {
+        "calls": len(samples),
+        "ok": len(latencies),
+        "errors": len(samples) - len(latencies),
+        "elapsed_s": round(elapsed, 2),
+        "target_qps": spec.qps,
+        "offered_qps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "achieved_qps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 1)
+            for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))
+        },
+        "histogram_ms": {
+            ("+Inf" if math.isinf(bound) else str(bound)): histogram[bound]
+            for bound in (*HISTOGRAM_BOUNDS_MS, math.inf)
+            if histogram[bound]
+        },
+        "error_breakdown": dict(Counter(sample.error for sample in samples if sample.error).most_common()),
+        "tools": per_tool,
+    }
+
+
+def format_report(summary: dict[str, Any]) -> str:
+    """Format a run summary for the terminal.
+
+    Args:
+        summary: Result of ``summarize``
+
+    Returns:
+        str: Report text
+
+    """
+    lines = [
+        f"Calls: {summary['calls']} ({summary['ok']} ok, {summary['errors']} failed) in {summary['elapsed_s']}s",
+        f"Throughput: target {summary['target_qps']}/s, offered {summary['offered_qps']}/s, "
+        f"achieved {summary['achieved_qps']}/s",
+        "Latency (ms): " + ", ".join(f"{name} {value}" for name, value in summary["latency_ms"].items()),
+        "",
+        "Latency histogram:",
+    ]
+    peak = max(summary["histogram_ms"].values(), default=0)
+    for bound, count in summary["histogram_ms"].items():
+        bar = "#" * max(1, round(count / peak * HISTOGRAM_WIDTH))
+        lines.append(f"  <= {bound:>6} ms | {bar:<{HISTOGRAM_WIDTH}} {count}")
+    if summary["error_breakdown"]:
+        lines += ["", "Errors:"]
+        lines += [f"  {count:>6}  {error}" for error, count in summary["error_breakdown"].items()]
+    lines += ["", "By tool:"]
+    for tool, result in summary["tools"].items():
+        lines.append(
+            f"  {tool}: {result['calls']} calls, {result['errors']} failed, "
+            f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms"
+        )
+    return "\n".join(lines)
+
+
+async def _open_session(stack: AsyncExitStack, spec: BenchSpec) -> ClientSession:
+    """Connect to the server described by the spec."""
+    if spec.server_url:
+        if spec.server_url.rstrip("/").endswith("/sse"):
+            # Import third-party modules
+            from mcp.client.sse import sse_client
+
+            read_stream, write_stream = await stack.enter_async_context(sse_client(spec.server_url))
+        else:
+            # Import third-party modules
+            from mcp.client.streamable_http import streamablehttp_client
+
+            read_stream, write_stream, _ = await stack.enter_async_context(streamablehttp_client(spec.server_url))
+    else:
+        # Import third-party modules
+        from mcp.client.stdio import StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
+        # Console logs go to stdout, which the stdio transport reserves for MCP messages
+        env = {**os.environ, "WECOM_LOG_CONSOLE": "false", **spec.server_env}
+        if spec.simulator is not None:
+            env.update(await _start_simulator(stack, spec))
+        params = StdioServerParameters(command=sys.executable, args=["-m", "wecom_bot_mcp_server"], env=env)
+        read_stream, write_stream = await stack.enter_async_context(stdio_client(params))
+
+    session = await stack.enter_async_context(ClientSession(read_stream, write_stream))
+    await session.initialize()
+    return session
+
+
+async def _start_simulator(stack: AsyncExitStack, spec: BenchSpec) -> dict[str, str]:
+    """Start a local WeCom simulator and configure every bot of the spec to use it."""
+    # Import local modules
+    from wecom_bot_mcp_server.simulator import SimulatorConfig
+    from wecom_bot_mcp_server.simulator import WeComSimulator
+
+    options = spec.simulator or {}
+    config = SimulatorConfig(
+        rate_limit=int(options.get("rate_limit", SimulatorConfig.rate_limit)),
+        latency=float(options.get("latency_ms", 0)) / 1000,
+        jitter=float(options.get("jitter_ms", 0)) / 1000,
+        error_rate=float(options.get("error_rate", 0)),
+        timeout_rate=float(options.get("timeout_rate", 0)),
+        timeout_delay=float(options.get("timeout_s", SimulatorConfig.timeout_delay)),
+        seed=spec.seed,
+    )
+    simulator = await stack.enter_async_context(WeComSimulator(config))
+    bots = {bot: simulator.webhook_url(bot) for bot in spec.bots}
+    return {"WECOM_WEBHOOK_URL": simulator.webhook_url("default"), "WECOM_BOTS": json.dumps(bots)}
+
+
+async def run_bench(spec: BenchSpec) -> dict[str, Any]:
+    """Run a load profile against the server.
+
+    Args:
+        spec: Load profile
+
+    Returns:
+        dict: Run summary
+
+    """
+    async with AsyncExitStack() as stack:
+        session = await _open_session(stack, spec)
+        samples, elapsed = await run_load(session, spec)
+    return summarize(samples, elapsed, spec)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments of the bench subcommand.
+
+    Args:
+        argv: Arguments to parse. If None, uses ``sys.argv[2:]``.
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="wecom-bot-mcp-server bench", description="Replay a load profile against the MCP server"
+    )
+    parser.add_argument("spec", help="YAML load profile")
+    parser.add_argument("--url", help="Connect to a server in HTTP mode instead of spawning one (overrides the spec)")
+    parser.add_argument("--qps", type=float, help="Target arrival rate (overrides the spec)")
+    parser.add_argument("--duration", type=float, help="Seconds of load (overrides the spec)")
+    parser.add_argument("--json", dest="json_path", help="Also write the summary as JSON to this file")
+    return parser.parse_args(sys.argv[2:] if argv is None else argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the bench subcommand.
+
+    Args:
+        argv: Command line arguments after ``bench``. If None, uses ``sys.argv[2:]``.
+
+    """
+    args = parse_args(argv)
+    try:
+        spec = load_spec(args.spec)
+    except WeComError as e:
+        sys.exit(str(e))
+    if args.url:
+        spec.server_url = args.url
+        spec.simulator = None
+    if args.qps:
+        spec.qps = args.qps
+    if args.duration:
+        spec.duration = args.duration
+
+    summary = asyncio.run(run_bench(spec))
+    print(format_report(summary))
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
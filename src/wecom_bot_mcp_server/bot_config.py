@@ -18,9 +18,14 @@ Configuration Methods:
 3. Combined mode:
    - WECOM_WEBHOOK_URL becomes the "default" bot
    - Additional bots can be configured via WECOM_BOTS or WECOM_BOT_<NAME>_URL
+
+A bot configured in WECOM_BOTS may list several webhooks under "webhook_urls";
+sends are then spread across the pool (see ``wecom_bot_mcp_server.pool``).
 """
 
 # Import built-in modules
+from bisect import bisect_left
+from collections.abc import Iterable
 from dataclasses import dataclass
 from dataclasses import field
 from functools import lru_cache
@@ -28,6 +33,7 @@ import json
 import os
 import re
 from typing import Any
+from typing import TYPE_CHECKING
 
 # Import third-party modules
 from loguru import logger
@@ -36,11 +42,29 @@ from loguru import logger
 from wecom_bot_mcp_server.errors import ErrorCode
 from wecom_bot_mcp_server.errors import WeComError
 
+if TYPE_CHECKING:
+    # Import local modules
+    from wecom_bot_mcp_server.pool import WebhookEndpoint
+    from wecom_bot_mcp_server.pool import WebhookPool
+
 # Constants
 DEFAULT_BOT_NAME = "default"
 ENV_WEBHOOK_URL = "WECOM_WEBHOOK_URL"
 ENV_BOTS_CONFIG = "WECOM_BOTS"
 ENV_BOT_URL_PATTERN = re.compile(r"^WECOM_BOT_(\w+)_URL$")
+TAGS_METADATA_KEY = "tags"
+# bot_id values starting with this prefix address every bot carrying the tag, e.g. "@group:oncall"
+GROUP_TARGET_PREFIX = "@group:"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Registries up to this size are listed in full in the instructions; larger ones are summarized
+INSTRUCTIONS_MAX_LISTED_BOTS = 10
+INSTRUCTIONS_MAX_LISTED_TAGS = 10
+# Description of the ttl_s parameter of the send tools
+TTL_DESCRIPTION = (
+    "Optional time-to-live in seconds. If the send is still waiting (e.g. for the webhook's rate limit) "
+    "when it expires, it is discarded instead of being delivered late. Defaults to the bot's ttl_s, if any."
+)
 
 
 @dataclass
@@ -51,6 +75,11 @@ class BotConfig:
         name: Human-readable name for the bot (e.g., "Alert Bot", "CI Notify")
         webhook_url: The webhook URL for sending messages
         description: Optional description of the bot's purpose
+        metadata: Free-form metadata. ``metadata["tags"]`` (list or comma-separated string)
+            is indexed by the registry for filtering.
+        webhook_urls: Webhook pool backing the bot. Defaults to ``webhook_url`` alone.
+        fallbacks: Ordered ids of bots that take over when this bot's webhook fails
+        ttl_s: Default time-to-live in seconds of queued sends to the bot (None for none)
 
     """
 
@@ -58,9 +87,15 @@ class BotConfig:
     webhook_url: str
     description: str = ""
     metadata: dict[str, Any] = field(default_factory=dict)
+    webhook_urls: list["WebhookEndpoint"] = field(default_factory=list)
+    fallbacks: list[str] = field(default_factory=list)
+    ttl_s: float | None = None
 
     def __post_init__(self) -> None:
         """Validate the bot configuration after initialization."""
+        # Import local modules
+        from wecom_bot_mcp_server.pool import WebhookEndpoint
+
         if not self.webhook_url:
             raise WeComError(
                 f"Bot '{self.name}' has empty webhook_url",
@@ -71,6 +106,24 @@ class BotConfig:
                 f"Bot '{self.name}' webhook_url must start with 'http://' or 'https://'. Got: '{self.webhook_url}'",
                 ErrorCode.VALIDATION_ERROR,
             )
+        if not self.webhook_urls:
+            self.webhook_urls = [WebhookEndpoint(self.webhook_url)]
+        self.fallbacks = [bot_id.strip().lower() for bot_id in self.fallbacks if bot_id.strip()]
+        if self.ttl_s is not None and (
+            isinstance(self.ttl_s, bool) or not isinstance(self.ttl_s, (int, float)) or self.ttl_s <= 0
+        ):
+            raise WeComError(
+                f"Bot '{self.name}' ttl_s must be a positive number of seconds. Got: {self.ttl_s!r}",
+                ErrorCode.VALIDATION_ERROR,
+            )
+
+    @property
+    def tags(self) -> tuple[str, ...]:
+        """Normalized (lowercase, de-duplicated) tags from ``metadata["tags"]``."""
+        raw = self.metadata.get(TAGS_METADATA_KEY) or ()
+        if isinstance(raw, str):
+            raw = raw.split(",")
+        return tuple(dict.fromkeys(str(tag).strip().lower() for tag in raw if str(tag).strip()))
 
 
 class BotRegistry:
@@ -78,13 +131,61 @@ class BotRegistry:
 
     This class provides methods to register, retrieve, and list bots.
     It automatically loads configuration from environment variables.
+
+    Bots are indexed by tag and kept in a sorted id list so that filtered and
+    paginated listings stay cheap with thousands of registered bots.
     """
 
     def __init__(self) -> None:
         """Initialize the bot registry."""
         self._bots: dict[str, BotConfig] = {}
+        self._tag_index: dict[str, set[str]] = {}
+        # Sorted id lists keyed by tag (None for all bots), rebuilt lazily after changes
+        self._sorted_ids: dict[str | None, list[str]] = {}
+        # Webhook pools of bots backed by more than one webhook, created on first send
+        self._pools: dict[str, WebhookPool] = {}
         self._loaded = False
 
+    def _add(self, bot_id: str, config: BotConfig) -> None:
+        """Store a bot and update the lookup indexes.
+
+        Args:
+            bot_id: Normalized (lowercase) bot identifier
+            config: Bot configuration
+
+        """
+        previous = self._bots.get(bot_id)
+        if previous is not None:
+            for tag in previous.tags:
+                members = self._tag_index.get(tag)
+                if members is not None:
+                    members.discard(bot_id)
+                    if not members:
+                        del self._tag_index[tag]
+        self._bots[bot_id] = config
+        self._pools.pop(bot_id, None)
+        for tag in config.tags:
+            self._tag_index.setdefault(tag, set()).add(bot_id)
+        self._sorted_ids.clear()
+
+    def _ids_sorted(self, tag: str | None = None) -> list[str]:
+        """Get bot ids in sorted order, optionally restricted to a tag.
+
+        Args:
+            tag: Optional tag to restrict the ids to
+
+        Returns:
+            list[str]: Sorted bot ids (cached until the registry changes)
+
+        """
+        key = tag.lower() if tag else None
+        ids = self._sorted_ids.get(key)
+        if ids is None:
+            source: Iterable[str] = self._bots if key is None else self._tag_index.get(key, ())
+            ids = sorted(source)
+            self._sorted_ids[key] = ids
+        return ids
+
     def _ensure_loaded(self) -> None:
         """Ensure bots are loaded from environment."""
         if not self._loaded:
@@ -103,10 +204,13 @@ class BotRegistry:
         default_url = os.getenv(ENV_WEBHOOK_URL)
         if default_url:
             try:
-                self._bots[DEFAULT_BOT_NAME] = BotConfig(
-                    name=DEFAULT_BOT_NAME,
-                    webhook_url=default_url.strip(),
-                    description="Default bot (from WECOM_WEBHOOK_URL)",
+                self._add(
+                    DEFAULT_BOT_NAME,
+                    BotConfig(
+                        name=DEFAULT_BOT_NAME,
+                        webhook_url=default_url.strip(),
+                        description="Default bot (from WECOM_WEBHOOK_URL)",
+                    ),
                 )
                 logger.debug(f"Loaded default bot from {ENV_WEBHOOK_URL}")
             except WeComError as e:
@@ -131,10 +235,13 @@ class BotRegistry:
                 bot_id = match.group(1).lower()
                 if bot_id not in self._bots:
                     try:
-                        self._bots[bot_id] = BotConfig(
-                            name=bot_id,
-                            webhook_url=value.strip(),
-                            description=f"Bot from {key}",
+                        self._add(
+                            bot_id,
+                            BotConfig(
+                                name=bot_id,
+                                webhook_url=value.strip(),
+                                description=f"Bot from {key}",
+                            ),
                         )
                         logger.debug(f"Loaded bot '{bot_id}' from {key}")
                     except WeComError as e:
@@ -152,17 +259,24 @@ class BotRegistry:
         try:
             if isinstance(bot_info, str):
                 # Simple format: {"bot_id": "webhook_url"}
-                self._bots[bot_id] = BotConfig(
-                    name=bot_id,
-                    webhook_url=bot_info.strip(),
-                )
+                self._add(bot_id, BotConfig(name=bot_id, webhook_url=bot_info.strip()))
             elif isinstance(bot_info, dict):
                 # Full format: {"bot_id": {"name": "...", "webhook_url": "...", "description": "..."}}
-                self._bots[bot_id] = BotConfig(
-                    name=bot_info.get("name", bot_id),
-                    webhook_url=bot_info.get("webhook_url", "").strip(),
-                    description=bot_info.get("description", ""),
-                    metadata=bot_info.get("metadata", {}),
+                endpoints = _parse_endpoints(bot_info.get("webhook_urls") or [])
+                webhook_url = bot_info.get("webhook_url", "").strip()
+                if not webhook_url and endpoints:
+                    webhook_url = endpoints[0].url
+                self._add(
+                    bot_id,
+                    BotConfig(
+                        name=bot_info.get("name", bot_id),
+                        webhook_url=webhook_url,
+                        description=bot_info.get("description", ""),
+                        metadata=bot_info.get("metadata", {}),
+                        webhook_urls=endpoints,
+                        fallbacks=_parse_id_list(bot_info.get("fallbacks") or []),
+                        ttl_s=bot_info.get("ttl_s"),
+                    ),
                 )
         except WeComError as e:
             logger.warning(f"Failed to register bot '{bot_id}': {e}")
@@ -176,7 +290,7 @@ class BotRegistry:
 
         """
         self._ensure_loaded()
-        self._bots[bot_id.lower()] = config
+        self._add(bot_id.lower(), config)
         logger.info(f"Registered bot '{bot_id}' ({config.name})")
 
     def get(self, bot_id: str | None = None) -> BotConfig:
@@ -201,48 +315,194 @@ class BotRegistry:
         bot_id = bot_id.lower()
 
         if bot_id not in self._bots:
-            available = list(self._bots.keys())
-            if not available:
+            if not self._bots:
                 raise WeComError(
                     "No bots configured. Set WECOM_WEBHOOK_URL or WECOM_BOTS environment variable.",
                     ErrorCode.VALIDATION_ERROR,
                 )
+            available = self._ids_sorted()
+            hint = ", ".join(available[:INSTRUCTIONS_MAX_LISTED_BOTS])
+            if len(available) > INSTRUCTIONS_MAX_LISTED_BOTS:
+                hint += f", ... ({len(available)} total, use `list_wecom_bots` to search)"
             raise WeComError(
-                f"Bot '{bot_id}' not found. Available bots: {', '.join(available)}",
+                f"Bot '{bot_id}' not found. Available bots: {hint}",
                 ErrorCode.VALIDATION_ERROR,
             )
 
         return self._bots[bot_id]
 
-    def get_webhook_url(self, bot_id: str | None = None) -> str:
+    def get_webhook_url(self, bot_id: str | None = None, conversation_key: str | None = None) -> str:
         """Get webhook URL for a bot.
 
+        For bots backed by a webhook pool, a pool member is selected for the next send.
+
         Args:
             bot_id: Bot identifier. If None, returns the default bot's URL.
+            conversation_key: Optional key keeping a conversation on one pool member
 
         Returns:
             str: The webhook URL
 
         """
-        return self.get(bot_id).webhook_url
+        # Import local modules
+        from wecom_bot_mcp_server.pool import WebhookPool
+
+        config = self.get(bot_id)
+        if len(config.webhook_urls) <= 1:
+            return config.webhook_url
+        key = (bot_id or DEFAULT_BOT_NAME).lower()
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = WebhookPool(config.webhook_urls)
+        return pool.select(conversation_key)
+
+    def get_fallbacks(self, bot_id: str | None = None) -> list[str]:
+        """Get the ordered fallback bot ids of a bot.
+
+        Args:
+            bot_id: Bot identifier. If None, uses the default bot.
+
+        Returns:
+            list[str]: Fallback bot ids (empty if none are configured)
+
+        """
+        return list(self.get(bot_id).fallbacks)
+
+    def get_ttl(self, bot_id: str | None = None) -> float | None:
+        """Get the default time-to-live of queued sends to a bot.
+
+        Args:
+            bot_id: Bot identifier. If None, uses the default bot.
+
+        Returns:
+            float | None: TTL in seconds, or None if the bot has none. ``@group:`` targets and
+                unknown bots (whose sends fail when their webhook is resolved) have none.
+
+        """
+        if parse_group_target(bot_id) is not None:
+            return None
+        try:
+            return self.get(bot_id).ttl_s
+        except WeComError:
+            return None
+
+    def list_bots(
+        self,
+        tag: str | None = None,
+        prefix: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """List configured bots, optionally filtered and paginated.
+
+        Args:
+            tag: Only include bots carrying this tag
+            prefix: Only include bots whose id starts with this prefix
+            offset: Number of matching bots to skip
+            limit: Maximum number of bots to return. If None, returns all matches.
+
+        Returns:
+            list: List of bot information dictionaries, sorted by id
+
+        """
+        ids, _ = self.find_bot_ids(tag=tag, prefix=prefix, offset=offset, limit=limit)
+        return [self._describe(bot_id) for bot_id in ids]
+
+    def find_bot_ids(
+        self,
+        tag: str | None = None,
+        prefix: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> tuple[list[str], int]:
+        """Find bot ids matching the filters using the tag and prefix indexes.
+
+        Args:
+            tag: Only include bots carrying this tag
+            prefix: Only include bots whose id starts with this prefix
+            offset: Number of matching bots to skip
+            limit: Maximum number of ids to return. If None, returns all matches.
+
+        Returns:
+            tuple: (page of matching bot ids, total number of matches)
+
+        """
+        self._ensure_loaded()
+        ids = self._ids_sorted(tag)
+        start, end = 0, len(ids)
+        if prefix:
+            prefix = prefix.lower()
+            # Ids sharing a prefix are contiguous in sorted order
+            start = bisect_left(ids, prefix)
+            end = bisect_left(ids, prefix + "\uffff", lo=start)
+        total = end - start
+        offset = max(offset, 0)
+        page_start = start + offset
+        page_end = end if limit is None else min(end, page_start + max(limit, 0))
+        return ids[page_start:page_end], total
+
+    def resolve_group(self, group: str) -> list[str]:
+        """Resolve a group name to the ids of its member bots.
+
+        A group is the set of bots carrying the tag of the same name.
+
+        Args:
+            group: Group (tag) name, with or without the ``@group:`` prefix
+
+        Returns:
+            list[str]: Sorted member bot ids
+
+        Raises:
+            WeComError: If the group has no members
+
+        """
+        self._ensure_loaded()
+        name = parse_group_target(group) or group
+        members = self._ids_sorted(name)
+        if not members:
+            raise WeComError(
+                f"Bot group '{name}' has no members. Tag bots via metadata.tags to add them to a group.",
+                ErrorCode.VALIDATION_ERROR,
+            )
+        return list(members)
 
-    def list_bots(self) -> list[dict[str, str | bool]]:
-        """List all configured bots.
+    def list_tags(self) -> dict[str, int]:
+        """List known tags with the number of bots carrying each.
 
         Returns:
-            list: List of bot information dictionaries
+            dict: Mapping of tag to bot count, most used tags first
 
         """
         self._ensure_loaded()
-        return [
-            {
-                "id": bot_id,
-                "name": config.name,
-                "description": config.description,
-                "has_webhook": bool(config.webhook_url),
-            }
-            for bot_id, config in self._bots.items()
-        ]
+        counts = {tag: len(members) for tag, members in self._tag_index.items()}
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def _describe(self, bot_id: str) -> dict[str, Any]:
+        """Build the public description of a bot.
+
+        Args:
+            bot_id: Normalized bot identifier
+
+        Returns:
+            dict: Bot information dictionary
+
+        """
+        config = self._bots[bot_id]
+        info: dict[str, Any] = {
+            "id": bot_id,
+            "name": config.name,
+            "description": config.description,
+            "has_webhook": bool(config.webhook_url),
+        }
+        if config.tags:
+            info["tags"] = list(config.tags)
+        if len(config.webhook_urls) > 1:
+            info["pool_size"] = len(config.webhook_urls)
+        if config.fallbacks:
+            info["fallbacks"] = list(config.fallbacks)
+        if config.ttl_s is not None:
+            info["ttl_s"] = config.ttl_s
+        return info
 
     def has_bot(self, bot_id: str) -> bool:
         """Check if a bot is registered.
@@ -257,6 +517,19 @@ class BotRegistry:
         self._ensure_loaded()
         return bot_id.lower() in self._bots
 
+    def has_group(self, group: str) -> bool:
+        """Check if a group has members.
+
+        Args:
+            group: Group (tag) name, with or without the ``@group:`` prefix
+
+        Returns:
+            bool: True if at least one bot carries the tag
+
+        """
+        self._ensure_loaded()
+        return (parse_group_target(group) or group).lower() in self._tag_index
+
     def has_multiple_bots(self) -> bool:
         """Check if multiple bots are configured.
 
@@ -280,6 +553,9 @@ class BotRegistry:
     def clear(self) -> None:
         """Clear all registered bots (mainly for testing)."""
         self._bots.clear()
+        self._tag_index.clear()
+        self._sorted_ids.clear()
+        self._pools.clear()
         self._loaded = False
 
     def reload(self) -> None:
@@ -288,6 +564,69 @@ class BotRegistry:
         self._ensure_loaded()
 
 
+def _parse_endpoints(raw: list[Any]) -> list["WebhookEndpoint"]:
+    """Parse the ``webhook_urls`` list of a bot configuration.
+
+    Args:
+        raw: Entries as URL strings or ``{"url": ..., "weight": ...}`` objects
+
+    Returns:
+        list[WebhookEndpoint]: Pool members in configuration order
+
+    Raises:
+        WeComError: If an entry is malformed
+
+    """
+    # Import local modules
+    from wecom_bot_mcp_server.pool import WebhookEndpoint
+
+    if not isinstance(raw, list):
+        raise WeComError("webhook_urls must be a list", ErrorCode.VALIDATION_ERROR)
+    endpoints = []
+    for entry in raw:
+        if isinstance(entry, str):
+            endpoints.append(WebhookEndpoint(entry.strip()))
+        elif isinstance(entry, dict):
+            try:
+                weight = int(entry.get("weight", 1))
+            except (TypeError, ValueError) as e:
+                raise WeComError(f"Invalid webhook weight: {entry.get('weight')!r}", ErrorCode.VALIDATION_ERROR) from e
+            endpoints.append(WebhookEndpoint(str(entry.get("url", "")).strip(), weight))
+        else:
+            raise WeComError(f"Invalid webhook_urls entry: {entry!r}", ErrorCode.VALIDATION_ERROR)
+    return endpoints
+
+
+def _parse_id_list(raw: list[Any] | str) -> list[str]:
+    """Parse a list of bot ids given as a JSON list or comma-separated string.
+
+    Args:
+        raw: Bot ids
+
+    Returns:
+        list[str]: Bot ids in the given order
+
+    """
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return [str(bot_id) for bot_id in raw]
+
+
+def parse_group_target(bot_id: str | None) -> str | None:
+    """Extract the group name from a ``@group:<name>`` bot target.
+
+    Args:
+        bot_id: Bot identifier as passed to a send tool
+
+    Returns:
+        str | None: Lowercase group name, or None if ``bot_id`` is not a group target
+
+    """
+    if bot_id and bot_id.lower().startswith(GROUP_TARGET_PREFIX):
+        return bot_id[len(GROUP_TARGET_PREFIX) :].strip().lower()
+    return None
+
+
 # Global bot registry instance
 _bot_registry: BotRegistry | None = None
 
@@ -335,57 +674,107 @@ def get_webhook_url_for_bot(bot_id: str | None = None) -> str:
     return get_bot_registry().get_webhook_url(bot_id)
 
 
-def list_available_bots() -> list[dict[str, str | bool]]:
-    """List all available bots.
+def list_available_bots(
+    tag: str | None = None,
+    prefix: str | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[dict[str, Any]]:
+    """List available bots, optionally filtered and paginated.
+
+    Args:
+        tag: Only include bots carrying this tag
+        prefix: Only include bots whose id starts with this prefix
+        offset: Number of matching bots to skip
+        limit: Maximum number of bots to return. If None, returns all matches.
 
     Returns:
         list: List of bot information
 
     """
-    return get_bot_registry().list_bots()
+    return get_bot_registry().list_bots(tag=tag, prefix=prefix, offset=offset, limit=limit)
+
+
+def get_send_ttl(bot_id: str | None, ttl_s: float | None = None) -> float | None:
+    """Get the time-to-live of a send: the one given, or else the bot's default.
+
+    Args:
+        bot_id: Bot identifier as passed to a send tool
+        ttl_s: TTL given with the send, if any
+
+    Returns:
+        float | None: TTL in seconds, or None for none
+
+    """
+    return ttl_s if ttl_s is not None else get_bot_registry().get_ttl(bot_id)
 
 
 def get_multi_bot_instructions() -> str:
     """Get instructions for AI on how to use multiple bots.
 
+    Small registries are listed in full. Larger ones are summarized (bot count,
+    a bounded sample of ids and the most used tags) so the text size does not
+    grow with the number of configured bots.
+
     Returns:
         str: Instructions text for AI assistants
 
     """
     registry = get_bot_registry()
-    bots = registry.list_bots()
+    total = registry.get_bot_count()
 
-    if not bots:
+    if not total:
         return (
             "No WeCom bots are configured. Please set the WECOM_WEBHOOK_URL environment "
             "variable or configure multiple bots via WECOM_BOTS."
         )
 
-    if len(bots) == 1:
-        bot = bots[0]
+    if total == 1:
+        bot = registry.list_bots()[0]
         return (
             f"One WeCom bot is configured: '{bot['name']}' (id: {bot['id']}). "
             "All messages will be sent to this bot. You don't need to specify a bot_id."
         )
 
     # Multiple bots configured
+    bots = registry.list_bots(limit=INSTRUCTIONS_MAX_LISTED_BOTS)
     bot_list = "\n".join(
         f"  - **{bot['id']}**: {bot['name']}" + (f" - {bot['description']}" if bot["description"] else "")
         for bot in bots
     )
+    if total > len(bots):
+        bot_list += f"\n  - ... and {total - len(bots)} more (use `list_wecom_bots` to search)"
+        bot_id_hint = (
+            "- To send to a specific bot, set `bot_id` to its id. Call `list_wecom_bots` with `tag` or "
+            "`prefix` to find the right bot instead of guessing.\n"
+        )
+    else:
+        bot_id_hint = f"- To send to a specific bot, set `bot_id` to one of: {', '.join(b['id'] for b in bots)}\n"
+
+    tags = list(registry.list_tags().items())
+    tag_section = ""
+    if tags:
+        tag_lines = "\n".join(f"  - `{tag}` ({count} bots)" for tag, count in tags[:INSTRUCTIONS_MAX_LISTED_TAGS])
+        if len(tags) > INSTRUCTIONS_MAX_LISTED_TAGS:
+            tag_lines += f"\n  - ... and {len(tags) - INSTRUCTIONS_MAX_LISTED_TAGS} more tags"
+        tag_section = f"### Bot Tags\n{tag_lines}\n\n"
 
     return (
         f"## Multiple WeCom Bots Available\n\n"
-        f"This server has {len(bots)} bots configured:\n{bot_list}\n\n"
+        f"This server has {total} bots configured:\n{bot_list}\n\n"
+        f"{tag_section}"
         f"### How to Send Messages to Specific Bots\n"
         f"When calling `send_message`, `send_wecom_image`, or `send_wecom_file`, "
         f"you can specify the `bot_id` parameter to choose which bot to use:\n\n"
         f"- If `bot_id` is not specified, messages go to the **default** bot.\n"
-        f"- To send to a specific bot, set `bot_id` to one of: {', '.join(b['id'] for b in bots)}\n\n"
+        f"{bot_id_hint}"
+        f"- To broadcast to every bot carrying a tag, set `bot_id` to `@group:<tag>` "
+        f"(e.g. `@group:oncall`); the result aggregates per-bot outcomes.\n\n"
         f"### Use Case Examples\n"
         f"- **Alert notifications**: Use the bot designated for alerts\n"
         f"- **CI/CD notifications**: Use the bot for build/deploy notifications\n"
         f"- **Team updates**: Use team-specific bots for targeted messaging\n\n"
         f"### Listing Bots\n"
-        f"Call the `list_wecom_bots` tool to see all available bots and their configurations."
+        f"Call the `list_wecom_bots` tool to see available bots and their configurations. "
+        f"It is paginated and can be filtered by `tag` or id `prefix`."
     )
@@ -0,0 +1,66 @@
+"""Shared NotifyBridge clients for WeCom Bot MCP Server.
+
+Opening a NotifyBridge for every send pays for a new connection to WeCom (TCP and
+TLS handshakes) on every message. While the background services run (see
+``app.background_services``), sends share one bridge per sending module instead,
+whose notifiers keep their HTTP connections open between sends. The bridges are
+closed when the services stop, after the send queue has drained (see
+``shutdown``). The HTTP client files are uploaded with (see ``file``) is shared
+the same way.
+
+Outside of the background services (e.g. a tool function called directly from
+Python), every send opens and closes its own bridge.
+"""
+
+# Import built-in modules
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from contextlib import AsyncExitStack
+from contextlib import asynccontextmanager
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+
+# Shared bridges by the factory that created them, closed together when the services stop
+_connections: AsyncExitStack | None = None
+_bridges: dict[Any, Any] = {}
+
+
+@asynccontextmanager
+async def shared_connections() -> AsyncIterator[None]:
+    """Share NotifyBridge clients between sends while the block runs, closing them after it."""
+    global _connections
+    async with AsyncExitStack() as connections:
+        _connections = connections
+        try:
+            yield
+        finally:
+            _connections = None
+            if _bridges:
+                logger.debug(f"Closing {len(_bridges)} shared NotifyBridge client(s)")
+            _bridges.clear()
+
+
+@asynccontextmanager
+async def shared_bridge(factory: Callable[[], Any]) -> AsyncIterator[Any]:
+    """Use the shared bridge made by a factory, or a bridge of its own outside of ``shared_connections``.
+
+    Args:
+        factory: The calling module's ``NotifyBridge`` (so patching it in tests still takes effect),
+            or another factory of async context managers such as the upload client's
+
+    Yields:
+        The bridge to send with
+
+    """
+    if _connections is None:
+        async with factory() as bridge:
+            yield bridge
+        return
+    bridge = _bridges.get(factory)
+    if bridge is None:
+        bridge = await _connections.enter_async_context(factory())
+        # A concurrent send may have opened one meanwhile; the extra one is still closed with the others
+        bridge = _bridges.setdefault(factory, bridge)
+    yield bridge
@@ -0,0 +1,205 @@
+"""Deadlines for the send tools of WeCom Bot MCP Server.
+
+Without a deadline, a hung WeCom connection or a long rate-limit wait holds a tool
+call (and the MCP client waiting on it) indefinitely. Every send tool accepts an
+optional ``timeout_s``, falling back to the server-wide ``WECOM_SEND_TIMEOUT``. The
+deadline covers the whole call: rate-limit waits, failover to other bots, image
+downloads, file uploads and the HTTP requests. When it expires, the call is
+cancelled (releasing its rate-limit slot and closing its connections) and raises
+``WeComTimeoutError`` naming the stage that was running.
+
+Stages are reported by ``metrics.stage`` (and the rate limiter), so the layers of
+the send path need no deadline parameter. Code that waits for a known time, such
+as the rate limiter, calls ``ensure_time_for`` to fail at once instead of waiting
+for a slot the call cannot live to use.
+
+Environment Variables:
+    WECOM_SEND_TIMEOUT: Default timeout of a send tool call in seconds; 0 disables
+        it (default: 120)
+"""
+
+# Import built-in modules
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+import functools
+import inspect
+from typing import Any
+from typing import TypeVar
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
+from wecom_bot_mcp_server.utils import get_env_float
+
+# Constants
+DEFAULT_TIMEOUT = 120.0
+# Stage reported when the deadline expires outside of any named stage
+DEFAULT_STAGE = "send"
+# Description of the timeout_s parameter of the send tools
+TIMEOUT_DESCRIPTION = (
+    "Optional limit in seconds for the whole send, including waits for the webhook's rate limit. "
+    "If it expires, nothing more is attempted and a timeout error names the stage that was running."
+)
+
+T = TypeVar("T")
+
+
+@dataclass
+class Deadline:
+    """Deadline of a running tool call."""
+
+    tool: str
+    expires: float
+    timeout: float
+    # Stages running now, most recently started last
+    stages: list[str] = field(default_factory=list)
+    # Innermost stage cancelled by the deadline
+    expired_in: str | None = None
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (negative once it has passed)."""
+        return self.expires - asyncio.get_running_loop().time()
+
+    @property
+    def stage(self) -> str:
+        """Stage cancelled by the deadline, or else the innermost stage running now."""
+        if self.expired_in is not None:
+            return self.expired_in
+        return self.stages[-1] if self.stages else DEFAULT_STAGE
+
+    def error(self, stage: str, detail: str = "") -> WeComTimeoutError:
+        """Build the error raised when the call runs out of time.
+
+        Args:
+            stage: Stage that was running (or could not be completed in time)
+            detail: Optional explanation appended to the message
+
+        Returns:
+            WeComTimeoutError: Error to raise
+
+        """
+        message = f"{self.tool} timed out after {self.timeout:g}s during {stage}"
+        return WeComTimeoutError(f"{message}: {detail}" if detail else message, stage, self.timeout)
+
+
+# Deadline of the tool call running in the current task
+_deadline: ContextVar[Deadline | None] = ContextVar("wecom_deadline", default=None)
+
+
+def get_default_timeout() -> float:
+    """Get the server-wide default timeout of send tool calls.
+
+    Returns:
+        float: Timeout in seconds, 0 for none
+
+    """
+    return get_env_float("WECOM_SEND_TIMEOUT", DEFAULT_TIMEOUT)
+
+
+@contextmanager
+def track_stage(name: str) -> Iterator[None]:
+    """Mark a stage of the running tool call, to be reported if its deadline expires.
+
+    Args:
+        name: Stage name
+
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        yield
+        return
+    deadline.stages.append(name)
+    try:
+        yield
+    except asyncio.CancelledError:
+        # Stages unwind from the innermost out, and are gone by the time the timeout is reported
+        if deadline.expired_in is None and deadline.remaining() <= 0:
+            deadline.expired_in = name
+        raise
+    finally:
+        deadline.stages.remove(name)
+
+
+def ensure_time_for(seconds: float, stage: str) -> None:
+    """Fail at once if waiting would outlast the running tool call's deadline.
+
+    Args:
+        seconds: Time the caller is about to wait
+        stage: Stage the wait belongs to (e.g. ``rate_limit``)
+
+    Raises:
+        WeComTimeoutError: If the deadline would expire during the wait
+
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return
+    left = deadline.remaining()
+    if seconds > left:
+        raise deadline.error(stage, f"waiting {seconds:.1f}s would exceed the {max(left, 0.0):.1f}s left")
+
+
+async def run_with_deadline(tool: str, timeout_s: float | None, call: Callable[[], Awaitable[T]]) -> T:
+    """Run a tool call under a deadline.
+
+    Args:
+        tool: Tool name, for the error message
+        timeout_s: Timeout in seconds; None for the server default
+        call: Coroutine function running the call
+
+    Returns:
+        The call's result
+
+    Raises:
+        WeComTimeoutError: If the call does not finish in time
+        WeComError: If the timeout is invalid
+
+    """
+    if timeout_s is not None and timeout_s <= 0:
+        raise WeComError(f"timeout_s must be positive, got {timeout_s:g}", ErrorCode.VALIDATION_ERROR)
+    timeout = timeout_s if timeout_s is not None else get_default_timeout()
+    if timeout <= 0 or _deadline.get() is not None:
+        # No deadline, or one set by an enclosing call that already bounds this one
+        return await call()
+
+    deadline = Deadline(tool, asyncio.get_running_loop().time() + timeout, timeout)
+    token = _deadline.set(deadline)
+    try:
+        return await asyncio.wait_for(call(), timeout)
+    except asyncio.TimeoutError as e:
+        if deadline.remaining() > 0:
+            raise  # raised by the call itself, not by the deadline
+        raise deadline.error(deadline.stage) from e
+    finally:
+        _deadline.reset(token)
+
+
+def with_deadline(tool: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorate a send tool to run under the deadline given by its ``timeout_s`` argument.
+
+    Args:
+        tool: Tool name, for the error message
+
+    Returns:
+        Callable: Decorator for an async function taking a ``timeout_s`` argument
+
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            timeout_s = signature.bind_partial(*args, **kwargs).arguments.get("timeout_s")
+            return await run_with_deadline(tool, timeout_s, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,183 @@
+"""Content deduplication for WeCom Bot MCP Server.
+
+Flapping monitors make agents send the same alert many times a minute, which
+uses up the webhook's quota (20 messages per minute) before a genuinely new alert
+arrives. When a deduplication window is configured, a message whose normalized
+content was already sent to the same bot within the window is suppressed instead
+of sent. The window starts at the last copy that was sent, so a message repeated
+forever still gets through once per window. That copy reports how many copies
+were suppressed since the previous one, in a note (``REPEATED_NOTE``).
+
+Messages are tracked by a digest of their content, in a table bounded to the most
+recently seen messages.
+
+Environment Variables:
+    WECOM_DEDUP_WINDOW: Seconds during which identical messages to a bot are
+        suppressed (default: 0, deduplication disabled)
+    WECOM_DEDUP_MAX_ENTRIES: Messages tracked; the least recently seen are forgotten
+        (default: 10000)
+    WECOM_DEDUP_SUMMARY: Note the number of suppressed copies on the next copy that
+        is sent (default: true)
+"""
+
+# Import built-in modules
+from collections import OrderedDict
+from collections.abc import Callable
+import hashlib
+import time
+
+# Import local modules
+from wecom_bot_mcp_server.utils import get_env_bool
+from wecom_bot_mcp_server.utils import get_env_float
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+DEFAULT_MAX_ENTRIES = 10000
+REPEATED_NOTE = "(repeated \u00d7{count})"
+
+
+def content_digest(content: str) -> bytes:
+    """Digest of message content, ignoring case and differences in whitespace.
+
+    Args:
+        content: Message content
+
+    Returns:
+        bytes: 16-byte digest
+
+    """
+    normalized = " ".join(content.split()).casefold()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+def repeated_note(content: str, repeated: int) -> str:
+    """Append the number of suppressed copies to message content.
+
+    Args:
+        content: Message content
+        repeated: Copies suppressed since the previous one was sent
+
+    Returns:
+        str: Content followed by the note
+
+    """
+    return f"{content}\n\n{REPEATED_NOTE.format(count=repeated)}"
+
+
+class DedupWindow:
+    """Suppress identical messages to the same bot within a time window."""
+
+    def __init__(
+        self,
+        window: float,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        summarize: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the window.
+
+        Args:
+            window: Seconds during which identical messages are suppressed. 0 disables it.
+            max_entries: Messages tracked; the least recently seen are forgotten
+            summarize: Whether the next copy sent notes the number of suppressed copies
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.window = window
+        self.max_entries = max(1, max_entries)
+        self.summarize = summarize
+        self._clock = clock
+        # (bot, digest) -> [time the last copy was sent, copies suppressed since]
+        self._entries: OrderedDict[tuple[str, bytes], list[float]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether deduplication is enabled."""
+        return self.window > 0
+
+    def __len__(self) -> int:
+        """Return the number of tracked messages."""
+        return len(self._entries)
+
+    def admit(self, bot: str, content: str) -> int | None:
+        """Decide whether a message is sent, and record the decision.
+
+        Args:
+            bot: Target bot (or group) the message is sent to
+            content: Message content
+
+        Returns:
+            int | None: None if the message is a duplicate and must be suppressed.
+                Otherwise the number of copies suppressed since the previous one was
+                sent, to be summarized (0 when there is nothing to summarize).
+
+        """
+        if not self.enabled:
+            return 0
+        key = (bot.lower(), content_digest(content))
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if now - entry[0] < self.window:
+                entry[1] += 1
+                return None
+            repeated = int(entry[1])
+            entry[0], entry[1] = now, 0
+            return repeated if self.summarize else 0
+
+        self._entries[key] = [now, 0]
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return 0
+
+    def suppressed(self, bot: str, content: str) -> int:
+        """Return how many copies of a message were suppressed since the last one was sent.
+
+        Args:
+            bot: Target bot (or group)
+            content: Message content
+
+        Returns:
+            int: Suppressed copies
+
+        """
+        entry = self._entries.get((bot.lower(), content_digest(content)))
+        return int(entry[1]) if entry is not None else 0
+
+    def cancel(self, bot: str, content: str, repeated: int) -> None:
+        """Undo the admission of a message whose send failed.
+
+        The next copy is then sent rather than suppressed, and still carries the count.
+
+        Args:
+            bot: Target bot (or group)
+            content: Message content
+            repeated: Value returned by ``admit`` for the failed message
+
+        """
+        entry = self._entries.get((bot.lower(), content_digest(content)))
+        if entry is not None:
+            entry[0] = float("-inf")
+            entry[1] += repeated
+
+
+# Global deduplication window
+_dedup_window: DedupWindow | None = None
+
+
+def get_dedup_window() -> DedupWindow:
+    """Get the global deduplication window, configured from the environment on first use.
+
+    Returns:
+        DedupWindow: Global deduplication window
+
+    """
+    global _dedup_window
+    if _dedup_window is None:
+        _dedup_window = DedupWindow(
+            window=get_env_float("WECOM_DEDUP_WINDOW", 0.0),
+            max_entries=get_env_int("WECOM_DEDUP_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+            summarize=get_env_bool("WECOM_DEDUP_SUMMARY", True),
+        )
+    return _dedup_window
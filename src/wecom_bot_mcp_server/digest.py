@@ -0,0 +1,253 @@
+"""Digest delivery for WeCom Bot MCP Server.
+
+Noisy sources should not produce one WeCom message per event. A ``send_message``
+call with a ``group_key`` is buffered instead of sent: messages with the same bot,
+group key and message type accumulate, and are delivered together as one digest
+of that type. A digest is sent when the group's interval has passed since its first
+message, or earlier when the next message would push it past the WeCom content
+limit (4096 bytes).
+
+Flushes are timed by one ``TimerWheel`` for all groups, so many active groups cost
+no more than one background task.
+
+Environment Variables:
+    WECOM_DIGEST_INTERVAL: Seconds a group collects messages before it is sent
+        (default: 60)
+    WECOM_DIGEST_MAX_BYTES: Size at which a digest is sent early, leaving room for
+        encoding (default: 4000)
+"""
+
+# Import built-in modules
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+import contextvars
+from dataclasses import dataclass
+from dataclasses import field
+import time
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.timer_wheel import TimerWheel
+from wecom_bot_mcp_server.utils import get_env_float
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+DEFAULT_INTERVAL = 60.0
+DEFAULT_MAX_BYTES = 4000
+MAX_GROUP_KEY_LENGTH = 128
+
+# Bot, group key and message type
+DigestKey = tuple[str, str, str]
+
+
+@dataclass
+class DigestGroup:
+    """Messages waiting to be sent as one digest."""
+
+    bot_id: str
+    group_key: str
+    msg_type: str
+    created: float
+    # Distinct contents in arrival order, with the number of times each was received
+    items: dict[str, int] = field(default_factory=dict)
+    mentioned_list: list[str] = field(default_factory=list)
+    mentioned_mobile_list: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        """Number of messages in the group."""
+        return sum(self.items.values())
+
+    def render(self) -> str:
+        """Render the group as one message of its type.
+
+        Returns:
+            str: Digest content, under a bold header for markdown digests
+
+        """
+        # Plain text digests would show the asterisks
+        title = f"**{self.group_key}**" if self.msg_type.startswith("markdown") else self.group_key
+        lines = [f"{title} ({self.count} messages)"]
+        for content, times in self.items.items():
+            lines.append(content if times == 1 else f"{content} (\u00d7{times})")
+        return "\n\n".join(lines)
+
+
+# Delivers a digest: (bot_id, content, msg_type, mentioned_list, mentioned_mobile_list)
+DigestSender = Callable[[str, str, str, list[str], list[str]], Awaitable[Any]]
+
+
+class Digester:
+    """Buffer messages per group and send each group as one digest."""
+
+    def __init__(
+        self,
+        send: DigestSender,
+        interval: float = DEFAULT_INTERVAL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        wheel: TimerWheel | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the digester.
+
+        Args:
+            send: Coroutine function delivering a digest
+            interval: Seconds a group collects messages before it is sent
+            max_bytes: Size (UTF-8) at which a digest is sent early
+            wheel: Timer wheel scheduling the flushes
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self._send = send
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self._clock = clock
+        self._groups: dict[DigestKey, DigestGroup] = {}
+        self._flushing: set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        """Return the number of groups collecting messages."""
+        return len(self._groups)
+
+    def add(
+        self,
+        bot_id: str,
+        group_key: str,
+        content: str,
+        msg_type: str = "markdown_v2",
+        mentioned_list: list[str] | None = None,
+        mentioned_mobile_list: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Add a message to its group's digest.
+
+        Args:
+            bot_id: Target bot (or ``@group:`` target)
+            group_key: Key grouping related messages
+            content: Message content
+            msg_type: Message type
+            mentioned_list: Users to mention in the digest
+            mentioned_mobile_list: Mobile numbers to mention in the digest
+
+        Returns:
+            dict: Response with status ``queued``, the messages pending in the group
+                and the seconds until it is sent
+
+        Raises:
+            WeComError: If the group key is too long
+
+        """
+        if len(group_key) > MAX_GROUP_KEY_LENGTH:
+            raise WeComError(
+                f"group_key is too long ({len(group_key)} > {MAX_GROUP_KEY_LENGTH} characters)",
+                ErrorCode.VALIDATION_ERROR,
+            )
+        key = (bot_id.lower(), group_key, msg_type)
+        group = self._groups.get(key)
+        if group is not None and content not in group.items and self._size(group, content) > self.max_bytes:
+            # The message does not fit: send what the group has and start a new digest
+            self._flush(key)
+            group = None
+        if group is None:
+            group = DigestGroup(bot_id, group_key, msg_type, created=self._clock())
+            self._groups[key] = group
+            self.wheel.schedule(key, self.interval, lambda: self._flush(key))
+
+        group.items[content] = group.items.get(content, 0) + 1
+        for name, values in (("mentioned_list", mentioned_list), ("mentioned_mobile_list", mentioned_mobile_list)):
+            merged = getattr(group, name)
+            merged.extend(value for value in values or [] if value not in merged)
+
+        if len(group.render().encode("utf-8")) >= self.max_bytes:
+            self._flush(key)
+            flush_in = 0.0
+        else:
+            flush_in = max(0.0, group.created + self.interval - self._clock())
+        return {
+            "status": "queued",
+            "message": f"Message added to digest '{group_key}'",
+            "group_key": group_key,
+            "pending": group.count,
+            "flush_in": round(flush_in, 1),
+        }
+
+    async def flush_all(self) -> None:
+        """Send every pending digest now and wait for all sends to finish."""
+        for key in list(self._groups):
+            self._flush(key)
+        while self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    def _size(self, group: DigestGroup, content: str) -> int:
+        group.items[content] = 1
+        try:
+            return len(group.render().encode("utf-8"))
+        finally:
+            del group.items[content]
+
+    def _flush(self, key: DigestKey) -> None:
+        group = self._groups.pop(key, None)
+        self.wheel.cancel(key)
+        if group is None:
+            return
+        # Send from an empty context so the send is not attributed to the tool call that triggered it
+        task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._deliver(group))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _deliver(self, group: DigestGroup) -> None:
+        try:
+            await self._send(
+                group.bot_id, group.render(), group.msg_type, group.mentioned_list, group.mentioned_mobile_list
+            )
+        except Exception as e:
+            logger.warning(f"Failed to send digest '{group.group_key}' of {group.count} message(s): {e}")
+
+
+async def _send_digest(
+    bot_id: str, content: str, msg_type: str, mentioned_list: list[str], mentioned_mobile_list: list[str]
+) -> Any:
+    # Import local modules
+    from wecom_bot_mcp_server.message import send_message
+
+    return await send_message(
+        content=content,
+        msg_type=msg_type,
+        mentioned_list=mentioned_list,
+        mentioned_mobile_list=mentioned_mobile_list,
+        bot_id=bot_id,
+    )
+
+
+# Global digester
+_digester: Digester | None = None
+
+
+def get_digester() -> Digester:
+    """Get the global digester, sending through ``send_message`` and configured from the environment.
+
+    Returns:
+        Digester: Global digester
+
+    """
+    global _digester
+    if _digester is None:
+        _digester = Digester(
+            _send_digest,
+            interval=get_env_float("WECOM_DIGEST_INTERVAL", DEFAULT_INTERVAL) or DEFAULT_INTERVAL,
+            max_bytes=get_env_int("WECOM_DIGEST_MAX_BYTES", DEFAULT_MAX_BYTES) or DEFAULT_MAX_BYTES,
+        )
+    return _digester
+
+
+async def flush_digests() -> None:
+    """Send all pending digests (at shutdown)."""
+    if _digester is not None and len(_digester):
+        logger.info(f"Sending {len(_digester)} pending digest(s)")
+        await _digester.flush_all()
@@ -14,18 +14,73 @@ class ErrorCode(Enum):
     API_FAILURE = auto()
     FILE_ERROR = auto()
     PATH_TRAVERSAL_ERROR = auto()
+    TIMEOUT = auto()
+    QUEUE_FULL = auto()
+    EXPIRED = auto()
 
 
 class WeComError(Exception):
     """Base exception class for WeCom Bot MCP Server."""
 
-    def __init__(self, message: str, error_code: ErrorCode = ErrorCode.UNKNOWN):
+    def __init__(self, message: str, error_code: ErrorCode = ErrorCode.UNKNOWN, errcode: int | None = None):
         """Initialize WeComError.
 
         Args:
             message: Error message
             error_code: Error code
+            errcode: The ``errcode`` returned by the WeCom API, if the error came from it
 
         """
         super().__init__(message)
         self.error_code = error_code
+        self.errcode = errcode
+
+
+class WeComTimeoutError(WeComError):
+    """A tool call that did not finish before its deadline."""
+
+    def __init__(self, message: str, stage: str, timeout: float):
+        """Initialize WeComTimeoutError.
+
+        Args:
+            message: Error message
+            stage: Stage of the call that was running when the deadline expired
+                (e.g. ``rate_limit``, ``download``, ``upload``, ``http``)
+            timeout: The call's timeout in seconds
+
+        """
+        super().__init__(message, ErrorCode.TIMEOUT)
+        self.stage = stage
+        self.timeout = timeout
+
+
+class WeComQueueFullError(WeComError):
+    """A send refused (or dropped) because the send queue is full."""
+
+    def __init__(self, message: str, scope: str):
+        """Initialize WeComQueueFullError.
+
+        Args:
+            message: Error message
+            scope: Limit that was reached (``total``, ``bot`` or ``session``)
+
+        """
+        super().__init__(message, ErrorCode.QUEUE_FULL)
+        self.scope = scope
+
+
+class WeComExpiredError(WeComError):
+    """A queued send discarded because its time-to-live passed before it was delivered."""
+
+    def __init__(self, message: str, ttl: float, age: float):
+        """Initialize WeComExpiredError.
+
+        Args:
+            message: Error message
+            ttl: Time-to-live of the send in seconds
+            age: Seconds the send had been queued when it was discarded
+
+        """
+        super().__init__(message, ErrorCode.EXPIRED)
+        self.ttl = ttl
+        self.age = age
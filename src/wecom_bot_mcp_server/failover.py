@@ -0,0 +1,127 @@
+"""Automatic failover to backup bots for WeCom Bot MCP Server.
+
+A bot configured with ``fallbacks`` (an ordered list of bot ids) keeps delivering
+when its webhook fails: the send is retried on each fallback in order until one
+succeeds. Bots marked unhealthy by the health tracker are tried last, so once a
+primary is known to be down sends go straight to the backup, and traffic returns to
+the primary after it recovers.
+
+Only delivery errors fail over (network errors, HTTP failures and WeCom errcodes
+that point at the webhook, such as rate limiting or an invalid key). Errors caused
+by the message itself would fail on every bot and are raised immediately.
+"""
+
+# Import built-in modules
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Sequence
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+from mcp.server.fastmcp import Context
+
+# Import local modules
+from wecom_bot_mcp_server.bot_config import DEFAULT_BOT_NAME
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.health import get_health_tracker
+from wecom_bot_mcp_server.metrics import set_current_bot
+
+# WeCom errcodes caused by the message content; another bot would reject it too
+CONTENT_ERRCODES = frozenset(
+    {
+        40008,  # invalid message type
+        40009,  # invalid image size
+        40011,  # invalid video size
+        40058,  # invalid parameter (e.g. content too long)
+        44004,  # empty text content
+        45002,  # content size out of limit
+    }
+)
+
+
+def is_failover_error(error: Exception) -> bool:
+    """Check whether a send error should be retried on a fallback bot.
+
+    Args:
+        error: Error raised by a send attempt
+
+    Returns:
+        bool: True for delivery errors, False for errors caused by the message
+
+    """
+    if not isinstance(error, WeComError):
+        return True
+    if error.error_code not in (ErrorCode.NETWORK_ERROR, ErrorCode.API_FAILURE, ErrorCode.UNKNOWN):
+        return False
+    return error.errcode not in CONTENT_ERRCODES
+
+
+async def send_with_failover(
+    bot_id: str | None,
+    fallbacks: Sequence[str],
+    resolve: Callable[[str | None], Awaitable[str]],
+    send: Callable[[str], Awaitable[dict[str, Any]]],
+    ctx: Context | None = None,
+) -> dict[str, Any]:
+    """Deliver a payload through a bot, failing over to its fallbacks.
+
+    Args:
+        bot_id: Requested bot identifier (None for the default bot)
+        fallbacks: Ordered fallback bot ids of the requested bot
+        resolve: Coroutine returning the webhook URL of a bot id
+        send: Coroutine delivering the payload to a webhook URL and returning the result
+        ctx: FastMCP context
+
+    Returns:
+        dict: Result of the first successful delivery. When a fallback delivered it,
+            ``delivered_by`` and ``failed_over_from`` report the bots involved.
+
+    Raises:
+        WeComError: If the error is not retryable or every bot failed
+
+    """
+    primary = (bot_id or DEFAULT_BOT_NAME).lower()
+    chain = list(dict.fromkeys([primary, *(fallback.lower() for fallback in fallbacks)]))
+    tracker = get_health_tracker()
+
+    if len(chain) > 1:
+        # Healthy bots (or bots due for a recovery probe) first, the rest as a last resort
+        available = [candidate for candidate in chain if tracker.get(candidate).available()]
+        chain = available + [candidate for candidate in chain if candidate not in available]
+
+    failed: list[str] = []
+    errors: list[str] = []
+    for candidate in chain:
+        set_current_bot(candidate)
+        try:
+            webhook_url = await resolve(bot_id if candidate == primary else candidate)
+        except WeComError as e:
+            if candidate == primary or len(chain) == 1:
+                raise
+            logger.warning(f"Skipping fallback bot '{candidate}': {e}")
+            continue
+
+        try:
+            result = await send(webhook_url)
+        except Exception as e:
+            if not is_failover_error(e):
+                raise
+            tracker.get(candidate).record(ok=False)
+            if len(chain) == 1:
+                raise
+            failed.append(candidate)
+            errors.append(f"{candidate}: {e}")
+            logger.warning(f"Delivery through bot '{candidate}' failed, trying next bot: {e}")
+            if ctx:
+                await ctx.warning(f"Delivery through bot '{candidate}' failed, trying next bot")
+            continue
+
+        tracker.get(candidate).record(ok=True)
+        if failed or candidate != primary:
+            logger.info(f"Delivered through fallback bot '{candidate}' instead of '{primary}'")
+            return {**result, "delivered_by": candidate, "failed_over_from": failed or [primary]}
+        return result
+
+    raise WeComError(f"Delivery failed on every bot: {'; '.join(errors)}", ErrorCode.API_FAILURE)
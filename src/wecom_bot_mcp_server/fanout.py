@@ -0,0 +1,143 @@
+"""Fan-out sending to bot groups for WeCom Bot MCP Server.
+
+A ``bot_id`` of the form ``@group:<tag>`` addresses every bot carrying that tag.
+The caller prepares the payload once (encoded text, validated image or file) and
+passes a coroutine that delivers it to one webhook. Members are grouped by the
+webhooks they are configured with, so that members sharing a key receive (and upload
+media for) the payload exactly once, and the distinct targets are sent to
+concurrently. For members backed by a webhook pool, the pool selects a webhook once
+per actual delivery, not while the group is resolved.
+"""
+
+# Import built-in modules
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+from mcp.server.fastmcp import Context
+
+# Import local modules
+from wecom_bot_mcp_server.bot_config import get_bot_registry
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Maximum number of webhooks sent to at the same time for one group send
+FANOUT_CONCURRENCY = max(get_env_int("WECOM_FANOUT_CONCURRENCY", 16), 1)
+
+
+@dataclass
+class FanOutTarget:
+    """Group members configured with the same webhooks.
+
+    Attributes:
+        webhook_urls: Webhook URLs of the members (one, or the members of a webhook pool)
+        bot_ids: Ids of the group members configured with these webhooks
+
+    """
+
+    webhook_urls: tuple[str, ...]
+    bot_ids: list[str]
+
+
+def resolve_group_targets(group: str) -> list[FanOutTarget]:
+    """Resolve a group to its distinct webhook targets.
+
+    Only the members' configuration is read: no webhook is selected from a pool.
+
+    Args:
+        group: Group (tag) name
+
+    Returns:
+        list[FanOutTarget]: One target per distinct set of webhooks
+
+    Raises:
+        WeComError: If the group has no members
+
+    """
+    registry = get_bot_registry()
+    by_urls: dict[tuple[str, ...], list[str]] = {}
+    for bot_id in registry.resolve_group(group):
+        urls = tuple(endpoint.url for endpoint in registry.get(bot_id).webhook_urls)
+        by_urls.setdefault(urls, []).append(bot_id)
+    return [FanOutTarget(webhook_urls=urls, bot_ids=bot_ids) for urls, bot_ids in by_urls.items()]
+
+
+async def fan_out(
+    group: str,
+    send: Callable[[str], Awaitable[dict[str, Any]]],
+    ctx: Context | None = None,
+    conversation_key: str | None = None,
+) -> dict[str, Any]:
+    """Deliver a prepared payload to every member of a group.
+
+    Args:
+        group: Group (tag) name
+        send: Coroutine function delivering the payload to one webhook URL.
+            It returns the per-webhook result dict or raises on failure.
+        ctx: FastMCP context
+        conversation_key: Optional key keeping a conversation on one webhook of pooled members
+
+    Returns:
+        dict: Aggregate result with per-bot outcomes. ``status`` is ``success``
+            when every member succeeded and ``partial`` otherwise.
+
+    Raises:
+        WeComError: If the group is empty or every member failed
+
+    """
+    targets = resolve_group_targets(group)
+    member_count = sum(len(target.bot_ids) for target in targets)
+    if ctx:
+        await ctx.info(f"Sending to group '{group}': {member_count} bot(s), {len(targets)} distinct webhook(s)")
+
+    semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def _deliver(target: FanOutTarget) -> tuple[FanOutTarget, dict[str, Any] | None, Exception | None]:
+        async with semaphore:
+            try:
+                # Selected here, so a pool advances once per delivery
+                webhook_url = get_bot_registry().get_webhook_url(target.bot_ids[0], conversation_key)
+                return target, await send(webhook_url), None
+            except Exception as e:  # one failing member must not abort the others
+                return target, None, e
+
+    outcomes = await asyncio.gather(*(_deliver(target) for target in targets))
+
+    results: list[dict[str, Any]] = []
+    failed = 0
+    for target, result, error in outcomes:
+        for bot_id in target.bot_ids:
+            if error is None:
+                results.append({"bot_id": bot_id, **(result or {})})
+            else:
+                failed += 1
+                results.append({"bot_id": bot_id, "status": "error", "message": str(error)})
+
+    succeeded = member_count - failed
+    summary = f"Sent to {succeeded}/{member_count} bot(s) in group '{group}'"
+    if succeeded == 0:
+        raise WeComError(f"{summary}: every delivery failed", ErrorCode.API_FAILURE)
+
+    if failed:
+        failures = "; ".join(f"{r['bot_id']}: {r['message']}" for r in results if r.get("status") == "error")
+        logger.warning(f"{summary}, failed: {failures}")
+    else:
+        logger.info(summary)
+    if ctx:
+        await ctx.report_progress(1.0)
+        await ctx.info(summary)
+
+    return {
+        "status": "success" if failed == 0 else "partial",
+        "message": summary,
+        "group": group,
+        "total": member_count,
+        "succeeded": succeeded,
+        "failed": failed,
+        "results": results,
+    }
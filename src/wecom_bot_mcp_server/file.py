@@ -1,65 +1,141 @@
 """File handling functionality for WeCom Bot MCP Server."""
 
 # Import built-in modules
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
+import ssl
 from typing import Annotated
 from typing import Any
+from urllib.parse import parse_qs
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
 
 # Import third-party modules
+import httpx
 from loguru import logger
 from mcp.server.fastmcp import Context
-from notify_bridge import NotifyBridge
 from pydantic import Field
 
 # Import local modules
 from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.bot_config import DEFAULT_BOT_NAME
+from wecom_bot_mcp_server.bot_config import TTL_DESCRIPTION
 from wecom_bot_mcp_server.bot_config import get_bot_registry
+from wecom_bot_mcp_server.bot_config import get_send_ttl
+from wecom_bot_mcp_server.bot_config import parse_group_target
+from wecom_bot_mcp_server.connections import shared_bridge
+from wecom_bot_mcp_server.deadline import TIMEOUT_DESCRIPTION
+from wecom_bot_mcp_server.deadline import with_deadline
 from wecom_bot_mcp_server.errors import ErrorCode
 from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComExpiredError
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
+from wecom_bot_mcp_server.idempotency import IDEMPOTENCY_KEY_DESCRIPTION
+from wecom_bot_mcp_server.idempotency import idempotent
+from wecom_bot_mcp_server.lazy import LazyImport
+from wecom_bot_mcp_server.metrics import instrument_tool
+from wecom_bot_mcp_server.metrics import record_bytes_sent
+from wecom_bot_mcp_server.metrics import stage
 from wecom_bot_mcp_server.utils import ensure_within_allowed_root
 
+# Imported on first use to keep server startup fast
+NotifyBridge = LazyImport("notify_bridge", "NotifyBridge")
 
+# WeCom upload_media limits for msg_type=file
+MIN_UPLOAD_SIZE = 5
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+UPLOAD_TIMEOUT = 60.0
+# Host notify-bridge uploads media to, whatever the webhook's host
+WECOM_API_HOST = "qyapi.weixin.qq.com"
+
+
+@instrument_tool("send_wecom_file")
+@with_deadline("send_wecom_file")
+@idempotent("send_wecom_file")
 async def send_wecom_file(
     file_path: str,
     bot_id: str | None = None,
     ctx: Context | None = None,
+    idempotency_key: str | None = None,
+    timeout_s: float | None = None,
+    ttl_s: float | None = None,
 ) -> dict[str, Any]:
     """Send file to WeCom.
 
     Args:
         file_path: Path to file
         bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
+            Use ``@group:<tag>`` to send to every bot carrying the tag.
         ctx: FastMCP context
+        idempotency_key: Optional key; retries with the same key return the original result
+        timeout_s: Optional limit for the whole send in seconds (default: WECOM_SEND_TIMEOUT)
+        ttl_s: Optional time-to-live in seconds while the send is queued (default: the bot's ttl_s)
 
     Returns:
-        dict: Response containing status and message
+        dict: Response containing status and message (aggregated per bot for group targets),
+            and the send's ``sequence`` number in the bot's delivery order
 
     Raises:
+        WeComTimeoutError: If the send does not finish within the timeout
+        WeComQueueFullError: If the send queue is full (see WECOM_QUEUE_POLICY) or the server is shutting down
+        WeComExpiredError: If the send waited out its time-to-live and was dropped
         WeComError: If file is not found or API call fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.failover import send_with_failover
+    from wecom_bot_mcp_server.fanout import fan_out
+    from wecom_bot_mcp_server.send_queue import queued_send
+
     if ctx:
         await ctx.report_progress(0.1)
         await ctx.info(f"Processing file: {file_path}" + (f" via bot '{bot_id}'" if bot_id else ""))
 
     try:
-        # Validate file and get webhook URL
-        file_path_p = await _validate_file(file_path, ctx)
-        base_url = await _get_webhook_url(bot_id, ctx)
+        async with queued_send(bot_id or DEFAULT_BOT_NAME, get_send_ttl(bot_id, ttl_s)) as ticket:
+            # Validate file and get webhook URL
+            with stage("validate"):
+                file_path_p = await _validate_file(file_path, ctx)
 
-        # Send file to WeCom
-        if ctx:
-            await ctx.report_progress(0.5)
-            await ctx.info("Sending file to WeCom...")
+            group = parse_group_target(bot_id)
+            if group is not None:
+                # Media ids are scoped to a webhook key, so the file is uploaded once per distinct webhook,
+                # all over one HTTP client
+                async with _upload_client() as upload_client:
+
+                    async def _send_one(url: str) -> dict[str, Any]:
+                        response = await _send_file_to_wecom(file_path_p, url, upload_client=upload_client)
+                        return await _process_file_response(response, file_path_p)
+
+                    result = await fan_out(group, _send_one, ctx)
+                return {**result, "sequence": ticket.seq}
 
-        response = await _send_file_to_wecom(file_path_p, base_url, ctx)
+            fallbacks = get_bot_registry().get_fallbacks(bot_id)
 
-        # Process response
-        return await _process_file_response(response, file_path_p, ctx)
+            # Send file to WeCom
+            if ctx:
+                await ctx.report_progress(0.5)
+                await ctx.info("Sending file to WeCom...")
 
+            async def _resolve(target: str | None) -> str:
+                return await _get_webhook_url(target, ctx)
+
+            async def _send_single(base_url: str) -> dict[str, Any]:
+                response = await _send_file_to_wecom(file_path_p, base_url, ctx)
+                return await _process_file_response(response, file_path_p, ctx)
+
+            result = await send_with_failover(bot_id, fallbacks, _resolve, _send_single, ctx)
+            return {**result, "sequence": ticket.seq}
+
+    except (WeComTimeoutError, WeComQueueFullError, WeComExpiredError):
+        raise
     except Exception as e:
         error_msg = f"Error sending file: {e!s}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.UNKNOWN) from e
@@ -87,23 +163,21 @@ async def _validate_file(file_path: str | Path, ctx: Context | None = None) -> P
     if isinstance(file_path, str):
         file_path = Path(file_path)
 
-    # Validate file
-    if not file_path.exists():
+    # Validate file (file system calls run in worker threads so they never block the event loop)
+    if not await asyncio.to_thread(file_path.exists):
         error_msg = f"File not found: {file_path}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.FILE_ERROR)
 
-    if not file_path.is_file():
+    if not await asyncio.to_thread(file_path.is_file):
         error_msg = f"Not a file: {file_path}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.FILE_ERROR)
 
     # Confine the path to the allowed root (prevents path traversal / CWE-22)
-    file_path = ensure_within_allowed_root(file_path)
+    file_path = await asyncio.to_thread(ensure_within_allowed_root, file_path)
 
     return file_path
 
@@ -134,38 +208,156 @@ async def _get_webhook_url(bot_id: str | None = None, ctx: Context | None = None
         raise
 
 
-async def _send_file_to_wecom(file_path: Path, base_url: str, ctx: Context | None = None) -> Any:
-    """Send file to WeCom using NotifyBridge.
+@lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    """Build the SSL context for uploads once; loading the CA bundle takes tens of milliseconds."""
+    return httpx.create_ssl_context()
+
+
+def _new_upload_client() -> httpx.AsyncClient:
+    """Create the HTTP client media is uploaded with."""
+    return httpx.AsyncClient(timeout=UPLOAD_TIMEOUT, verify=_ssl_context())
+
+
+@asynccontextmanager
+async def _upload_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Use the shared upload client, or one of its own outside of the background services.
+
+    Yields:
+        httpx.AsyncClient: Client to upload media with
+
+    """
+    # Load the CA bundle in a worker thread before a client is created with it
+    await asyncio.to_thread(_ssl_context)
+    async with shared_bridge(_new_upload_client) as client:
+        yield client
+
+
+def _get_upload_url(base_url: str) -> str:
+    """Build the upload_media endpoint for a webhook URL.
+
+    The endpoint lives next to ``/send`` on the same host, so bots pointed at a
+    different host (e.g. a local simulator) upload there as well.
+
+    Args:
+        base_url: Webhook URL (``.../cgi-bin/webhook/send?key=...``)
+
+    Returns:
+        str: Upload URL for ``type=file`` media
+
+    Raises:
+        WeComError: If the webhook URL has no ``key`` parameter
+
+    """
+    parts = urlsplit(base_url)
+    key = parse_qs(parts.query).get("key", [""])[0]
+    if not key:
+        raise WeComError(f"Webhook URL has no key parameter: {base_url}", ErrorCode.VALIDATION_ERROR)
+    path = parts.path.rsplit("/", 1)[0] + "/upload_media"
+    return urlunsplit((parts.scheme, parts.netloc, path, urlencode({"key": key, "type": "file"}), ""))
+
+
+async def _upload_media(file_path: Path, base_url: str, client: httpx.AsyncClient) -> str:
+    """Upload a file to the webhook's upload_media endpoint.
+
+    Args:
+        file_path: Path to file
+        base_url: Webhook URL the media id will be used with
+        client: HTTP client to upload with
+
+    Returns:
+        str: Media id valid for this webhook key
+
+    Raises:
+        WeComError: If the file size is out of range or the upload fails
+
+    """
+    file_size = (await asyncio.to_thread(file_path.stat)).st_size
+    if not MIN_UPLOAD_SIZE <= file_size <= MAX_UPLOAD_SIZE:
+        raise WeComError(
+            f"File size must be between {MIN_UPLOAD_SIZE} bytes and 20MB, got {file_size} bytes",
+            ErrorCode.FILE_ERROR,
+        )
+
+    upload_url = _get_upload_url(base_url)
+    content = await asyncio.to_thread(file_path.read_bytes)
+    try:
+        files = {"media": (file_path.name, content, "application/octet-stream")}
+        response = await client.post(upload_url, files=files)
+        data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise WeComError(f"Failed to upload file: {e}", ErrorCode.NETWORK_ERROR) from e
+
+    if not isinstance(data, dict):
+        raise WeComError(f"Failed to upload file: unexpected response {data!r}", ErrorCode.API_FAILURE)
+    media_id = data.get("media_id")
+    if data.get("errcode", -1) != 0 or not isinstance(media_id, str) or not media_id:
+        raise WeComError(
+            f"Failed to upload file: {data.get('errmsg', 'invalid media_id')} (errcode {data.get('errcode')})",
+            ErrorCode.API_FAILURE,
+            errcode=data.get("errcode"),
+        )
+    return media_id
+
+
+async def _send_file_to_wecom(
+    file_path: Path, base_url: str, ctx: Context | None = None, upload_client: httpx.AsyncClient | None = None
+) -> Any:
+    """Send a file to WeCom using NotifyBridge.
+
+    NotifyBridge uploads the file itself (by ``media_path``) for webhooks on
+    WeCom's own host. Group fan-out (given an ``upload_client``) and webhooks on
+    another host (e.g. a local simulator) upload it here instead, asynchronously
+    and to the webhook's own host, and send the resulting media id.
 
     Args:
         file_path: Path to file
         base_url: Webhook URL
         ctx: FastMCP context
+        upload_client: Client to upload the file with here rather than through NotifyBridge
 
     Returns:
         Any: Response from NotifyBridge
 
     """
-    logger.info(f"Processing file: {file_path}")
+    # Import local modules
+    from wecom_bot_mcp_server.ratelimit import rate_limited
+
+    logger.debug(f"Processing file: {file_path}")
 
     if ctx:
         await ctx.info(f"Sending file: {file_path}")
         await ctx.report_progress(0.7)
 
-    # Use NotifyBridge to send file directly via the wecom channel
-    # NOTE:
-    #   The notify-bridge WeCom notifier expects the file path in the
-    #   ``media_path`` field when sending a ``msg_type="file"`` message.
-    #   Using any other field name (like ``file_path``) will cause
-    #   notify-bridge to raise "Either media_id or media_path is required
-    #   for file message" and the upload will fail.
-    async with NotifyBridge() as nb:
-        return await nb.send_async(
-            "wecom",
-            webhook_url=base_url,
-            msg_type="file",
-            media_path=str(file_path.absolute()),
-        )
+    if upload_client is not None:
+        with stage("upload"):
+            media_id = await _upload_media(file_path, base_url, upload_client)
+        media = {"media_id": media_id}
+    elif urlsplit(base_url).hostname != WECOM_API_HOST:
+        with stage("upload"):
+            async with _upload_client() as client:
+                media_id = await _upload_media(file_path, base_url, client)
+        media = {"media_id": media_id}
+    else:
+        # NOTE:
+        #   The notify-bridge WeCom notifier expects the file path in the
+        #   ``media_path`` field when sending a ``msg_type="file"`` message.
+        #   Using any other field name (like ``file_path``) will cause
+        #   notify-bridge to raise "Either media_id or media_path is required
+        #   for file message" and the upload will fail.
+        media = {"media_path": str(file_path.absolute())}
+
+    async with rate_limited(base_url), shared_bridge(NotifyBridge) as nb:
+        with stage("http"):
+            response = await nb.send_async(
+                "wecom",
+                webhook_url=base_url,
+                msg_type="file",
+                **media,
+            )
+        record_bytes_sent((await asyncio.to_thread(file_path.stat)).st_size)
+
+        return response
 
 
 async def _process_file_response(response: Any, file_path: Path, ctx: Context | None = None) -> dict[str, Any]:
@@ -183,10 +375,12 @@ async def _process_file_response(response: Any, file_path: Path, ctx: Context |
         WeComError: If API call fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.log_config import log_success
+
     # Check response
     if not getattr(response, "success", False):
         error_msg = f"Failed to send file: {response}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.API_FAILURE)
@@ -194,14 +388,13 @@ async def _process_file_response(response: Any, file_path: Path, ctx: Context |
     # Check WeChat API response
     data = getattr(response, "data", {})
     if data.get("errcode", -1) != 0:
-        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')}"
-        logger.error(error_msg)
+        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')} (errcode {data.get('errcode')})"
         if ctx:
             await ctx.error(error_msg)
-        raise WeComError(error_msg, ErrorCode.API_FAILURE)
+        raise WeComError(error_msg, ErrorCode.API_FAILURE, errcode=data.get("errcode"))
 
     success_msg = "File sent successfully"
-    logger.info(success_msg)
+    log_success(success_msg)
     if ctx:
         await ctx.report_progress(1.0)
         await ctx.info(success_msg)
@@ -233,16 +426,23 @@ async def send_wecom_file_mcp(
         Field(
             description=(
                 "Bot identifier for multi-bot setups. If not specified, uses the default bot. "
-                "Use `list_wecom_bots` tool to see available bots."
+                "Use `list_wecom_bots` tool to see available bots. "
+                "Use '@group:<tag>' to send to every bot carrying the tag."
             )
         ),
     ] = None,
+    idempotency_key: Annotated[str | None, Field(description=IDEMPOTENCY_KEY_DESCRIPTION)] = None,
+    timeout_s: Annotated[float | None, Field(description=TIMEOUT_DESCRIPTION, gt=0)] = None,
+    ttl_s: Annotated[float | None, Field(description=TTL_DESCRIPTION, gt=0)] = None,
 ) -> dict[str, Any]:
     """Send file to WeCom.
 
     Args:
         file_path: Path to the file to send
         bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
+        idempotency_key: Optional key; retries with the same key return the original result.
+        timeout_s: Optional limit for the whole send in seconds.
+        ttl_s: Optional time-to-live in seconds while the send is queued.
 
     Returns:
         dict: Response with file information and status
@@ -251,4 +451,6 @@ async def send_wecom_file_mcp(
         WeComError: If file sending fails
 
     """
-    return await send_wecom_file(file_path=file_path, bot_id=bot_id, ctx=None)
+    return await send_wecom_file(
+        file_path=file_path, bot_id=bot_id, ctx=None, idempotency_key=idempotency_key, timeout_s=timeout_s, ttl_s=ttl_s
+    )
@@ -0,0 +1,190 @@
+"""Bot health tracking for WeCom Bot MCP Server.
+
+Each bot keeps a sliding time window of send outcomes. A bot is marked unhealthy
+when its error rate over the window reaches ``WECOM_HEALTH_ERROR_RATE`` (with at
+least ``MIN_SAMPLES`` sends), and healthy again only once a send succeeds while the
+error rate is at most a fifth of that threshold. The gap between the two thresholds
+keeps a bot that fails intermittently from flapping between states.
+
+While a bot is unhealthy, failover skips it except for one probe send every
+``WECOM_HEALTH_PROBE_INTERVAL`` seconds, so recovery is detected without sending
+all traffic to a broken webhook.
+
+Environment Variables:
+    WECOM_HEALTH_WINDOW: Length of the outcome window in seconds (default: 60)
+    WECOM_HEALTH_ERROR_RATE: Error rate that marks a bot unhealthy (default: 0.5)
+    WECOM_HEALTH_PROBE_INTERVAL: Seconds between probes of an unhealthy bot (default: 15)
+"""
+
+# Import built-in modules
+from collections import deque
+from collections.abc import Callable
+import time
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.utils import get_env_float
+
+# Constants
+DEFAULT_HEALTH_WINDOW = 60.0
+DEFAULT_ERROR_RATE = 0.5
+DEFAULT_PROBE_INTERVAL = 15.0
+MIN_SAMPLES = 3
+# A bot recovers once its error rate falls to this fraction of the trip threshold
+RECOVERY_FACTOR = 0.2
+
+
+class BotHealth:
+    """Sliding-window health state of a single bot."""
+
+    def __init__(
+        self,
+        bot_id: str,
+        window: float = DEFAULT_HEALTH_WINDOW,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the health state.
+
+        Args:
+            bot_id: Bot identifier (for log messages)
+            window: Length of the outcome window in seconds
+            error_rate: Error rate that marks the bot unhealthy
+            probe_interval: Seconds between probe sends while unhealthy
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.bot_id = bot_id
+        self.window = window
+        self.trip_rate = error_rate
+        self.recover_rate = error_rate * RECOVERY_FACTOR
+        self.probe_interval = probe_interval
+        self._clock = clock
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._failures = 0
+        self.healthy = True
+        self._last_probe = float("-inf")
+
+    def _prune(self) -> None:
+        """Drop outcomes that fell out of the window."""
+        cutoff = self._clock() - self.window
+        while self._outcomes and self._outcomes[0][0] <= cutoff:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    @property
+    def error_rate(self) -> float:
+        """Error rate over the current window (0.0 without samples)."""
+        self._prune()
+        return self._failures / len(self._outcomes) if self._outcomes else 0.0
+
+    def record(self, ok: bool) -> None:
+        """Record the outcome of a send and update the health state.
+
+        Args:
+            ok: Whether the send succeeded
+
+        """
+        self._outcomes.append((self._clock(), ok))
+        if not ok:
+            self._failures += 1
+        rate = self.error_rate
+        if self.healthy and not ok and len(self._outcomes) >= MIN_SAMPLES and rate >= self.trip_rate:
+            self.healthy = False
+            self._last_probe = self._clock()
+            logger.warning(f"Bot '{self.bot_id}' marked unhealthy (error rate {rate:.0%} over {self.window:.0f}s)")
+        elif not self.healthy and ok and rate <= self.recover_rate:
+            self.healthy = True
+            logger.info(f"Bot '{self.bot_id}' recovered (error rate {rate:.0%} over {self.window:.0f}s)")
+
+    def available(self) -> bool:
+        """Check whether a send should be attempted through this bot.
+
+        For an unhealthy bot this claims the next probe slot, so concurrent sends
+        do not all probe at once.
+
+        Returns:
+            bool: True if the bot is healthy or a probe is due
+
+        """
+        if self.healthy:
+            return True
+        now = self._clock()
+        if now - self._last_probe >= self.probe_interval:
+            self._last_probe = now
+            return True
+        return False
+
+    def snapshot(self) -> dict[str, Any]:
+        """Describe the current health state.
+
+        Returns:
+            dict: Health state with error rate and sample count
+
+        """
+        return {"healthy": self.healthy, "error_rate": round(self.error_rate, 3), "samples": len(self._outcomes)}
+
+
+class HealthTracker:
+    """Health states of all bots, created on first use."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the tracker from the environment.
+
+        Args:
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.window = get_env_float("WECOM_HEALTH_WINDOW", DEFAULT_HEALTH_WINDOW)
+        self.error_rate = get_env_float("WECOM_HEALTH_ERROR_RATE", DEFAULT_ERROR_RATE)
+        self.probe_interval = get_env_float("WECOM_HEALTH_PROBE_INTERVAL", DEFAULT_PROBE_INTERVAL)
+        self._clock = clock
+        self._bots: dict[str, BotHealth] = {}
+
+    def get(self, bot_id: str) -> BotHealth:
+        """Get the health state of a bot.
+
+        Args:
+            bot_id: Normalized bot identifier
+
+        Returns:
+            BotHealth: The bot's health state
+
+        """
+        health = self._bots.get(bot_id)
+        if health is None:
+            health = self._bots[bot_id] = BotHealth(
+                bot_id, self.window, self.error_rate, self.probe_interval, self._clock
+            )
+        return health
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Describe the health of every bot that has sent.
+
+        Returns:
+            dict: Mapping of bot id to health state
+
+        """
+        return {bot_id: health.snapshot() for bot_id, health in sorted(self._bots.items())}
+
+
+# Global health tracker instance
+_health_tracker: HealthTracker | None = None
+
+
+def get_health_tracker() -> HealthTracker:
+    """Get the global health tracker instance.
+
+    Returns:
+        HealthTracker: The global health tracker
+
+    """
+    global _health_tracker
+    if _health_tracker is None:
+        _health_tracker = HealthTracker()
+    return _health_tracker
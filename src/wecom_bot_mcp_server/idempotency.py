@@ -0,0 +1,336 @@
+"""Idempotency keys for the send tools of WeCom Bot MCP Server.
+
+An MCP client that times out and retries a send would otherwise deliver the
+message twice. Send tools accept an optional ``idempotency_key``: the first call
+with a key sends and its result is stored, and repeats of the call within the TTL
+return the stored result (marked ``idempotent_replay``) without sending again. A
+repeat that arrives while the first call is still in flight waits for it.
+
+Keys are scoped per tool. Reusing a key with different arguments is rejected.
+Only successful results are stored, so a call that failed can be retried with
+the same key.
+
+Environment Variables:
+    WECOM_IDEMPOTENCY_TTL: Seconds a result is kept (default: 86400)
+    WECOM_IDEMPOTENCY_MAX_KEYS: Maximum number of stored results; the oldest are
+        evicted first (default: 10000)
+    WECOM_IDEMPOTENCY_DB: Path of a SQLite database keeping results across restarts.
+        If unset, results are kept in memory.
+"""
+
+# Import built-in modules
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+import functools
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.metrics import IDEMPOTENT_REPLAYS
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_KEYS = 10000
+MAX_KEY_LENGTH = 256
+# Description of the idempotency_key parameter of the send tools
+IDEMPOTENCY_KEY_DESCRIPTION = (
+    "Optional unique key for this send (e.g. a UUID, or an alert id plus its state). If the call is "
+    "retried with the same key, the original result is returned and nothing is sent again."
+)
+
+# Stored entry: fingerprint of the call arguments and the call's result
+Entry = tuple[str, dict[str, Any]]
+
+
+class IdempotencyStore:
+    """Bounded in-memory store of tool results that expire after a TTL."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            ttl: Seconds a result is kept
+            max_keys: Maximum number of stored results
+            clock: Time source (injectable for tests)
+
+        """
+        self.ttl = ttl
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        # key -> (expiry, fingerprint, result); insertion order is expiry order
+        self._entries: OrderedDict[str, tuple[float, str, dict[str, Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of stored results, including expired ones not yet evicted."""
+        return len(self._entries)
+
+    async def get(self, key: str) -> Entry | None:
+        """Look up the result stored for a key.
+
+        Args:
+            key: Scoped idempotency key
+
+        Returns:
+            tuple | None: Fingerprint and result, or None if there is no live entry
+
+        """
+        self._evict_expired()
+        entry = self._entries.get(key)
+        return (entry[1], entry[2]) if entry is not None else None
+
+    async def put(self, key: str, fingerprint: str, result: dict[str, Any]) -> None:
+        """Store the result of a call.
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Fingerprint of the call arguments
+            result: Result of the call
+
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (self._clock() + self.ttl, fingerprint, result)
+        self._evict_expired()
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+    def _evict_expired(self) -> None:
+        now = self._clock()
+        while self._entries:
+            key, (expiry, _, _) = next(iter(self._entries.items()))
+            if expiry > now:
+                break
+            del self._entries[key]
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """Idempotency store kept in a SQLite database, so results survive restarts.
+
+    Database calls run in a worker thread to keep them off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl: float = DEFAULT_TTL,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Open (or create) the database.
+
+        Args:
+            path: Database file
+            ttl: Seconds a result is kept
+            max_keys: Maximum number of stored results
+            clock: Wall-clock time source, since expiry times are persisted
+
+        """
+        # Import built-in modules
+        import sqlite3
+
+        super().__init__(ttl, max_keys, clock)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency "
+            "(key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, result TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idempotency_expires ON idempotency (expires)")
+
+    def __len__(self) -> int:
+        """Return the number of stored results, including expired ones not yet evicted."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM idempotency").fetchone()[0]
+
+    async def get(self, key: str) -> Entry | None:
+        """Look up the result stored for a key.
+
+        Args:
+            key: Scoped idempotency key
+
+        Returns:
+            tuple | None: Fingerprint and result, or None if there is no live entry
+
+        """
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, fingerprint: str, result: dict[str, Any]) -> None:
+        """Store the result of a call.
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Fingerprint of the call arguments
+            result: Result of the call
+
+        """
+        await asyncio.to_thread(self._put, key, fingerprint, json.dumps(result, default=str))
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def _get(self, key: str) -> Entry | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, result FROM idempotency WHERE key = ? AND expires > ?", (key, self._clock())
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row is not None else None
+
+    def _put(self, key: str, fingerprint: str, result: str) -> None:
+        now = self._clock()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO idempotency (key, fingerprint, result, expires) VALUES (?, ?, ?, ?)",
+                (key, fingerprint, result, now + self.ttl),
+            )
+            self._db.execute("DELETE FROM idempotency WHERE expires <= ?", (now,))
+            self._db.execute(
+                "DELETE FROM idempotency WHERE key IN "
+                "(SELECT key FROM idempotency ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                (self.max_keys,),
+            )
+
+
+# Global store instance
+_idempotency_store: IdempotencyStore | None = None
+# Calls in flight by scoped key: fingerprint and a future resolved with the call's result
+_pending: dict[str, tuple[str, asyncio.Future[dict[str, Any]]]] = {}
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get the global idempotency store, created from the environment on first use.
+
+    Returns:
+        IdempotencyStore: Global store
+
+    """
+    global _idempotency_store
+    if _idempotency_store is None:
+        ttl = get_env_int("WECOM_IDEMPOTENCY_TTL", DEFAULT_TTL)
+        max_keys = get_env_int("WECOM_IDEMPOTENCY_MAX_KEYS", DEFAULT_MAX_KEYS)
+        path = os.getenv("WECOM_IDEMPOTENCY_DB", "").strip()
+        if path:
+            logger.info(f"Keeping idempotency keys in {path}")
+            _idempotency_store = SQLiteIdempotencyStore(path, ttl, max_keys)
+        else:
+            _idempotency_store = IdempotencyStore(ttl, max_keys)
+    return _idempotency_store
+
+
+def _fingerprint(arguments: dict[str, Any]) -> str:
+    payload = json.dumps(arguments, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _replay(tool: str, key: str, fingerprint: str, entry: Entry) -> dict[str, Any]:
+    stored_fingerprint, result = entry
+    if stored_fingerprint != fingerprint:
+        raise WeComError(
+            f"Idempotency key '{key}' was already used for a {tool} call with different arguments",
+            ErrorCode.VALIDATION_ERROR,
+        )
+    IDEMPOTENT_REPLAYS.inc(tool=tool)
+    logger.info(f"Replaying the result of {tool} for idempotency key '{key}'")
+    return {**result, "idempotent_replay": True}
+
+
+async def _call_once(
+    tool: str, key: str, fingerprint: str, call: Callable[[], Awaitable[dict[str, Any]]]
+) -> dict[str, Any]:
+    scoped_key = f"{tool}:{key}"
+    pending = _pending.get(scoped_key)
+    if pending is not None:
+        return _replay(tool, key, fingerprint, (pending[0], await asyncio.shield(pending[1])))
+
+    store = get_idempotency_store()
+    entry = await store.get(scoped_key)
+    if entry is not None:
+        return _replay(tool, key, fingerprint, entry)
+    # The lookup may have yielded to a call with the same key
+    pending = _pending.get(scoped_key)
+    if pending is not None:
+        return _replay(tool, key, fingerprint, (pending[0], await asyncio.shield(pending[1])))
+
+    future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+    _pending[scoped_key] = (fingerprint, future)
+    try:
+        result = await call()
+        if isinstance(result, dict):
+            await store.put(scoped_key, fingerprint, result)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        # Calls waiting on this one fail the same way; nothing is stored, so a later retry sends again
+        future.set_exception(e)
+        future.exception()  # mark retrieved, in case nobody was waiting
+        raise
+    finally:
+        if not future.done():  # cancelled
+            future.cancel()
+        del _pending[scoped_key]
+
+
+def idempotent(tool: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Decorate a send tool to honour its ``idempotency_key`` argument.
+
+    Calls with the same key and tool within the TTL run once; repeats get the
+    stored result. Calls without a key are passed through unchanged.
+
+    Args:
+        tool: Tool name, scoping the keys
+
+    Returns:
+        Callable: Decorator for an async function taking an ``idempotency_key`` argument
+
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            key = arguments.pop("idempotency_key", None)
+            if not key:
+                return await func(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                raise WeComError(
+                    f"Idempotency key is too long ({len(key)} > {MAX_KEY_LENGTH} characters)",
+                    ErrorCode.VALIDATION_ERROR,
+                )
+            # Neither the context nor the time allowed for a call (or its delivery) makes it a different call
+            arguments.pop("ctx", None)
+            arguments.pop("timeout_s", None)
+            arguments.pop("ttl_s", None)
+            return await _call_once(tool, key, _fingerprint(arguments), lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
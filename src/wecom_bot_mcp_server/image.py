@@ -1,6 +1,7 @@
 """Image handling functionality for WeCom Bot MCP Server."""
 
 # Import built-in modules
+import asyncio
 import os
 from pathlib import Path
 import tempfile
@@ -8,20 +9,38 @@ from typing import Annotated
 from typing import Any
 
 # Import third-party modules
-from PIL import Image
-import aiohttp
 from loguru import logger
 from mcp.server.fastmcp import Context
-from notify_bridge import NotifyBridge
 from pydantic import Field
 
 # Import local modules
 from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.bot_config import DEFAULT_BOT_NAME
+from wecom_bot_mcp_server.bot_config import TTL_DESCRIPTION
 from wecom_bot_mcp_server.bot_config import get_bot_registry
+from wecom_bot_mcp_server.bot_config import get_send_ttl
+from wecom_bot_mcp_server.bot_config import parse_group_target
+from wecom_bot_mcp_server.connections import shared_bridge
+from wecom_bot_mcp_server.deadline import TIMEOUT_DESCRIPTION
+from wecom_bot_mcp_server.deadline import with_deadline
 from wecom_bot_mcp_server.errors import ErrorCode
 from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComExpiredError
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
+from wecom_bot_mcp_server.idempotency import IDEMPOTENCY_KEY_DESCRIPTION
+from wecom_bot_mcp_server.idempotency import idempotent
+from wecom_bot_mcp_server.lazy import LazyImport
+from wecom_bot_mcp_server.metrics import instrument_tool
+from wecom_bot_mcp_server.metrics import record_bytes_sent
+from wecom_bot_mcp_server.metrics import stage
 from wecom_bot_mcp_server.utils import ensure_within_allowed_root
 
+# Imported on first use to keep server startup fast
+Image = LazyImport("PIL.Image")
+aiohttp = LazyImport("aiohttp")
+NotifyBridge = LazyImport("notify_bridge", "NotifyBridge")
+
 
 async def download_image(url: str, ctx: Context | None = None) -> Path:
     """Download image from URL with retry mechanism.
@@ -68,64 +87,97 @@ async def download_image(url: str, ctx: Context | None = None) -> Path:
                 ext = content_type.split("/")[1]
                 final_file = temp_dir / f"image_{hash(url)}.{ext}"
 
-                # Write the content to the file
-                with open(final_file, "wb") as f:
-                    content = await response.read()
-                    f.write(content)
+                # Write the content to the file, off the event loop
+                content = await response.read()
+                await asyncio.to_thread(final_file.write_bytes, content)
 
                 return final_file
 
     except aiohttp.ClientError as e:
         error_msg = f"Failed to download image: {e!s}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.NETWORK_ERROR) from e
 
 
+@instrument_tool("send_wecom_image")
+@with_deadline("send_wecom_image")
+@idempotent("send_wecom_image")
 async def send_wecom_image(
     image_path: str,
     bot_id: str | None = None,
     ctx: Context | None = None,
+    idempotency_key: str | None = None,
+    timeout_s: float | None = None,
+    ttl_s: float | None = None,
 ) -> dict[str, Any]:
     """Send image to WeCom.
 
     Args:
         image_path: Path to image file or URL
         bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
+            Use ``@group:<tag>`` to send to every bot carrying the tag.
         ctx: FastMCP context
+        idempotency_key: Optional key; retries with the same key return the original result
+        timeout_s: Optional limit for the whole send in seconds (default: WECOM_SEND_TIMEOUT)
+        ttl_s: Optional time-to-live in seconds while the send is queued (default: the bot's ttl_s)
 
     Returns:
-        dict: Response containing status and message
+        dict: Response containing status and message (aggregated per bot for group targets),
+            and the send's ``sequence`` number in the bot's delivery order
 
     Raises:
+        WeComTimeoutError: If the send does not finish within the timeout
+        WeComQueueFullError: If the send queue is full (see WECOM_QUEUE_POLICY) or the server is shutting down
+        WeComExpiredError: If the send waited out its time-to-live and was dropped
         WeComError: If image is not found or API call fails.
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.failover import send_with_failover
+    from wecom_bot_mcp_server.fanout import fan_out
+    from wecom_bot_mcp_server.send_queue import queued_send
+
     if ctx:
         await ctx.report_progress(0.1)
         await ctx.info(f"Processing image: {image_path}" + (f" via bot '{bot_id}'" if bot_id else ""))
 
     try:
-        # Process and validate image
-        image_path_p = await _process_image_path(image_path, ctx)
+        async with queued_send(bot_id or DEFAULT_BOT_NAME, get_send_ttl(bot_id, ttl_s)) as ticket:
+            # Process and validate image
+            image_path_p = await _process_image_path(image_path, ctx)
 
-        # Get webhook URL for the specified bot
-        base_url = await _get_webhook_url(bot_id, ctx)
+            group = parse_group_target(bot_id)
+            if group is not None:
+                # The image is downloaded and validated once, then sent to each distinct webhook
+                async def _send_one(base_url: str) -> dict[str, Any]:
+                    response = await _send_image_to_wecom(image_path_p, base_url)
+                    return await _process_image_response(response, image_path_p)
 
-        # Send image to WeCom
-        if ctx:
-            await ctx.report_progress(0.5)
-            await ctx.info("Sending image via notify-bridge...")
+                result = await fan_out(group, _send_one, ctx)
+                return {**result, "sequence": ticket.seq}
+
+            fallbacks = get_bot_registry().get_fallbacks(bot_id)
+
+            # Send image to WeCom
+            if ctx:
+                await ctx.report_progress(0.5)
+                await ctx.info("Sending image via notify-bridge...")
+
+            async def _resolve(target: str | None) -> str:
+                return await _get_webhook_url(target, ctx)
 
-        response = await _send_image_to_wecom(image_path_p, base_url)
+            async def _send_single(base_url: str) -> dict[str, Any]:
+                response = await _send_image_to_wecom(image_path_p, base_url)
+                return await _process_image_response(response, image_path_p, ctx)
 
-        # Process response
-        return await _process_image_response(response, image_path_p, ctx)
+            result = await send_with_failover(bot_id, fallbacks, _resolve, _send_single, ctx)
+            return {**result, "sequence": ticket.seq}
 
+    except (WeComTimeoutError, WeComQueueFullError, WeComExpiredError):
+        raise
     except Exception as e:
         error_msg = f"Error sending image: {e!s}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.NETWORK_ERROR) from e
@@ -148,7 +200,8 @@ async def _process_image_path(image_path: str | Path, ctx: Context | None = None
     # Handle URL
     if isinstance(image_path, str) and image_path.startswith(("http://", "https://")):
         try:
-            image_path = await download_image(image_path, ctx)
+            with stage("download"):
+                image_path = await download_image(image_path, ctx)
         except WeComError as e:
             if ctx:
                 await ctx.error(str(e))
@@ -158,23 +211,22 @@ async def _process_image_path(image_path: str | Path, ctx: Context | None = None
     if isinstance(image_path, str):
         image_path = Path(image_path)
 
-    # Check if file exists
-    if not image_path.exists():
+    # File system calls and Pillow run in worker threads so they never block the event loop
+    if not await asyncio.to_thread(image_path.exists):
         error_msg = f"Image file not found: {image_path}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.FILE_ERROR)
 
     # Confine the path to the allowed root (prevents path traversal / CWE-22)
-    image_path = ensure_within_allowed_root(image_path)
+    image_path = await asyncio.to_thread(ensure_within_allowed_root, image_path)
 
     # Validate image format
     try:
-        Image.open(image_path)
+        with stage("validate"):
+            await asyncio.to_thread(_open_image, image_path)
     except Exception as e:
         error_msg = f"Invalid image format: {e!s}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.FILE_ERROR) from e
@@ -182,6 +234,12 @@ async def _process_image_path(image_path: str | Path, ctx: Context | None = None
     return image_path
 
 
+def _open_image(image_path: Path) -> None:
+    """Check that Pillow recognizes a file as an image (blocking)."""
+    with Image.open(image_path):
+        pass
+
+
 async def _get_webhook_url(bot_id: str | None = None, ctx: Context | None = None) -> str:
     """Get webhook URL for a specific bot.
 
@@ -215,16 +273,21 @@ async def _send_image_to_wecom(image_path: Path, base_url: str) -> Any:
         Any: Response from NotifyBridge
 
     """
-    logger.info(f"Processing image: {image_path}")
+    # Import local modules
+    from wecom_bot_mcp_server.ratelimit import rate_limited
+
+    logger.debug(f"Processing image: {image_path}")
 
     # Use NotifyBridge to send image directly via the wecom channel
-    async with NotifyBridge() as nb:
-        response = await nb.send_async(
-            "wecom",
-            webhook_url=base_url,
-            msg_type="image",
-            image_path=str(image_path.absolute()),
-        )
+    async with rate_limited(base_url), shared_bridge(NotifyBridge) as nb:
+        with stage("http"):
+            response = await nb.send_async(
+                "wecom",
+                webhook_url=base_url,
+                msg_type="image",
+                image_path=str(image_path.absolute()),
+            )
+        record_bytes_sent((await asyncio.to_thread(image_path.stat)).st_size)
 
         return response
 
@@ -244,10 +307,12 @@ async def _process_image_response(response: Any, image_path: Path, ctx: Context
         WeComError: If API call fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.log_config import log_success
+
     # Check response
     if not getattr(response, "success", False):
         error_msg = f"Failed to send image: {response}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.API_FAILURE)
@@ -255,14 +320,13 @@ async def _process_image_response(response: Any, image_path: Path, ctx: Context
     # Check WeChat API response
     data = getattr(response, "data", {})
     if isinstance(data, dict) and data.get("errcode", -1) != 0:
-        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')}"
-        logger.error(error_msg)
+        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')} (errcode {data.get('errcode')})"
         if ctx:
             await ctx.error(error_msg)
-        raise WeComError(error_msg, ErrorCode.API_FAILURE)
+        raise WeComError(error_msg, ErrorCode.API_FAILURE, errcode=data.get("errcode"))
 
     success_msg = "Image sent successfully"
-    logger.info(success_msg)
+    log_success(success_msg)
     if ctx:
         await ctx.report_progress(1.0)
         await ctx.info(success_msg)
@@ -292,16 +356,23 @@ async def send_wecom_image_mcp(
         Field(
             description=(
                 "Bot identifier for multi-bot setups. If not specified, uses the default bot. "
-                "Use `list_wecom_bots` tool to see available bots."
+                "Use `list_wecom_bots` tool to see available bots. "
+                "Use '@group:<tag>' to send to every bot carrying the tag."
             )
         ),
     ] = None,
+    idempotency_key: Annotated[str | None, Field(description=IDEMPOTENCY_KEY_DESCRIPTION)] = None,
+    timeout_s: Annotated[float | None, Field(description=TIMEOUT_DESCRIPTION, gt=0)] = None,
+    ttl_s: Annotated[float | None, Field(description=TTL_DESCRIPTION, gt=0)] = None,
 ) -> dict[str, Any]:
     """Send image to WeCom.
 
     Args:
         image_path: Path to the image file to send
         bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
+        idempotency_key: Optional key; retries with the same key return the original result.
+        timeout_s: Optional limit for the whole send in seconds.
+        ttl_s: Optional time-to-live in seconds while the send is queued.
 
     Returns:
         dict: Response with image information and status
@@ -310,4 +381,11 @@ async def send_wecom_image_mcp(
         WeComError: If image sending fails
 
     """
-    return await send_wecom_image(image_path=image_path, bot_id=bot_id, ctx=None)
+    return await send_wecom_image(
+        image_path=image_path,
+        bot_id=bot_id,
+        ctx=None,
+        idempotency_key=idempotency_key,
+        timeout_s=timeout_s,
+        ttl_s=ttl_s,
+    )
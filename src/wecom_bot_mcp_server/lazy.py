@@ -0,0 +1,75 @@
+"""Deferred imports of heavy dependencies for WeCom Bot MCP Server.
+
+Pillow, aiohttp, notify-bridge and ftfy are only needed once a tool actually
+sends something, but importing them up front delays the server's answer to
+``initialize`` on every stdio launch. Modules bind these dependencies to
+``LazyImport`` proxies instead:
+
+    aiohttp = LazyImport("aiohttp")
+    NotifyBridge = LazyImport("notify_bridge", "NotifyBridge")
+
+The proxy imports its target on first attribute access or call and forwards to
+it from then on. Because the proxy stays bound to the module attribute,
+``unittest.mock.patch("wecom_bot_mcp_server.message.NotifyBridge")`` and
+``patch("wecom_bot_mcp_server.image.aiohttp.ClientSession")`` keep working.
+"""
+
+# Import built-in modules
+import importlib
+from typing import Any
+
+
+class LazyImport:
+    """Proxy for a module, or an attribute of a module, imported on first use."""
+
+    __slots__ = ("_attribute", "_module_name", "_target")
+
+    def __init__(self, module_name: str, attribute: str | None = None) -> None:
+        """Initialize the proxy without importing anything.
+
+        Args:
+            module_name: Dotted name of the module to import
+            attribute: Optional attribute of the module to proxy instead of the module itself
+
+        """
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_attribute", attribute)
+        object.__setattr__(self, "_target", None)
+
+    def _load(self) -> Any:
+        """Import the target on first use.
+
+        Returns:
+            Any: The imported module or attribute
+
+        """
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            target = importlib.import_module(object.__getattribute__(self, "_module_name"))
+            attribute = object.__getattribute__(self, "_attribute")
+            if attribute is not None:
+                target = getattr(target, attribute)
+            object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward attribute access (including ``__dict__``, used by ``mock.patch``) to the target."""
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Forward attribute assignment to the target."""
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        """Forward attribute deletion to the target."""
+        delattr(self._load(), name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Call the target, e.g. to instantiate a lazily imported class."""
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        """Describe the proxy without triggering the import."""
+        name = object.__getattribute__(self, "_module_name")
+        attribute = object.__getattribute__(self, "_attribute")
+        return f"<LazyImport {name}{'.' + attribute if attribute else ''}>"
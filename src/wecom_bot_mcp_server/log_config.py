@@ -1,10 +1,13 @@
 """Logging configuration for WeCom Bot MCP Server."""
 
 # Import built-in modules
+import hashlib
+import json
 import os
 from pathlib import Path
 import sys
 from typing import Any
+from typing import TYPE_CHECKING
 
 # Import third-party modules
 from loguru import logger
@@ -12,6 +15,15 @@ from platformdirs import user_log_dir
 
 # Import local modules
 from wecom_bot_mcp_server.app import APP_NAME
+from wecom_bot_mcp_server.log_sink import BatchingSink
+from wecom_bot_mcp_server.log_sink import RotatingFileWriter
+from wecom_bot_mcp_server.log_sink import parse_size
+from wecom_bot_mcp_server.metrics import add_call_fields
+from wecom_bot_mcp_server.utils import get_env_bool
+
+if TYPE_CHECKING:
+    # Import third-party modules
+    from loguru import Record
 
 
 class LoggerWrapper:
@@ -93,25 +105,6 @@ class LoggerWrapper:
         logger.bind(name=self.name).exception(msg, *args, **kwargs)
 
 
-def _parse_bool_env(name: str, default: bool = True) -> bool:
-    """Parse boolean environment variable.
-
-    Args:
-        name: Environment variable name.
-        default: Default value if not set.
-
-    Returns:
-        bool: Parsed boolean value.
-
-    """
-    value = os.getenv(name, "").lower()
-    if value in ("false", "0", "no", "off", "disabled"):
-        return False
-    if value in ("true", "1", "yes", "on", "enabled"):
-        return True
-    return default
-
-
 def _parse_size_env(name: str, default: str) -> str:
     """Parse size environment variable.
 
@@ -157,11 +150,94 @@ LOG_FORMAT = (
 # WECOM_LOG_MAX_SIZE: Max log file size before rotation (default: 10 MB)
 # WECOM_LOG_RETENTION: Number of rotated log files to keep (default: 3)
 # WECOM_LOG_CONSOLE: Enable/disable console logging (default: true)
-LOG_ENABLED = _parse_bool_env("WECOM_LOG_ENABLED", True)
+# WECOM_LOG_FORMAT: "text" (default) or "json" (one JSON object per line)
+# WECOM_LOG_CONTENT: How message content appears in logs: "truncate" (default), "hash" or "full"
+# WECOM_LOG_CONTENT_MAX: Characters kept by "truncate" (default: 80)
+# WECOM_LOG_SUCCESS_SAMPLE: Log 1 in N routine success lines (default: 1, every line)
+# WECOM_LOG_ASYNC: Write logs from a background thread in batches (default: true)
+# WECOM_LOG_BUFFER: Log lines buffered for the background writer before the oldest are dropped (default: 10000)
+LOG_ENABLED = get_env_bool("WECOM_LOG_ENABLED", True)
 LOG_LEVEL = os.getenv("WECOM_LOG_LEVEL", os.getenv("MCP_LOG_LEVEL", "DEBUG")).upper()
 LOG_MAX_SIZE = _parse_size_env("WECOM_LOG_MAX_SIZE", "10 MB")
 LOG_RETENTION = _parse_int_env("WECOM_LOG_RETENTION", 3)
-LOG_CONSOLE_ENABLED = _parse_bool_env("WECOM_LOG_CONSOLE", True)
+LOG_CONSOLE_ENABLED = get_env_bool("WECOM_LOG_CONSOLE", True)
+LOG_JSON = os.getenv("WECOM_LOG_FORMAT", "text").strip().lower() == "json"
+LOG_CONTENT = os.getenv("WECOM_LOG_CONTENT", "truncate").strip().lower()
+LOG_CONTENT_MAX = _parse_int_env("WECOM_LOG_CONTENT_MAX", 80)
+LOG_SUCCESS_SAMPLE = max(1, _parse_int_env("WECOM_LOG_SUCCESS_SAMPLE", 1))
+LOG_ASYNC = get_env_bool("WECOM_LOG_ASYNC", True)
+LOG_BUFFER = _parse_int_env("WECOM_LOG_BUFFER", 10000)
+
+# Number of success lines seen per message key, for sampling
+_success_counts: dict[str, int] = {}
+
+
+def redact_content(text: str) -> str:
+    """Shorten message content for logging according to WECOM_LOG_CONTENT.
+
+    Args:
+        text: Message content
+
+    Returns:
+        str: The content truncated to WECOM_LOG_CONTENT_MAX characters ("truncate"),
+            replaced by a short SHA-256 digest ("hash"), or unchanged ("full")
+
+    """
+    if LOG_CONTENT == "full":
+        return text
+    if LOG_CONTENT == "hash":
+        return f"sha256:{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]} ({len(text)} chars)"
+    if len(text) <= LOG_CONTENT_MAX:
+        return text
+    return f"{text[:LOG_CONTENT_MAX]}... ({len(text)} chars)"
+
+
+def log_success(message: str, **fields: Any) -> None:
+    """Log a routine success line at INFO, keeping 1 in WECOM_LOG_SUCCESS_SAMPLE of them.
+
+    Lines are sampled per message text, so the first occurrence of every kind of
+    line is always logged. Kept lines carry a ``sampled`` field with the rate when
+    sampling is on, so that log-based counts can be scaled back up.
+
+    Args:
+        message: Log message
+        **fields: Structured fields bound to the record
+
+    """
+    if LOG_SUCCESS_SAMPLE > 1:
+        seen = _success_counts.get(message, 0)
+        _success_counts[message] = seen + 1
+        if seen % LOG_SUCCESS_SAMPLE:
+            return
+        fields["sampled"] = LOG_SUCCESS_SAMPLE
+    logger.opt(depth=1).bind(**fields).info(message)
+
+
+def _format_json(record: "Record") -> str:
+    """Render a log record as one JSON object per line."""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **{key: value for key, value in record["extra"].items() if key != "json"},
+    }
+    if record["exception"] is not None:
+        exc_type, exc_value, _ = record["exception"]
+        entry["exception"] = f"{exc_type.__name__}: {exc_value}" if exc_type else str(exc_value)
+    record["extra"]["json"] = json.dumps(entry, ensure_ascii=False, default=str)
+    return "{extra[json]}\n"
+
+
+def _rotation_bytes() -> int | None:
+    """Parse WECOM_LOG_MAX_SIZE for the batched file writer (None if it is not a plain size)."""
+    try:
+        return parse_size(LOG_MAX_SIZE)
+    except ValueError:
+        # loguru also accepts rotation times such as "1 day"; leave those to its own file sink
+        return None
 
 
 def setup_logging() -> LoggerWrapper:
@@ -179,31 +255,52 @@ def setup_logging() -> LoggerWrapper:
             Set to 0 to keep only the current log file.
         WECOM_LOG_CONSOLE: Enable/disable console logging (default: true).
             Set to "false" to disable console output.
+        WECOM_LOG_FORMAT: "text" (default) or "json" for one JSON object per line,
+            including structured fields such as tool, bot and errcode.
+        WECOM_LOG_CONTENT: "truncate" (default), "hash" or "full" message content in logs.
+        WECOM_LOG_SUCCESS_SAMPLE: Log 1 in N routine success lines (default: 1).
+        WECOM_LOG_ASYNC: Write logs in batches from a background thread (default: true).
+            Set to "false" for loguru's own sinks with ``enqueue=True``.
+        WECOM_LOG_BUFFER: Lines buffered for the background writer (default: 10000).
+            When the buffer is full the oldest lines are dropped.
 
     Returns:
         LoggerWrapper: Configured logger instance that provides a logging.Logger-like interface
 
     """
-    # Remove any existing handlers
+    # Remove any existing handlers, and tag records logged during a tool call with its tool and bot
     logger.remove()
+    logger.configure(patcher=add_call_fields)
+    log_format = _format_json if LOG_JSON else LOG_FORMAT
 
     # Add rotating file handler if enabled
     if LOG_ENABLED:
         LOG_DIR.mkdir(parents=True, exist_ok=True)
-        logger.add(
-            LOG_FILE,
-            rotation=LOG_MAX_SIZE,
-            retention=LOG_RETENTION,
-            compression="zip",
-            format=LOG_FORMAT,
-            level=LOG_LEVEL,
-            enqueue=True,
-            encoding="utf-8",
-        )
+        max_bytes = _rotation_bytes() if LOG_ASYNC else None
+        if max_bytes:
+            writer = RotatingFileWriter(LOG_FILE, max_bytes, LOG_RETENTION)
+            sink = BatchingSink(writer.write, writer.flush, writer.close, max_buffer=LOG_BUFFER)
+            logger.add(sink, format=log_format, level=LOG_LEVEL, colorize=False)
+        else:
+            logger.add(
+                LOG_FILE,
+                rotation=LOG_MAX_SIZE,
+                retention=LOG_RETENTION,
+                compression="zip",
+                format=log_format,
+                level=LOG_LEVEL,
+                enqueue=True,
+                encoding="utf-8",
+            )
 
     # Add console handler if enabled
     if LOG_CONSOLE_ENABLED:
-        logger.add(sys.stdout, format=LOG_FORMAT, level=LOG_LEVEL, enqueue=True)
+        if LOG_ASYNC:
+            stream = sys.stdout
+            sink = BatchingSink(stream.write, stream.flush, max_buffer=LOG_BUFFER)
+            logger.add(sink, format=log_format, level=LOG_LEVEL, colorize=stream.isatty())
+        else:
+            logger.add(sys.stdout, format=log_format, level=LOG_LEVEL, enqueue=True)
 
     logger_wrapper = LoggerWrapper("mcp_wechat_server")
 
@@ -0,0 +1,219 @@
+"""Batched, in-process log sinks for WeCom Bot MCP Server.
+
+loguru's ``enqueue=True`` pickles every record through a multiprocessing queue,
+and its file sink zip-compresses rotated files inside the writer. ``BatchingSink``
+instead hands formatted lines to a background thread through a bounded in-memory
+buffer. The thread writes them in batches and flushes once per batch. When the
+buffer is full, the oldest lines are dropped (and the number dropped is logged)
+so that logging never blocks a tool call.
+
+``RotatingFileWriter`` is the file target of the batching sink. It rotates by
+size, and compresses rotated files and enforces retention on a separate thread,
+off the write path.
+"""
+
+# Import built-in modules
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import re
+import sys
+import threading
+import zipfile
+
+# Constants
+DEFAULT_MAX_BUFFER = 10000
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_FLUSH_INTERVAL = 0.2
+_SIZE_PATTERN = re.compile(r"([\d.]+)\s*([kmgt]?)(i?)b", re.IGNORECASE)
+
+
+def parse_size(size: str) -> int:
+    """Parse a size such as ``"10 MB"`` or ``"512 KiB"`` into bytes.
+
+    Args:
+        size: Size with a B, KB, MB, GB or TB unit (KiB, MiB... for powers of 1024)
+
+    Returns:
+        int: Size in bytes
+
+    Raises:
+        ValueError: If the size cannot be parsed
+
+    """
+    match = _SIZE_PATTERN.fullmatch(size.strip())
+    if not match:
+        raise ValueError(f"Invalid size: '{size}'")
+    value, unit, binary = match.groups()
+    base = 1024 if binary else 1000
+    return int(float(value) * base ** ("kmgt".index(unit.lower()) + 1 if unit else 0))
+
+
+class BatchingSink:
+    """loguru sink writing formatted lines in batches from a background thread.
+
+    The sink deliberately has no ``flush`` method, because loguru would call it
+    after every record. Lines are flushed by the writer thread once per batch, and
+    all pending lines are written when the sink is stopped (``logger.remove()``,
+    which loguru also runs at exit).
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str], object],
+        flush: Callable[[], object] | None = None,
+        close: Callable[[], object] | None = None,
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """Start the writer thread.
+
+        Args:
+            write: Writes a batch of lines to the target
+            flush: Flushes the target after each batch
+            close: Closes the target when the sink stops
+            max_buffer: Maximum lines waiting to be written; older lines are dropped beyond it
+            batch_size: Pending lines that wake the writer before the flush interval
+            flush_interval: Maximum seconds a line waits before it is written
+
+        """
+        self._write = write
+        self._flush = flush
+        self._close = close
+        self._buffer: deque[str] = deque(maxlen=max(1, max_buffer))
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self.dropped = 0
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="wecom-log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        """Queue a formatted line (called by loguru under its handler lock).
+
+        Args:
+            message: Formatted log line
+
+        """
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(message)
+        if len(buffer) == self._batch_size:
+            with self._wakeup:
+                self._wakeup.notify()
+
+    def drain(self) -> None:
+        """Write all pending lines from the calling thread."""
+        batch = []
+        while self._buffer:
+            batch.append(self._buffer.popleft())
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            batch.insert(0, f"[log buffer full, dropped {dropped} older record(s)]\n")
+        if not batch:
+            return
+        try:
+            self._write("".join(batch))
+            if self._flush:
+                self._flush()
+        except Exception as e:  # a broken target must not take down the writer
+            print(f"Failed to write {len(batch)} log record(s): {e}", file=sys.stderr)
+            return
+        self.written += len(batch)
+
+    def stop(self) -> None:
+        """Write all pending lines, stop the writer thread and close the target."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        self._thread.join()
+        self.drain()
+        if self._close:
+            self._close()
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                if not self._stopping and len(self._buffer) < self._batch_size:
+                    self._wakeup.wait(self._flush_interval)
+                if self._stopping:
+                    return
+            self.drain()
+
+
+class RotatingFileWriter:
+    """Append-only log file rotated by size, with background compression and retention."""
+
+    def __init__(self, path: Path, max_bytes: int, retention: int, compress: bool = True):
+        """Open the log file.
+
+        Args:
+            path: Log file
+            max_bytes: Size at which the file is rotated
+            retention: Number of rotated files to keep
+            compress: Zip rotated files
+
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.compress = compress
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._housekeeper = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wecom-log-rotate")
+
+    def write(self, text: str) -> None:
+        """Append text, rotating the file first if it would grow past ``max_bytes``.
+
+        Args:
+            text: Lines to append
+
+        """
+        size = len(text.encode("utf-8"))
+        if self._size and self._size + size > self.max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._size += size
+
+    def flush(self) -> None:
+        """Flush the log file."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the log file and wait for pending compression."""
+        self._file.close()
+        self._housekeeper.shutdown(wait=True)
+
+    def rotated_files(self) -> list[Path]:
+        """List rotated files (compressed or not), oldest first.
+
+        Rotated files are named like loguru's, ``<stem>.<timestamp><suffix>[.zip]``,
+        so files rotated by either writer sort by name in rotation order.
+        """
+        return sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}*"))
+
+    def _rotate(self) -> None:
+        self._file.close()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+        rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        self.path.rename(rotated)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._size = 0
+        self._housekeeper.submit(self._housekeep, rotated)
+
+    def _housekeep(self, rotated: Path) -> None:
+        # Retention may already have removed a file rotated before the previous one was compressed
+        if self.compress and rotated.exists():
+            with zipfile.ZipFile(f"{rotated}.zip", "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.write(rotated, rotated.name)
+            rotated.unlink()
+        rotated_files = self.rotated_files()
+        for old in rotated_files[: max(0, len(rotated_files) - self.retention)]:
+            old.unlink(missing_ok=True)
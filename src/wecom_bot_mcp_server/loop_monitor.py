@@ -0,0 +1,194 @@
+"""Event loop lag monitor and blocking-call detector for WeCom Bot MCP Server.
+
+All sessions of an HTTP-mode server share one event loop, so a call that blocks
+it (Pillow, file system calls, text fixing on large messages) stalls every other
+session. ``LoopMonitor`` measures this in two ways:
+
+- Lag: a background task sleeps for a fixed interval and records how much later
+  than requested it woke up, as the ``wecom_event_loop_lag_seconds`` metric.
+- Blocking (debug mode): a watchdog thread repeatedly schedules a no-op callback on
+  the loop. When the callback has not run within the threshold, the watchdog
+  captures the loop thread's stack, waits for the loop to come back and reports
+  the block (``wecom_event_loop_blocks_total`` and a warning with that stack).
+
+The monitor runs while at least one MCP session is open (see ``monitor_event_loop``).
+
+Environment Variables:
+    WECOM_LOOP_MONITOR: ``on`` (default, lag metric only), ``debug`` (also detect and
+        log blocking calls) or ``off``
+    WECOM_LOOP_LAG_INTERVAL_MS: Lag sampling interval (default: 100)
+    WECOM_LOOP_BLOCK_MS: Blocking threshold in debug mode (default: 100)
+"""
+
+# Import built-in modules
+import asyncio
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from contextlib import suppress
+from dataclasses import dataclass
+import os
+import sys
+import threading
+import time
+import traceback
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.metrics import LOOP_BLOCKS
+from wecom_bot_mcp_server.metrics import LOOP_LAG
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+MODES = ("off", "on", "debug")
+DEFAULT_INTERVAL_MS = 100
+DEFAULT_BLOCK_MS = 100
+# Stack frames kept in a blocking report, innermost last
+MAX_STACK_FRAMES = 30
+
+
+@dataclass
+class BlockedLoop:
+    """One detected stall of the event loop."""
+
+    duration: float
+    stack: str
+
+
+def _log_block(block: BlockedLoop) -> None:
+    logger.warning(f"Event loop blocked for {block.duration * 1000:.0f} ms. Loop thread stack:\n{block.stack}")
+
+
+class LoopMonitor:
+    """Measure event loop lag and, optionally, detect blocking calls."""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL_MS / 1000,
+        block_threshold: float | None = None,
+        on_block: Callable[[BlockedLoop], None] = _log_block,
+    ):
+        """Configure the monitor.
+
+        Args:
+            interval: Seconds between lag measurements
+            block_threshold: Report the loop as blocked when a callback waits longer than
+                this many seconds. None disables blocking detection.
+            on_block: Called (from the watchdog thread) for every detected block
+
+        """
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.on_block = on_block
+        self.max_lag = 0.0
+        self.blocks: list[BlockedLoop] = []
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running event loop (call from the loop thread)."""
+        loop = asyncio.get_running_loop()
+        self._stopping.clear()
+        self._task = loop.create_task(self._measure_lag(), name="wecom-loop-monitor")
+        if self.block_threshold:
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(loop, threading.get_ident(), self.block_threshold),
+                name="wecom-loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _measure_lag(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG.observe(lag)
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread: int, threshold: float) -> None:
+        while not self._stopping.is_set():
+            ran = threading.Event()
+            sent = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:  # the loop is closed
+                return
+            if ran.wait(threshold):
+                self._stopping.wait(threshold / 2)
+                continue
+
+            frame = sys._current_frames().get(loop_thread)
+            stack = "".join(traceback.format_stack(frame, limit=MAX_STACK_FRAMES)) if frame else ""
+            while not ran.wait(threshold / 2):
+                if self._stopping.is_set() or loop.is_closed():
+                    return
+            block = BlockedLoop(time.perf_counter() - sent, stack)
+            self.blocks.append(block)
+            LOOP_BLOCKS.inc()
+            self.on_block(block)
+
+
+def create_loop_monitor(mode: str | None = None) -> LoopMonitor | None:
+    """Create a loop monitor as configured by the WECOM_LOOP_* environment variables.
+
+    Args:
+        mode: ``off``, ``on`` or ``debug``. If None, reads WECOM_LOOP_MONITOR.
+
+    Returns:
+        LoopMonitor | None: Monitor, or None if monitoring is off
+
+    """
+    mode = (mode if mode is not None else os.getenv("WECOM_LOOP_MONITOR", "on")).strip().lower() or "on"
+    if mode not in MODES:
+        logger.warning(f"Unknown loop monitor mode '{mode}', expected one of: {', '.join(MODES)}")
+        mode = "on"
+    if mode == "off":
+        return None
+    interval = (get_env_int("WECOM_LOOP_LAG_INTERVAL_MS", DEFAULT_INTERVAL_MS) or DEFAULT_INTERVAL_MS) / 1000
+    block_ms = get_env_int("WECOM_LOOP_BLOCK_MS", DEFAULT_BLOCK_MS) or DEFAULT_BLOCK_MS
+    return LoopMonitor(interval, block_ms / 1000 if mode == "debug" else None)
+
+
+# Monitor shared by the open sessions, and how many sessions use it
+_monitor: LoopMonitor | None = None
+_sessions = 0
+
+
+@asynccontextmanager
+async def monitor_event_loop() -> AsyncIterator[LoopMonitor | None]:
+    """Monitor the event loop while the block runs (shared by concurrent sessions).
+
+    Yields:
+        LoopMonitor | None: The running monitor, or None if monitoring is off
+
+    """
+    global _monitor, _sessions
+    if _sessions == 0:
+        _monitor = create_loop_monitor()
+        if _monitor is not None:
+            _monitor.start()
+    _sessions += 1
+    try:
+        yield _monitor
+    finally:
+        _sessions -= 1
+        if _sessions == 0 and _monitor is not None:
+            monitor, _monitor = _monitor, None
+            await monitor.stop()
@@ -1,6 +1,8 @@
 """Message handling functionality for WeCom Bot MCP Server."""
 
 # Import built-in modules
+import asyncio
+import json
 from typing import Annotated
 from typing import Any
 from typing import Literal
@@ -8,18 +10,39 @@ from typing import Literal
 # Import third-party modules
 from loguru import logger
 from mcp.server.fastmcp import Context
-from notify_bridge import NotifyBridge
 from pydantic import Field
 
 # Import local modules
 from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.bot_config import DEFAULT_BOT_NAME
+from wecom_bot_mcp_server.bot_config import DEFAULT_PAGE_SIZE
+from wecom_bot_mcp_server.bot_config import MAX_PAGE_SIZE
+from wecom_bot_mcp_server.bot_config import TTL_DESCRIPTION
 from wecom_bot_mcp_server.bot_config import get_bot_registry
 from wecom_bot_mcp_server.bot_config import get_multi_bot_instructions
+from wecom_bot_mcp_server.bot_config import get_send_ttl
 from wecom_bot_mcp_server.bot_config import list_available_bots
+from wecom_bot_mcp_server.bot_config import parse_group_target
+from wecom_bot_mcp_server.connections import shared_bridge
+from wecom_bot_mcp_server.deadline import TIMEOUT_DESCRIPTION
+from wecom_bot_mcp_server.deadline import with_deadline
 from wecom_bot_mcp_server.errors import ErrorCode
 from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComExpiredError
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
+from wecom_bot_mcp_server.idempotency import IDEMPOTENCY_KEY_DESCRIPTION
+from wecom_bot_mcp_server.idempotency import idempotent
+from wecom_bot_mcp_server.lazy import LazyImport
+from wecom_bot_mcp_server.metrics import instrument_tool
+from wecom_bot_mcp_server.metrics import record_bytes_sent
+from wecom_bot_mcp_server.metrics import record_dedup_suppressed
+from wecom_bot_mcp_server.metrics import stage
 from wecom_bot_mcp_server.utils import encode_text
 
+# Imported on first use to keep server startup fast
+NotifyBridge = LazyImport("notify_bridge", "NotifyBridge")
+
 # Type alias for message types
 MessageType = Literal["markdown", "markdown_v2"]
 
@@ -27,6 +50,8 @@ MessageType = Literal["markdown", "markdown_v2"]
 MESSAGE_HISTORY_KEY = "history://messages"
 MARKDOWN_CAPABILITIES_RESOURCE_KEY = "wecom://markdown-capabilities"
 MULTI_BOT_INSTRUCTIONS_KEY = "wecom://multi-bot-instructions"
+# Content longer than this is encoded in a worker thread instead of on the event loop
+ENCODE_IN_THREAD_CHARS = 2048
 
 # Message history storage
 message_history: list[dict[str, str]] = []
@@ -177,6 +202,9 @@ def wecom_message_guidelines() -> str:
     return base_guidelines + multi_bot_info
 
 
+@instrument_tool("send_message")
+@with_deadline("send_message")
+@idempotent("send_message")
 async def send_message(
     content: str,
     msg_type: str = "markdown_v2",
@@ -184,7 +212,12 @@ async def send_message(
     mentioned_mobile_list: list[str] | None = None,
     bot_id: str | None = None,
     ctx: Context | None = None,
-) -> dict[str, str]:
+    conversation_key: str | None = None,
+    idempotency_key: str | None = None,
+    group_key: str | None = None,
+    timeout_s: float | None = None,
+    ttl_s: float | None = None,
+) -> dict[str, Any]:
     """Send message to WeCom.
 
     Args:
@@ -194,50 +227,195 @@ async def send_message(
             - 'markdown_v2': Use for tables, lists, embedded images, or general content (default)
         mentioned_list: List of mentioned users
         mentioned_mobile_list: List of mentioned mobile numbers
-        bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
+        bot_id: Bot identifier for multi-bot setups. If None, the routing table
+            (WECOM_ROUTES) picks the bot from the content, falling back to the default bot.
+            Use ``@group:<tag>`` to send to every bot carrying the tag.
         ctx: FastMCP context
+        conversation_key: Optional key keeping related messages on one webhook of a pooled bot
+        idempotency_key: Optional key; retries with the same key return the original result
+        group_key: Optional key collecting the message into a digest with the other messages
+            carrying it, sent later as one message (WECOM_DIGEST_INTERVAL)
+        timeout_s: Optional limit for the whole send in seconds (default: WECOM_SEND_TIMEOUT)
+        ttl_s: Optional time-to-live in seconds while the send is queued (default: the bot's ttl_s)
 
     Returns:
-        dict: Response containing status and message
+        dict: Response containing status and message (aggregated per bot for group targets).
+            ``sequence`` numbers the sent messages per bot in delivery order.
+            When a routing rule picked the bot, ``routed_by`` and ``bot_id`` report it.
+            A duplicate within the deduplication window (WECOM_DEDUP_WINDOW) is not sent
+            and has status ``suppressed``. A message added to a digest has status ``queued``.
 
     Raises:
+        WeComTimeoutError: If the send does not finish within the timeout
+        WeComQueueFullError: If the send queue is full (see WECOM_QUEUE_POLICY) or the server is shutting down
+        WeComExpiredError: If the send waited out its time-to-live and was dropped
         WeComError: If message sending fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.dedup import get_dedup_window
+    from wecom_bot_mcp_server.dedup import repeated_note
+    from wecom_bot_mcp_server.digest import get_digester
+    from wecom_bot_mcp_server.failover import send_with_failover
+    from wecom_bot_mcp_server.routing import get_router
+    from wecom_bot_mcp_server.send_queue import queued_send
+
     if ctx:
         await ctx.report_progress(0.1)
         await ctx.info(f"Sending {msg_type} message" + (f" via bot '{bot_id}'" if bot_id else ""))
 
+    dedup = get_dedup_window()
+    dedup_target = ""
+    repeated: int | None = None
     try:
         # Validate inputs
-        await _validate_message_inputs(content, msg_type, ctx)
+        with stage("validate"):
+            await _validate_message_inputs(content, msg_type, ctx)
+
+        route = get_router().route(content) if not bot_id else None
+        if route is not None:
+            bot_id = route.bot_id
+            logger.info(f"Routing rule '{route.rule}' selected bot '{bot_id}'")
+            if ctx:
+                await ctx.info(f"Routing rule '{route.rule}' selected bot '{bot_id}'")
+        routing_info = {"routed_by": route.rule, "bot_id": route.bot_id} if route is not None else {}
+
+        dedup_target = bot_id or DEFAULT_BOT_NAME
+        original_content = content
+        repeated = dedup.admit(dedup_target, content)
+        if repeated is None:
+            return {**await _suppress_duplicate(dedup_target, content, ctx), **routing_info}
+        if repeated:
+            content = repeated_note(content, repeated)
+
+        if group_key:
+            result = get_digester().add(
+                dedup_target, group_key, content, msg_type, mentioned_list, mentioned_mobile_list
+            )
+            logger.info(f"{result['message']} ({result['pending']} pending, sent in {result['flush_in']:g}s)")
+            if ctx:
+                await ctx.info(result["message"])
+            return {**result, **routing_info}
+
+        # Saved to the outbox if the server shuts down before the message is sent
+        payload = {
+            "content": content,
+            "msg_type": msg_type,
+            "bot_id": bot_id,
+            "mentioned_list": list(mentioned_list or []),
+            "mentioned_mobile_list": list(mentioned_mobile_list or []),
+        }
+        async with queued_send(dedup_target, get_send_ttl(bot_id, ttl_s), payload) as ticket:
+            group = parse_group_target(bot_id)
+            if group is not None:
+                result = await _send_message_to_group(
+                    group, content, msg_type, mentioned_list, mentioned_mobile_list, ctx, conversation_key
+                )
+                return {**result, **routing_info, "sequence": ticket.seq}
+
+            fallbacks = get_bot_registry().get_fallbacks(bot_id)
+
+            fixed_content = await _prepare_message_content(content, msg_type, ctx)
+
+            # Add message to history
+            message_history.append({"role": "assistant", "content": content})
+
+            if ctx:
+                await ctx.report_progress(0.5)
+                await ctx.info("Sending message...")
+
+            async def _resolve(target: str | None) -> str:
+                return await _get_webhook_url(target, ctx, conversation_key)
+
+            async def _send_one(base_url: str) -> dict[str, Any]:
+                response = await _send_message_to_wecom(
+                    base_url, msg_type, fixed_content, mentioned_list, mentioned_mobile_list
+                )
+                return await _process_message_response(response, ctx)
+
+            # Send message to WeCom, failing over to the bot's fallbacks if its webhook fails
+            result = await send_with_failover(bot_id, fallbacks, _resolve, _send_one, ctx)
+            return {**result, **routing_info, "sequence": ticket.seq}
+
+    except (Exception, asyncio.CancelledError) as e:
+        if repeated is not None:
+            # Not sent (or cancelled before it was known to be), so the next copy must not be suppressed
+            dedup.cancel(dedup_target, original_content, repeated)
+        if isinstance(e, (WeComTimeoutError, WeComQueueFullError, WeComExpiredError, asyncio.CancelledError)):
+            raise
+        error_msg = f"Error sending message: {e!s}"
+        if ctx:
+            await ctx.error(error_msg)
+        raise WeComError(error_msg, ErrorCode.NETWORK_ERROR) from e
 
-        # Get webhook URL for the specified bot
-        base_url = await _get_webhook_url(bot_id, ctx)
 
-        fixed_content = await _prepare_message_content(content, msg_type, ctx)
+async def _suppress_duplicate(target: str, content: str, ctx: Context | None = None) -> dict[str, Any]:
+    """Report a message suppressed by the deduplication window.
 
-        # Add message to history
-        message_history.append({"role": "assistant", "content": content})
+    Args:
+        target: Bot or group the message was meant for
+        content: Message content
+        ctx: FastMCP context
 
-        if ctx:
-            await ctx.report_progress(0.5)
-            await ctx.info("Sending message...")
+    Returns:
+        dict: Response with status ``suppressed`` and the copies suppressed so far
 
-        # Send message to WeCom
+    """
+    # Import local modules
+    from wecom_bot_mcp_server.dedup import get_dedup_window
+
+    suppressed = get_dedup_window().suppressed(target, content)
+    record_dedup_suppressed()
+    message = (
+        f"Duplicate message to '{target}' suppressed ({suppressed} since the last copy was sent; "
+        f"window {get_dedup_window().window:g}s)"
+    )
+    logger.info(message)
+    if ctx:
+        await ctx.info(message)
+    return {"status": "suppressed", "message": message, "repeated": suppressed}
+
+
+async def _send_message_to_group(
+    group: str,
+    content: str,
+    msg_type: str,
+    mentioned_list: list[str] | None = None,
+    mentioned_mobile_list: list[str] | None = None,
+    ctx: Context | None = None,
+    conversation_key: str | None = None,
+) -> dict[str, Any]:
+    """Send one message to every bot in a group.
+
+    The content is encoded once and the same payload is delivered to each
+    distinct webhook of the group concurrently.
+
+    Args:
+        group: Group (tag) name
+        content: Message content
+        msg_type: Message type
+        mentioned_list: List of mentioned users
+        mentioned_mobile_list: List of mentioned mobile numbers
+        ctx: FastMCP context
+        conversation_key: Optional key keeping related messages on one webhook of pooled members
+
+    Returns:
+        dict: Aggregate result with per-bot outcomes
+
+    """
+    # Import local modules
+    from wecom_bot_mcp_server.fanout import fan_out
+
+    fixed_content = await _prepare_message_content(content, msg_type, ctx)
+    message_history.append({"role": "assistant", "content": content})
+
+    async def _send_one(base_url: str) -> dict[str, Any]:
         response = await _send_message_to_wecom(
             base_url, msg_type, fixed_content, mentioned_list, mentioned_mobile_list
         )
+        return await _process_message_response(response)
 
-        # Process response
-        return await _process_message_response(response, ctx)
-
-    except Exception as e:
-        error_msg = f"Error sending message: {e!s}"
-        logger.error(error_msg)
-        if ctx:
-            await ctx.error(error_msg)
-        raise WeComError(error_msg, ErrorCode.NETWORK_ERROR) from e
+    return await fan_out(group, _send_one, ctx, conversation_key)
 
 
 async def _validate_message_inputs(content: str, msg_type: str, ctx: Context | None = None) -> None:
@@ -254,7 +432,6 @@ async def _validate_message_inputs(content: str, msg_type: str, ctx: Context | N
     """
     if not content:
         error_msg = "Message content cannot be empty"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
@@ -263,18 +440,20 @@ async def _validate_message_inputs(content: str, msg_type: str, ctx: Context | N
     valid_msg_types = ("markdown", "markdown_v2")
     if msg_type not in valid_msg_types:
         error_msg = f"Invalid message type: {msg_type}. Supported types: {', '.join(valid_msg_types)}."
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
 
 
-async def _get_webhook_url(bot_id: str | None = None, ctx: Context | None = None) -> str:
+async def _get_webhook_url(
+    bot_id: str | None = None, ctx: Context | None = None, conversation_key: str | None = None
+) -> str:
     """Get webhook URL for a specific bot.
 
     Args:
         bot_id: Bot identifier. If None, uses the default bot.
         ctx: FastMCP context
+        conversation_key: Optional key keeping a conversation on one webhook of a pooled bot
 
     Returns:
         str: Webhook URL
@@ -284,6 +463,8 @@ async def _get_webhook_url(bot_id: str | None = None, ctx: Context | None = None
 
     """
     try:
+        if conversation_key:
+            return get_bot_registry().get_webhook_url(bot_id, conversation_key=conversation_key)
         return get_bot_registry().get_webhook_url(bot_id)
     except WeComError as e:
         if ctx:
@@ -306,12 +487,18 @@ async def _prepare_message_content(content: str, msg_type: str = "markdown_v2",
         WeComError: If text encoding fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.log_config import redact_content
+
     try:
-        fixed_content = encode_text(content, msg_type)
-        logger.info(f"Sending message: {fixed_content}")
+        with stage("encode"):
+            if len(content) > ENCODE_IN_THREAD_CHARS:
+                fixed_content = await asyncio.to_thread(encode_text, content, msg_type)
+            else:
+                fixed_content = encode_text(content, msg_type)
+        logger.debug(f"Encoded {msg_type} message: {redact_content(fixed_content)}")
         return fixed_content
     except ValueError as e:
-        logger.error(f"Text encoding error: {e}")
         if ctx:
             await ctx.error(f"Text encoding error: {e}")
         raise WeComError(f"Text encoding error: {e}", ErrorCode.VALIDATION_ERROR) from e
@@ -345,26 +532,36 @@ async def _send_message_to_wecom(
         WeComError: If URL is invalid or request fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.ratelimit import rate_limited
+    from wecom_bot_mcp_server.send_queue import stale_note
+    from wecom_bot_mcp_server.send_queue import stale_notice
+
     # Validate base_url format again before sending
     if not base_url.startswith("http://") and not base_url.startswith("https://"):
         error_msg = f"Invalid webhook URL format: '{base_url}'. URL must start with 'http://' or 'https://'"
-        logger.error(error_msg)
         raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
 
     # Use NotifyBridge to send message via the wecom channel
     try:
-        async with NotifyBridge() as nb:
-            return await nb.send_async(
-                "wecom",
-                webhook_url=base_url,
-                msg_type=msg_type,
-                content=content,
-                mentioned_list=mentioned_list or [],
-                mentioned_mobile_list=mentioned_mobile_list or [],
-            )
+        async with rate_limited(base_url), shared_bridge(NotifyBridge) as nb:
+            with stale_notice() as stale, stage("http"):
+                if stale:
+                    content = stale_note(content, stale)
+                response = await nb.send_async(
+                    "wecom",
+                    webhook_url=base_url,
+                    msg_type=msg_type,
+                    content=content,
+                    mentioned_list=mentioned_list or [],
+                    mentioned_mobile_list=mentioned_mobile_list or [],
+                )
+            record_bytes_sent(len(content.encode("utf-8")))
+            return response
+    except (WeComTimeoutError, WeComExpiredError):
+        raise
     except Exception as e:
         error_msg = f"Failed to send message via NotifyBridge: {e}. URL: {base_url}, Type: {msg_type}"
-        logger.error(error_msg)
         raise WeComError(error_msg, ErrorCode.NETWORK_ERROR) from e
 
 
@@ -382,10 +579,12 @@ async def _process_message_response(response: Any, ctx: Context | None = None) -
         WeComError: If API call fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.log_config import log_success
+
     # Check response
     if not getattr(response, "success", False):
         error_msg = f"Failed to send message: {response}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.API_FAILURE)
@@ -393,14 +592,13 @@ async def _process_message_response(response: Any, ctx: Context | None = None) -
     # Check WeChat API response
     data = getattr(response, "data", {})
     if data.get("errcode", -1) != 0:
-        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')}"
-        logger.error(error_msg)
+        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')} (errcode {data.get('errcode')})"
         if ctx:
             await ctx.error(error_msg)
-        raise WeComError(error_msg, ErrorCode.API_FAILURE)
+        raise WeComError(error_msg, ErrorCode.API_FAILURE, errcode=data.get("errcode"))
 
     success_msg = "Message sent successfully"
-    logger.info(success_msg)
+    log_success(success_msg)
     if ctx:
         await ctx.report_progress(1.0)
         await ctx.info(success_msg)
@@ -451,13 +649,38 @@ async def send_message_mcp(
         str | None,
         Field(
             description=(
-                "Bot identifier for multi-bot setups. If not specified, uses the default bot. "
+                "Bot identifier for multi-bot setups. If not specified, the server's routing rules pick "
+                "the bot from the content (the result reports `routed_by`), otherwise the default bot is used. "
                 "Use `list_wecom_bots` tool to see available bots. "
-                "Example values: 'default', 'alert', 'ci', 'notify'"
+                "Example values: 'default', 'alert', 'ci', 'notify'. "
+                "Use '@group:<tag>' (e.g. '@group:oncall') to send to every bot carrying the tag."
             )
         ),
     ] = None,
-) -> dict[str, str]:
+    conversation_key: Annotated[
+        str | None,
+        Field(
+            description=(
+                "Optional conversation identifier (e.g. an incident or thread id). Messages with the same key "
+                "are always sent through the same webhook of a pooled bot, so they arrive in order."
+            )
+        ),
+    ] = None,
+    idempotency_key: Annotated[str | None, Field(description=IDEMPOTENCY_KEY_DESCRIPTION)] = None,
+    group_key: Annotated[
+        str | None,
+        Field(
+            description=(
+                "Optional digest group (e.g. an alert name or source). Instead of being sent now, the message "
+                "is collected with the other messages to the same bot carrying this key, and they are sent "
+                "together as one digest message after a delay or when the digest is full. Use it for noisy, "
+                "low-urgency notifications."
+            )
+        ),
+    ] = None,
+    timeout_s: Annotated[float | None, Field(description=TIMEOUT_DESCRIPTION, gt=0)] = None,
+    ttl_s: Annotated[float | None, Field(description=TTL_DESCRIPTION, gt=0)] = None,
+) -> dict[str, Any]:
     """Send message to WeCom with optional @mentions.
 
     MENTION USERS:
@@ -478,6 +701,11 @@ async def send_message_mcp(
         mentioned_list: User IDs to mention (only for text messages).
         mentioned_mobile_list: Mobile numbers to mention (only for text messages).
         bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
+        conversation_key: Optional key keeping related messages on one webhook of a pooled bot.
+        idempotency_key: Optional key; retries with the same key return the original result.
+        group_key: Optional key collecting the message into a digest sent later.
+        timeout_s: Optional limit for the whole send in seconds.
+        ttl_s: Optional time-to-live in seconds while the send is queued.
 
     Returns:
         dict: Response with status and message
@@ -493,9 +721,17 @@ async def send_message_mcp(
         mentioned_mobile_list=mentioned_mobile_list,
         bot_id=bot_id,
         ctx=None,
+        conversation_key=conversation_key,
+        idempotency_key=idempotency_key,
+        group_key=group_key,
+        timeout_s=timeout_s,
+        ttl_s=ttl_s,
     )
 
 
+@instrument_tool("send_wecom_template_card")
+@with_deadline("send_wecom_template_card")
+@idempotent("send_wecom_template_card")
 async def send_wecom_template_card(
     template_card_type: str,
     *,
@@ -512,7 +748,10 @@ async def send_wecom_template_card(
     template_card_image_text_area: dict[str, Any] | None = None,
     bot_id: str | None = None,
     ctx: Context | None = None,
-) -> dict[str, str]:
+    idempotency_key: str | None = None,
+    timeout_s: float | None = None,
+    ttl_s: float | None = None,
+) -> dict[str, Any]:
     """Send a WeCom template card message.
 
     This wraps notify-bridge ``msg_type="template_card"`` with the supported
@@ -538,37 +777,31 @@ async def send_wecom_template_card(
         template_card_image_text_area: Image text area for news_notice type
         bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
         ctx: FastMCP context
+        idempotency_key: Optional key; retries with the same key return the original result
+        timeout_s: Optional limit for the whole send in seconds (default: WECOM_SEND_TIMEOUT)
+        ttl_s: Optional time-to-live in seconds while the send is queued (default: the bot's ttl_s)
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.failover import send_with_failover
+    from wecom_bot_mcp_server.send_queue import queued_send
+
     if ctx:
         await ctx.report_progress(0.1)
         await ctx.info(
             f"Sending template_card ({template_card_type}) message" + (f" via bot '{bot_id}'" if bot_id else "")
         )
 
-    valid_types = ("text_notice", "news_notice")
-    if template_card_type not in valid_types:
-        error_msg = f"Invalid template_card_type: {template_card_type}. Allowed values: {', '.join(valid_types)}"
-        logger.error(error_msg)
-        if ctx:
-            await ctx.error(error_msg)
-        raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
-
     required_fields = {
         "template_card_source": template_card_source,
         "template_card_main_title": template_card_main_title,
         "template_card_card_action": template_card_card_action,
     }
-    missing = [name for name, value in required_fields.items() if value is None]
-    if missing:
-        error_msg = f"Missing required template card fields: {', '.join(missing)}"
-        logger.error(error_msg)
-        if ctx:
-            await ctx.error(error_msg)
-        raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
+    with stage("validate"):
+        await _validate_template_card_inputs(template_card_type, required_fields, ctx)
 
     try:
-        base_url = await _get_webhook_url(bot_id, ctx)
+        fallbacks = get_bot_registry().get_fallbacks(bot_id)
 
         if ctx:
             await ctx.report_progress(0.3)
@@ -596,20 +829,58 @@ async def send_wecom_template_card(
         if template_card_image_text_area is not None:
             template_kwargs["template_card_image_text_area"] = template_card_image_text_area
 
-        response = await _send_template_card_to_wecom(
-            base_url=base_url,
-            template_card_type=template_card_type,
-            **template_kwargs,
-        )
-        return await _process_template_card_response(response, ctx)
+        async def _resolve(target: str | None) -> str:
+            return await _get_webhook_url(target, ctx)
+
+        async def _send_one(base_url: str) -> dict[str, Any]:
+            response = await _send_template_card_to_wecom(
+                base_url=base_url,
+                template_card_type=template_card_type,
+                **template_kwargs,
+            )
+            return await _process_template_card_response(response, ctx)
+
+        async with queued_send(bot_id or DEFAULT_BOT_NAME, get_send_ttl(bot_id, ttl_s)) as ticket:
+            result = await send_with_failover(bot_id, fallbacks, _resolve, _send_one, ctx)
+            return {**result, "sequence": ticket.seq}
+    except (WeComTimeoutError, WeComQueueFullError, WeComExpiredError):
+        raise
     except Exception as e:
         error_msg = f"Error sending template card: {e!s}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.NETWORK_ERROR) from e
 
 
+async def _validate_template_card_inputs(
+    template_card_type: str, required_fields: dict[str, Any], ctx: Context | None = None
+) -> None:
+    """Validate template card inputs.
+
+    Args:
+        template_card_type: Type of template card
+        required_fields: Required template card fields by name
+        ctx: FastMCP context
+
+    Raises:
+        WeComError: If validation fails
+
+    """
+    valid_types = ("text_notice", "news_notice")
+    if template_card_type not in valid_types:
+        error_msg = f"Invalid template_card_type: {template_card_type}. Allowed values: {', '.join(valid_types)}"
+        if ctx:
+            await ctx.error(error_msg)
+        raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
+
+    missing = [name for name, value in required_fields.items() if value is None]
+    if missing:
+        error_msg = f"Missing required template card fields: {', '.join(missing)}"
+        if ctx:
+            await ctx.error(error_msg)
+        raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
+
+
 async def _send_template_card_to_wecom(
     base_url: str,
     template_card_type: str,
@@ -626,29 +897,34 @@ async def _send_template_card_to_wecom(
         Any: Response from NotifyBridge
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.ratelimit import rate_limited
+
     if not base_url.startswith("http://") and not base_url.startswith("https://"):
         error_msg = f"Invalid webhook URL format: '{base_url}'. URL must start with 'http://' or 'https://'"
-        logger.error(error_msg)
         raise WeComError(error_msg, ErrorCode.VALIDATION_ERROR)
 
     try:
-        # Debug: log the template_kwargs
-        logger.debug(f"Sending template card with kwargs: {template_kwargs}")
-
-        async with NotifyBridge() as nb:
-            return await nb.send_async(
-                "wecom",
-                webhook_url=base_url,
-                msg_type="template_card",
-                template_card_type=template_card_type,
-                **template_kwargs,
-            )
+        logger.debug(f"Sending {template_card_type} template card with fields: {', '.join(sorted(template_kwargs))}")
+
+        async with rate_limited(base_url), shared_bridge(NotifyBridge) as nb:
+            with stage("http"):
+                response = await nb.send_async(
+                    "wecom",
+                    webhook_url=base_url,
+                    msg_type="template_card",
+                    template_card_type=template_card_type,
+                    **template_kwargs,
+                )
+            record_bytes_sent(len(json.dumps(template_kwargs, ensure_ascii=False, default=str).encode("utf-8")))
+            return response
+    except (WeComTimeoutError, WeComExpiredError):
+        raise
     except Exception as e:
         error_msg = (
             f"Failed to send template card via NotifyBridge: {e}. URL: {base_url}, "
             f"template_card_type: {template_card_type}"
         )
-        logger.error(error_msg)
         raise WeComError(error_msg, ErrorCode.NETWORK_ERROR) from e
 
 
@@ -669,23 +945,24 @@ async def _process_template_card_response(
         WeComError: If API call fails
 
     """
+    # Import local modules
+    from wecom_bot_mcp_server.log_config import log_success
+
     if not getattr(response, "success", False):
         error_msg = f"Failed to send template card: {response}"
-        logger.error(error_msg)
         if ctx:
             await ctx.error(error_msg)
         raise WeComError(error_msg, ErrorCode.API_FAILURE)
 
     data = getattr(response, "data", {}) or {}
     if data.get("errcode", -1) != 0:
-        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')}"
-        logger.error(error_msg)
+        error_msg = f"WeChat API error: {data.get('errmsg', 'Unknown error')} (errcode {data.get('errcode')})"
         if ctx:
             await ctx.error(error_msg)
-        raise WeComError(error_msg, ErrorCode.API_FAILURE)
+        raise WeComError(error_msg, ErrorCode.API_FAILURE, errcode=data.get("errcode"))
 
     success_msg = "Template card sent successfully"
-    logger.info(success_msg)
+    log_success(success_msg)
     if ctx:
         await ctx.report_progress(1.0)
         await ctx.info(success_msg)
@@ -736,8 +1013,11 @@ async def send_wecom_template_card_text_notice_mcp(
             )
         ),
     ] = None,
+    idempotency_key: Annotated[str | None, Field(description=IDEMPOTENCY_KEY_DESCRIPTION)] = None,
+    timeout_s: Annotated[float | None, Field(description=TIMEOUT_DESCRIPTION, gt=0)] = None,
+    ttl_s: Annotated[float | None, Field(description=TTL_DESCRIPTION, gt=0)] = None,
     ctx: Context | None = None,
-) -> dict[str, str]:
+) -> dict[str, Any]:
     """MCP tool wrapper for sending a text_notice template card.
 
     The structure of the template card fields follows the WeCom template_card
@@ -758,6 +1038,9 @@ async def send_wecom_template_card_text_notice_mcp(
         template_card_image_text_area=None,
         bot_id=bot_id,
         ctx=ctx,
+        idempotency_key=idempotency_key,
+        timeout_s=timeout_s,
+        ttl_s=ttl_s,
     )
 
 
@@ -811,8 +1094,11 @@ async def send_wecom_template_card_news_notice_mcp(
             )
         ),
     ] = None,
+    idempotency_key: Annotated[str | None, Field(description=IDEMPOTENCY_KEY_DESCRIPTION)] = None,
+    timeout_s: Annotated[float | None, Field(description=TIMEOUT_DESCRIPTION, gt=0)] = None,
+    ttl_s: Annotated[float | None, Field(description=TTL_DESCRIPTION, gt=0)] = None,
     ctx: Context | None = None,
-) -> dict[str, str]:
+) -> dict[str, Any]:
     """MCP tool wrapper for sending a news_notice template card."""
     return await send_wecom_template_card(
         template_card_type="news_notice",
@@ -829,29 +1115,61 @@ async def send_wecom_template_card_news_notice_mcp(
         template_card_image_text_area=template_card_image_text_area,
         bot_id=bot_id,
         ctx=ctx,
+        idempotency_key=idempotency_key,
+        timeout_s=timeout_s,
+        ttl_s=ttl_s,
     )
 
 
 @mcp.tool(name="list_wecom_bots")
-async def list_wecom_bots_mcp() -> dict[str, Any]:
-    """List all configured WeCom bots.
+async def list_wecom_bots_mcp(
+    tag: Annotated[
+        str | None,
+        Field(description="Only list bots carrying this tag (from the bot's metadata.tags)."),
+    ] = None,
+    prefix: Annotated[
+        str | None,
+        Field(description="Only list bots whose id starts with this prefix (case-insensitive)."),
+    ] = None,
+    offset: Annotated[
+        int,
+        Field(description="Number of matching bots to skip, for pagination.", ge=0),
+    ] = 0,
+    limit: Annotated[
+        int,
+        Field(description="Maximum number of bots to return in this page.", ge=1, le=MAX_PAGE_SIZE),
+    ] = DEFAULT_PAGE_SIZE,
+) -> dict[str, Any]:
+    """List configured WeCom bots, with optional filtering and pagination.
 
     Use this tool to discover available bots before sending messages.
-    Each bot has an id, name, and optional description.
+    Each bot has an id, name, and optional description and tags.
 
     Returns:
-        dict: Contains 'bots' list and 'count' of available bots.
-            Each bot entry has: id, name, description, has_webhook
+        dict: Contains the 'bots' page, its 'count', the 'total' number of matches
+            and 'next_offset' (None when there are no more pages).
+            Each bot entry has: id, name, description, has_webhook (and tags when set)
 
     """
-    bots = list_available_bots()
     registry = get_bot_registry()
+    bots = list_available_bots(tag=tag, prefix=prefix, offset=offset, limit=limit)
+    _, total = registry.find_bot_ids(tag=tag, prefix=prefix, limit=0)
+    next_offset = offset + len(bots)
+
+    if registry.has_bot("default"):
+        default_bot: str | None = "default"
+    else:
+        first_ids, _ = registry.find_bot_ids(limit=1)
+        default_bot = first_ids[0] if first_ids else None
 
     return {
         "bots": bots,
         "count": len(bots),
+        "total": total,
+        "offset": offset,
+        "next_offset": next_offset if next_offset < total else None,
         "has_multiple_bots": registry.has_multiple_bots(),
-        "default_bot": "default" if registry.has_bot("default") else (bots[0]["id"] if bots else None),
+        "default_bot": default_bot,
         "instructions": (
             "To send a message to a specific bot, use the 'bot_id' parameter in send_message, "
             "send_wecom_image, or send_wecom_file tools. "
@@ -0,0 +1,572 @@
+"""In-process metrics for WeCom Bot MCP Server.
+
+A small Prometheus-compatible registry (counters and histograms with labels)
+records, per tool and bot:
+
+- ``wecom_requests_total``: tool calls by outcome and WeCom errcode
+- ``wecom_stage_duration_seconds``: latency per stage (validate, download, encode,
+  upload, http, and ``total`` for the whole call)
+- ``wecom_bytes_sent_total``: payload bytes sent to WeCom
+- ``wecom_rate_limit_wait_seconds``: time spent waiting for a webhook's rate budget
+- ``wecom_inflight_requests``: tool calls currently in progress (the server's queue depth)
+- ``wecom_event_loop_lag_seconds`` and ``wecom_event_loop_blocks_total``: scheduling
+  delay and detected stalls of the event loop (see ``loop_monitor``)
+- ``wecom_idempotent_replays_total``: repeated calls answered from the idempotency
+  store instead of sending again (see ``idempotency``)
+- ``wecom_dedup_suppressed_total``: duplicate messages suppressed by the
+  deduplication window (see ``dedup``)
+- ``wecom_timeouts_total``: tool calls that ran out of time, by the stage that was
+  running (see ``deadline``)
+- ``wecom_queue_depth`` and ``wecom_queue_overflows_total``: sends admitted to the
+  send queue per bot, and sends rejected or dropped because it was full (see
+  ``send_queue``)
+- ``wecom_expired_total``: queued sends discarded because their time-to-live passed
+  (see ``send_queue``)
+
+Tool entry points are wrapped with ``instrument_tool``, which keeps the tool and
+bot of the running call in a context variable, so the helpers called deeper in
+the send path (``stage``, ``record_bytes_sent``, ``record_rate_limit_wait``) need
+no extra parameters. Outside of a tool call these helpers do nothing. The ``bot``
+label is the bot id, or ``unknown`` for ids that are not configured (see
+``bot_label``), so clients cannot add series by passing arbitrary ids.
+
+The metrics are exposed as ``/metrics`` (Prometheus text format) in HTTP mode and
+as the ``wecom://stats`` MCP resource (JSON). When tracing is enabled, the same tool
+calls and stages are also recorded as spans (see ``tracing``), and with profiling
+enabled slow calls leave a profile (see ``profiling``). A failed tool call
+is logged once, here, with its tool, bot and errcode; the layers below it only
+raise.
+"""
+
+# Import built-in modules
+from bisect import bisect_left
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import inspect
+import math
+import time
+from typing import Any
+from typing import TYPE_CHECKING
+from typing import TypeVar
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server import profiling
+from wecom_bot_mcp_server import tracing
+from wecom_bot_mcp_server.bot_config import get_bot_registry
+from wecom_bot_mcp_server.bot_config import parse_group_target
+from wecom_bot_mcp_server.deadline import track_stage
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
+
+if TYPE_CHECKING:
+    # Import third-party modules
+    from loguru import Record
+
+# Constants
+DEFAULT_BOT_LABEL = "default"
+# Label of bot ids that are neither configured bots nor groups with members
+UNKNOWN_BOT_LABEL = "unknown"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+T = TypeVar("T")
+
+# Tool and bot of the tool call running in the current task
+_current_call: ContextVar[dict[str, str] | None] = ContextVar("wecom_current_call", default=None)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the Prometheus text format."""
+    if math.isinf(value):
+        return "+Inf"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """Format a label set for the Prometheus text format."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Counter:
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        """Initialize the counter.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increase the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values
+
+        """
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Get the current value for a label set."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        """Render the samples in the Prometheus text format."""
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Describe the samples as JSON-serializable dictionaries."""
+        return [{**dict(zip(self.labelnames, key)), "value": value} for key, value in sorted(self._values.items())]
+
+    def clear(self) -> None:
+        """Drop all samples."""
+        self._values.clear()
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Decrease the gauge.
+
+        Args:
+            amount: Decrement
+            **labels: Label values
+
+        """
+        self.inc(-amount, **labels)
+
+
+class Histogram(Counter):
+    """Distribution of observed values per label set, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels
+            buckets: Sorted upper bounds of the buckets (``+Inf`` is added)
+
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*buckets, math.inf)
+        # Per label set: [per-bucket counts..., sum]
+        self._states: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record an observation.
+
+        Args:
+            value: Observed value
+            **labels: Label values
+
+        """
+        key = self._key(labels)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = [0.0] * (len(self.buckets) + 1)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        """Get the number of observations for a label set."""
+        state = self._states.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def quantile(self, q: float, **labels: Any) -> float:
+        """Estimate a quantile from the buckets (linear interpolation, like ``histogram_quantile``).
+
+        Args:
+            q: Quantile between 0 and 1
+            **labels: Label values
+
+        Returns:
+            float: Estimated quantile (0.0 without observations)
+
+        """
+        state = self._states.get(self._key(labels))
+        return self._quantile(state, q) if state else 0.0
+
+    def _quantile(self, state: list[float], q: float) -> float:
+        total = sum(state[:-1])
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0.0
+        for index, bound in enumerate(self.buckets):
+            previous = cumulative
+            cumulative += state[index]
+            if cumulative >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * ((rank - previous) / state[index] if state[index] else 0.0)
+        return self.buckets[-2]
+
+    def render(self) -> list[str]:
+        """Render the samples in the Prometheus text format."""
+        lines = []
+        for key, state in sorted(self._states.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                bucket_labels = {**labels, "le": _format_value(bound)}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+        return lines
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Describe each label set's count, sum and estimated quantiles."""
+        samples = []
+        for key, state in sorted(self._states.items()):
+            count = sum(state[:-1])
+            samples.append(
+                {
+                    **dict(zip(self.labelnames, key)),
+                    "count": int(count),
+                    "sum": round(state[-1], 6),
+                    "p50": round(self._quantile(state, 0.5), 6),
+                    "p99": round(self._quantile(state, 0.99), 6),
+                }
+            )
+        return samples
+
+    def clear(self) -> None:
+        """Drop all observations."""
+        self._states.clear()
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, Counter] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        """Create and register a gauge."""
+        gauge = Gauge(name, documentation, labelnames)
+        self._register(gauge)
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self._register(histogram)
+        return histogram
+
+    def _register(self, metric: Counter) -> Counter:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """Describe every metric as JSON-serializable data.
+
+        Returns:
+            dict: Mapping of metric name to samples
+
+        """
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def clear(self) -> None:
+        """Drop all samples (mainly for testing)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+# Global registry and the server's metrics
+REGISTRY = MetricsRegistry()
+REQUESTS = REGISTRY.counter(
+    "wecom_requests_total", "Tool calls by outcome and WeCom errcode.", ("tool", "bot", "outcome", "errcode")
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "wecom_stage_duration_seconds", "Latency of each stage of a tool call.", ("tool", "bot", "stage")
+)
+BYTES_SENT = REGISTRY.counter("wecom_bytes_sent_total", "Payload bytes sent to WeCom.", ("tool", "bot"))
+RATE_LIMIT_WAIT = REGISTRY.histogram(
+    "wecom_rate_limit_wait_seconds", "Time spent waiting for a webhook's rate budget.", ("tool", "bot")
+)
+INFLIGHT = REGISTRY.gauge("wecom_inflight_requests", "Tool calls currently in progress.", ("tool",))
+LOOP_LAG = REGISTRY.histogram(
+    "wecom_event_loop_lag_seconds",
+    "How much later than scheduled the event loop ran a timer.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_BLOCKS = REGISTRY.counter(
+    "wecom_event_loop_blocks_total", "Times the event loop was blocked longer than the detection threshold."
+)
+IDEMPOTENT_REPLAYS = REGISTRY.counter(
+    "wecom_idempotent_replays_total", "Calls answered with the stored result of an earlier call.", ("tool",)
+)
+DEDUP_SUPPRESSED = REGISTRY.counter(
+    "wecom_dedup_suppressed_total", "Duplicate messages suppressed by the deduplication window.", ("tool", "bot")
+)
+TIMEOUTS = REGISTRY.counter(
+    "wecom_timeouts_total", "Tool calls that ran out of time, by the stage that was running.", ("tool", "stage")
+)
+QUEUE_DEPTH = REGISTRY.gauge("wecom_queue_depth", "Sends in the send queue (waiting or in flight).", ("bot",))
+QUEUE_OVERFLOWS = REGISTRY.counter(
+    "wecom_queue_overflows_total",
+    "Sends rejected or dropped because the send queue was full, by the limit reached.",
+    ("bot", "scope", "action"),
+)
+EXPIRED = REGISTRY.counter(
+    "wecom_expired_total", "Queued sends discarded because their time-to-live passed.", ("tool", "bot")
+)
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the global metrics registry.
+
+    Returns:
+        MetricsRegistry: The global registry
+
+    """
+    return REGISTRY
+
+
+def _errcode_label(error: BaseException) -> str:
+    """Find the WeCom errcode behind an error, following the ``raise ... from`` chain."""
+    current: BaseException | None = error
+    while current is not None:
+        if isinstance(current, WeComError) and current.errcode is not None:
+            return str(current.errcode)
+        current = current.__cause__
+    return "none"
+
+
+def bot_label(bot_id: str | None) -> str:
+    """Get the ``bot`` label value for a bot id.
+
+    Bot ids come from clients, so ids that are not configured bots or groups are
+    counted under one label rather than adding a series each.
+
+    Args:
+        bot_id: Bot identifier or ``@group:`` target (None for the default bot)
+
+    Returns:
+        str: Lowercase bot id, ``default`` or ``unknown``
+
+    """
+    if not bot_id:
+        return DEFAULT_BOT_LABEL
+    label = bot_id.lower()
+    if label == DEFAULT_BOT_LABEL:
+        return label
+    registry = get_bot_registry()
+    group = parse_group_target(label)
+    known = registry.has_group(group) if group is not None else registry.has_bot(label)
+    return label if known else UNKNOWN_BOT_LABEL
+
+
+def add_call_fields(record: "Record") -> None:
+    """Add the tool and bot of the running tool call to a log record (a loguru patcher).
+
+    Args:
+        record: Log record
+
+    """
+    call = _current_call.get()
+    if call is not None:
+        record["extra"].setdefault("tool", call["tool"])
+        record["extra"].setdefault("bot", call["bot"])
+
+
+def set_current_bot(bot_id: str | None) -> None:
+    """Attribute the rest of the running tool call to a bot (e.g. after routing or failover).
+
+    Args:
+        bot_id: Bot identifier (None for the default bot)
+
+    """
+    call = _current_call.get()
+    if call is not None:
+        call["bot"] = bot_label(bot_id)
+        tracing.set_attribute("wecom.bot_id", call["bot"])
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a stage of the running tool call, and trace it as a child span when tracing is enabled.
+
+    The stage is also reported if the call's deadline expires during it.
+
+    Args:
+        name: Stage name (e.g. ``validate``, ``encode``, ``upload``, ``http``)
+
+    """
+    call = _current_call.get()
+    if call is None:
+        with track_stage(name):
+            yield
+        return
+    start = time.perf_counter()
+    try:
+        with track_stage(name), tracing.span(f"wecom.{name}", {"wecom.bot_id": call["bot"]}):
+            yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, tool=call["tool"], bot=call["bot"], stage=name)
+
+
+def record_bytes_sent(size: int) -> None:
+    """Count payload bytes sent by the running tool call.
+
+    Args:
+        size: Number of bytes
+
+    """
+    call = _current_call.get()
+    if call is not None:
+        BYTES_SENT.inc(size, tool=call["tool"], bot=call["bot"])
+        tracing.set_attribute("wecom.bytes", size)
+
+
+def record_dedup_suppressed() -> None:
+    """Count a duplicate message suppressed in the running tool call."""
+    call = _current_call.get()
+    if call is not None:
+        DEDUP_SUPPRESSED.inc(tool=call["tool"], bot=call["bot"])
+
+
+def record_expired() -> None:
+    """Count a send of the running tool call discarded because its time-to-live passed."""
+    call = _current_call.get()
+    if call is not None:
+        EXPIRED.inc(tool=call["tool"], bot=call["bot"])
+
+
+def record_rate_limit_wait(seconds: float) -> None:
+    """Record time the running tool call waited for rate budget.
+
+    Args:
+        seconds: Wait time in seconds
+
+    """
+    call = _current_call.get()
+    if call is not None:
+        RATE_LIMIT_WAIT.observe(seconds, tool=call["tool"], bot=call["bot"])
+
+
+def instrument_tool(tool: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorate a tool implementation to record request counts and total latency, and trace it as a span.
+
+    Args:
+        tool: Tool name used as the ``tool`` label
+
+    Returns:
+        Callable: Decorator for an async function taking an optional ``bot_id`` argument
+
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            bot_id = signature.bind_partial(*args, **kwargs).arguments.get("bot_id")
+            call = {"tool": tool, "bot": bot_label(bot_id)}
+            token = _current_call.set(call)
+            INFLIGHT.inc(tool=tool)
+            start = time.perf_counter()
+            try:
+                with (
+                    tracing.span(f"wecom.{tool}", {"wecom.tool": tool, "wecom.bot_id": call["bot"]}),
+                    profiling.profile_call(tool),
+                ):
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        errcode = _errcode_label(e)
+                        if isinstance(e, WeComTimeoutError):
+                            TIMEOUTS.inc(tool=tool, stage=e.stage)
+                        tracing.set_attribute("wecom.errcode", errcode)
+                        REQUESTS.inc(tool=tool, bot=call["bot"], outcome="error", errcode=errcode)
+                        logger.bind(
+                            tool=tool,
+                            bot=call["bot"],
+                            errcode=errcode,
+                            duration_ms=round((time.perf_counter() - start) * 1000, 1),
+                        ).error(f"{tool} failed: {e}")
+                        raise
+                    outcome = result.get("status", "success") if isinstance(result, dict) else "success"
+                    tracing.set_attribute("wecom.errcode", "0")
+                    tracing.set_attribute("wecom.outcome", outcome)
+            finally:
+                STAGE_DURATION.observe(time.perf_counter() - start, tool=tool, bot=call["bot"], stage="total")
+                INFLIGHT.dec(tool=tool)
+                _current_call.reset(token)
+            REQUESTS.inc(tool=tool, bot=call["bot"], outcome=outcome, errcode="0")
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,131 @@
+"""Weighted webhook pools for WeCom Bot MCP Server.
+
+A logical bot can be backed by several webhook URLs (each one a separate WeCom
+bot added to the same chat). Every webhook has its own per-minute rate limit, so
+spreading sends across the pool multiplies the throughput of the logical bot.
+
+Pool members are configured in WECOM_BOTS:
+
+    WECOM_BOTS='{"alerts": {"name": "Alerts", "webhook_urls": [
+        "https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=a",
+        {"url": "https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=b", "weight": 2}
+    ]}}'
+
+Selection:
+- Sends with a ``conversation_key`` always use the same member (weighted rendezvous
+  hashing), so messages of one conversation keep their order.
+- Other sends use smooth weighted round-robin over the members that still have rate
+  budget; when every member is exhausted, over all members, so queued sends wait on
+  each member's rate limit in proportion to its weight.
+"""
+
+# Import built-in modules
+from dataclasses import dataclass
+import hashlib
+import math
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.ratelimit import RateLimiter
+from wecom_bot_mcp_server.ratelimit import get_rate_limiter
+
+
+@dataclass(frozen=True)
+class WebhookEndpoint:
+    """A webhook URL in a bot's pool.
+
+    Attributes:
+        url: Webhook URL
+        weight: Relative share of the traffic sent to this webhook
+
+    """
+
+    url: str
+    weight: int = 1
+
+    def __post_init__(self) -> None:
+        """Validate the endpoint after initialization."""
+        if not self.url.startswith(("http://", "https://")):
+            raise WeComError(
+                f"Webhook URL must start with 'http://' or 'https://'. Got: '{self.url}'",
+                ErrorCode.VALIDATION_ERROR,
+            )
+        if self.weight < 1:
+            raise WeComError(f"Webhook weight must be at least 1. Got: {self.weight}", ErrorCode.VALIDATION_ERROR)
+
+
+class WebhookPool:
+    """Selects a webhook from a bot's pool of endpoints."""
+
+    def __init__(self, endpoints: list[WebhookEndpoint], limiter: RateLimiter | None = None) -> None:
+        """Initialize the pool.
+
+        Args:
+            endpoints: Pool members
+            limiter: Rate limiter used to check budgets (defaults to the global limiter)
+
+        """
+        if not endpoints:
+            raise WeComError("Webhook pool needs at least one endpoint", ErrorCode.VALIDATION_ERROR)
+        self.endpoints = list(endpoints)
+        self._limiter = limiter
+        # Smooth weighted round-robin state (nginx style), one entry per endpoint
+        self._current = [0] * len(self.endpoints)
+
+    @property
+    def limiter(self) -> RateLimiter:
+        """Rate limiter used for budget checks."""
+        return self._limiter or get_rate_limiter()
+
+    def select(self, conversation_key: str | None = None) -> str:
+        """Pick the webhook URL for the next send.
+
+        Args:
+            conversation_key: Optional key keeping a conversation on one webhook
+
+        Returns:
+            str: Selected webhook URL
+
+        """
+        if len(self.endpoints) == 1:
+            return self.endpoints[0].url
+        if conversation_key:
+            return self._select_sticky(conversation_key)
+
+        limiter = self.limiter
+        available = [i for i, endpoint in enumerate(self.endpoints) if limiter.delay(endpoint.url) <= 0]
+        if not available:
+            # Everything is throttled: queue the send on members in proportion to their weight
+            available = list(range(len(self.endpoints)))
+
+        total = 0
+        best = available[0]
+        for i in available:
+            self._current[i] += self.endpoints[i].weight
+            total += self.endpoints[i].weight
+            if self._current[i] > self._current[best]:
+                best = i
+        self._current[best] -= total
+        return self.endpoints[best].url
+
+    def _select_sticky(self, conversation_key: str) -> str:
+        """Pick the webhook for a conversation with weighted rendezvous hashing.
+
+        Adding or removing a member only moves the conversations of that member.
+
+        Args:
+            conversation_key: Conversation key
+
+        Returns:
+            str: Selected webhook URL
+
+        """
+
+        def score(endpoint: WebhookEndpoint) -> float:
+            digest = hashlib.blake2b(f"{conversation_key}\0{endpoint.url}".encode(), digest_size=8).digest()
+            # Map the hash into (0, 1) and weight it: -w / ln(u) is larger for heavier members
+            unit = (int.from_bytes(digest, "big") + 1) / (2**64 + 2)
+            return -endpoint.weight / math.log(unit)
+
+        return max(self.endpoints, key=score).url
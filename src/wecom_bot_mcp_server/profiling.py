@@ -0,0 +1,290 @@
+"""Opt-in per-call profiling for WeCom Bot MCP Server.
+
+When enabled, every tool call is run under a profiler (see ``metrics.instrument_tool``).
+Calls that take longer than the slow threshold leave a profile in the log directory.
+Faster calls are discarded. Only one call is profiled at a time, because a profiler
+observes the whole event loop thread. A profile therefore also shows whatever else
+the loop ran during the slow call, which is often the reason it was slow.
+
+Profiling is disabled by default. While disabled, ``profile_call()`` returns a
+shared no-op context manager.
+
+Environment Variables:
+    WECOM_PROFILE: ``off`` (default), ``cprofile`` (deterministic, writes ``.pstats``
+        files for ``python -m pstats`` or snakeviz) or ``sample`` (a stack sampler with
+        low overhead, writes ``.speedscope.json`` files for https://www.speedscope.app)
+    WECOM_PROFILE_SLOW_MS: Calls slower than this leave a profile (default: 1000)
+    WECOM_PROFILE_KEEP: Profiles kept on disk; the oldest are deleted (default: 20)
+    WECOM_PROFILE_INTERVAL_MS: Sampling interval of the ``sample`` profiler (default: 5)
+    WECOM_PROFILE_DIR: Profile directory (default: ``profiles`` in the log directory)
+"""
+
+# Import built-in modules
+import cProfile
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
+from contextlib import contextmanager
+from contextlib import nullcontext
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.utils import get_env_float
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+PROFILERS = ("off", "cprofile", "sample")
+DEFAULT_SLOW_MS = 1000
+DEFAULT_KEEP = 20
+DEFAULT_INTERVAL_MS = 5.0
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_NOOP = nullcontext()
+
+
+@dataclass
+class ProfileSettings:
+    """Profiling configuration."""
+
+    profiler: str
+    directory: Path
+    slow_ms: float = DEFAULT_SLOW_MS
+    keep: int = DEFAULT_KEEP
+    interval_ms: float = DEFAULT_INTERVAL_MS
+
+
+# Settings in use, None while profiling is disabled
+_settings: ProfileSettings | None = None
+# Whether a call is being profiled right now (one at a time)
+_active = False
+
+
+class StackSampler:
+    """Sample the stack of one thread at a fixed interval from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        """Prepare a sampler.
+
+        Args:
+            thread_id: Identifier of the thread to sample
+            interval: Seconds between samples
+
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[tuple[tuple[str, str, int], ...]] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wecom-profiler", daemon=True)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                # co_qualname is new in Python 3.11
+                stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def to_speedscope(self, name: str, duration_ms: float) -> dict[str, Any]:
+        """Export the samples as a speedscope "sampled" profile.
+
+        Args:
+            name: Profile name
+            duration_ms: Duration of the profiled call
+
+        Returns:
+            dict: speedscope file contents
+
+        """
+        frames: dict[tuple[str, str, int], int] = {}
+        samples = []
+        weights = []
+        interval_ms = self.interval * 1000
+        for stack, count in self.stacks.most_common():
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(round(count * interval_ms, 3))
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "wecom-bot-mcp-server",
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(duration_ms, 3),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def is_enabled() -> bool:
+    """Check whether tool calls are profiled.
+
+    Returns:
+        bool: True if profiling is enabled
+
+    """
+    return _settings is not None
+
+
+def set_profile_settings(settings: ProfileSettings | None) -> None:
+    """Profile tool calls with the given settings, or disable profiling.
+
+    Args:
+        settings: Profiling configuration, or None to disable profiling
+
+    """
+    global _settings
+    _settings = settings
+
+
+def configure_profiling(profiler: str | None = None) -> bool:
+    """Enable profiling as configured by the WECOM_PROFILE* environment variables.
+
+    Args:
+        profiler: ``off``, ``cprofile`` or ``sample``. If None, reads WECOM_PROFILE.
+
+    Returns:
+        bool: True if profiling was enabled
+
+    """
+    profiler = (profiler if profiler is not None else os.getenv("WECOM_PROFILE", "off")).strip().lower() or "off"
+    if profiler not in PROFILERS:
+        logger.warning(f"Unknown profiler '{profiler}', expected one of: {', '.join(PROFILERS)}")
+        profiler = "off"
+    if profiler == "off":
+        set_profile_settings(None)
+        return False
+
+    directory_env = os.getenv("WECOM_PROFILE_DIR")
+    if directory_env:
+        directory = Path(directory_env)
+    else:
+        # Import local modules
+        from wecom_bot_mcp_server.log_config import LOG_DIR
+
+        directory = LOG_DIR / "profiles"
+    settings = ProfileSettings(
+        profiler=profiler,
+        directory=directory,
+        slow_ms=get_env_float("WECOM_PROFILE_SLOW_MS", DEFAULT_SLOW_MS),
+        keep=get_env_int("WECOM_PROFILE_KEEP", DEFAULT_KEEP),
+        interval_ms=get_env_float("WECOM_PROFILE_INTERVAL_MS", DEFAULT_INTERVAL_MS) or DEFAULT_INTERVAL_MS,
+    )
+    set_profile_settings(settings)
+    logger.info(
+        f"Profiling tool calls with {profiler}; calls slower than {settings.slow_ms:g} ms "
+        f"leave a profile in {settings.directory}"
+    )
+    return True
+
+
+def _prune(directory: Path, keep: int) -> None:
+    """Delete the oldest profiles beyond ``keep`` (file names start with their timestamp)."""
+    profiles = sorted(path for path in directory.iterdir() if path.name.endswith((".pstats", ".speedscope.json")))
+    for path in profiles[: max(0, len(profiles) - keep)]:
+        path.unlink(missing_ok=True)
+
+
+@contextmanager
+def _profiled(settings: ProfileSettings, tool: str) -> Iterator[None]:
+    """Profile a block and keep the profile if it was slow."""
+    global _active
+    _active = True
+    profiler = None
+    sampler = None
+    try:
+        if settings.profiler == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(threading.get_ident(), settings.interval_ms / 1000)
+            sampler.start()
+    except ValueError as e:  # another profiler (e.g. a debugger) is already active
+        logger.debug(f"Not profiling {tool}: {e}")
+        _active = False
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        _active = False
+        if duration_ms >= settings.slow_ms:
+            _write_profile(settings, tool, duration_ms, profiler, sampler)
+
+
+def _write_profile(
+    settings: ProfileSettings,
+    tool: str,
+    duration_ms: float,
+    profiler: cProfile.Profile | None,
+    sampler: StackSampler | None,
+) -> None:
+    """Write the profile of a slow call and prune old profiles."""
+    if profiler is None and sampler is None:
+        return
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() % 1_000_000_000:09d}"
+    name = f"{stamp}_{tool}_{duration_ms:.0f}ms"
+    try:
+        settings.directory.mkdir(parents=True, exist_ok=True)
+        if profiler is not None:
+            path = settings.directory / f"{name}.pstats"
+            profiler.dump_stats(path)
+        elif sampler is not None:
+            path = settings.directory / f"{name}.speedscope.json"
+            path.write_text(json.dumps(sampler.to_speedscope(name, duration_ms)), encoding="utf-8")
+        _prune(settings.directory, settings.keep)
+    except OSError as e:
+        logger.warning(f"Failed to write profile of slow {tool} call: {e}")
+        return
+    logger.warning(f"Slow {tool} call took {duration_ms:.0f} ms, profile written to {path}")
+
+
+def profile_call(tool: str) -> AbstractContextManager[None]:
+    """Profile a tool call, keeping the profile if the call is slow.
+
+    Args:
+        tool: Tool name, used in the profile file name
+
+    Returns:
+        AbstractContextManager: Context manager around the call (a no-op while profiling
+            is disabled or another call is being profiled)
+
+    """
+    if _settings is None or _active:
+        return _NOOP
+    return _profiled(_settings, tool)
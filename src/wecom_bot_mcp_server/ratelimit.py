@@ -0,0 +1,264 @@
+"""Client-side rate limiting for WeCom webhooks.
+
+WeCom allows about 20 messages per minute per webhook key and rejects the
+excess with errcode 45009. The limiter tracks a sliding window of send times per
+webhook URL, so sends wait for a free slot instead of being rejected, and webhook
+pools can pick the member with the most budget left.
+
+A request holds its slot while in flight and is counted from its completion time,
+because the server counts a request when it arrives, which can be well after the
+slot was taken when the HTTP client is busy.
+
+Environment Variables:
+    WECOM_RATE_LIMIT_PER_MINUTE: Sends allowed per webhook per minute (default: 20).
+        Set to 0 to disable client-side rate limiting.
+"""
+
+# Import built-in modules
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+import time
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.deadline import ensure_time_for
+from wecom_bot_mcp_server.deadline import track_stage
+from wecom_bot_mcp_server.errors import WeComExpiredError
+from wecom_bot_mcp_server.metrics import record_rate_limit_wait
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+DEFAULT_RATE_LIMIT = 20
+DEFAULT_RATE_WINDOW = 60.0
+
+
+class RateLimiter:
+    """Sliding-window rate limiter keyed by webhook URL."""
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_RATE_LIMIT,
+        window: float = DEFAULT_RATE_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the rate limiter.
+
+        Args:
+            limit: Sends allowed per key within the window. 0 disables limiting.
+            window: Window length in seconds
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        self._sends: dict[str, deque[float]] = {}
+        self._inflight: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether sends are limited at all."""
+        return self.limit > 0
+
+    def _window_for(self, key: str) -> deque[float]:
+        """Get the send timestamps of a key with expired entries dropped.
+
+        Args:
+            key: Webhook URL
+
+        Returns:
+            deque: Send times within the current window, oldest first
+
+        """
+        sends = self._sends.setdefault(key, deque())
+        cutoff = self._clock() - self.window
+        while sends and sends[0] <= cutoff:
+            sends.popleft()
+        return sends
+
+    def _in_use(self, key: str) -> int:
+        """Count sends in the window plus requests still in flight."""
+        return len(self._window_for(key)) + self._inflight.get(key, 0)
+
+    def remaining(self, key: str) -> int:
+        """Count the sends still allowed for a key in the current window.
+
+        Args:
+            key: Webhook URL
+
+        Returns:
+            int: Remaining budget (a large number when limiting is disabled)
+
+        """
+        if not self.enabled:
+            return 1 << 30
+        return max(self.limit - self._in_use(key), 0)
+
+    def delay(self, key: str) -> float:
+        """Seconds until a send to the key is allowed.
+
+        Args:
+            key: Webhook URL
+
+        Returns:
+            float: 0.0 if a send is allowed now
+
+        """
+        if not self.enabled:
+            return 0.0
+        sends = self._window_for(key)
+        inflight = self._inflight.get(key, 0)
+        if len(sends) + inflight < self.limit:
+            return 0.0
+        if inflight >= self.limit:
+            # Every slot is held by a running request; those count from their completion
+            return self.window
+        return max(sends[len(sends) - (self.limit - inflight)] + self.window - self._clock(), 0.0)
+
+    def last_used(self, key: str) -> float:
+        """Time of the most recent completed send to the key.
+
+        Args:
+            key: Webhook URL
+
+        Returns:
+            float: Clock value of the last send, or -inf if never used
+
+        """
+        sends = self._sends.get(key)
+        return sends[-1] if sends else float("-inf")
+
+    def record(self, key: str) -> None:
+        """Record a completed send to the key.
+
+        Args:
+            key: Webhook URL
+
+        """
+        if self.enabled:
+            self._window_for(key).append(self._clock())
+
+    async def acquire(self, key: str) -> float:
+        """Wait until a send to the key is allowed, then hold a slot for it.
+
+        The slot must be given back with ``release`` once the request completes.
+
+        Args:
+            key: Webhook URL
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            WeComTimeoutError: If the running tool call's deadline expires before a slot is free
+            WeComExpiredError: If the running send's time-to-live would pass before a slot is free
+
+        """
+        # Import local modules
+        from wecom_bot_mcp_server.send_queue import ensure_fresh_for
+
+        waited = 0.0
+        with track_stage("rate_limit"):
+            while True:
+                delay = self.delay(key)
+                if delay <= 0:
+                    # No await between the check and the reservation, so concurrent callers cannot overbook
+                    if self.enabled:
+                        self._inflight[key] = self._inflight.get(key, 0) + 1
+                    return waited
+                if self._inflight.get(key, 0) < self.limit:
+                    # The delay is then a lower bound, so a call (or send) that cannot wait that long gives up now
+                    ensure_time_for(delay, "rate_limit")
+                    ensure_fresh_for(delay)
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def release(self, key: str, sent: bool = True) -> None:
+        """Give back a slot held by ``acquire`` and count the send from now.
+
+        Args:
+            key: Webhook URL
+            sent: Whether a request was made with the slot; if not, it is not counted
+
+        """
+        if not self.enabled or not self._inflight.get(key):
+            return
+        self._inflight[key] -= 1
+        if not self._inflight[key]:
+            del self._inflight[key]
+        if sent:
+            self.record(key)
+
+    @asynccontextmanager
+    async def slot(self, key: str) -> AsyncIterator[float]:
+        """Hold a send slot for the duration of a request.
+
+        Args:
+            key: Webhook URL
+
+        Yields:
+            float: Seconds spent waiting for the slot
+
+        """
+        waited = await self.acquire(key)
+        try:
+            yield waited
+        finally:
+            self.release(key)
+
+    def reset(self) -> None:
+        """Forget all recorded sends."""
+        self._sends.clear()
+        self._inflight.clear()
+
+
+# Global rate limiter instance
+_rate_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the global rate limiter instance.
+
+    Returns:
+        RateLimiter: The global rate limiter, configured from the environment
+
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(limit=get_env_int("WECOM_RATE_LIMIT_PER_MINUTE", DEFAULT_RATE_LIMIT))
+    return _rate_limiter
+
+
+@asynccontextmanager
+async def rate_limited(webhook_url: str) -> AsyncIterator[None]:
+    """Wait for the send's turn in its bot's lane and the webhook's rate budget, and hold a slot while sending.
+
+    Args:
+        webhook_url: Webhook URL about to be called
+
+    """
+    # Import local modules
+    from wecom_bot_mcp_server.send_queue import mark_dispatched
+    from wecom_bot_mcp_server.send_queue import wait_for_turn
+
+    await wait_for_turn()
+    limiter = get_rate_limiter()
+    waited = await limiter.acquire(webhook_url)
+    record_rate_limit_wait(waited)
+    if waited > 0:
+        logger.info(f"Rate limit reached, waited {waited:.2f}s before sending")
+    try:
+        mark_dispatched()
+    except WeComExpiredError:
+        # Discarded without a request, so the slot is not counted against the budget
+        limiter.release(webhook_url, sent=False)
+        raise
+    try:
+        yield
+    finally:
+        limiter.release(webhook_url)
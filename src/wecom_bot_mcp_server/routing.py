@@ -0,0 +1,403 @@
+"""Rule-based bot routing for WeCom Bot MCP Server.
+
+When ``send_message`` is called without a ``bot_id``, the message content is
+matched against a declarative routing table and the first matching rule (in
+table order) picks the bot. Rules are configured with the ``WECOM_ROUTES``
+environment variable as a JSON list:
+
+    WECOM_ROUTES='[
+        {"name": "critical", "severity": "critical", "bot_id": "oncall"},
+        {"name": "database", "keywords": ["postgres", "mysql"], "bot_id": "dba"},
+        {"name": "deploys", "regex": "deploy(ed|ing)? to prod", "bot_id": "@group:release"}
+    ]'
+
+Rule kinds:
+- ``keyword`` / ``keywords``: case-insensitive substring match
+- ``regex``: Python regular expression, case-sensitive; use scoped inline flags
+  such as ``(?i:deploy)`` (global flags such as ``(?i)deploy`` are rejected, since
+  every rule is embedded in one combined expression)
+- ``severity``: matches severity words in the content at or above the given level
+  (``critical`` > ``error`` > ``warning`` > ``info``)
+
+Keyword and severity rules are compiled into one trie-shaped regular expression
+(an automaton over all terms, scanned by the regex engine in C) and regex rules into
+one combined regular expression, so routing costs a single scan of the content per
+rule kind regardless of how many rules are configured.
+"""
+
+# Import built-in modules
+from dataclasses import dataclass
+import json
+import os
+import re
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+
+# Constants
+ENV_ROUTES_CONFIG = "WECOM_ROUTES"
+SEVERITY_LEVELS = ("critical", "error", "warning", "info")
+SEVERITY_WORDS: dict[str, tuple[str, ...]] = {
+    "critical": ("critical", "fatal", "emergency", "p0", "sev0", "sev1"),
+    "error": ("error", "failed", "failure", "p1", "sev2"),
+    "warning": ("warning", "warn", "p2", "sev3"),
+    "info": ("info", "notice", "resolved"),
+}
+
+
+# Trie key marking the end of a term; real trie keys are single characters
+_TERMINAL = ""
+
+
+@dataclass(frozen=True)
+class RoutingRule:
+    """A single routing rule.
+
+    Attributes:
+        name: Rule name reported in tool results
+        bot_id: Target bot id (may be an ``@group:<tag>`` target)
+        kind: Rule kind: ``keyword``, ``severity`` or ``regex``
+        terms: Keywords or severity words (lowercase), or the single regex source
+
+    """
+
+    name: str
+    bot_id: str
+    kind: str
+    terms: tuple[str, ...]
+
+    @classmethod
+    def from_dict(cls, index: int, data: dict[str, Any]) -> "RoutingRule":
+        """Build a rule from its JSON configuration.
+
+        Args:
+            index: Position of the rule in the table (used for the default name)
+            data: Rule configuration
+
+        Returns:
+            RoutingRule: The parsed rule
+
+        Raises:
+            WeComError: If the rule is invalid
+
+        """
+        bot_id = str(data.get("bot_id", "")).strip()
+        if not bot_id:
+            raise WeComError(f"Routing rule #{index} has no bot_id", ErrorCode.VALIDATION_ERROR)
+        name = str(data.get("name") or f"rule-{index}")
+
+        if data.get("regex"):
+            pattern = str(data["regex"])
+            terms: tuple[str, ...] = (pattern,)
+            kind = "regex"
+            try:
+                compiled = re.compile(pattern)
+            except re.error as e:
+                raise WeComError(f"Routing rule '{name}' has invalid regex: {e}", ErrorCode.VALIDATION_ERROR) from e
+            if compiled.groupindex:
+                raise WeComError(f"Routing rule '{name}' must not use named groups", ErrorCode.VALIDATION_ERROR)
+            if re.search(r"\\\d", pattern):
+                raise WeComError(f"Routing rule '{name}' must not use backreferences", ErrorCode.VALIDATION_ERROR)
+            error = _embedding_error(pattern)
+            if error:
+                raise WeComError(f"Routing rule '{name}' has invalid regex: {error}", ErrorCode.VALIDATION_ERROR)
+        elif data.get("keyword") or data.get("keywords"):
+            keywords = data.get("keywords") or [data["keyword"]]
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            terms = tuple(str(k).lower() for k in keywords if str(k))
+            kind = "keyword"
+            if not terms:
+                raise WeComError(f"Routing rule '{name}' has no keywords", ErrorCode.VALIDATION_ERROR)
+        elif data.get("severity"):
+            level = str(data["severity"]).lower()
+            if level not in SEVERITY_LEVELS:
+                raise WeComError(
+                    f"Routing rule '{name}' has unknown severity '{level}'. Supported: {', '.join(SEVERITY_LEVELS)}",
+                    ErrorCode.VALIDATION_ERROR,
+                )
+            terms = tuple(w for lvl in SEVERITY_LEVELS[: SEVERITY_LEVELS.index(level) + 1] for w in SEVERITY_WORDS[lvl])
+            kind = "severity"
+        else:
+            raise WeComError(
+                f"Routing rule '{name}' needs one of: keyword, keywords, regex, severity",
+                ErrorCode.VALIDATION_ERROR,
+            )
+
+        return cls(name=name, bot_id=bot_id, kind=kind, terms=terms)
+
+
+def _regex_alternative(index: int, pattern: str) -> str:
+    """Wrap a regex rule for the combined expression, in a group naming its rule.
+
+    Args:
+        index: Position of the rule in the table
+        pattern: Regex source of the rule
+
+    Returns:
+        str: Regular expression source of the alternative
+
+    """
+    return f"(?P<r{index}>{pattern})"
+
+
+def _combined_regex(alternatives: list[str]) -> re.Pattern[str]:
+    """Compile regex rule alternatives into one zero-width lookahead expression.
+
+    Args:
+        alternatives: Wrapped regex rules in priority order
+
+    Returns:
+        re.Pattern: The combined expression
+
+    """
+    return re.compile(f"(?=(?:{'|'.join(alternatives)}))", re.DOTALL)
+
+
+def _embedding_error(pattern: str) -> str | None:
+    """Check that a regex still compiles when embedded in the combined expression.
+
+    Args:
+        pattern: Regex source of a rule
+
+    Returns:
+        str | None: Why the pattern cannot be embedded, or None if it can
+
+    """
+    try:
+        _combined_regex([_regex_alternative(0, pattern)])
+    except re.error as e:
+        if "global flags" in str(e):
+            return f"{e}; use scoped flags such as (?i:...) instead"
+        return str(e)
+    return None
+
+
+@dataclass(frozen=True)
+class RouteMatch:
+    """Result of routing a message.
+
+    Attributes:
+        rule: Name of the matching rule
+        bot_id: Bot id selected by the rule
+
+    """
+
+    rule: str
+    bot_id: str
+
+
+def _build_trie_pattern(node: dict[str, Any]) -> str:
+    """Emit a regular expression matching every term stored in a trie.
+
+    Sharing prefixes lets the regex engine reject a position after a few
+    character comparisons instead of trying every term in turn.
+
+    Args:
+        node: Trie node (characters map to child nodes)
+
+    Returns:
+        str: Regular expression source for the sub-trie
+
+    """
+    branches = [re.escape(char) + _build_trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if _TERMINAL in node else body
+
+
+class Router:
+    """Routes message content to a bot id using a compiled rule table."""
+
+    def __init__(self, rules: list[RoutingRule] | None = None) -> None:
+        """Initialize the router.
+
+        Args:
+            rules: Routing rules in priority order
+
+        """
+        self._rules: list[RoutingRule] = []
+        for rule in rules or []:
+            error = _embedding_error(rule.terms[0]) if rule.kind == "regex" else None
+            if error:
+                logger.warning(f"Skipping routing rule '{rule.name}': invalid regex: {error}")
+                continue
+            self._rules.append(rule)
+        # Trie of keyword/severity terms; terminal entries hold (rule index, whole-word only)
+        self._trie: dict[str, Any] = {}
+        self._term_regex: re.Pattern[str] | None = None
+        self._pattern_regex: re.Pattern[str] | None = None
+        self._group_to_rule: dict[int, int] = {}
+        self._compile()
+
+    def _compile(self) -> None:
+        """Compile the rules into the term automaton and the combined regex.
+
+        Both expressions are wrapped in a zero-width lookahead, so the scan reports a
+        match at every position instead of consuming text and overlapping matches of
+        higher-priority rules are not hidden.
+        """
+        regex_alternatives = []
+        for index, rule in enumerate(self._rules):
+            if rule.kind == "regex":
+                regex_alternatives.append(_regex_alternative(index, rule.terms[0]))
+                continue
+            for term in rule.terms:
+                node = self._trie
+                for char in term:
+                    node = node.setdefault(char, {})
+                node.setdefault(_TERMINAL, []).append((index, rule.kind == "severity"))
+
+        if self._trie:
+            self._term_regex = re.compile(f"(?=({_build_trie_pattern(self._trie)}))", re.IGNORECASE | re.DOTALL)
+        if regex_alternatives:
+            compiled = _combined_regex(regex_alternatives)
+            self._pattern_regex = compiled
+            self._group_to_rule = {number: int(name[1:]) for name, number in compiled.groupindex.items()}
+
+    @property
+    def rules(self) -> list[RoutingRule]:
+        """Routing rules in priority order."""
+        return list(self._rules)
+
+    def _best_term_rule(self, content: str, best: int | None) -> int | None:
+        """Find the highest-priority keyword/severity rule matching the content.
+
+        Args:
+            content: Message content
+            best: Best rule index found so far
+
+        Returns:
+            int | None: Lowest matching rule index, or ``best`` if none is lower
+
+        """
+        if self._term_regex is None:
+            return best
+        for match in self._term_regex.finditer(content):
+            start = match.start()
+            # Every term matching at this position lies on the single trie path spelled by the content
+            node = self._trie
+            for offset, char in enumerate(content[start : start + len(match.group(1))], 1):
+                node = node.get(char.lower(), {})
+                for index, whole_word in node.get(_TERMINAL, ()):
+                    if best is not None and index >= best:
+                        continue
+                    if whole_word and not _is_whole_word(content, start, start + offset):
+                        continue
+                    best = index
+            if best == 0:
+                break
+        return best
+
+    def _best_regex_rule(self, content: str, best: int | None) -> int | None:
+        """Find the highest-priority regex rule matching the content.
+
+        Args:
+            content: Message content
+            best: Best rule index found so far
+
+        Returns:
+            int | None: Lowest matching rule index, or ``best`` if none is lower
+
+        """
+        if self._pattern_regex is None:
+            return best
+        for match in self._pattern_regex.finditer(content):
+            # The rule's wrapper group is the outermost group of its alternative, so it closes last
+            index = self._group_to_rule[match.lastindex or 0]
+            if best is None or index < best:
+                best = index
+        return best
+
+    def route(self, content: str) -> RouteMatch | None:
+        """Pick a bot for the given content.
+
+        Args:
+            content: Message content
+
+        Returns:
+            RouteMatch | None: The first matching rule in table order, or None
+
+        """
+        if not self._rules or not content:
+            return None
+        best = self._best_term_rule(content, None)
+        if best != 0:
+            best = self._best_regex_rule(content, best)
+        if best is None:
+            return None
+        rule = self._rules[best]
+        return RouteMatch(rule=rule.name, bot_id=rule.bot_id)
+
+    @classmethod
+    def from_environment(cls) -> "Router":
+        """Build a router from the WECOM_ROUTES environment variable.
+
+        Invalid rules are skipped with a warning.
+
+        Returns:
+            Router: Router with the configured rules (possibly empty)
+
+        """
+        routes_json = os.getenv(ENV_ROUTES_CONFIG)
+        if not routes_json:
+            return cls()
+        try:
+            routes_data = json.loads(routes_json)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Invalid JSON in {ENV_ROUTES_CONFIG}: {e}")
+            return cls()
+        if not isinstance(routes_data, list):
+            logger.warning(f"{ENV_ROUTES_CONFIG} must be a JSON list of rules")
+            return cls()
+
+        rules = []
+        for index, rule_data in enumerate(routes_data):
+            try:
+                if not isinstance(rule_data, dict):
+                    raise WeComError(f"Routing rule #{index} must be an object", ErrorCode.VALIDATION_ERROR)
+                rules.append(RoutingRule.from_dict(index, rule_data))
+            except WeComError as e:
+                logger.warning(f"Skipping routing rule: {e}")
+        logger.debug(f"Loaded {len(rules)} routing rule(s) from {ENV_ROUTES_CONFIG}")
+        return cls(rules)
+
+
+def _is_whole_word(content: str, start: int, end: int) -> bool:
+    """Check that ``content[start:end]`` is not part of a longer word.
+
+    Args:
+        content: Message content
+        start: Start offset of the term
+        end: End offset of the term
+
+    Returns:
+        bool: True if the term is delimited by non-word characters or the text edges
+
+    """
+    before = content[start - 1] if start > 0 else " "
+    after = content[end] if end < len(content) else " "
+    return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
+
+
+# Global router instance
+_router: Router | None = None
+
+
+def get_router() -> Router:
+    """Get the global router instance.
+
+    Returns:
+        Router: The global router, loaded from the environment on first use
+
+    """
+    global _router
+    if _router is None:
+        _router = Router.from_environment()
+    return _router
@@ -0,0 +1,620 @@
+"""Scheduled message delivery for WeCom Bot MCP Server.
+
+The ``schedule_message`` tool lets an agent post a message later ("post this
+reminder at 09:00") without keeping its session open. Pending messages are kept
+in a min-heap ordered by delivery time, so scheduling and delivering are
+O(log n). A single task sleeps until the earliest message is due. Cancelled
+messages are removed from the heap lazily.
+
+Every pending message is also stored in a local SQLite database, so schedules
+survive restarts. Messages that fell due while the server was down are sent as
+soon as it starts again, unless they are more than ``WECOM_SCHEDULE_MAX_LATENESS``
+seconds late, in which case they are dropped and logged as missed. A message
+whose send fails stays in the database and is retried with exponential backoff,
+up to ``MAX_ATTEMPTS`` attempts; messages WeCom can never accept (validation
+errors) are dropped at once.
+
+The scheduler runs while the server has an open session (stdio) or is listening
+(HTTP and SSE modes). A stdio server therefore only delivers while a client keeps
+it running; use HTTP mode for reminders that must go out when no client is
+connected.
+
+Environment Variables:
+    WECOM_SCHEDULE_DB: Path of the SQLite database (default: ``schedule.db`` in the
+        user data directory)
+    WECOM_SCHEDULE_MAX_LATENESS: Seconds a message may be overdue and still be sent
+        after downtime; 0 sends every overdue message (default: 3600)
+"""
+
+# Import built-in modules
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+import contextvars
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timedelta
+import heapq
+import json
+import os
+from pathlib import Path
+import re
+import threading
+import time
+from typing import Annotated
+from typing import Any
+from typing import TYPE_CHECKING
+import uuid
+
+# Import third-party modules
+from loguru import logger
+from platformdirs import user_data_dir
+from pydantic import Field
+
+# Import local modules
+from wecom_bot_mcp_server.app import APP_NAME
+from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.metrics import instrument_tool
+from wecom_bot_mcp_server.utils import get_env_int
+
+if TYPE_CHECKING:
+    # Import built-in modules
+    import sqlite3
+
+# Constants
+DEFAULT_MAX_LATENESS = 3600
+# Seconds before the first retry of a failed send; doubled for every further attempt
+DEFAULT_RETRY_DELAY = 30.0
+MAX_ATTEMPTS = 5
+MESSAGE_TYPES = ("markdown", "markdown_v2")
+PREVIEW_LENGTH = 80
+_TIME_OF_DAY = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?")
+
+
+@dataclass
+class ScheduledMessage:
+    """A message waiting to be sent at a given time."""
+
+    id: str
+    send_at: float
+    content: str
+    msg_type: str = "markdown_v2"
+    bot_id: str | None = None
+    mentioned_list: list[str] = field(default_factory=list)
+    mentioned_mobile_list: list[str] = field(default_factory=list)
+    created: float = 0.0
+    attempts: int = 0
+
+    def describe(self) -> dict[str, Any]:
+        """Summarize the message for listings.
+
+        Returns:
+            dict: Id, delivery time (ISO 8601, local time), bot, type and a content preview
+
+        """
+        preview = self.content if len(self.content) <= PREVIEW_LENGTH else self.content[:PREVIEW_LENGTH] + "..."
+        return {
+            "id": self.id,
+            "send_at": datetime.fromtimestamp(self.send_at).astimezone().isoformat(timespec="seconds"),
+            "bot_id": self.bot_id,
+            "msg_type": self.msg_type,
+            "preview": preview,
+        }
+
+
+def parse_send_at(send_at: str, now: datetime | None = None) -> float:
+    """Parse a delivery time.
+
+    Args:
+        send_at: ISO 8601 date and time (e.g. ``2026-10-20T09:00:00+08:00``; without a
+            UTC offset, server local time), or a time of day (``09:00``), meaning its
+            next occurrence in server local time
+        now: Current local time (injectable for tests)
+
+    Returns:
+        float: Delivery time as a Unix timestamp
+
+    Raises:
+        WeComError: If the time cannot be parsed
+
+    """
+    now = now or datetime.now().astimezone()
+    text = send_at.strip()
+    match = _TIME_OF_DAY.fullmatch(text)
+    if match:
+        hour, minute, second = (int(part or 0) for part in match.groups())
+        try:
+            when = now.replace(hour=hour, minute=minute, second=second, microsecond=0)
+        except ValueError as e:
+            raise WeComError(f"Invalid time of day '{send_at}': {e}", ErrorCode.VALIDATION_ERROR) from e
+        if when <= now:
+            when += timedelta(days=1)
+        return when.timestamp()
+    try:
+        # Python 3.10 does not accept the "Z" suffix
+        when = datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith(("Z", "z")) else text)
+    except ValueError as e:
+        raise WeComError(
+            f"Invalid send_at '{send_at}': use an ISO 8601 date and time or a time of day such as 09:00",
+            ErrorCode.VALIDATION_ERROR,
+        ) from e
+    return when.astimezone().timestamp()
+
+
+# Delivers a scheduled message
+ScheduledSender = Callable[[ScheduledMessage], Awaitable[Any]]
+
+
+class MessageScheduler:
+    """Deliver messages at their scheduled time, persisted in SQLite."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        send: ScheduledSender,
+        max_lateness: float = DEFAULT_MAX_LATENESS,
+        clock: Callable[[], float] = time.time,
+        retry_delay: float = DEFAULT_RETRY_DELAY,
+    ) -> None:
+        """Initialize the scheduler (nothing is loaded or sent until it is started).
+
+        Args:
+            path: SQLite database file
+            send: Coroutine function delivering a message
+            max_lateness: Seconds a message may be overdue and still be sent; 0 for no limit
+            clock: Wall-clock time source, since delivery times are persisted
+            retry_delay: Seconds before the first retry of a failed send
+
+        """
+        self.path = Path(path)
+        self.max_lateness = max_lateness
+        self.retry_delay = retry_delay
+        self._send = send
+        self._clock = clock
+        self._pending: dict[str, ScheduledMessage] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._delivering: set[asyncio.Task[None]] = set()
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        # Concurrent first calls (schedule, list, cancel) must not each load the database and start a loop
+        self._starting = asyncio.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of pending messages."""
+        return len(self._pending)
+
+    @property
+    def running(self) -> bool:
+        """Whether the delivery task is running."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Load the pending messages and start delivering them."""
+        async with self._starting:
+            if self.running:
+                return
+            rows = await asyncio.to_thread(self._open)
+            self._pending = {}
+            for row_id, payload in rows:
+                self._pending[row_id] = ScheduledMessage(**json.loads(payload))
+            self._heap = [(message.send_at, message.id) for message in self._pending.values()]
+            heapq.heapify(self._heap)
+            if self._pending:
+                overdue = sum(1 for message in self._pending.values() if message.send_at <= self._clock())
+                logger.info(f"Loaded {len(self._pending)} scheduled message(s), {overdue} overdue")
+            self._wakeup = asyncio.Event()
+            # Start from an empty context so deliveries are not attributed to the calling tool call
+            self._task = contextvars.Context().run(
+                asyncio.get_running_loop().create_task, self._run(), name="wecom-scheduler"
+            )
+
+    async def pause(self) -> None:
+        """Stop starting deliveries; deliveries in progress go on and the database stays open."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stop(self) -> None:
+        """Stop delivering, wait for deliveries in progress and close the database."""
+        await self.pause()
+        if self._delivering:
+            await asyncio.gather(*self._delivering, return_exceptions=True)
+        if self._db is not None:
+            await asyncio.to_thread(self._close)
+
+    async def schedule(self, message: ScheduledMessage) -> None:
+        """Add a message, persisting it before it is accepted.
+
+        Args:
+            message: Message to deliver
+
+        """
+        await self.start()
+        await asyncio.to_thread(self._insert, message)
+        self._push(message)
+
+    async def store(self, messages: list[ScheduledMessage]) -> None:
+        """Persist messages without delivering them now; they are delivered once the scheduler is next started.
+
+        Args:
+            messages: Messages to deliver
+
+        """
+        await asyncio.to_thread(self._open)
+        for message in messages:
+            await asyncio.to_thread(self._insert, message)
+
+    async def cancel(self, message_id: str) -> ScheduledMessage | None:
+        """Cancel a pending message.
+
+        Args:
+            message_id: Id returned when the message was scheduled
+
+        Returns:
+            ScheduledMessage | None: The cancelled message, or None if it is not pending
+
+        """
+        message = self._pending.pop(message_id, None)
+        if message is None:
+            return None
+        await asyncio.to_thread(self._execute, "DELETE FROM scheduled WHERE id = ?", (message_id,))
+        # The heap entry is skipped when it comes up; rebuild once most entries are stale
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._pending):
+            self._heap = [(m.send_at, m.id) for m in self._pending.values()]
+            heapq.heapify(self._heap)
+        return message
+
+    def pending(self, bot_id: str | None = None) -> list[ScheduledMessage]:
+        """List pending messages in delivery order.
+
+        Args:
+            bot_id: Only list messages for this bot
+
+        Returns:
+            list: Pending messages
+
+        """
+        messages = sorted(self._pending.values(), key=lambda message: message.send_at)
+        if bot_id is not None:
+            messages = [message for message in messages if (message.bot_id or "").lower() == bot_id.lower()]
+        return messages
+
+    async def _run(self) -> None:
+        while True:
+            # Drop entries of cancelled messages from the top of the heap
+            while self._heap and self._heap[0][1] not in self._pending:
+                heapq.heappop(self._heap)
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - self._clock()
+            if delay > 0:
+                # Sleep until the message is due, or until an earlier one is scheduled.
+                # (Not wait_for, which can swallow a cancellation that races the wakeup.)
+                timer = asyncio.get_running_loop().call_later(delay, self._wakeup.set)
+                try:
+                    await self._wakeup.wait()
+                finally:
+                    timer.cancel()
+                continue
+            _, message_id = heapq.heappop(self._heap)
+            message = self._pending.pop(message_id)
+            task = asyncio.get_running_loop().create_task(self._deliver(message))
+            self._delivering.add(task)
+            task.add_done_callback(self._delivering.discard)
+
+    def _push(self, message: ScheduledMessage) -> None:
+        self._pending[message.id] = message
+        heapq.heappush(self._heap, (message.send_at, message.id))
+        if self._heap[0][1] == message.id:
+            self._wakeup.set()
+
+    async def _deliver(self, message: ScheduledMessage) -> None:
+        lateness = self._clock() - message.send_at
+        if self.max_lateness and lateness > self.max_lateness:
+            logger.warning(
+                f"Dropping scheduled message {message.id}: it was due {lateness:.0f}s ago, "
+                f"more than WECOM_SCHEDULE_MAX_LATENESS ({self.max_lateness:g}s)"
+            )
+        else:
+            try:
+                await self._send(message)
+            except Exception as e:
+                await self._retry(message, e)
+                return
+            logger.info(f"Sent scheduled message {message.id}" + (f" ({lateness:.0f}s late)" if lateness > 60 else ""))
+        # Delete after the attempt: a crash mid-send repeats the message rather than losing it
+        await asyncio.to_thread(self._execute, "DELETE FROM scheduled WHERE id = ?", (message.id,))
+
+    async def _retry(self, message: ScheduledMessage, error: Exception) -> None:
+        message.attempts += 1
+        invalid = isinstance(error, WeComError) and error.error_code == ErrorCode.VALIDATION_ERROR
+        if invalid or message.attempts >= MAX_ATTEMPTS:
+            logger.error(f"Dropping scheduled message {message.id} after {message.attempts} failed attempt(s): {error}")
+            await asyncio.to_thread(self._execute, "DELETE FROM scheduled WHERE id = ?", (message.id,))
+            return
+        delay = self.retry_delay * 2 ** (message.attempts - 1)
+        logger.warning(f"Failed to send scheduled message {message.id}: {error}; retrying in {delay:g}s")
+        message.send_at = self._clock() + delay
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE scheduled SET send_at = ?, payload = ? WHERE id = ?",
+            (message.send_at, json.dumps(asdict(message), ensure_ascii=False), message.id),
+        )
+        self._push(message)
+
+    def _open(self) -> list[tuple[str, str]]:
+        # Import built-in modules
+        import sqlite3
+
+        with self._lock:
+            if self._db is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS scheduled "
+                    "(id TEXT PRIMARY KEY, send_at REAL NOT NULL, payload TEXT NOT NULL)"
+                )
+            return self._db.execute("SELECT id, payload FROM scheduled").fetchall()
+
+    def _insert(self, message: ScheduledMessage) -> None:
+        self._execute(
+            "INSERT INTO scheduled (id, send_at, payload) VALUES (?, ?, ?)",
+            (message.id, message.send_at, json.dumps(asdict(message), ensure_ascii=False)),
+        )
+
+    def _execute(self, sql: str, parameters: tuple[Any, ...]) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.execute(sql, parameters)
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+async def _send_scheduled(message: ScheduledMessage) -> Any:
+    # Import local modules
+    from wecom_bot_mcp_server.message import send_message
+
+    return await send_message(
+        content=message.content,
+        msg_type=message.msg_type,
+        mentioned_list=message.mentioned_list,
+        mentioned_mobile_list=message.mentioned_mobile_list,
+        bot_id=message.bot_id,
+    )
+
+
+# Global scheduler
+_scheduler: MessageScheduler | None = None
+
+
+def get_scheduler() -> MessageScheduler:
+    """Get the global scheduler, configured from the environment on first use.
+
+    Returns:
+        MessageScheduler: Global scheduler
+
+    """
+    global _scheduler
+    if _scheduler is None:
+        path = os.getenv("WECOM_SCHEDULE_DB", "").strip() or Path(user_data_dir(APP_NAME)) / "schedule.db"
+        _scheduler = MessageScheduler(
+            path,
+            _send_scheduled,
+            max_lateness=get_env_int("WECOM_SCHEDULE_MAX_LATENESS", DEFAULT_MAX_LATENESS),
+        )
+    return _scheduler
+
+
+async def start_scheduler() -> None:
+    """Resume delivery of persisted messages, if there are any (at server start)."""
+    scheduler = get_scheduler()
+    if await asyncio.to_thread(scheduler.path.exists):
+        await scheduler.start()
+
+
+async def pause_scheduler() -> None:
+    """Stop starting deliveries (at shutdown, before the send queue drains)."""
+    if _scheduler is not None:
+        await _scheduler.pause()
+
+
+async def stop_scheduler() -> None:
+    """Stop the scheduler (at server shutdown). Pending messages stay in the database."""
+    if _scheduler is not None:
+        await _scheduler.stop()
+
+
+@instrument_tool("schedule_message")
+async def schedule_message(
+    content: str,
+    send_at: str | None = None,
+    delay_seconds: float | None = None,
+    msg_type: str = "markdown_v2",
+    bot_id: str | None = None,
+    mentioned_list: list[str] | None = None,
+    mentioned_mobile_list: list[str] | None = None,
+) -> dict[str, Any]:
+    """Schedule a message for later delivery.
+
+    Args:
+        content: Message content
+        send_at: Delivery time: ISO 8601 date and time, or a time of day (``09:00``)
+            meaning its next occurrence, in server local time unless an offset is given
+        delay_seconds: Delivery delay from now, instead of ``send_at``
+        msg_type: Message type ('markdown' or 'markdown_v2')
+        bot_id: Bot identifier (or ``@group:<tag>``). If None, uses the default bot.
+        mentioned_list: List of mentioned users
+        mentioned_mobile_list: List of mentioned mobile numbers
+
+    Returns:
+        dict: Response with status ``scheduled``, the message id and its delivery time
+
+    Raises:
+        WeComError: If the inputs are invalid
+
+    """
+    if not content:
+        raise WeComError("Message content cannot be empty", ErrorCode.VALIDATION_ERROR)
+    if msg_type not in MESSAGE_TYPES:
+        raise WeComError(
+            f"Invalid message type: {msg_type}. Supported types: {', '.join(MESSAGE_TYPES)}.",
+            ErrorCode.VALIDATION_ERROR,
+        )
+    if (send_at is None) == (delay_seconds is None):
+        raise WeComError("Specify exactly one of send_at and delay_seconds", ErrorCode.VALIDATION_ERROR)
+
+    now = time.time()
+    when = parse_send_at(send_at) if send_at is not None else now + max(0.0, delay_seconds or 0.0)
+    if when < now - 1:
+        raise WeComError(f"send_at '{send_at}' is in the past", ErrorCode.VALIDATION_ERROR)
+
+    message = ScheduledMessage(
+        id=uuid.uuid4().hex[:12],
+        send_at=when,
+        content=content,
+        msg_type=msg_type,
+        bot_id=bot_id,
+        mentioned_list=list(mentioned_list or []),
+        mentioned_mobile_list=list(mentioned_mobile_list or []),
+        created=now,
+    )
+    await get_scheduler().schedule(message)
+    logger.info(f"Scheduled message {message.id} for {message.describe()['send_at']}")
+    return {"status": "scheduled", "message": "Message scheduled", **message.describe()}
+
+
+async def list_scheduled(bot_id: str | None = None) -> dict[str, Any]:
+    """List messages waiting to be sent.
+
+    Args:
+        bot_id: Only list messages for this bot
+
+    Returns:
+        dict: Pending messages in delivery order
+
+    """
+    scheduler = get_scheduler()
+    await start_scheduler()
+    messages = [message.describe() for message in scheduler.pending(bot_id)]
+    return {"status": "success", "total": len(messages), "scheduled": messages}
+
+
+async def cancel_scheduled(schedule_id: str) -> dict[str, Any]:
+    """Cancel a scheduled message.
+
+    Args:
+        schedule_id: Id returned by ``schedule_message``
+
+    Returns:
+        dict: Response describing the cancelled message
+
+    Raises:
+        WeComError: If no pending message has this id
+
+    """
+    await start_scheduler()
+    message = await get_scheduler().cancel(schedule_id)
+    if message is None:
+        raise WeComError(f"No scheduled message with id '{schedule_id}'", ErrorCode.VALIDATION_ERROR)
+    logger.info(f"Cancelled scheduled message {schedule_id}")
+    return {"status": "cancelled", "message": "Scheduled message cancelled", **message.describe()}
+
+
+@mcp.tool(name="schedule_message")
+async def schedule_message_mcp(
+    content: str,
+    send_at: Annotated[
+        str | None,
+        Field(
+            description=(
+                "When to send: an ISO 8601 date and time (e.g. '2026-10-20T09:00:00+08:00'), or a time of day "
+                "such as '09:00' for its next occurrence. Without a UTC offset, the server's local time is used."
+            )
+        ),
+    ] = None,
+    delay_seconds: Annotated[
+        float | None,
+        Field(description="Send after this many seconds instead of at send_at."),
+    ] = None,
+    msg_type: Annotated[
+        str,
+        Field(description="Message type: 'markdown' (for <@userid> mentions and colors) or 'markdown_v2'."),
+    ] = "markdown_v2",
+    bot_id: Annotated[
+        str | None,
+        Field(
+            description=(
+                "Bot identifier for multi-bot setups. If not specified, uses the default bot. "
+                "Use '@group:<tag>' to send to every bot carrying the tag."
+            )
+        ),
+    ] = None,
+) -> dict[str, Any]:
+    """Schedule a message to be sent to WeCom later, e.g. a reminder at 09:00.
+
+    The message is sent by the server even if this session has ended. Use
+    `list_scheduled` to see pending messages and `cancel_scheduled` to cancel one.
+
+    Args:
+        content: Message content
+        send_at: Delivery time (ISO 8601 or time of day)
+        delay_seconds: Delivery delay instead of send_at
+        msg_type: Message type
+        bot_id: Bot identifier for multi-bot setups. If None, uses the default bot.
+
+    Returns:
+        dict: Response with the schedule id and delivery time
+
+    """
+    return await schedule_message(
+        content=content, send_at=send_at, delay_seconds=delay_seconds, msg_type=msg_type, bot_id=bot_id
+    )
+
+
+@mcp.tool(name="list_scheduled")
+async def list_scheduled_mcp(
+    bot_id: Annotated[str | None, Field(description="Only list messages for this bot.")] = None,
+) -> dict[str, Any]:
+    """List scheduled messages that have not been sent yet.
+
+    Args:
+        bot_id: Only list messages for this bot
+
+    Returns:
+        dict: Pending messages with their ids, delivery times and content previews
+
+    """
+    return await list_scheduled(bot_id)
+
+
+@mcp.tool(name="cancel_scheduled")
+async def cancel_scheduled_mcp(
+    schedule_id: Annotated[str, Field(description="Id returned by schedule_message or list_scheduled.")],
+) -> dict[str, Any]:
+    """Cancel a scheduled message.
+
+    Args:
+        schedule_id: Id of the scheduled message
+
+    Returns:
+        dict: Response describing the cancelled message
+
+    """
+    return await cancel_scheduled(schedule_id)
@@ -0,0 +1,583 @@
+"""Bounded send queue for WeCom Bot MCP Server.
+
+Sends wait behind each webhook's rate limit (20 messages per minute), and in HTTP
+mode many clients share one server, so a runaway agent could queue sends until the
+server runs out of memory. Every send is therefore admitted to a queue before it
+starts and leaves it when it is done. The queue is bounded in total, per bot and
+per MCP session. When a limit is reached, the overflow policy decides:
+
+- ``reject``: the new send fails at once
+- ``drop_oldest``: the oldest send within the full limit that is still waiting (it
+  has not started its request to WeCom) is dropped and fails, and the new send is
+  admitted in its place
+- ``block``: the new send waits for room, for at most its deadline (``timeout_s``,
+  see ``deadline``)
+
+Refused and dropped sends raise ``WeComQueueFullError`` naming the limit reached.
+
+Each bot (or ``@group:`` target) is also a delivery lane: sends are numbered per
+bot in the order they were admitted, and reach WeCom one at a time in that order,
+so concurrent tool calls cannot reorder a series of messages. A send prepares its
+content (downloads, uploads to validate, ...) as soon as it is admitted and only
+waits for its turn (``wait_for_turn``, called by the rate limiter) right before
+its request, while sends to other bots proceed in parallel. The sequence number is
+returned to the client as ``sequence``.
+
+A send may have a time-to-live (``ttl_s``, or the bot's configured ``ttl_s``): an
+alert that waited out its TTL behind the rate limit is worse than none, so when its
+turn comes (and again once it has a rate-limit slot) an expired send is discarded
+and raises ``WeComExpiredError``. A send that would expire while waiting for the
+rate limit is discarded at once (``ensure_fresh_for``). The discarded sends are counted per bot, and the
+next message delivered to the bot notes how many were dropped.
+
+When the server shuts down, the queue is closed: new sends fail with
+``WeComQueueFullError`` (scope ``shutdown``) while the queued ones drain (see
+``shutdown``).
+
+Environment Variables:
+    WECOM_QUEUE_MAX: Sends queued in total; 0 for no limit (default: 10000)
+    WECOM_QUEUE_MAX_PER_BOT: Sends queued per bot (default: 1000)
+    WECOM_QUEUE_MAX_PER_SESSION: Sends queued per MCP session (default: 1000)
+    WECOM_QUEUE_POLICY: ``reject`` (default), ``drop_oldest`` or ``block``
+    WECOM_QUEUE_STALE_NOTICE: Note the number of expired sends in the bot's next message
+        (default: true)
+"""
+
+# Import built-in modules
+import asyncio
+from collections import Counter
+from collections import deque
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+import os
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+from mcp.server.lowlevel.server import request_ctx
+
+# Import local modules
+from wecom_bot_mcp_server.deadline import track_stage
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComExpiredError
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.metrics import QUEUE_DEPTH
+from wecom_bot_mcp_server.metrics import QUEUE_OVERFLOWS
+from wecom_bot_mcp_server.metrics import bot_label
+from wecom_bot_mcp_server.metrics import record_expired
+from wecom_bot_mcp_server.utils import get_env_bool
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+POLICIES = ("reject", "drop_oldest", "block")
+DEFAULT_MAX_QUEUED = 10000
+DEFAULT_MAX_PER_BOT = 1000
+DEFAULT_MAX_PER_SESSION = 1000
+STALE_NOTE = "({count} stale messages dropped)"
+
+
+@dataclass(eq=False)
+class SendTicket:
+    """A send admitted to the queue."""
+
+    bot: str
+    session: str | None
+    task: asyncio.Task[Any] | None
+    # Loop time of admission, and seconds after it the send may still be delivered
+    admitted: float = 0.0
+    ttl: float | None = None
+    # Position in the bot's delivery lane, counted per bot from 1
+    seq: int = 0
+    # Set once every send admitted to the bot before this one has finished
+    turn: asyncio.Event = field(default_factory=asyncio.Event)
+    # Whether the send has started its request to WeCom (it can no longer be dropped)
+    dispatched: bool = False
+    # Error the send fails with once it has been dropped from the queue
+    dropped: WeComQueueFullError | None = None
+    # Message to save in the outbox if the server shuts down before it is sent (see ``shutdown``)
+    payload: dict[str, Any] | None = None
+
+
+class SendQueue:
+    """Admission control for sends, bounded in total, per bot and per session, with one FIFO lane per bot."""
+
+    def __init__(
+        self,
+        max_total: int = DEFAULT_MAX_QUEUED,
+        max_per_bot: int = DEFAULT_MAX_PER_BOT,
+        max_per_session: int = DEFAULT_MAX_PER_SESSION,
+        policy: str = "reject",
+        stale_notice: bool = True,
+    ) -> None:
+        """Initialize the queue.
+
+        Args:
+            max_total: Sends queued in total; 0 for no limit
+            max_per_bot: Sends queued per bot; 0 for no limit
+            max_per_session: Sends queued per MCP session; 0 for no limit
+            policy: Overflow policy (``reject``, ``drop_oldest`` or ``block``)
+            stale_notice: Whether the next message to a bot notes its expired sends
+
+        Raises:
+            WeComError: If the policy is unknown
+
+        """
+        if policy not in POLICIES:
+            raise WeComError(
+                f"Unknown send queue policy '{policy}'. Use one of: {', '.join(POLICIES)}",
+                ErrorCode.VALIDATION_ERROR,
+            )
+        self.max_total = max_total
+        self.max_per_bot = max_per_bot
+        self.max_per_session = max_per_session
+        self.policy = policy
+        self.stale_notice = stale_notice
+        # Admitted tickets in admission order (dict keys keep insertion order)
+        self._tickets: dict[SendTicket, None] = {}
+        self._per_bot: Counter[str] = Counter()
+        self._per_session: Counter[str] = Counter()
+        # Admitted tickets per bot in delivery order, and the last sequence number given out per bot
+        self._lanes: dict[str, deque[SendTicket]] = {}
+        self._sequences: Counter[str] = Counter()
+        # Sends discarded per bot since its last delivered message
+        self._stale: Counter[str] = Counter()
+        # Sends blocked waiting for room, first come first served
+        self._waiters: deque[tuple[SendTicket, asyncio.Future[None]]] = deque()
+        # Whether sends are refused because the server is shutting down, and set while no send is queued
+        self.closed = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def __len__(self) -> int:
+        """Return the number of queued sends (waiting or in flight)."""
+        return len(self._tickets)
+
+    def depth(self, bot: str) -> int:
+        """Return the number of queued sends to a bot.
+
+        Args:
+            bot: Bot identifier
+
+        Returns:
+            int: Queued sends
+
+        """
+        return self._per_bot[bot.lower()]
+
+    async def admit(
+        self,
+        bot: str,
+        session: str | None = None,
+        ttl: float | None = None,
+        payload: dict[str, Any] | None = None,
+    ) -> SendTicket:
+        """Admit a send, applying the overflow policy if the queue is full.
+
+        Args:
+            bot: Bot (or ``@group:`` target) the send is for
+            session: MCP session making the send, if any
+            ttl: Time-to-live of the send in seconds, counted from now; None for none
+            payload: Message to save in the outbox if the server shuts down before it is sent
+
+        Returns:
+            SendTicket: Ticket to pass to ``release`` when the send is done
+
+        Raises:
+            WeComQueueFullError: If the send is rejected, or the queue is closed
+
+        """
+        if self.closed:
+            raise _shutdown_error()
+        ticket = SendTicket(bot.lower(), session, asyncio.current_task(), asyncio.get_running_loop().time(), ttl)
+        ticket.payload = payload
+        scope = self._full_scope(ticket)
+        if scope is None and not self._waiters:
+            self._add(ticket)
+            return ticket
+
+        if self.policy == "drop_oldest":
+            while scope is not None:
+                victim = self._oldest_waiting(ticket, scope)
+                if victim is None:
+                    # Everything within the limit is already being sent
+                    raise self._overflow(ticket, scope, "rejected")
+                self._drop(victim, scope)
+                scope = self._full_scope(ticket)
+            self._add(ticket)
+            return ticket
+
+        if self.policy == "reject":
+            raise self._overflow(ticket, scope or "total", "rejected")
+
+        # Block: wait for room, behind any sends already waiting for it
+        granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append((ticket, granted))
+        try:
+            with track_stage("queue"):
+                await granted
+        except BaseException:
+            if (ticket, granted) in self._waiters:
+                self._waiters.remove((ticket, granted))
+            else:
+                self.release(ticket)  # no-op unless room was granted just before the send was cancelled
+            raise
+        return ticket
+
+    def dispatch(self, ticket: SendTicket) -> None:
+        """Mark a send as started, so it is no longer dropped to make room.
+
+        Args:
+            ticket: Ticket of the send
+
+        """
+        ticket.dispatched = True
+
+    def check_fresh(self, ticket: SendTicket, wait: float = 0.0) -> None:
+        """Discard a send that has not started and whose time-to-live has passed.
+
+        Args:
+            ticket: Ticket of the send
+            wait: Seconds the send is about to wait; it is discarded now if it would expire meanwhile
+
+        Raises:
+            WeComExpiredError: If the send has expired
+
+        """
+        if ticket.ttl is None or ticket.dispatched:
+            return
+        age = asyncio.get_running_loop().time() - ticket.admitted
+        if age + wait < ticket.ttl:
+            return
+        if self.stale_notice:
+            self._stale[ticket.bot] += 1
+        record_expired()
+        detail = f"queued {age:.1f}s" + (f", {wait:.1f}s more to wait for the rate limit" if wait else "")
+        logger.warning(f"Discarded a stale send to '{ticket.bot}' ({detail}; ttl_s {ticket.ttl:g})")
+        raise WeComExpiredError(
+            f"Send to '{ticket.bot}' expired in the queue ({detail}; ttl_s {ticket.ttl:g}) and was not delivered",
+            ticket.ttl,
+            age,
+        )
+
+    def take_stale(self, bot: str) -> int:
+        """Take the number of sends to a bot discarded since its last delivered message.
+
+        Args:
+            bot: Bot identifier
+
+        Returns:
+            int: Discarded sends, now reset to 0
+
+        """
+        return self._stale.pop(bot.lower(), 0)
+
+    def restore_stale(self, bot: str, count: int) -> None:
+        """Give back a count taken by ``take_stale`` whose message was not delivered.
+
+        Args:
+            bot: Bot identifier
+            count: Discarded sends
+
+        """
+        if count:
+            self._stale[bot.lower()] += count
+
+    def release(self, ticket: SendTicket) -> None:
+        """Remove a finished (or failed) send from the queue.
+
+        Args:
+            ticket: Ticket returned by ``admit``
+
+        """
+        if ticket not in self._tickets:
+            return  # already dropped
+        self._remove(ticket)
+        self._wake()
+
+    def close(self) -> None:
+        """Stop admitting sends (at shutdown); sends blocked waiting for room fail at once."""
+        self.closed = True
+        waiters, self._waiters = self._waiters, deque()
+        for _, granted in waiters:
+            if not granted.done():
+                granted.set_exception(_shutdown_error())
+
+    def open(self) -> None:
+        """Admit sends again (when the server starts)."""
+        self.closed = False
+
+    async def drain(self, timeout: float) -> list[SendTicket]:
+        """Wait for the queued sends to finish.
+
+        Args:
+            timeout: Seconds to wait at most
+
+        Returns:
+            list: Sends still queued when the time is up, in admission order
+
+        """
+        if self._tickets:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(self._tickets)
+
+    def abort(self, ticket: SendTicket, error: WeComQueueFullError) -> None:
+        """Remove a send from the queue and cancel it, making it fail with an error.
+
+        Args:
+            ticket: Ticket of the send
+            error: Error the send fails with
+
+        """
+        if ticket not in self._tickets:
+            return
+        self._remove(ticket)
+        ticket.dropped = error
+        if ticket.task is not None:
+            ticket.task.cancel()
+
+    def _full_scope(self, ticket: SendTicket) -> str | None:
+        if self.max_total and len(self._tickets) >= self.max_total:
+            return "total"
+        if self.max_per_bot and self._per_bot[ticket.bot] >= self.max_per_bot:
+            return "bot"
+        if self.max_per_session and ticket.session and self._per_session[ticket.session] >= self.max_per_session:
+            return "session"
+        return None
+
+    def _oldest_waiting(self, ticket: SendTicket, scope: str) -> SendTicket | None:
+        for queued in self._tickets:
+            if queued.dispatched:
+                continue
+            if (
+                scope == "total"
+                or (scope == "bot" and queued.bot == ticket.bot)
+                or (scope == "session" and queued.session == ticket.session)
+            ):
+                return queued
+        return None
+
+    def _add(self, ticket: SendTicket) -> None:
+        self._tickets[ticket] = None
+        self._idle.clear()
+        self._sequences[ticket.bot] += 1
+        ticket.seq = self._sequences[ticket.bot]
+        lane = self._lanes.setdefault(ticket.bot, deque())
+        lane.append(ticket)
+        if len(lane) == 1:
+            ticket.turn.set()
+        self._per_bot[ticket.bot] += 1
+        if ticket.session:
+            self._per_session[ticket.session] += 1
+        QUEUE_DEPTH.inc(bot=bot_label(ticket.bot))
+
+    def _remove(self, ticket: SendTicket) -> None:
+        del self._tickets[ticket]
+        if not self._tickets:
+            self._idle.set()
+        lane = self._lanes[ticket.bot]
+        lane.remove(ticket)
+        if lane:
+            lane[0].turn.set()
+        else:
+            del self._lanes[ticket.bot]
+        for counts, key in ((self._per_bot, ticket.bot), (self._per_session, ticket.session)):
+            if key:
+                counts[key] -= 1
+                if not counts[key]:
+                    del counts[key]
+        QUEUE_DEPTH.dec(bot=bot_label(ticket.bot))
+
+    def _drop(self, victim: SendTicket, scope: str) -> None:
+        QUEUE_OVERFLOWS.inc(bot=bot_label(victim.bot), scope=scope, action="dropped")
+        logger.warning(f"Send queue full ({scope} limit): dropped the oldest waiting send to '{victim.bot}'")
+        self.abort(
+            victim,
+            WeComQueueFullError(
+                f"Send to '{victim.bot}' was dropped from the full send queue to make room for newer sends", "dropped"
+            ),
+        )
+
+    def _wake(self) -> None:
+        # Grant room to blocked sends in arrival order; one whose limit is still full does not hold up the others
+        for ticket, granted in list(self._waiters):
+            if granted.done() or self._full_scope(ticket) is not None:
+                continue
+            self._waiters.remove((ticket, granted))
+            self._add(ticket)
+            granted.set_result(None)
+
+    def _overflow(self, ticket: SendTicket, scope: str, action: str) -> WeComQueueFullError:
+        QUEUE_OVERFLOWS.inc(bot=bot_label(ticket.bot), scope=scope, action=action)
+        limit = {"total": self.max_total, "bot": self.max_per_bot, "session": self.max_per_session}[scope]
+        target = {"total": "in total", "bot": f"for bot '{ticket.bot}'", "session": "for this session"}[scope]
+        return WeComQueueFullError(f"Send queue is full ({limit} sends queued {target}); retry later", scope)
+
+
+def _shutdown_error() -> WeComQueueFullError:
+    return WeComQueueFullError("Server is shutting down and no longer accepts sends; retry later", "shutdown")
+
+
+# Global send queue and the ticket of the send running in the current task
+_send_queue: SendQueue | None = None
+_current_ticket: ContextVar[SendTicket | None] = ContextVar("wecom_send_ticket", default=None)
+
+
+def get_send_queue() -> SendQueue:
+    """Get the global send queue, configured from the environment on first use.
+
+    Returns:
+        SendQueue: Global send queue
+
+    """
+    global _send_queue
+    if _send_queue is None:
+        policy = os.getenv("WECOM_QUEUE_POLICY", "").strip().lower() or "reject"
+        if policy not in POLICIES:
+            logger.warning(f"Unknown WECOM_QUEUE_POLICY '{policy}', using 'reject'")
+            policy = "reject"
+        _send_queue = SendQueue(
+            max_total=get_env_int("WECOM_QUEUE_MAX", DEFAULT_MAX_QUEUED),
+            max_per_bot=get_env_int("WECOM_QUEUE_MAX_PER_BOT", DEFAULT_MAX_PER_BOT),
+            max_per_session=get_env_int("WECOM_QUEUE_MAX_PER_SESSION", DEFAULT_MAX_PER_SESSION),
+            policy=policy,
+            stale_notice=get_env_bool("WECOM_QUEUE_STALE_NOTICE", True),
+        )
+    return _send_queue
+
+
+def _current_session() -> str | None:
+    try:
+        return f"{id(request_ctx.get().session):x}"
+    except LookupError:
+        return None  # not called through MCP (e.g. a scheduled message)
+
+
+@asynccontextmanager
+async def queued_send(
+    bot: str, ttl_s: float | None = None, payload: dict[str, Any] | None = None
+) -> AsyncIterator[SendTicket]:
+    """Hold a place in the send queue while the block sends.
+
+    Args:
+        bot: Bot (or ``@group:`` target) the send is for
+        ttl_s: Time-to-live of the send in seconds; None for none
+        payload: Message to save in the outbox if the server shuts down before it is sent
+            (the keyword arguments of a ``ScheduledMessage``, see ``shutdown``)
+
+    Yields:
+        SendTicket: Ticket of the send
+
+    Raises:
+        WeComQueueFullError: If the send is rejected, dropped to make room for newer ones,
+            or cut off by a server shutdown
+        WeComError: If the TTL is invalid
+
+    """
+    if ttl_s is not None and ttl_s <= 0:
+        raise WeComError(f"ttl_s must be positive, got {ttl_s:g}", ErrorCode.VALIDATION_ERROR)
+    queue = get_send_queue()
+    ticket = await queue.admit(bot, _current_session(), ttl_s, payload)
+    token = _current_ticket.set(ticket)
+    try:
+        yield ticket
+    except asyncio.CancelledError:
+        if ticket.dropped is None:
+            raise
+        task = asyncio.current_task()
+        if task is not None and hasattr(task, "uncancel"):  # Python 3.11+
+            task.uncancel()
+        raise ticket.dropped from None
+    finally:
+        _current_ticket.reset(token)
+        queue.release(ticket)
+
+
+async def wait_for_turn() -> None:
+    """Wait until every send admitted to the running send's bot before it has finished.
+
+    Called right before a request to WeCom; returns at once outside of ``queued_send``.
+
+    Raises:
+        WeComExpiredError: If the send's time-to-live passed before its turn came
+
+    """
+    ticket = _current_ticket.get()
+    if ticket is None or _send_queue is None:
+        return
+    if not ticket.turn.is_set():
+        with track_stage("lane"):
+            await ticket.turn.wait()
+    _send_queue.check_fresh(ticket)
+
+
+def mark_dispatched() -> None:
+    """Mark the running send as started (called once it is about to reach WeCom).
+
+    Raises:
+        WeComExpiredError: If the send's time-to-live passed while it waited for the rate limit
+
+    """
+    ticket = _current_ticket.get()
+    if ticket is not None and _send_queue is not None:
+        _send_queue.check_fresh(ticket)
+        _send_queue.dispatch(ticket)
+
+
+def ensure_fresh_for(seconds: float) -> None:
+    """Discard the running send at once if it would expire while waiting.
+
+    Args:
+        seconds: Time the send is about to wait
+
+    Raises:
+        WeComExpiredError: If the send's time-to-live would pass during the wait
+
+    """
+    ticket = _current_ticket.get()
+    if ticket is not None and _send_queue is not None:
+        _send_queue.check_fresh(ticket, seconds)
+
+
+@contextmanager
+def stale_notice() -> Iterator[int]:
+    """Take the number of sends to the running send's bot discarded since its last delivery.
+
+    The count is given back if the block raises, so the next message notes it instead.
+
+    Yields:
+        int: Discarded sends to note in the message (0 outside of ``queued_send``)
+
+    """
+    ticket = _current_ticket.get()
+    if ticket is None or _send_queue is None:
+        yield 0
+        return
+    count = _send_queue.take_stale(ticket.bot)
+    try:
+        yield count
+    except BaseException:
+        _send_queue.restore_stale(ticket.bot, count)
+        raise
+
+
+def stale_note(content: str, count: int) -> str:
+    """Append the number of discarded stale sends to message content.
+
+    Args:
+        content: Message content
+        count: Sends discarded since the previous delivered message
+
+    Returns:
+        str: Content followed by the note
+
+    """
+    return f"{content}\n\n{STALE_NOTE.format(count=count)}"
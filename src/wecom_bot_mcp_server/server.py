@@ -2,31 +2,276 @@
 
 This module provides a FastMCP server for interacting with WeCom (WeChat Work) bot.
 It supports sending messages and files through WeCom's webhook API.
+
+By default the server talks MCP over stdio, one process per client. With
+``--transport http`` (streamable HTTP) or ``--transport sse`` one long-lived process
+serves many concurrent client sessions, sharing its webhook pools, rate limits and
+bot health state between them.
+
+On SIGTERM the server stops admitting sends and gives the queued ones
+``WECOM_SHUTDOWN_GRACE`` seconds to finish, saving the rest to the outbox, before
+it closes its sessions and connections (see ``wecom_bot_mcp_server.shutdown``).
+
+``wecom-bot-mcp-server bench <spec.yaml>`` runs the load generator instead of the
+server (see ``wecom_bot_mcp_server.bench``).
 """
 
 # Import built-in modules
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from contextlib import asynccontextmanager
+import os
+import signal
+import socket
+import sys
+from typing import Any
 
 # Import third-party modules
+import anyio
 from loguru import logger
+from mcp.server.transport_security import TransportSecuritySettings
+import uvicorn
 
 # Import local modules
 from wecom_bot_mcp_server import __version__
 from wecom_bot_mcp_server.app import APP_NAME
+from wecom_bot_mcp_server.app import background_services
 from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.app import stop_background_services
 from wecom_bot_mcp_server.log_config import setup_logging
+from wecom_bot_mcp_server.profiling import configure_profiling
+from wecom_bot_mcp_server.tracing import configure_tracing
+from wecom_bot_mcp_server.utils import get_env_int
+
+# Constants
+TRANSPORTS = ("stdio", "http", "sse")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+# Maximum concurrent connections and requests in HTTP modes (each open SSE stream counts)
+DEFAULT_MAX_CONCURRENCY = 256
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+# Listen addresses that are not a name clients can use in their Host header
+WILDCARD_HOSTS = ("0.0.0.0", "::", "")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Defaults can be set with the WECOM_MCP_TRANSPORT, WECOM_MCP_HOST, WECOM_MCP_PORT,
+    WECOM_MCP_MAX_CONCURRENCY and WECOM_MCP_ALLOWED_HOSTS environment variables.
+
+    Args:
+        argv: Arguments to parse. If None, uses ``sys.argv[1:]``.
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+
+    """
+    parser = argparse.ArgumentParser(prog="wecom-bot-mcp-server", description="WeCom Bot MCP Server")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=os.getenv("WECOM_MCP_TRANSPORT", "stdio"),
+        help="MCP transport: stdio (default), http (streamable HTTP) or sse",
+    )
+    parser.add_argument(
+        "--host",
+        default=os.getenv("WECOM_MCP_HOST", DEFAULT_HOST),
+        help=f"Address to listen on in HTTP modes (default: {DEFAULT_HOST})",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=get_env_int("WECOM_MCP_PORT", DEFAULT_PORT),
+        help=f"Port to listen on in HTTP modes (default: {DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=get_env_int("WECOM_MCP_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY),
+        help=(
+            "Maximum concurrent connections and requests in HTTP modes; excess requests get HTTP 503 "
+            f"(default: {DEFAULT_MAX_CONCURRENCY}, 0 for no limit)"
+        ),
+    )
+    parser.add_argument(
+        "--allowed-hosts",
+        default=os.getenv("WECOM_MCP_ALLOWED_HOSTS", ""),
+        help=(
+            "Comma-separated Host header values clients may use in HTTP modes, e.g. 'mcp.example.com,10.0.0.5:8000' "
+            "(without a port, any port); '*' turns DNS rebinding protection off. Loopback names and the --host "
+            "address are always allowed."
+        ),
+    )
+    return parser.parse_args(argv)
+
+
+def transport_security(host: str, allowed_hosts: list[str]) -> TransportSecuritySettings:
+    """Build the DNS rebinding protection settings of the HTTP transports.
+
+    Requests whose Host (or Origin) header names neither a loopback address, the
+    listen address nor one of ``allowed_hosts`` are rejected.
+
+    Args:
+        host: Address the server listens on
+        allowed_hosts: Additional Host header values (``name`` or ``name:port``); ``*`` turns the protection off
+
+    Returns:
+        TransportSecuritySettings: Settings for the MCP transports
+
+    """
+    if "*" in allowed_hosts:
+        logger.warning("DNS rebinding protection is off (--allowed-hosts '*'); Host headers are not checked")
+        return TransportSecuritySettings(enable_dns_rebinding_protection=False)
+
+    names = list(LOOPBACK_HOSTS)
+    if host not in LOOPBACK_HOSTS and host not in WILDCARD_HOSTS:
+        names.append(host)
+    elif host in WILDCARD_HOSTS and not allowed_hosts:
+        logger.warning(
+            f"Listening on {host or 'all addresses'} but only loopback Host headers are accepted; "
+            "set --allowed-hosts (WECOM_MCP_ALLOWED_HOSTS) to the names clients connect with"
+        )
+    patterns = list(dict.fromkeys(_host_pattern(name) for name in names + allowed_hosts))
+    return TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=patterns,
+        allowed_origins=[f"{scheme}://{pattern}" for pattern in patterns for scheme in ("http", "https")],
+    )
+
+
+def _with_background_services(lifespan: Callable[[Any], AbstractAsyncContextManager[Any]]) -> Callable[[Any], Any]:
+    """Wrap a Starlette lifespan so the background services run for the life of the server."""
+
+    @asynccontextmanager
+    async def wrapped(app: Any) -> AsyncIterator[Any]:
+        async with background_services(), lifespan(app) as state:
+            yield state
+
+    return wrapped
+
+
+def _host_pattern(name: str) -> str:
+    """Turn ``name`` or ``name:port`` into a Host header pattern, allowing any port if none is given."""
+    if name.count(":") > 1 and not name.startswith("["):
+        # A bare IPv6 address
+        name = f"[{name}]"
+    return name if name.rpartition(":")[2].isdigit() else f"{name}:*"
+
+
+def run_http(
+    transport: str, host: str, port: int, max_concurrency: int, allowed_hosts: list[str] | None = None
+) -> None:
+    """Serve the MCP app over streamable HTTP or SSE.
+
+    Args:
+        transport: ``http`` or ``sse``
+        host: Address to listen on
+        port: Port to listen on
+        max_concurrency: Maximum concurrent connections and requests (0 for no limit)
+        allowed_hosts: Host header values allowed besides loopback names and ``host`` (see ``transport_security``)
+
+    """
+    mcp.settings.host = host
+    mcp.settings.port = port
+    mcp.settings.transport_security = transport_security(host, allowed_hosts or [])
+
+    app = mcp.streamable_http_app() if transport == "http" else mcp.sse_app()
+    # Keep the background services (e.g. scheduled messages) running while no session is open
+    app.router.lifespan_context = _with_background_services(app.router.lifespan_context)
+    endpoint = mcp.settings.streamable_http_path if transport == "http" else mcp.settings.sse_path
+    logger.info(f"Serving MCP over {transport} at http://{host}:{port}{endpoint}")
+
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        limit_concurrency=max_concurrency or None,
+        log_level=mcp.settings.log_level.lower(),
+    )
+    server = DrainingServer(config)
+    server.run()
+
+
+class DrainingServer(uvicorn.Server):
+    """Uvicorn server that drains the send queue before it closes its connections."""
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        """Drain queued sends, then shut down the server.
+
+        Args:
+            sockets: Sockets the server listens on
+
+        """
+        # Import local modules
+        from wecom_bot_mcp_server.shutdown import drain_sends
+
+        # Drain before uvicorn closes the connections, cancelling the tool calls still sending
+        await drain_sends()
+        await super().shutdown(sockets)
+
+
+async def serve_stdio() -> None:
+    """Serve the MCP app over stdio, shutting down gracefully on SIGTERM."""
+    loop = asyncio.get_running_loop()
+    shutting_down: set[asyncio.Task[None]] = set()
+
+    async def shut_down() -> None:
+        logger.info("Received SIGTERM, shutting down")
+        # Drains the send queue before anything else (see wecom_bot_mcp_server.shutdown)
+        await stop_background_services()
+        logger.info("Shutdown complete")
+        logger.remove()  # flush and close the log sinks
+        # The stdio transport waits for stdin to close, so end the process as SIGTERM otherwise would
+        loop.remove_signal_handler(signal.SIGTERM)
+        signal.raise_signal(signal.SIGTERM)
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, lambda: shutting_down.add(loop.create_task(shut_down())))
+    except (NotImplementedError, RuntimeError):
+        # No signal handlers on Windows, or outside the main thread
+        await mcp.run_stdio_async()
+        return
+    try:
+        await mcp.run_stdio_async()
+    finally:
+        loop.remove_signal_handler(signal.SIGTERM)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Start the MCP server.
+
+    Args:
+        argv: Command line arguments. If None, uses ``sys.argv[1:]``.
+
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "bench":
+        # Import local modules
+        from wecom_bot_mcp_server.bench import main as bench_main
 
-# Re-export tools for easier imports
+        bench_main(argv[1:])
+        return
 
+    args = parse_args(argv)
 
-def main() -> None:
-    """Start the MCP server."""
-    # Setup logging
+    # Setup logging and, if WECOM_TRACING or WECOM_PROFILE are set, tracing and profiling
     setup_logging()
+    configure_tracing()
+    configure_profiling()
 
     logger.info(f"Starting {APP_NAME} v{__version__}")
 
     # Run the MCP server
-    mcp.run()
+    if args.transport == "stdio":
+        anyio.run(serve_stdio)
+    else:
+        allowed_hosts = [name.strip() for name in args.allowed_hosts.split(",") if name.strip()]
+        run_http(args.transport, args.host, args.port, args.max_concurrency, allowed_hosts)
 
 
 if __name__ == "__main__":
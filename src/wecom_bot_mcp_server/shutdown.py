@@ -0,0 +1,115 @@
+"""Graceful shutdown of WeCom Bot MCP Server.
+
+When the server gets SIGTERM (e.g. during a rolling deploy), sends still in the
+send queue would be cut off mid-request and lost. ``drain_sends`` runs first when
+the server shuts down: before uvicorn closes its connections in HTTP and SSE modes,
+when the background services stop in stdio mode (see ``server``), and whenever the
+background services stop (``app.background_services``):
+
+1. The scheduler stops starting deliveries, and pending digests are sent: they
+   go through the send queue, so this happens while it still admits sends.
+2. The send queue stops admitting sends: new sends fail with
+   ``WeComQueueFullError`` (scope ``shutdown``).
+3. Queued and in-flight sends get ``WECOM_SHUTDOWN_GRACE`` seconds (counted from
+   the start of the shutdown) to finish.
+4. Messages still waiting after that (they have not started their request to
+   WeCom) are saved to the outbox, the scheduled message database, due at once:
+   they are sent when the server starts again (within ``WECOM_SCHEDULE_MAX_LATENESS``).
+   Only ``send_message`` sends without a time-to-live are saved: template cards
+   cannot be scheduled, and the sources of images and files may be gone by then.
+5. The sends left fail with ``WeComQueueFullError`` (scope ``shutdown``).
+
+The scheduler is stopped and the shared NotifyBridge clients (see
+``connections``) are closed after that.
+
+Environment Variables:
+    WECOM_SHUTDOWN_GRACE: Seconds queued sends get to finish at shutdown (default: 10)
+    WECOM_SHUTDOWN_OUTBOX: Save messages that could not be sent in time for delivery
+        after a restart (default: true)
+"""
+
+# Import built-in modules
+import asyncio
+import time
+import uuid
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.digest import flush_digests
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.scheduler import ScheduledMessage
+from wecom_bot_mcp_server.scheduler import get_scheduler
+from wecom_bot_mcp_server.scheduler import pause_scheduler
+from wecom_bot_mcp_server.send_queue import SendTicket
+from wecom_bot_mcp_server.send_queue import get_send_queue
+from wecom_bot_mcp_server.utils import get_env_bool
+from wecom_bot_mcp_server.utils import get_env_float
+
+# Constants
+DEFAULT_GRACE = 10.0
+# Seconds the sends cut off at the end of the grace period get to unwind
+ABORT_TIMEOUT = 1.0
+
+
+async def drain_sends() -> None:
+    """Stop admitting sends and let the queued ones finish (when the background services stop)."""
+    await pause_scheduler()
+    queue = get_send_queue()
+    grace = get_env_float("WECOM_SHUTDOWN_GRACE", DEFAULT_GRACE)
+    deadline = time.monotonic() + grace
+    # Digests are sent through the queue, so they must be admitted before it closes
+    flushing = asyncio.create_task(flush_digests())
+    await asyncio.wait({flushing}, timeout=grace)
+    queue.close()
+    if len(queue):
+        logger.info(f"Shutting down: waiting up to {grace:g}s for {len(queue)} queued send(s)")
+    leftovers = await queue.drain(max(0.0, deadline - time.monotonic()))
+    if not leftovers:
+        await flushing
+        return
+
+    saved = await save_to_outbox(leftovers) if get_env_bool("WECOM_SHUTDOWN_OUTBOX", True) else set()
+    for ticket in leftovers:
+        outcome = "saved to the outbox, to be sent when the server restarts" if ticket in saved else "not delivered"
+        queue.abort(
+            ticket,
+            WeComQueueFullError(f"Server shut down before the send to '{ticket.bot}' finished; {outcome}", "shutdown"),
+        )
+    logger.warning(
+        f"Shutting down: {len(leftovers)} send(s) did not finish within {grace:g}s, {len(saved)} saved to the outbox"
+    )
+    tasks = {ticket.task for ticket in leftovers if ticket.task is not None and not ticket.task.done()}
+    if not flushing.done():
+        tasks.add(flushing)
+    if tasks:
+        await asyncio.wait(tasks, timeout=ABORT_TIMEOUT)
+
+
+async def save_to_outbox(tickets: list[SendTicket]) -> set[SendTicket]:
+    """Save the messages of sends that have not started to the scheduled message database, due now.
+
+    Args:
+        tickets: Sends cut off by the shutdown
+
+    Returns:
+        set: Tickets whose message was saved
+
+    """
+    now = time.time()
+    saved = {
+        ticket: ScheduledMessage(id=uuid.uuid4().hex[:12], send_at=now, created=now, **ticket.payload)
+        for ticket in tickets
+        if ticket.payload is not None and ticket.ttl is None and not ticket.dispatched
+    }
+    if not saved:
+        return set()
+    try:
+        await get_scheduler().store(list(saved.values()))
+    except Exception as e:
+        logger.error(f"Failed to save {len(saved)} unsent message(s) to the outbox: {e}")
+        return set()
+    for message in saved.values():
+        logger.info(f"Saved unsent message {message.id} to the outbox")
+    return set(saved)
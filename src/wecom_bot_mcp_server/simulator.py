@@ -0,0 +1,410 @@
+"""Local WeCom webhook simulator for load testing.
+
+Serves the ``/cgi-bin/webhook/send`` and ``/cgi-bin/webhook/upload_media``
+endpoints the way qyapi.weixin.qq.com does, so bots can be load-tested without
+touching the real service:
+
+- every key gets 20 messages per minute; the excess is rejected with errcode 45009
+- payloads are validated like WeCom does (message types, content and media sizes,
+  image md5, media ids issued by ``upload_media`` for the same key, template cards)
+- latency, HTTP 5xx errors and timeouts can be injected
+
+Point bots at it by replacing the host of their webhook URL (any key is accepted):
+
+    python -m wecom_bot_mcp_server.simulator --port 8900 --latency-ms 80 --error-rate 0.01
+    export WECOM_WEBHOOK_URL="http://127.0.0.1:8900/cgi-bin/webhook/send?key=local"
+
+In tests, run it in-process with ``async with WeComSimulator(config) as simulator``.
+"""
+
+# Import built-in modules
+import argparse
+import asyncio
+import base64
+import binascii
+from collections import Counter
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+import hashlib
+import itertools
+import random
+import time
+from typing import Any
+
+# Import third-party modules
+from aiohttp import web
+from loguru import logger
+
+# Constants
+SEND_PATH = "/cgi-bin/webhook/send"
+UPLOAD_PATH = "/cgi-bin/webhook/upload_media"
+MESSAGE_TYPES = ("text", "markdown", "markdown_v2", "image", "news", "file", "voice", "template_card")
+TEXT_MAX_BYTES = 2048
+MARKDOWN_MAX_BYTES = 4096
+IMAGE_MAX_BYTES = 2 * 1024 * 1024
+NEWS_MAX_ARTICLES = 8
+FILE_MIN_BYTES = 5
+FILE_MAX_BYTES = 20 * 1024 * 1024
+VOICE_MAX_BYTES = 2 * 1024 * 1024
+# Number of recently delivered messages kept for inspection
+RECENT_MESSAGES = 1000
+# Upload bodies are multipart, so allow some overhead above the largest file
+MAX_REQUEST_BYTES = FILE_MAX_BYTES + 1024 * 1024
+
+# WeCom errcodes returned by the simulator
+ERR_OK = 0
+ERR_INVALID_FILE_SIZE = 40006
+ERR_INVALID_MEDIA_ID = 40007
+ERR_INVALID_MESSAGE_TYPE = 40008
+ERR_INVALID_IMAGE_SIZE = 40009
+ERR_INVALID_PARAMETER = 40058
+ERR_EMPTY_CONTENT = 44004
+ERR_RATE_LIMITED = 45009
+ERR_INVALID_WEBHOOK = 93000
+
+
+class SimulatedError(Exception):
+    """WeCom error answered by the simulator."""
+
+    def __init__(self, errcode: int, errmsg: str) -> None:
+        """Initialize the error.
+
+        Args:
+            errcode: WeCom errcode
+            errmsg: WeCom errmsg
+
+        """
+        super().__init__(errmsg)
+        self.errcode = errcode
+        self.errmsg = errmsg
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of the simulator.
+
+    Attributes:
+        rate_limit: Messages per key per window (0 disables rate limiting)
+        rate_window: Rate limit window in seconds
+        latency: Added response latency in seconds
+        jitter: Random extra latency of up to this many seconds
+        error_rate: Fraction of requests answered with HTTP ``error_status``
+        error_status: HTTP status of injected errors
+        timeout_rate: Fraction of requests left unanswered for ``timeout_delay`` seconds
+        timeout_delay: How long a timed-out request hangs before the connection is answered with 504
+        seed: Random seed for reproducible fault injection
+
+    """
+
+    rate_limit: int = 20
+    rate_window: float = 60.0
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    timeout_rate: float = 0.0
+    timeout_delay: float = 30.0
+    seed: int | None = None
+
+
+class WeComSimulator:
+    """In-process WeCom webhook simulator."""
+
+    def __init__(self, config: SimulatorConfig | None = None, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the simulator.
+
+        Args:
+            config: Simulator behaviour (defaults match WeCom without injected faults)
+            clock: Monotonic clock used for rate limiting
+
+        """
+        self.config = config or SimulatorConfig()
+        self._clock = clock
+        self._random = random.Random(self.config.seed)
+        self._sends: dict[str, deque[float]] = {}
+        self._media: dict[str, tuple[str, str]] = {}
+        self._media_ids = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+        # Messages delivered per key, and answers per errcode (HTTP faults count as "http_<status>")
+        self.delivered: Counter[str] = Counter()
+        self.uploads: Counter[str] = Counter()
+        self.errors: Counter[int | str] = Counter()
+        self.messages: deque[tuple[str, dict[str, Any]]] = deque(maxlen=RECENT_MESSAGES)
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application.
+
+        Returns:
+            web.Application: Application serving the webhook endpoints
+
+        """
+        app = web.Application(client_max_size=MAX_REQUEST_BYTES)
+        app.router.add_post(SEND_PATH, self.handle_send)
+        app.router.add_post(UPLOAD_PATH, self.handle_upload)
+        return app
+
+    def webhook_url(self, key: str = "simulator") -> str:
+        """Get the webhook URL of a key on the running simulator.
+
+        Args:
+            key: Webhook key
+
+        Returns:
+            str: Webhook URL
+
+        """
+        return f"{self.base_url}{SEND_PATH}?key={key}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving.
+
+        Args:
+            host: Address to listen on
+            port: Port to listen on (0 for a free port)
+
+        Returns:
+            str: Base URL of the simulator
+
+        """
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        # The sockets the runner listens on give the port picked for port 0
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "WeComSimulator":
+        """Start the simulator on a free local port."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop the simulator."""
+        await self.stop()
+
+    async def _inject_faults(self) -> web.Response | None:
+        """Apply the configured latency, timeouts and HTTP errors."""
+        config = self.config
+        delay = config.latency + (self._random.uniform(0, config.jitter) if config.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if config.timeout_rate and self._random.random() < config.timeout_rate:
+            await asyncio.sleep(config.timeout_delay)
+            self.errors["http_504"] += 1
+            return web.Response(status=504, text="Gateway Timeout")
+        if config.error_rate and self._random.random() < config.error_rate:
+            self.errors[f"http_{config.error_status}"] += 1
+            return web.Response(status=config.error_status, text="Service Unavailable")
+        return None
+
+    def _error(self, error: SimulatedError) -> web.Response:
+        self.errors[error.errcode] += 1
+        return web.json_response({"errcode": error.errcode, "errmsg": error.errmsg})
+
+    @staticmethod
+    def _key(request: web.Request) -> str:
+        key = request.query.get("key", "")
+        if not key:
+            raise SimulatedError(ERR_INVALID_WEBHOOK, "invalid webhook url")
+        return key
+
+    def _take_rate_slot(self, key: str) -> None:
+        limit = self.config.rate_limit
+        if limit <= 0:
+            return
+        now = self._clock()
+        sends = self._sends.setdefault(key, deque())
+        while sends and sends[0] <= now - self.config.rate_window:
+            sends.popleft()
+        if len(sends) >= limit:
+            raise SimulatedError(ERR_RATE_LIMITED, "api freq out of limit")
+        sends.append(now)
+
+    async def handle_send(self, request: web.Request) -> web.Response:
+        """Handle ``POST /cgi-bin/webhook/send``."""
+        fault = await self._inject_faults()
+        if fault is not None:
+            return fault
+        try:
+            key = self._key(request)
+            try:
+                payload = await request.json()
+            except ValueError as e:
+                raise SimulatedError(ERR_INVALID_PARAMETER, "invalid json") from e
+            if not isinstance(payload, dict):
+                raise SimulatedError(ERR_INVALID_PARAMETER, "invalid json")
+            self._validate_message(key, payload)
+            self._take_rate_slot(key)
+        except SimulatedError as e:
+            return self._error(e)
+        self.delivered[key] += 1
+        self.messages.append((key, payload))
+        return web.json_response({"errcode": ERR_OK, "errmsg": "ok"})
+
+    async def handle_upload(self, request: web.Request) -> web.Response:
+        """Handle ``POST /cgi-bin/webhook/upload_media``."""
+        fault = await self._inject_faults()
+        if fault is not None:
+            return fault
+        try:
+            key = self._key(request)
+            media_type = request.query.get("type", "")
+            if media_type not in ("file", "voice"):
+                raise SimulatedError(ERR_INVALID_PARAMETER, f"invalid media type: {media_type}")
+            try:
+                form = await request.post()
+            except ValueError as e:
+                raise SimulatedError(ERR_INVALID_PARAMETER, "invalid multipart body") from e
+            media = form.get("media")
+            if not isinstance(media, web.FileField):
+                raise SimulatedError(ERR_INVALID_PARAMETER, "missing media")
+            size = len(media.file.read())
+            max_size = FILE_MAX_BYTES if media_type == "file" else VOICE_MAX_BYTES
+            if not FILE_MIN_BYTES <= size <= max_size:
+                raise SimulatedError(ERR_INVALID_FILE_SIZE, f"invalid file size: {size}")
+        except SimulatedError as e:
+            return self._error(e)
+        media_id = f"sim-{next(self._media_ids)}"
+        self._media[media_id] = (key, media_type)
+        self.uploads[key] += 1
+        return web.json_response(
+            {
+                "errcode": ERR_OK,
+                "errmsg": "ok",
+                "type": media_type,
+                "media_id": media_id,
+                "created_at": str(int(time.time())),
+            }
+        )
+
+    def _validate_message(self, key: str, payload: dict[str, Any]) -> None:
+        """Validate a message payload like WeCom does."""
+        msg_type = payload.get("msgtype")
+        if msg_type not in MESSAGE_TYPES:
+            raise SimulatedError(ERR_INVALID_MESSAGE_TYPE, f"invalid message type: {msg_type}")
+        body = payload.get(msg_type)
+        if not isinstance(body, dict):
+            raise SimulatedError(ERR_INVALID_PARAMETER, f"missing {msg_type}")
+
+        if msg_type in ("text", "markdown", "markdown_v2"):
+            content = body.get("content")
+            if not isinstance(content, str) or not content:
+                raise SimulatedError(ERR_EMPTY_CONTENT, "empty content")
+            max_bytes = TEXT_MAX_BYTES if msg_type == "text" else MARKDOWN_MAX_BYTES
+            if len(content.encode("utf-8")) > max_bytes:
+                raise SimulatedError(ERR_INVALID_PARAMETER, f"{msg_type}.content exceed max length {max_bytes}")
+        elif msg_type == "image":
+            self._validate_image(body)
+        elif msg_type == "news":
+            articles = body.get("articles")
+            if not isinstance(articles, list) or not 1 <= len(articles) <= NEWS_MAX_ARTICLES:
+                raise SimulatedError(ERR_INVALID_PARAMETER, f"news.articles must have 1 to {NEWS_MAX_ARTICLES} items")
+            if any(not isinstance(a, dict) or not a.get("title") or not a.get("url") for a in articles):
+                raise SimulatedError(ERR_INVALID_PARAMETER, "news article requires title and url")
+        elif msg_type in ("file", "voice"):
+            media = self._media.get(body.get("media_id", ""))
+            if media is None or media != (key, msg_type):
+                raise SimulatedError(ERR_INVALID_MEDIA_ID, "invalid media_id")
+        else:
+            self._validate_template_card(body)
+
+    @staticmethod
+    def _validate_image(body: dict[str, Any]) -> None:
+        try:
+            data = base64.b64decode(body.get("base64", ""), validate=True)
+        except (binascii.Error, TypeError) as e:
+            raise SimulatedError(ERR_INVALID_PARAMETER, "invalid image base64") from e
+        if not data or len(data) > IMAGE_MAX_BYTES:
+            raise SimulatedError(ERR_INVALID_IMAGE_SIZE, f"invalid image size: {len(data)}")
+        if hashlib.md5(data).hexdigest() != body.get("md5"):
+            raise SimulatedError(ERR_INVALID_PARAMETER, "image md5 mismatch")
+
+    @staticmethod
+    def _validate_template_card(card: dict[str, Any]) -> None:
+        card_type = card.get("card_type")
+        if card_type not in ("text_notice", "news_notice"):
+            raise SimulatedError(ERR_INVALID_PARAMETER, f"invalid template_card.card_type: {card_type}")
+        main_title = card.get("main_title") or {}
+        if not main_title.get("title") and not card.get("sub_title_text"):
+            raise SimulatedError(ERR_INVALID_PARAMETER, "template_card requires main_title.title or sub_title_text")
+        action = card.get("card_action")
+        if not isinstance(action, dict) or action.get("type") not in (1, 2):
+            raise SimulatedError(ERR_INVALID_PARAMETER, "template_card.card_action.type must be 1 or 2")
+        if action["type"] == 1 and not action.get("url"):
+            raise SimulatedError(ERR_INVALID_PARAMETER, "template_card.card_action.url is required")
+        if action["type"] == 2 and not action.get("appid"):
+            raise SimulatedError(ERR_INVALID_PARAMETER, "template_card.card_action.appid is required")
+        if card_type == "news_notice" and not card.get("card_image") and not card.get("image_text_area"):
+            raise SimulatedError(ERR_INVALID_PARAMETER, "news_notice requires card_image or image_text_area")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Args:
+        argv: Arguments to parse. If None, uses ``sys.argv[1:]``.
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+
+    """
+    defaults = SimulatorConfig()
+    parser = argparse.ArgumentParser(
+        prog="python -m wecom_bot_mcp_server.simulator", description="Local WeCom webhook simulator"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8900, help="Port to listen on (default: 8900)")
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=defaults.rate_limit,
+        help=f"Messages per key per minute, 0 to disable (default: {defaults.rate_limit})",
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request in milliseconds")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency of up to N milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument(
+        "--timeout-s",
+        type=float,
+        default=defaults.timeout_delay,
+        help=f"How long hanging requests hang in seconds (default: {defaults.timeout_delay:g})",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible fault injection")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the simulator until interrupted.
+
+    Args:
+        argv: Command line arguments. If None, uses ``sys.argv[1:]``.
+
+    """
+    args = parse_args(argv)
+    config = SimulatorConfig(
+        rate_limit=args.rate_limit,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout_s,
+        seed=args.seed,
+    )
+    simulator = WeComSimulator(config)
+    logger.info(f"WeCom simulator listening on http://{args.host}:{args.port}{SEND_PATH}?key=<any key>")
+    web.run_app(simulator.app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Metrics endpoints for WeCom Bot MCP Server.
+
+The metrics registry is exposed in two ways:
+
+- ``wecom://stats``: MCP resource with a JSON snapshot of the metrics and bot health,
+  available over every transport (including stdio)
+- ``GET /metrics``: Prometheus text format, served next to the MCP endpoint in HTTP
+  and SSE modes
+"""
+
+# Import built-in modules
+import json
+from typing import Any
+
+# Import third-party modules
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+# Import local modules
+from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.health import get_health_tracker
+from wecom_bot_mcp_server.metrics import get_registry
+
+# Constants
+STATS_RESOURCE_KEY = "wecom://stats"
+METRICS_PATH = "/metrics"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def get_stats() -> dict[str, Any]:
+    """Collect the metrics snapshot and bot health.
+
+    Returns:
+        dict: ``metrics`` (samples per metric name) and ``health`` (state per bot)
+
+    """
+    return {"metrics": get_registry().snapshot(), "health": get_health_tracker().snapshot()}
+
+
+@mcp.resource(STATS_RESOURCE_KEY, mime_type="application/json")
+def get_stats_resource() -> str:
+    """Resource endpoint exposing server metrics and bot health.
+
+    Returns:
+        str: JSON-encoded statistics
+
+    """
+    return json.dumps(get_stats(), ensure_ascii=False, indent=2)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Serve the metrics in the Prometheus text exposition format.
+
+    Args:
+        request: Incoming HTTP request
+
+    Returns:
+        PlainTextResponse: Exposition text
+
+    """
+    return PlainTextResponse(get_registry().render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# ``custom_route`` is untyped, so it is called directly rather than used as a decorator
+mcp.custom_route(METRICS_PATH, methods=["GET"])(metrics_endpoint)
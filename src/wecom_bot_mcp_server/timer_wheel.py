@@ -0,0 +1,141 @@
+"""Hashed timer wheel for WeCom Bot MCP Server.
+
+Background work that is due after a delay (such as flushing digests) is kept in
+a ring of slots that a single task advances once per tick, instead of one sleeping
+task per timer. Scheduling and cancelling a timer are O(1), and each tick only
+looks at the timers in one slot, so thousands of pending timers cost little more
+than one. Timers fire up to one tick late.
+"""
+
+# Import built-in modules
+import asyncio
+from collections.abc import Callable
+from collections.abc import Hashable
+import contextvars
+import math
+import time
+
+# Import third-party modules
+from loguru import logger
+
+# Constants
+DEFAULT_TICK = 1.0
+DEFAULT_SLOTS = 512
+
+
+class TimerWheel:
+    """Run callbacks after a delay, with one task for all timers."""
+
+    def __init__(
+        self,
+        tick: float = DEFAULT_TICK,
+        slots: int = DEFAULT_SLOTS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the wheel.
+
+        Args:
+            tick: Seconds per slot (the timer resolution)
+            slots: Number of slots in the ring; longer delays take extra rounds
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.tick = tick
+        self._clock = clock
+        # slot -> key -> [remaining rounds, callback]
+        self._slots: list[dict[Hashable, list]] = [{} for _ in range(max(1, slots))]
+        self._slot_of: dict[Hashable, int] = {}
+        self._cursor = 0
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of pending timers."""
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check whether a timer is pending for a key."""
+        return key in self._slot_of
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], object]) -> None:
+        """Run a callback after a delay, replacing any timer pending for the key.
+
+        Starts the wheel's task on the running event loop if needed.
+
+        Args:
+            key: Timer identifier
+            delay: Seconds until the callback runs
+            callback: Called on the event loop when the timer fires
+
+        """
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % len(self._slots)
+        self._slots[slot][key] = [(ticks - 1) // len(self._slots), callback]
+        self._slot_of[key] = slot
+        self._ensure_running()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel the timer pending for a key.
+
+        Args:
+            key: Timer identifier
+
+        Returns:
+            bool: True if a timer was cancelled
+
+        """
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    def advance(self) -> int:
+        """Move the wheel forward by one tick and run the timers that are due.
+
+        Returns:
+            int: Number of timers that fired
+
+        """
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        slot = self._slots[self._cursor]
+        due = []
+        for key, timer in slot.items():
+            if timer[0] == 0:
+                due.append(key)
+            else:
+                timer[0] -= 1
+        for key in due:
+            _, callback = slot.pop(key)
+            del self._slot_of[key]
+            try:
+                callback()
+            except Exception as e:  # one failing timer must not stop the wheel
+                logger.exception(f"Timer {key!r} failed: {e}")
+        return len(due)
+
+    async def stop(self) -> None:
+        """Stop the wheel's task. Pending timers are kept and resume on the next schedule."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        # Start from an empty context so the task does not inherit the calling tool call
+        self._task = contextvars.Context().run(loop.create_task, self._run(), name="wecom-timer-wheel")
+
+    async def _run(self) -> None:
+        next_tick = self._clock() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - self._clock()))
+            # Catch up on ticks missed while the event loop was busy
+            while next_tick <= self._clock():
+                self.advance()
+                next_tick += self.tick
@@ -0,0 +1,206 @@
+"""Optional OpenTelemetry tracing for WeCom Bot MCP Server.
+
+When enabled, every tool call becomes a span (``wecom.send_message``,
+``wecom.send_wecom_image``, ...) with a child span per stage (``wecom.download``,
+``wecom.validate``, ``wecom.encode``, ``wecom.upload``, ``wecom.http``), carrying the
+bot id, bytes sent and WeCom errcode as attributes. The spans are opened by the
+metrics instrumentation (see ``metrics.stage``), so both always describe the same
+stages.
+
+Tracing is disabled by default. While disabled, ``span()`` returns a shared no-op
+context manager and the OpenTelemetry packages are never imported.
+
+Spans are exported in batches. The buffered ones are flushed when the background
+services stop (see ``app.background_services``), and the tracer provider is shut
+down, exporting what is left, when the process exits.
+
+Environment Variables:
+    WECOM_TRACING: Span exporter: ``none`` (default), ``console`` (stderr, which keeps
+        the stdio transport clean) or ``otlp`` (OTLP over HTTP, configured with the
+        standard ``OTEL_EXPORTER_OTLP_*`` variables). Requires the ``tracing`` extra:
+        ``pip install wecom-bot-mcp-server[tracing]``.
+"""
+
+# Import built-in modules
+import asyncio
+import atexit
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
+from contextlib import contextmanager
+from contextlib import nullcontext
+from contextvars import ContextVar
+import os
+import sys
+from typing import Any
+
+# Import third-party modules
+from loguru import logger
+
+# Import local modules
+from wecom_bot_mcp_server.__version__ import __version__
+
+# Constants
+TRACER_NAME = "wecom_bot_mcp_server"
+EXPORTERS = ("none", "console", "otlp")
+# Milliseconds the buffered spans get to export when the background services stop
+FLUSH_TIMEOUT_MS = 5000
+
+# Tracer in use, None while tracing is disabled
+_tracer: Any | None = None
+# Tracer provider of the configured exporter, shut down at exit
+_provider: Any | None = None
+# Span opened by ``span()`` in the current task, for ``set_attribute``
+_current_span: ContextVar[Any | None] = ContextVar("wecom_current_span", default=None)
+_NOOP = nullcontext()
+
+
+def is_enabled() -> bool:
+    """Check whether tracing is enabled.
+
+    Returns:
+        bool: True if spans are being recorded
+
+    """
+    return _tracer is not None
+
+
+def set_tracer(tracer: Any | None) -> None:
+    """Record spans with a tracer, or disable tracing.
+
+    Args:
+        tracer: OpenTelemetry ``Tracer`` (anything with ``start_as_current_span``), or None to disable tracing
+
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def configure_tracing(exporter: str | None = None) -> bool:
+    """Enable tracing with the configured span exporter.
+
+    Args:
+        exporter: ``none``, ``console`` or ``otlp``. If None, reads WECOM_TRACING.
+
+    Returns:
+        bool: True if tracing was enabled
+
+    """
+    exporter = (exporter if exporter is not None else os.getenv("WECOM_TRACING", "none")).strip().lower() or "none"
+    if exporter not in EXPORTERS:
+        logger.warning(f"Unknown tracing exporter '{exporter}', expected one of: {', '.join(EXPORTERS)}")
+        exporter = "none"
+    if exporter == "none":
+        shutdown_tracing()
+        return False
+
+    try:
+        # Import third-party modules
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        if exporter == "otlp":
+            # Import third-party modules
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError as e:
+        logger.warning(
+            f"Tracing disabled, OpenTelemetry is not installed ({e}). Install wecom-bot-mcp-server[tracing]."
+        )
+        set_tracer(None)
+        return False
+
+    # Export the spans of a previously configured exporter before replacing it
+    shutdown_tracing()
+    provider = TracerProvider(resource=Resource.create({"service.name": TRACER_NAME}))
+    # The console exporter must not write to stdout, which carries the stdio transport
+    span_exporter = OTLPSpanExporter() if exporter == "otlp" else ConsoleSpanExporter(out=sys.stderr)
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    # OpenTelemetry keeps the first global provider it is given (and only warns on later ones),
+    # so spans are recorded with this provider's tracer rather than through the global one
+    if isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+        trace.set_tracer_provider(provider)
+    set_provider(provider)
+    set_tracer(provider.get_tracer(TRACER_NAME, __version__))
+    logger.info(f"Tracing enabled with the {exporter} exporter")
+    return True
+
+
+def set_provider(provider: Any | None) -> None:
+    """Flush and shut down a tracer provider with the server (when the background services stop, and at exit).
+
+    Args:
+        provider: OpenTelemetry ``TracerProvider`` (anything with ``force_flush`` and ``shutdown``), or None
+
+    """
+    global _provider
+    if _provider is None and provider is not None:
+        atexit.register(shutdown_tracing)
+    _provider = provider
+
+
+async def flush_tracing() -> None:
+    """Export the buffered spans (when the background services stop)."""
+    if _provider is None:
+        return
+    try:
+        await asyncio.to_thread(_provider.force_flush, FLUSH_TIMEOUT_MS)
+    except Exception as e:
+        logger.warning(f"Failed to flush traces: {e}")
+
+
+def shutdown_tracing() -> None:
+    """Export the buffered spans, shut down the tracer provider and disable tracing (at exit)."""
+    global _provider
+    provider, _provider = _provider, None
+    set_tracer(None)
+    if provider is None:
+        return
+    atexit.unregister(shutdown_tracing)
+    try:
+        provider.shutdown()
+    except Exception as e:
+        logger.warning(f"Failed to shut down tracing: {e}")
+
+
+@contextmanager
+def _traced(tracer: Any, name: str, attributes: dict[str, Any] | None) -> Iterator[Any]:
+    """Open a span as the current span."""
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        token = _current_span.set(current)
+        try:
+            yield current
+        finally:
+            _current_span.reset(token)
+
+
+def span(name: str, attributes: dict[str, Any] | None = None) -> AbstractContextManager[Any]:
+    """Trace a block of code.
+
+    Exceptions raised in the block are recorded on the span by OpenTelemetry.
+
+    Args:
+        name: Span name
+        attributes: Initial span attributes
+
+    Returns:
+        AbstractContextManager: Context manager yielding the span (None while tracing is disabled)
+
+    """
+    if _tracer is None:
+        return _NOOP
+    return _traced(_tracer, name, attributes)
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Set an attribute on the innermost span of the current task.
+
+    Args:
+        key: Attribute name
+        value: Attribute value
+
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
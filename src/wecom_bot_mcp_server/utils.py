@@ -6,12 +6,65 @@ import logging
 import os
 from pathlib import Path
 
-# Import third-party modules
-import ftfy
-
 # Import local modules
 from wecom_bot_mcp_server.errors import ErrorCode
 from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.lazy import LazyImport
+
+# Imported on first use to keep server startup fast
+ftfy = LazyImport("ftfy")
+
+
+def get_env_int(name: str, default: int) -> int:
+    """Read a non-negative integer setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or invalid
+
+    Returns:
+        int: Parsed value
+
+    """
+    value = os.getenv(name, "").strip()
+    return int(value) if value.isdigit() else default
+
+
+def get_env_bool(name: str, default: bool = True) -> bool:
+    """Read a boolean setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or invalid
+
+    Returns:
+        bool: Parsed value
+
+    """
+    value = os.getenv(name, "").lower()
+    if value in ("false", "0", "no", "off", "disabled"):
+        return False
+    if value in ("true", "1", "yes", "on", "enabled"):
+        return True
+    return default
+
+
+def get_env_float(name: str, default: float) -> float:
+    """Read a non-negative float setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or invalid
+
+    Returns:
+        float: Parsed value
+
+    """
+    try:
+        value = float(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
 
 
 @lru_cache
@@ -140,7 +193,10 @@ def encode_text(text: str, msg_type: str = "text") -> str:
     """
     try:
         logger = logging.getLogger(__name__)
-        logger.debug(f"Encoding {msg_type} message: {text[:100]}{'...' if len(text) > 100 else ''}")
+        # Skip building the debug lines on the hot path unless they are logged
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Encoding {msg_type} message: {text[:100]}{'...' if len(text) > 100 else ''}")
 
         # Fix text encoding and normalize Unicode
         fixed_text = ftfy.fix_text(text)
@@ -157,7 +213,8 @@ def encode_text(text: str, msg_type: str = "text") -> str:
             )
             logger.debug("Text encoding escaped all special characters")
 
-        logger.debug(f"Encoded result: {escaped_text[:100]}{'...' if len(escaped_text) > 100 else ''}")
+        if debug:
+            logger.debug(f"Encoded result: {escaped_text[:100]}{'...' if len(escaped_text) > 100 else ''}")
         # Return the escaped text directly without adding extra quotes
         return escaped_text
     except Exception as e:
@@ -0,0 +1 @@
+"""Performance benchmarks for WeCom Bot MCP Server."""
@@ -0,0 +1,82 @@
+"""Benchmark configuration and fixtures.
+
+Benchmarks are skipped unless WECOM_BENCHMARK is set:
+
+    WECOM_BENCHMARK=1 pytest tests/benchmarks
+
+Environment Variables:
+    WECOM_BENCH_REQUESTS: Tool calls per workload and concurrency level (default: 50)
+    WECOM_BENCH_CONCURRENCY: Comma-separated concurrency levels (default: 1,8,32)
+    WECOM_BENCH_OUTPUT: Result file (default: .benchmarks/benchmark-<version>.json)
+    WECOM_BENCH_BASELINE: Result file of an earlier run to compare against
+    WECOM_BENCH_TOLERANCE: Allowed relative regression against the baseline (default: 0.2)
+"""
+
+# Import built-in modules
+from dataclasses import dataclass
+from dataclasses import field
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from tests.benchmarks.harness import compare_results
+from tests.benchmarks.harness import write_results
+from wecom_bot_mcp_server.__version__ import __version__
+
+
+@dataclass
+class BenchSettings:
+    """Benchmark settings read from the environment."""
+
+    requests: int
+    concurrency: list[int]
+    output: Path
+    baseline: dict[str, Any] | None
+    tolerance: float
+    results: list[dict[str, Any]] = field(default_factory=list)
+
+    def check(self, results: list[dict[str, Any]]) -> None:
+        """Fail on regressions of results against the baseline."""
+        if self.baseline is None:
+            return
+        regressions = compare_results(self.baseline, {"results": results}, self.tolerance)
+        assert not regressions, "Regressions against baseline:\n" + "\n".join(regressions)
+
+
+@pytest.fixture
+def anyio_backend():
+    """Configure anyio to use asyncio backend."""
+    return "asyncio"
+
+
+@pytest.fixture
+def skip_unless_benchmark():
+    """Skip benchmarks unless WECOM_BENCHMARK is set."""
+    if not os.environ.get("WECOM_BENCHMARK"):
+        pytest.skip("WECOM_BENCHMARK environment variable not set")
+
+
+@pytest.fixture(scope="session")
+def bench_settings():
+    """Read benchmark settings and write the collected results at the end of the session."""
+    baseline_path = os.environ.get("WECOM_BENCH_BASELINE")
+    settings = BenchSettings(
+        requests=int(os.environ.get("WECOM_BENCH_REQUESTS", "50")),
+        concurrency=[int(level) for level in os.environ.get("WECOM_BENCH_CONCURRENCY", "1,8,32").split(",")],
+        output=Path(os.environ.get("WECOM_BENCH_OUTPUT", f".benchmarks/benchmark-{__version__}.json")),
+        baseline=json.loads(Path(baseline_path).read_text(encoding="utf-8")) if baseline_path else None,
+        tolerance=float(os.environ.get("WECOM_BENCH_TOLERANCE", "0.2")),
+    )
+    yield settings
+    if settings.results:
+        write_results(settings.output, __version__, settings.results)
+
+
+def pytest_configure(config):
+    """Register the benchmark marker."""
+    config.addinivalue_line("markers", "benchmark: mark test as performance benchmark")
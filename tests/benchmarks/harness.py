@@ -0,0 +1,128 @@
+"""Benchmark harness: load driver and result files."""
+
+# Import built-in modules
+import asyncio
+from collections.abc import Callable
+import json
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import time
+from typing import Any
+
+# Import third-party modules
+from mcp.client.session import ClientSession
+
+# Import local modules
+from wecom_bot_mcp_server.bench import percentile
+
+# Result fields where a higher value is a regression (the rest, throughput, regresses when lower)
+LOWER_IS_BETTER = ("p50_ms", "p99_ms")
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict[str, Any]:
+    """Summarize one workload run."""
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run_workload(
+    session: ClientSession,
+    tool: str,
+    arguments: Callable[[int], dict[str, Any]],
+    requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    """Call a tool ``requests`` times with at most ``concurrency`` calls in flight.
+
+    Args:
+        session: Initialized MCP client session
+        tool: Tool name
+        arguments: Function building the tool arguments of the n-th call
+        requests: Number of calls
+        concurrency: Maximum calls in flight
+
+    Returns:
+        dict: Throughput, p50/p99 latency and error count
+
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def call(n: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await session.call_tool(tool, arguments(n))
+            if result.isError:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(n) for n in range(requests)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and return cumulative import times in microseconds."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times.setdefault(name.strip(), int(cumulative))
+    return times
+
+
+def write_results(path: Path, version: str, results: list[dict[str, Any]]) -> None:
+    """Write benchmark results to a JSON file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any], tolerance: float) -> list[str]:
+    """List regressions of the current results against a baseline result file.
+
+    Args:
+        baseline: Baseline result document
+        current: Current result document
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        list: Human-readable regressions (empty if none)
+
+    """
+    previous = {(r["workload"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["workload"], result["concurrency"]))
+        if before is None:
+            continue
+        label = f"{result['workload']} @ concurrency {result['concurrency']}"
+        for field in LOWER_IS_BETTER:
+            if before[field] and result[field] > before[field] * (1 + tolerance):
+                regressions.append(f"{label}: {field} {before[field]} -> {result[field]}")
+        if before["throughput_rps"] and result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput_rps {before['throughput_rps']} -> {result['throughput_rps']}")
+    return regressions
@@ -0,0 +1,47 @@
+"""Tests for the benchmark harness itself (these run without WECOM_BENCHMARK)."""
+
+# Import built-in modules
+import json
+from pathlib import Path
+
+# Import local modules
+from tests.benchmarks.harness import compare_results
+from tests.benchmarks.harness import percentile
+from tests.benchmarks.harness import summarize
+from tests.benchmarks.harness import write_results
+
+
+def test_percentile_and_summary():
+    """Test nearest-rank percentiles and the workload summary."""
+    latencies = [i / 1000 for i in range(1, 101)]
+    assert percentile(latencies, 0.5) == 0.05
+    assert percentile(latencies, 0.99) == 0.099
+    assert percentile([], 0.5) == 0.0
+
+    summary = summarize(latencies, elapsed=2.0, errors=1)
+    assert summary == {"requests": 101, "errors": 1, "throughput_rps": 50.0, "p50_ms": 50.0, "p99_ms": 99.0}
+
+
+def test_compare_results_flags_regressions(tmp_path: Path):
+    """Test that slower latency or lower throughput beyond the tolerance is reported."""
+    baseline_result = {
+        "workload": "markdown",
+        "concurrency": 8,
+        "throughput_rps": 100.0,
+        "p50_ms": 10.0,
+        "p99_ms": 50.0,
+    }
+    path = tmp_path / "baseline.json"
+    write_results(path, "0.0.1", [baseline_result])
+    baseline = json.loads(path.read_text(encoding="utf-8"))
+    assert baseline["version"] == "0.0.1"
+
+    within = {**baseline_result, "throughput_rps": 90.0, "p99_ms": 55.0}
+    assert compare_results(baseline, {"results": [within]}, tolerance=0.2) == []
+
+    slower = {**baseline_result, "throughput_rps": 70.0, "p50_ms": 13.0}
+    regressions = compare_results(baseline, {"results": [slower]}, tolerance=0.2)
+    assert regressions == [
+        "markdown @ concurrency 8: p50_ms 10.0 -> 13.0",
+        "markdown @ concurrency 8: throughput_rps 100.0 -> 70.0",
+    ]
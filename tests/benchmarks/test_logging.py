@@ -0,0 +1,72 @@
+"""Logging throughput benchmark: batched sink vs. loguru's ``enqueue=True`` sinks.
+
+Each run configures logging through ``setup_logging`` with a temporary log file
+and measures how many records per second the calling threads can log, including
+the time to write everything out when the handlers are removed.
+"""
+
+# Import built-in modules
+from pathlib import Path
+import threading
+import time
+
+# Import third-party modules
+from loguru import logger
+import pytest
+
+# Import local modules
+from tests.benchmarks.conftest import BenchSettings
+from tests.benchmarks.harness import summarize
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.usefixtures("skip_unless_benchmark")]
+
+# Records logged per tool call of the throughput benchmarks
+RECORDS_PER_REQUEST = 200
+# A typical success line with a few hundred characters of redacted content
+RECORD = "Message sent successfully: " + "x" * 200
+
+
+def _log_records(records: int, threads: int) -> tuple[list[float], float]:
+    latencies: list[float] = []
+
+    def worker(count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            logger.info(RECORD)
+            latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(records // threads,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    # Removing the handlers waits until every record is written
+    logger.remove()
+    return latencies, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("sink", ["batched", "enqueue"])
+def test_logging_throughput(sink: str, bench_settings: BenchSettings, monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    """Measure logged records per second at each concurrency level (threads)."""
+    # Import local modules
+    import wecom_bot_mcp_server.log_config as log_config_module
+
+    monkeypatch.setattr(log_config_module, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(log_config_module, "LOG_FILE", tmp_path / "mcp_wecom.log")
+    monkeypatch.setattr(log_config_module, "LOG_LEVEL", "INFO")
+    monkeypatch.setattr(log_config_module, "LOG_CONSOLE_ENABLED", False)
+    monkeypatch.setattr(log_config_module, "LOG_ASYNC", sink == "batched")
+
+    records = bench_settings.requests * RECORDS_PER_REQUEST
+    results = []
+    for concurrency in bench_settings.concurrency:
+        log_config_module.setup_logging()
+        latencies, elapsed = _log_records(records, concurrency)
+        summary = summarize(latencies, elapsed, 0)
+        results.append({"workload": f"logging_{sink}", "tool": "logger.info", "concurrency": concurrency, **summary})
+
+    log_file = (tmp_path / "mcp_wecom.log").read_text(encoding="utf-8")
+    assert log_file.count(RECORD) == sum(records // level * level for level in bench_settings.concurrency)
+    bench_settings.results.extend(results)
+    bench_settings.check(results)
@@ -0,0 +1,82 @@
+"""Throughput and latency benchmarks of the MCP tools.
+
+The real tools are driven through an in-memory MCP session against the bundled
+WeCom simulator, at each configured concurrency level. Rate limiting is disabled on
+both sides so the numbers describe the server, not WeCom's 20 messages/minute.
+"""
+
+# Import built-in modules
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+# Import third-party modules
+from PIL import Image
+from mcp.shared.memory import create_connected_server_and_client_session
+import pytest
+
+# Import local modules
+from tests.benchmarks.conftest import BenchSettings
+from tests.benchmarks.harness import run_workload
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark, pytest.mark.usefixtures("skip_unless_benchmark")]
+
+TEMPLATE_CARD = {
+    "template_card_source": {"desc": "Benchmark"},
+    "template_card_main_title": {"title": "Build finished", "desc": "main"},
+    "template_card_card_action": {"type": 1, "url": "https://example.com"},
+}
+
+
+@pytest.fixture
+def bench_env(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Disable client-side rate limiting and allow files under a temporary directory."""
+    # Import local modules
+    from wecom_bot_mcp_server.utils import get_allowed_root
+
+    monkeypatch.setenv("WECOM_RATE_LIMIT_PER_MINUTE", "0")
+    monkeypatch.setenv("WECOM_MCP_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.delenv("WECOM_BOTS", raising=False)
+    get_allowed_root.cache_clear()
+    yield tmp_path
+    get_allowed_root.cache_clear()
+
+
+def _workloads(tmp_path: Path) -> dict[str, tuple[str, Callable[[int], dict[str, Any]]]]:
+    image_path = tmp_path / "chart.png"
+    Image.new("RGB", (320, 240), color=(30, 120, 200)).save(image_path)
+    file_path = tmp_path / "report.txt"
+    file_path.write_text("benchmark report\n" * 4096, encoding="utf-8")
+
+    return {
+        "markdown": ("send_message", lambda n: {"content": f"**Benchmark** message {n}", "msg_type": "markdown"}),
+        "template_card": ("send_wecom_template_card_text_notice", lambda n: TEMPLATE_CARD),
+        "image": ("send_wecom_image", lambda n: {"image_path": str(image_path)}),
+        "file": ("send_wecom_file", lambda n: {"file_path": str(file_path)}),
+    }
+
+
+@pytest.mark.parametrize("workload", ["markdown", "template_card", "image", "file"])
+async def test_tool_throughput(
+    workload: str, bench_env: Path, bench_settings: BenchSettings, monkeypatch: pytest.MonkeyPatch
+):
+    """Measure throughput and p50/p99 latency of a tool at each concurrency level."""
+    # Import local modules
+    from wecom_bot_mcp_server.app import mcp
+    from wecom_bot_mcp_server.simulator import SimulatorConfig
+    from wecom_bot_mcp_server.simulator import WeComSimulator
+
+    tool, arguments = _workloads(bench_env)[workload]
+    results = []
+    async with WeComSimulator(SimulatorConfig(rate_limit=0)) as simulator:
+        monkeypatch.setenv("WECOM_WEBHOOK_URL", simulator.webhook_url("bench"))
+        async with create_connected_server_and_client_session(mcp) as session:
+            for concurrency in bench_settings.concurrency:
+                summary = await run_workload(session, tool, arguments, bench_settings.requests, concurrency)
+                results.append({"workload": workload, "tool": tool, "concurrency": concurrency, **summary})
+
+    for result in results:
+        assert result["errors"] == 0, result
+    assert simulator.delivered["bench"] == bench_settings.requests * len(bench_settings.concurrency)
+    bench_settings.results.extend(results)
+    bench_settings.check(results)
@@ -12,6 +12,7 @@ from unittest.mock import patch
 import aiohttp
 from pyfakefs.fake_filesystem_unittest import Patcher
 import pytest
+import pytest_asyncio
 
 # Import local modules
 from wecom_bot_mcp_server.errors import WeComError
@@ -102,6 +103,35 @@ def fs():
         yield patcher.fs
 
 
+def ok_response():
+    """Create a successful WeCom API response as returned by NotifyBridge.send_async."""
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+    return response
+
+
+@pytest.fixture
+def notify_bridge_class():
+    """Patch NotifyBridge in the message module, whose bridges answer with ``ok_response()``.
+
+    Returns:
+        The patched NotifyBridge class
+
+    """
+    with patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge:
+        mock_nb_instance = AsyncMock()
+        mock_nb_instance.send_async.return_value = ok_response()
+        mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+        yield mock_notify_bridge
+
+
+@pytest.fixture
+def notify_bridge(notify_bridge_class):
+    """Patch NotifyBridge in the message module and return the ``send_async`` mock of its bridges."""
+    return notify_bridge_class.return_value.__aenter__.return_value.send_async
+
+
 @pytest.fixture
 def mock_notify_bridge():
     """Fixture for mocking NotifyBridge."""
@@ -853,3 +883,117 @@ def reset_bot_registry(request):
     yield
     # Reset after test as well
     bot_config._bot_registry = None
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    """Reset the global rate limiter so sends of earlier tests do not throttle later ones."""
+    # Import local modules
+    import wecom_bot_mcp_server.ratelimit as ratelimit
+
+    ratelimit._rate_limiter = None
+    yield
+    ratelimit._rate_limiter = None
+
+
+@pytest.fixture(autouse=True)
+def reset_health_tracker():
+    """Reset bot health so failures of earlier tests do not trigger failover in later ones."""
+    # Import local modules
+    import wecom_bot_mcp_server.health as health
+
+    health._health_tracker = None
+    yield
+    health._health_tracker = None
+
+
+@pytest.fixture(autouse=True)
+def reset_idempotency_store():
+    """Reset the idempotency store so keys of earlier tests do not replay in later ones."""
+    # Import local modules
+    import wecom_bot_mcp_server.idempotency as idempotency
+
+    idempotency._idempotency_store = None
+    yield
+    if idempotency._idempotency_store is not None:
+        idempotency._idempotency_store.close()
+    idempotency._idempotency_store = None
+
+
+@pytest.fixture(autouse=True)
+def reset_dedup_window():
+    """Reset the deduplication window so messages of earlier tests are not suppressed in later ones."""
+    # Import local modules
+    import wecom_bot_mcp_server.dedup as dedup
+
+    dedup._dedup_window = None
+    yield
+    dedup._dedup_window = None
+
+
+@pytest.fixture(autouse=True)
+def reset_digester():
+    """Reset the digester so messages buffered by earlier tests are not sent in later ones."""
+    # Import local modules
+    import wecom_bot_mcp_server.digest as digest
+
+    digest._digester = None
+    yield
+    digest._digester = None
+
+
+@pytest.fixture(autouse=True)
+def reset_scheduler(tmp_path, monkeypatch):
+    """Reset the scheduler and keep its database in a temporary directory."""
+    # Import local modules
+    import wecom_bot_mcp_server.scheduler as scheduler
+
+    monkeypatch.setenv("WECOM_SCHEDULE_DB", str(tmp_path / "schedule.db"))
+    scheduler._scheduler = None
+    yield
+    if scheduler._scheduler is not None:
+        scheduler._scheduler._close()
+    scheduler._scheduler = None
+
+
+@pytest.fixture(autouse=True)
+def reset_send_queue():
+    """Reset the send queue so sends of earlier tests do not count against later ones."""
+    # Import local modules
+    import wecom_bot_mcp_server.send_queue as send_queue
+
+    send_queue._send_queue = None
+    yield
+    send_queue._send_queue = None
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Reset metrics so samples of earlier tests do not leak into later ones."""
+    # Import local modules
+    from wecom_bot_mcp_server.metrics import get_registry
+
+    get_registry().clear()
+    yield
+    get_registry().clear()
+
+
+@pytest_asyncio.fixture
+async def no_loop_blocking():
+    """Fail the test if anything blocks the event loop for longer than 100 ms.
+
+    Warm up lazy imports before the code under test runs, since a first import
+    blocks the loop as well.
+    """
+    # Import local modules
+    from wecom_bot_mcp_server.loop_monitor import LoopMonitor
+
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.1, on_block=lambda block: None)
+    monitor.start()
+    yield monitor
+    await monitor.stop()
+    if monitor.blocks:
+        reports = "\n".join(
+            f"Blocked for {block.duration * 1000:.0f} ms at:\n{block.stack}" for block in monitor.blocks
+        )
+        pytest.fail(f"The event loop was blocked {len(monitor.blocks)} time(s):\n{reports}")
@@ -0,0 +1,69 @@
+"""E2E tests for the streamable HTTP transport."""
+
+# Import built-in modules
+import asyncio
+import socket
+import threading
+import time
+
+# Import third-party modules
+import httpx
+from mcp.client.session import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+import pytest
+import uvicorn
+
+# Import local modules
+from wecom_bot_mcp_server.app import mcp
+
+
+@pytest.fixture(scope="module")
+def http_server_url():
+    """Serve the MCP app over streamable HTTP on a free local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    config = uvicorn.Config(mcp.streamable_http_app(), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}{mcp.settings.streamable_http_path}"
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+@pytest.mark.anyio
+@pytest.mark.e2e
+async def test_http_transport_serves_concurrent_sessions(http_server_url: str):
+    """Test that one HTTP server serves several client sessions at once."""
+
+    async def run_session() -> set[str]:
+        async with (
+            streamablehttp_client(http_server_url) as (read_stream, write_stream, _),
+            ClientSession(read_stream, write_stream) as session,
+        ):
+            await session.initialize()
+            tools = await session.list_tools()
+            result = await session.call_tool("list_wecom_bots", {})
+            assert not result.isError
+            return {tool.name for tool in tools.tools}
+
+    results = await asyncio.gather(*(run_session() for _ in range(5)))
+    for names in results:
+        assert {"send_message", "send_wecom_image", "send_wecom_file", "list_wecom_bots"} <= names
+
+
+@pytest.mark.anyio
+@pytest.mark.e2e
+async def test_http_transport_serves_metrics(http_server_url: str):
+    """Test that the HTTP server exposes the metrics in the Prometheus text format."""
+    base_url = http_server_url.removesuffix(mcp.settings.streamable_http_path)
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{base_url}/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE wecom_requests_total counter" in response.text
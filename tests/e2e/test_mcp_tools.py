@@ -231,3 +231,17 @@ async def test_prompt_description_contains_usage_guide(client_session: ClientSes
     assert guidelines_prompt.description is not None
     # Description should mention what the prompt is for
     assert len(guidelines_prompt.description) > 0
+
+
+@pytest.mark.anyio
+@pytest.mark.e2e
+async def test_list_wecom_bots_tool_schema(client_session: ClientSession):
+    """Test list_wecom_bots tool exposes filter and pagination parameters."""
+    tools = await client_session.list_tools()
+    list_tool = next((t for t in tools.tools if t.name == "list_wecom_bots"), None)
+
+    assert list_tool is not None
+    properties = list_tool.inputSchema.get("properties", {})
+    for name in ("tag", "prefix", "offset", "limit"):
+        assert name in properties
+    assert list_tool.inputSchema.get("required", []) == []
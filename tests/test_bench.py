@@ -0,0 +1,143 @@
+"""Tests for the bench load generator."""
+
+# Import built-in modules
+import random
+
+# Import third-party modules
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.types import CallToolResult
+from mcp.types import TextContent
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.bench import Sample
+from wecom_bot_mcp_server.bench import arrival_times
+from wecom_bot_mcp_server.bench import build_call
+from wecom_bot_mcp_server.bench import classify_error
+from wecom_bot_mcp_server.bench import format_report
+from wecom_bot_mcp_server.bench import load_spec
+from wecom_bot_mcp_server.bench import parse_spec
+from wecom_bot_mcp_server.bench import run_load
+from wecom_bot_mcp_server.bench import summarize
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.simulator import SimulatorConfig
+from wecom_bot_mcp_server.simulator import WeComSimulator
+
+SPEC = """
+duration: 2
+qps: 10
+arrival: uniform
+seed: 1
+bots: {alerts: 3, ci: 1}
+mix:
+  - tool: send_message
+    weight: 4
+    arguments: {content: "Build {n} for {bot}", msg_type: markdown}
+  - tool: send_wecom_template_card_text_notice
+    arguments: {template_card_main_title: {title: "Deploy {n}"}}
+"""
+
+
+def test_load_spec(tmp_path):
+    """Test parsing a YAML spec."""
+    path = tmp_path / "load.yaml"
+    path.write_text(SPEC, encoding="utf-8")
+    spec = load_spec(path)
+
+    assert spec.duration == 2
+    assert spec.arrival == "uniform"
+    assert spec.bots == {"alerts": 3.0, "ci": 1.0}
+    assert [entry.tool for entry in spec.mix] == ["send_message", "send_wecom_template_card_text_notice"]
+    assert spec.mix[1].weight == 1.0
+    assert spec.server_url is None
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        ([], "expected a mapping"),
+        ({"mix": []}, "'mix' must be a non-empty list"),
+        ({"mix": [{"tool": "send_message"}], "qps": 0}, "must be positive"),
+        ({"mix": [{"tool": "send_message"}], "arrival": "burst"}, "'arrival' must be one of"),
+        ({"mix": [{"tool": "send_message"}], "server": {"url": "http://x/mcp"}, "simulator": {}}, "spawned"),
+    ],
+)
+def test_parse_spec_rejects_invalid(data, message):
+    """Test that invalid specs raise a validation error."""
+    with pytest.raises(WeComError, match=message) as excinfo:
+        parse_spec(data)
+    assert excinfo.value.error_code == ErrorCode.VALIDATION_ERROR
+
+
+def test_arrival_times_and_calls():
+    """Test the arrival schedule and per-call argument substitution."""
+    spec = parse_spec({"duration": 1, "qps": 4, "arrival": "uniform", "bots": ["ops"], "mix": [{"tool": "t"}]})
+    assert arrival_times(spec, random.Random(0)) == [0.25, 0.5, 0.75]
+
+    spec.arrival = "poisson"
+    spec.duration = 100
+    assert 300 < len(arrival_times(spec, random.Random(0))) < 500
+
+    spec.mix[0].arguments = {"content": "#{n} to {bot}", "tags": ["{n}"]}
+    assert build_call(spec, 7, random.Random(0)) == (
+        "t",
+        "ops",
+        {"content": "#7 to ops", "tags": ["7"], "bot_id": "ops"},
+    )
+
+
+def test_classify_error():
+    """Test grouping failed calls by errcode or message."""
+
+    def result(text: str) -> CallToolResult:
+        return CallToolResult(content=[TextContent(type="text", text=text)], isError=True)
+
+    assert classify_error(result("Error executing tool x: WeChat API error: busy (errcode 45009)")) == "errcode 45009"
+    assert classify_error(result("Error executing tool x: Error sending message: Invalid bot")) == "Invalid bot"
+
+
+def test_summarize_and_report():
+    """Test the summary and its terminal report."""
+    spec = parse_spec({"qps": 2, "mix": [{"tool": "send_message"}]})
+    samples = [Sample("send_message", None, latency) for latency in (0.005, 0.02, 0.02, 0.3)]
+    samples.append(Sample("send_message", None, 1.0, "errcode 45009"))
+    summary = summarize(samples, 2.5, spec)
+
+    assert summary["achieved_qps"] == 1.6
+    assert summary["offered_qps"] == 2.0
+    assert summary["latency_ms"] == {"p50": 20.0, "p90": 300.0, "p99": 300.0, "max": 300.0}
+    assert summary["histogram_ms"] == {"10": 1, "25": 2, "500": 1}
+    assert summary["error_breakdown"] == {"errcode 45009": 1}
+    assert summary["tools"]["send_message"]["errors"] == 1
+
+    report = format_report(summary)
+    assert "achieved 1.6/s" in report
+    assert "<=     25 ms | " + "#" * 40 + " 2" in report
+    assert "1  errcode 45009" in report
+
+
+@pytest.mark.asyncio
+async def test_run_load_against_simulator(monkeypatch: pytest.MonkeyPatch):
+    """Test an open-loop run through an MCP session against the simulator."""
+    monkeypatch.setenv("WECOM_RATE_LIMIT_PER_MINUTE", "0")
+    monkeypatch.delenv("WECOM_BOTS", raising=False)
+    spec = parse_spec(
+        {
+            "duration": 0.5,
+            "qps": 10,
+            "arrival": "uniform",
+            "mix": [{"tool": "send_message", "arguments": {"content": "load {n}", "msg_type": "markdown"}}],
+        }
+    )
+    async with WeComSimulator(SimulatorConfig(rate_limit=3)) as simulator:
+        monkeypatch.setenv("WECOM_WEBHOOK_URL", simulator.webhook_url("bench"))
+        async with create_connected_server_and_client_session(mcp) as session:
+            samples, elapsed = await run_load(session, spec)
+
+    summary = summarize(samples, elapsed, spec)
+    assert summary["calls"] == 4
+    assert summary["ok"] == 3
+    assert summary["error_breakdown"] == {"errcode 45009": 1}
+    assert len(simulator.messages) == 3
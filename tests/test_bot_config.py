@@ -183,6 +183,84 @@ class TestBotRegistry:
         assert registry.get_webhook_url("ALERT") == "https://example.com/alert"
 
 
+class TestBotRegistryIndexes:
+    """Tests for tag/prefix indexes and pagination in BotRegistry."""
+
+    @pytest.fixture
+    def registry(self):
+        """Registry with many tagged bots and no environment configuration."""
+        registry = BotRegistry()
+        registry._loaded = True
+        for i in range(300):
+            tags = ["oncall"] if i % 3 == 0 else []
+            tags.append("region-cn" if i % 2 == 0 else "region-us")
+            registry.register(
+                f"team-{i:04d}",
+                BotConfig(
+                    name=f"Team {i}",
+                    webhook_url=f"https://example.com/{i}",
+                    metadata={"tags": tags},
+                ),
+            )
+        registry.register("alert", BotConfig(name="Alert", webhook_url="https://example.com/alert"))
+        return registry
+
+    def test_tags_from_metadata(self):
+        """Test tags are normalized from list or comma-separated string."""
+        config = BotConfig(name="x", webhook_url="https://example.com", metadata={"tags": "OnCall, ci ,oncall"})
+        assert config.tags == ("oncall", "ci")
+        assert BotConfig(name="y", webhook_url="https://example.com").tags == ()
+
+    def test_filter_by_tag(self, registry):
+        """Test filtering bots by tag."""
+        bots = registry.list_bots(tag="oncall")
+        assert len(bots) == 100
+        assert all("oncall" in bot["tags"] for bot in bots)
+        assert registry.list_bots(tag="ONCALL") == bots
+        assert registry.list_bots(tag="missing") == []
+
+    def test_filter_by_prefix(self, registry):
+        """Test filtering bots by id prefix."""
+        ids, total = registry.find_bot_ids(prefix="team-01")
+        assert total == 100
+        assert ids[0] == "team-0100"
+        assert ids[-1] == "team-0199"
+        assert registry.find_bot_ids(prefix="al") == (["alert"], 1)
+
+    def test_filter_by_tag_and_prefix(self, registry):
+        """Test combining tag and prefix filters."""
+        ids, total = registry.find_bot_ids(tag="oncall", prefix="team-000")
+        assert ids == ["team-0000", "team-0003", "team-0006", "team-0009"]
+        assert total == 4
+
+    def test_pagination(self, registry):
+        """Test paging through bots returns each bot exactly once in sorted order."""
+        seen = []
+        offset = 0
+        while True:
+            ids, total = registry.find_bot_ids(offset=offset, limit=64)
+            if not ids:
+                break
+            seen.extend(ids)
+            offset += len(ids)
+        assert total == 301
+        assert seen == sorted(seen)
+        assert len(set(seen)) == 301
+
+    def test_reregister_updates_tag_index(self, registry):
+        """Test re-registering a bot moves it between tag indexes."""
+        registry.register("team-0000", BotConfig(name="x", webhook_url="https://example.com/x"))
+        assert "team-0000" not in registry.find_bot_ids(tag="oncall")[0]
+        assert registry.list_tags()["oncall"] == 99
+
+    def test_not_found_error_is_bounded(self, registry):
+        """Test the not-found error does not list every configured bot."""
+        with pytest.raises(WeComError) as exc_info:
+            registry.get("nope")
+        assert "301 total" in str(exc_info.value)
+        assert "team-0299" not in str(exc_info.value)
+
+
 class TestMultiBotInstructions:
     """Tests for multi-bot instruction generation."""
 
@@ -262,6 +340,32 @@ class TestMultiBotInstructions:
         assert "Multiple WeCom Bots Available" in instructions
         assert "bot_id" in instructions
 
+    def test_many_bots_instructions_are_summarized(self):
+        """Test instruction size does not grow with the number of bots."""
+        # Import local modules
+        import wecom_bot_mcp_server.bot_config as bot_config
+
+        sizes = []
+        for count in (50, 2000):
+            os.environ["WECOM_BOTS"] = json.dumps(
+                {
+                    f"team-{i}": {
+                        "name": f"Team {i}",
+                        "webhook_url": f"https://example.com/{i}",
+                        "metadata": {"tags": [f"group-{i % 25}"]},
+                    }
+                    for i in range(count)
+                }
+            )
+            bot_config._bot_registry = None
+            instructions = bot_config.get_multi_bot_instructions()
+            assert f"This server has {count} bots configured" in instructions
+            assert "list_wecom_bots" in instructions
+            sizes.append(len(instructions))
+
+        # Only digit widths in the sampled ids and counts differ
+        assert abs(sizes[0] - sizes[1]) < 100
+
 
 class TestListAvailableBots:
     """Tests for list_available_bots function."""
@@ -0,0 +1,90 @@
+"""Tests for deadlines on the send tools."""
+
+# Import built-in modules
+import asyncio
+import time
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
+from wecom_bot_mcp_server.image import send_wecom_image
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.metrics import TIMEOUTS
+from wecom_bot_mcp_server.ratelimit import get_rate_limiter
+
+
+async def _hang(*args, **kwargs):
+    await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+async def test_send_message_times_out_during_http(notify_bridge):
+    """Test that a hung request is cancelled, reports its stage and releases its rate-limit slot."""
+    notify_bridge.side_effect = _hang
+    start = time.perf_counter()
+    with pytest.raises(WeComTimeoutError) as exc_info:
+        await send_message("Deploy finished", timeout_s=0.05)
+    assert time.perf_counter() - start < 1
+    assert exc_info.value.stage == "http"
+    assert exc_info.value.error_code is ErrorCode.TIMEOUT
+    assert exc_info.value.timeout == 0.05
+    assert TIMEOUTS.value(tool="send_message", stage="http") == 1
+    assert get_rate_limiter()._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_send_message_fails_fast_on_rate_limit(notify_bridge, monkeypatch):
+    """Test that a call gives up at once when the rate-limit wait would outlast its deadline."""
+    monkeypatch.setenv("WECOM_RATE_LIMIT_PER_MINUTE", "1")
+    await send_message("First")
+
+    start = time.perf_counter()
+    with pytest.raises(WeComTimeoutError) as exc_info:
+        await send_message("Second", timeout_s=5)
+    assert time.perf_counter() - start < 1
+    assert exc_info.value.stage == "rate_limit"
+    assert notify_bridge.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_default_timeout_from_environment(notify_bridge, monkeypatch):
+    """Test that WECOM_SEND_TIMEOUT applies when no timeout_s is given, and 0 disables it."""
+    monkeypatch.setenv("WECOM_SEND_TIMEOUT", "0.05")
+    notify_bridge.side_effect = _hang
+    with pytest.raises(WeComTimeoutError):
+        await send_message("Deploy finished")
+
+    monkeypatch.setenv("WECOM_SEND_TIMEOUT", "0")
+    notify_bridge.side_effect = None
+    assert (await send_message("Deploy finished"))["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_image_download_stage_is_reported():
+    """Test that a slow download is reported as the stage that expired."""
+    with patch("wecom_bot_mcp_server.image.download_image", side_effect=_hang):
+        with pytest.raises(WeComTimeoutError) as exc_info:
+            await send_wecom_image("https://example.com/chart.png", timeout_s=0.05)
+    assert exc_info.value.stage == "download"
+
+
+@pytest.mark.asyncio
+async def test_invalid_timeout_is_rejected():
+    """Test that a non-positive timeout_s is a validation error."""
+    with pytest.raises(WeComError) as exc_info:
+        await send_message("Deploy finished", timeout_s=0)
+    assert exc_info.value.error_code is ErrorCode.VALIDATION_ERROR
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_not_part_of_the_idempotency_fingerprint(notify_bridge):
+    """Test that a retry with another timeout_s replays instead of being rejected."""
+    await send_message("Deploy finished", idempotency_key="deploy-42", timeout_s=30)
+    replay = await send_message("Deploy finished", idempotency_key="deploy-42", timeout_s=60)
+    assert replay["idempotent_replay"] is True
+    assert notify_bridge.await_count == 1
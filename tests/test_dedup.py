@@ -0,0 +1,89 @@
+"""Tests for the content deduplication window."""
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server import dedup
+from wecom_bot_mcp_server.dedup import DedupWindow
+from wecom_bot_mcp_server.dedup import content_digest
+from wecom_bot_mcp_server.dedup import get_dedup_window
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.metrics import DEDUP_SUPPRESSED
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Install a deduplication window of 60 seconds driven by a fake clock."""
+    now = [0.0]
+    monkeypatch.setattr(dedup, "_dedup_window", dedup.DedupWindow(60, clock=lambda: now[0]))
+    return now
+
+
+def test_content_digest_normalizes_whitespace_and_case():
+    """Test that copies differing only in whitespace or case are duplicates."""
+    assert content_digest("Disk  full on\nweb-1 ") == content_digest("disk full on web-1")
+    assert content_digest("Disk full on web-1") != content_digest("Disk full on web-2")
+
+
+def test_window_suppresses_and_counts(clock):
+    """Test suppression within the window and the count reported after it."""
+    window = get_dedup_window()
+    assert window.admit("alert", "Disk full") == 0
+    assert window.admit("alert", "Disk full") is None
+    assert window.admit("ALERT", "disk full") is None
+    assert window.admit("ci", "Disk full") == 0
+    assert window.suppressed("alert", "Disk full") == 2
+
+    clock[0] = 60
+    assert window.admit("alert", "Disk full") == 2
+    assert window.admit("alert", "Disk full") is None
+
+
+def test_window_is_bounded():
+    """Test that the least recently seen messages are forgotten beyond the bound."""
+    window = DedupWindow(60, max_entries=2)
+    for content in ("a", "b", "c"):
+        window.admit("alert", content)
+    assert len(window) == 2
+    assert window.admit("alert", "a") == 0
+    assert window.admit("alert", "c") is None
+
+
+def test_window_disabled_by_default(monkeypatch):
+    """Test that deduplication is off unless WECOM_DEDUP_WINDOW is set."""
+    monkeypatch.delenv("WECOM_DEDUP_WINDOW", raising=False)
+    window = get_dedup_window()
+    assert not window.enabled
+    assert window.admit("alert", "Disk full") == 0
+    assert window.admit("alert", "Disk full") == 0
+
+
+@pytest.mark.asyncio
+async def test_send_message_suppresses_duplicates(notify_bridge, clock):
+    """Test that duplicates are not sent and the next copy notes how many were suppressed."""
+    await send_message("Disk full", bot_id="default")
+    for _ in range(3):
+        result = await send_message("Disk full", bot_id="default")
+    assert result["status"] == "suppressed"
+    assert result["repeated"] == 3
+    assert notify_bridge.await_count == 1
+    assert DEDUP_SUPPRESSED.value(tool="send_message", bot="default") == 3
+
+    clock[0] = 61
+    result = await send_message("Disk full", bot_id="default")
+    assert result["status"] == "success"
+    assert notify_bridge.await_args.kwargs["content"].endswith("Disk full\n\n(repeated \u00d73)")
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_not_deduplicated(notify_bridge, clock):
+    """Test that a copy whose send failed does not suppress the next one."""
+    notify_bridge.side_effect = [ConnectionError("timed out"), notify_bridge.return_value]
+    with pytest.raises(WeComError):
+        await send_message("Disk full")
+    result = await send_message("Disk full")
+
+    assert result["status"] == "success"
+    assert notify_bridge.await_count == 2
@@ -0,0 +1,139 @@
+"""Tests for digest delivery and the timer wheel."""
+
+# Import built-in modules
+import asyncio
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.digest import Digester
+from wecom_bot_mcp_server.digest import flush_digests
+from wecom_bot_mcp_server.digest import get_digester
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.timer_wheel import TimerWheel
+
+
+@pytest.fixture
+def sent():
+    """Collect the digests delivered by a Digester."""
+    digests = []
+
+    async def send(bot_id, content, msg_type, mentioned_list, mentioned_mobile_list):
+        digests.append({"bot_id": bot_id, "content": content, "msg_type": msg_type, "mentioned": mentioned_list})
+
+    send.digests = digests
+    return send
+
+
+@pytest.mark.asyncio
+async def test_timer_wheel_fires_after_delay():
+    """Test that timers fire on the right tick, including delays longer than the ring."""
+    fired = []
+    wheel = TimerWheel(tick=1.0, slots=4)
+    wheel.schedule("short", 2, lambda: fired.append("short"))
+    wheel.schedule("long", 10, lambda: fired.append("long"))
+    wheel.schedule("cancelled", 1, lambda: fired.append("cancelled"))
+    assert wheel.cancel("cancelled")
+    assert len(wheel) == 2
+
+    for tick in range(1, 11):
+        wheel.advance()
+        if tick == 2:
+            assert fired == ["short"]
+        if tick == 9:
+            assert fired == ["short"]
+    assert fired == ["short", "long"]
+    assert len(wheel) == 0
+    await wheel.stop()
+
+
+@pytest.mark.asyncio
+async def test_timer_wheel_runs_in_background():
+    """Test that one background task fires many timers."""
+    fired = []
+    wheel = TimerWheel(tick=0.01)
+    for n in range(1000):
+        wheel.schedule(n, 0.02 + (n % 5) * 0.01, lambda n=n: fired.append(n))
+    await asyncio.sleep(0.2)
+    await wheel.stop()
+
+    assert sorted(fired) == list(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_digest_flushes_after_interval(sent):
+    """Test that a group's messages are sent as one digest after the interval."""
+    digester = Digester(sent, interval=0.05, wheel=TimerWheel(tick=0.01))
+    result = digester.add("alert", "disk", "Disk full on web-1", mentioned_list=["alice"])
+    digester.add("alert", "disk", "Disk full on web-2", mentioned_list=["alice", "bob"])
+    digester.add("alert", "disk", "Disk full on web-1")
+    digester.add("alert", "cpu", "CPU high on web-1")
+    assert result["status"] == "queued"
+    assert len(digester) == 2
+    assert sent.digests == []
+
+    await asyncio.sleep(0.15)
+    await digester.wheel.stop()
+
+    assert len(digester) == 0
+    disk = next(d for d in sent.digests if "disk" in d["content"])
+    assert disk["content"] == "**disk** (3 messages)\n\nDisk full on web-1 (\u00d72)\n\nDisk full on web-2"
+    assert disk["mentioned"] == ["alice", "bob"]
+    assert len(sent.digests) == 2
+
+
+@pytest.mark.asyncio
+async def test_text_digest_has_plain_header(sent):
+    """Test that a text digest is not given a markdown header."""
+    digester = Digester(sent, interval=60)
+    digester.add("alert", "disk", "Disk full on web-1", msg_type="text")
+    digester.add("alert", "disk", "Disk full on web-2", msg_type="text")
+    await digester.flush_all()
+    await digester.wheel.stop()
+
+    assert sent.digests[0]["msg_type"] == "text"
+    assert sent.digests[0]["content"] == "disk (2 messages)\n\nDisk full on web-1\n\nDisk full on web-2"
+
+
+@pytest.mark.asyncio
+async def test_digest_flushes_before_size_limit(sent):
+    """Test that a message that would overflow the digest sends the digest early."""
+    digester = Digester(sent, interval=60, max_bytes=120)
+    for n in range(5):
+        digester.add("alert", "disk", f"Disk full on web-{n} " + "x" * 20)
+    await digester.flush_all()
+    await digester.wheel.stop()
+
+    assert len(sent.digests) >= 2
+    assert all(len(d["content"].encode("utf-8")) <= 120 for d in sent.digests)
+    assert sum(d["content"].count("Disk full") for d in sent.digests) == 5
+
+
+@pytest.mark.asyncio
+async def test_send_message_with_group_key():
+    """Test that send_message queues messages with a group_key and sends one digest."""
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+    with patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge:
+        mock_nb_instance = AsyncMock()
+        mock_nb_instance.send_async.return_value = response
+        mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+        first = await send_message("Build 1 failed", group_key="ci")
+        second = await send_message("Build 2 failed", group_key="ci")
+        assert first["status"] == second["status"] == "queued"
+        assert second["pending"] == 2
+        mock_nb_instance.send_async.assert_not_called()
+
+        await flush_digests()
+        await get_digester().wheel.stop()
+
+    mock_nb_instance.send_async.assert_awaited_once()
+    content = mock_nb_instance.send_async.await_args.kwargs["content"]
+    assert "Build 1 failed" in content
+    assert "Build 2 failed" in content
@@ -0,0 +1,191 @@
+"""Tests for bot health tracking and failover."""
+
+# Import built-in modules
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.bot_config import BotRegistry
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.failover import is_failover_error
+from wecom_bot_mcp_server.failover import send_with_failover
+from wecom_bot_mcp_server.health import BotHealth
+from wecom_bot_mcp_server.health import get_health_tracker
+from wecom_bot_mcp_server.message import send_message
+
+
+class FakeClock:
+    """Manually advanced clock for health tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _health(clock: FakeClock):
+    return BotHealth("primary", window=60, error_rate=0.5, probe_interval=10, clock=clock)
+
+
+def test_health_trips_on_error_rate():
+    """Test that a bot becomes unhealthy once the error rate reaches the threshold."""
+    clock = FakeClock()
+    health = _health(clock)
+    health.record(ok=False)
+    health.record(ok=False)
+    # Too few samples to judge
+    assert health.healthy
+    health.record(ok=True)
+    health.record(ok=False)
+    assert not health.healthy
+    assert health.error_rate == pytest.approx(0.75)
+
+
+def test_health_probes_and_recovers_without_flapping():
+    """Test that an unhealthy bot is probed periodically and recovers only once errors age out."""
+    clock = FakeClock()
+    health = _health(clock)
+    for _ in range(3):
+        health.record(ok=False)
+    assert not health.healthy
+
+    # Between probes the bot is skipped
+    assert not health.available()
+    clock.now = 10
+    assert health.available()
+    assert not health.available()
+
+    # A successful probe while recent errors dominate the window does not recover the bot
+    health.record(ok=True)
+    assert not health.healthy
+
+    # Once the errors fall out of the window, the next success recovers it
+    clock.now = 61
+    health.record(ok=True)
+    assert health.healthy
+    assert health.available()
+
+
+def test_is_failover_error():
+    """Test which errors fail over to a fallback bot."""
+    assert is_failover_error(WeComError("network", ErrorCode.NETWORK_ERROR))
+    assert is_failover_error(WeComError("rate limited", ErrorCode.API_FAILURE, errcode=45009))
+    assert is_failover_error(ConnectionError("boom"))
+    assert not is_failover_error(WeComError("too long", ErrorCode.API_FAILURE, errcode=40058))
+    assert not is_failover_error(WeComError("bad input", ErrorCode.VALIDATION_ERROR))
+
+
+def _urls(bot_id):
+    return f"https://example.com/{bot_id or 'default'}"
+
+
+@pytest.mark.asyncio
+async def test_send_with_failover_uses_fallbacks_in_order():
+    """Test that a failing primary fails over to the first working fallback."""
+    attempts = []
+
+    async def resolve(bot_id):
+        return _urls(bot_id)
+
+    async def send(url):
+        attempts.append(url)
+        if url.endswith(("/primary", "/backup1")):
+            raise WeComError("server error", ErrorCode.NETWORK_ERROR)
+        return {"status": "success"}
+
+    result = await send_with_failover("primary", ["backup1", "backup2"], resolve, send)
+    assert attempts == ["https://example.com/primary", "https://example.com/backup1", "https://example.com/backup2"]
+    assert result == {"status": "success", "delivered_by": "backup2", "failed_over_from": ["primary", "backup1"]}
+
+
+@pytest.mark.asyncio
+async def test_send_with_failover_skips_unhealthy_primary():
+    """Test that sends go straight to the fallback while the primary is unhealthy."""
+    attempts = []
+
+    async def resolve(bot_id):
+        return _urls(bot_id)
+
+    async def send(url):
+        attempts.append(url)
+        if url.endswith("/primary"):
+            raise WeComError("server error", ErrorCode.NETWORK_ERROR)
+        return {"status": "success"}
+
+    for _ in range(3):
+        await send_with_failover("primary", ["backup"], resolve, send)
+    assert not get_health_tracker().get("primary").healthy
+
+    attempts.clear()
+    result = await send_with_failover("primary", ["backup"], resolve, send)
+    assert attempts == ["https://example.com/backup"]
+    assert result["failed_over_from"] == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_send_with_failover_does_not_retry_content_errors():
+    """Test that errors caused by the message are raised without trying fallbacks."""
+    send = AsyncMock(side_effect=WeComError("content too long", ErrorCode.API_FAILURE, errcode=40058))
+
+    async def resolve(bot_id):
+        return _urls(bot_id)
+
+    with pytest.raises(WeComError, match="content too long"):
+        await send_with_failover("primary", ["backup"], resolve, send)
+    send.assert_awaited_once_with("https://example.com/primary")
+
+
+@pytest.mark.asyncio
+async def test_send_with_failover_all_bots_fail():
+    """Test the error raised when every bot in the chain fails."""
+
+    async def resolve(bot_id):
+        return _urls(bot_id)
+
+    send = AsyncMock(side_effect=WeComError("server error", ErrorCode.NETWORK_ERROR))
+    with pytest.raises(WeComError, match="every bot") as exc_info:
+        await send_with_failover("primary", ["backup"], resolve, send)
+    assert exc_info.value.error_code == ErrorCode.API_FAILURE
+
+
+@pytest.mark.asyncio
+async def test_send_message_fails_over_to_configured_fallback():
+    """Test send_message with a bot whose fallbacks are configured in WECOM_BOTS."""
+    bots = {
+        "primary": {"webhook_url": "https://example.com/primary", "fallbacks": ["backup"]},
+        "backup": "https://example.com/backup",
+    }
+
+    async def send_async(channel, webhook_url, **kwargs):
+        errcode = 0 if webhook_url.endswith("/backup") else 93000
+        return SimpleNamespace(success=True, data={"errcode": errcode, "errmsg": "ok" if not errcode else "invalid"})
+
+    nb_instance = AsyncMock()
+    nb_instance.send_async.side_effect = send_async
+    with (
+        patch.dict(os.environ, {"WECOM_BOTS": json.dumps(bots)}),
+        patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge,
+    ):
+        mock_notify_bridge.return_value.__aenter__.return_value = nb_instance
+        result = await send_message("hello", bot_id="primary")
+
+    assert result["status"] == "success"
+    assert result["delivered_by"] == "backup"
+    assert result["failed_over_from"] == ["primary"]
+
+
+def test_registry_loads_fallbacks():
+    """Test that fallbacks are parsed from WECOM_BOTS and listed."""
+    bots = {"alert": {"webhook_url": "https://example.com/a", "fallbacks": "Backup, oncall"}}
+    with patch.dict(os.environ, {"WECOM_BOTS": json.dumps(bots)}, clear=True):
+        registry = BotRegistry()
+        assert registry.get_fallbacks("alert") == ["backup", "oncall"]
+        assert registry.list_bots()[0]["fallbacks"] == ["backup", "oncall"]
@@ -0,0 +1,265 @@
+"""Tests for group fan-out sending."""
+
+# Import built-in modules
+from pathlib import Path
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+
+@pytest.fixture
+def oncall_group():
+    """Register three oncall bots, two of which share a webhook."""
+    # Import local modules
+    from wecom_bot_mcp_server.bot_config import BotConfig
+    from wecom_bot_mcp_server.bot_config import get_bot_registry
+
+    registry = get_bot_registry()
+    registry.register(
+        "ops", BotConfig(name="Ops", webhook_url="https://example.com/send?key=ops", metadata={"tags": ["oncall"]})
+    )
+    registry.register(
+        "sre",
+        BotConfig(name="SRE", webhook_url="https://example.com/send?key=sre", metadata={"tags": "oncall,region-cn"}),
+    )
+    registry.register(
+        "sre-alias",
+        BotConfig(name="SRE alias", webhook_url="https://example.com/send?key=sre", metadata={"tags": ["oncall"]}),
+    )
+    return registry
+
+
+def _ok_response():
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+    return response
+
+
+def test_parse_group_target():
+    """Test parsing of @group: targets."""
+    # Import local modules
+    from wecom_bot_mcp_server.bot_config import parse_group_target
+
+    assert parse_group_target("@group:OnCall") == "oncall"
+    assert parse_group_target("@GROUP:ci") == "ci"
+    assert parse_group_target("alert") is None
+    assert parse_group_target(None) is None
+
+
+def test_resolve_group_targets_dedupes_webhooks(oncall_group):
+    """Test members sharing a webhook are delivered to once."""
+    # Import local modules
+    from wecom_bot_mcp_server.fanout import resolve_group_targets
+
+    targets = resolve_group_targets("oncall")
+    assert len(targets) == 2
+    shared = next(t for t in targets if t.webhook_urls == ("https://example.com/send?key=sre",))
+    assert shared.bot_ids == ["sre", "sre-alias"]
+
+
+@pytest.mark.asyncio
+@patch("wecom_bot_mcp_server.message.NotifyBridge")
+async def test_group_send_selects_pool_webhook_once_per_delivery(mock_notify_bridge, oncall_group):
+    """Test resolving a group leaves webhook pools alone, and each send selects one webhook."""
+    # Import local modules
+    from wecom_bot_mcp_server.bot_config import BotConfig
+    from wecom_bot_mcp_server.fanout import resolve_group_targets
+    from wecom_bot_mcp_server.message import send_message
+    from wecom_bot_mcp_server.pool import WebhookEndpoint
+
+    urls = ["https://example.com/send?key=pool-a", "https://example.com/send?key=pool-b"]
+    oncall_group.register(
+        "pooled",
+        BotConfig(
+            name="Pooled",
+            webhook_url=urls[0],
+            webhook_urls=[WebhookEndpoint(url) for url in urls],
+            metadata={"tags": ["oncall"]},
+        ),
+    )
+    for _ in range(3):
+        assert tuple(urls) in [target.webhook_urls for target in resolve_group_targets("oncall")]
+
+    mock_nb_instance = AsyncMock()
+    mock_nb_instance.send_async.return_value = _ok_response()
+    mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+    await send_message("Disk full", bot_id="@group:oncall")
+    await send_message("Disk still full", bot_id="@group:oncall")
+
+    sent = [c.kwargs["webhook_url"] for c in mock_nb_instance.send_async.call_args_list]
+    assert [url for url in sent if "pool" in url] == urls
+
+
+def test_resolve_empty_group_raises(oncall_group):
+    """Test an unknown group raises a validation error."""
+    # Import local modules
+    from wecom_bot_mcp_server.errors import WeComError
+    from wecom_bot_mcp_server.fanout import resolve_group_targets
+
+    with pytest.raises(WeComError, match="has no members"):
+        resolve_group_targets("nobody")
+
+
+@pytest.mark.asyncio
+@patch("wecom_bot_mcp_server.message.encode_text", side_effect=lambda text, msg_type: text)
+@patch("wecom_bot_mcp_server.message.NotifyBridge")
+async def test_send_message_to_group(mock_notify_bridge, mock_encode_text, oncall_group):
+    """Test a group send encodes once and aggregates per-bot results."""
+    # Import local modules
+    from wecom_bot_mcp_server.message import send_message
+
+    mock_nb_instance = AsyncMock()
+    mock_nb_instance.send_async.return_value = _ok_response()
+    mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+    result = await send_message("Disk full", bot_id="@group:oncall")
+
+    assert result["status"] == "success"
+    assert result["total"] == 3
+    assert result["succeeded"] == 3
+    assert {r["bot_id"] for r in result["results"]} == {"ops", "sre", "sre-alias"}
+    mock_encode_text.assert_called_once()
+    sent_urls = {c.kwargs["webhook_url"] for c in mock_nb_instance.send_async.call_args_list}
+    assert sent_urls == {"https://example.com/send?key=ops", "https://example.com/send?key=sre"}
+
+
+@pytest.mark.asyncio
+@patch("wecom_bot_mcp_server.message.NotifyBridge")
+async def test_send_message_to_group_partial_failure(mock_notify_bridge, oncall_group):
+    """Test one failing webhook yields a partial result."""
+    # Import local modules
+    from wecom_bot_mcp_server.message import send_message
+
+    failed = MagicMock()
+    failed.success = True
+    failed.data = {"errcode": 93000, "errmsg": "invalid webhook url"}
+
+    async def _send(_channel, **kwargs):
+        return failed if kwargs["webhook_url"].endswith("key=ops") else _ok_response()
+
+    mock_nb_instance = AsyncMock()
+    mock_nb_instance.send_async.side_effect = _send
+    mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+    result = await send_message("Disk full", bot_id="@group:oncall")
+
+    assert result["status"] == "partial"
+    assert result["failed"] == 1
+    ops = next(r for r in result["results"] if r["bot_id"] == "ops")
+    assert ops["status"] == "error"
+    assert "invalid webhook url" in ops["message"]
+
+
+@pytest.mark.asyncio
+@patch("wecom_bot_mcp_server.message.NotifyBridge")
+async def test_send_message_to_group_all_failed(mock_notify_bridge, oncall_group):
+    """Test a group send raises when no member succeeds."""
+    # Import local modules
+    from wecom_bot_mcp_server.errors import WeComError
+    from wecom_bot_mcp_server.message import send_message
+
+    mock_nb_instance = AsyncMock()
+    mock_nb_instance.send_async.side_effect = Exception("boom")
+    mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+    with pytest.raises(WeComError, match="every delivery failed"):
+        await send_message("Disk full", bot_id="@group:oncall")
+
+
+@pytest.mark.asyncio
+@patch("wecom_bot_mcp_server.file.NotifyBridge")
+@patch("wecom_bot_mcp_server.file._upload_media", new_callable=AsyncMock, return_value="media-1")
+async def test_send_file_to_group_uploads_once_per_key(
+    mock_upload, mock_notify_bridge, oncall_group, tmp_path, monkeypatch
+):
+    """Test files are uploaded once per distinct webhook key, over one HTTP client."""
+    # Import local modules
+    from wecom_bot_mcp_server.file import send_wecom_file
+    from wecom_bot_mcp_server.utils import get_allowed_root
+
+    monkeypatch.setenv("WECOM_MCP_ALLOWED_ROOT", str(tmp_path))
+
+    get_allowed_root.cache_clear()
+    report = tmp_path / "report.txt"
+    report.write_text("weekly report")
+
+    mock_nb_instance = AsyncMock()
+    mock_nb_instance.send_async.return_value = _ok_response()
+    mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+    try:
+        result = await send_wecom_file(str(report), bot_id="@group:oncall")
+    finally:
+        get_allowed_root.cache_clear()
+
+    assert result["succeeded"] == 3
+    assert mock_upload.await_count == 2
+    assert len({id(c.args[2]) for c in mock_upload.await_args_list}) == 1
+    assert all(c.kwargs["media_id"] == "media-1" for c in mock_nb_instance.send_async.call_args_list)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "webhook_url, uploads",
+    [
+        ("https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=abc", False),
+        ("http://127.0.0.1:8080/cgi-bin/webhook/send?key=abc", True),
+    ],
+)
+@patch("wecom_bot_mcp_server.file.NotifyBridge")
+@patch("wecom_bot_mcp_server.file._upload_media", new_callable=AsyncMock, return_value="media-1")
+async def test_send_file_to_single_bot_uploads_through_notify_bridge(
+    mock_upload, mock_notify_bridge, webhook_url, uploads, tmp_path, monkeypatch
+):
+    """Test single-bot files go through notify-bridge's media_path unless the webhook is on another host."""
+    # Import local modules
+    from wecom_bot_mcp_server.bot_config import BotConfig
+    from wecom_bot_mcp_server.bot_config import get_bot_registry
+    from wecom_bot_mcp_server.file import send_wecom_file
+    from wecom_bot_mcp_server.utils import get_allowed_root
+
+    monkeypatch.setenv("WECOM_MCP_ALLOWED_ROOT", str(tmp_path))
+    get_bot_registry().register("reports", BotConfig(name="Reports", webhook_url=webhook_url))
+
+    get_allowed_root.cache_clear()
+    report = tmp_path / "report.txt"
+    report.write_text("weekly report")
+
+    mock_nb_instance = AsyncMock()
+    mock_nb_instance.send_async.return_value = _ok_response()
+    mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+    try:
+        result = await send_wecom_file(str(report), bot_id="reports")
+    finally:
+        get_allowed_root.cache_clear()
+
+    assert result["status"] == "success"
+    kwargs = mock_nb_instance.send_async.await_args.kwargs
+    if uploads:
+        mock_upload.assert_awaited_once()
+        assert kwargs["media_id"] == "media-1"
+    else:
+        mock_upload.assert_not_awaited()
+        assert kwargs["media_path"] == str(report.absolute())
+
+
+def test_get_upload_url():
+    """Test the upload endpoint is derived from the webhook URL."""
+    # Import local modules
+    from wecom_bot_mcp_server.errors import WeComError
+    from wecom_bot_mcp_server.file import _get_upload_url
+
+    assert (
+        _get_upload_url("https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=abc")
+        == "https://qyapi.weixin.qq.com/cgi-bin/webhook/upload_media?key=abc&type=file"
+    )
+    assert _get_upload_url("http://127.0.0.1:8080/cgi-bin/webhook/send?key=k1").startswith(
+        "http://127.0.0.1:8080/cgi-bin/webhook/upload_media?key=k1"
+    )
+    with pytest.raises(WeComError):
+        _get_upload_url("https://example.com/webhook")
@@ -0,0 +1,118 @@
+"""Tests for idempotency keys on the send tools."""
+
+# Import built-in modules
+import asyncio
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.idempotency import IdempotencyStore
+from wecom_bot_mcp_server.idempotency import SQLiteIdempotencyStore
+from wecom_bot_mcp_server.idempotency import get_idempotency_store
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.metrics import IDEMPOTENT_REPLAYS
+
+
+@pytest.mark.asyncio
+async def test_memory_store_expires_and_evicts():
+    """Test that entries expire after the TTL and the oldest are evicted beyond the bound."""
+    now = [0.0]
+    store = IdempotencyStore(ttl=10, max_keys=2, clock=lambda: now[0])
+    await store.put("a", "fp", {"n": 1})
+    await store.put("b", "fp", {"n": 2})
+    await store.put("c", "fp", {"n": 3})
+    assert await store.get("a") is None
+    assert await store.get("b") == ("fp", {"n": 2})
+
+    now[0] = 10
+    assert await store.get("c") is None
+    assert len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_persists(tmp_path):
+    """Test that results stored in SQLite survive reopening and expire."""
+    now = [1000.0]
+    path = tmp_path / "idempotency.db"
+    store = SQLiteIdempotencyStore(path, ttl=10, max_keys=2, clock=lambda: now[0])
+    for n, key in enumerate("abc"):
+        await store.put(key, "fp", {"n": n})
+    store.close()
+
+    store = SQLiteIdempotencyStore(path, ttl=10, max_keys=2, clock=lambda: now[0])
+    assert await store.get("a") is None
+    assert await store.get("c") == ("fp", {"n": 2})
+    now[0] += 10
+    assert await store.get("c") is None
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_with_same_key_does_not_send_again(notify_bridge):
+    """Test that a retried send returns the original result without a network call."""
+    first = await send_message("Disk full", idempotency_key="alert-1")
+    second = await send_message("Disk full", idempotency_key="alert-1")
+
+    assert notify_bridge.await_count == 1
+    assert first["status"] == "success"
+    assert "idempotent_replay" not in first
+    assert second == {**first, "idempotent_replay": True}
+    assert IDEMPOTENT_REPLAYS.value(tool="send_message") == 1
+
+    await send_message("Disk full", idempotency_key="alert-2")
+    await send_message("Disk full")
+    await send_message("Disk full")
+    assert notify_bridge.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_retry_waits_for_the_original(notify_bridge):
+    """Test that a retry arriving while the original is in flight shares its result."""
+    release = asyncio.Event()
+
+    async def slow_send(*args, **kwargs):
+        await release.wait()
+        return notify_bridge.return_value
+
+    notify_bridge.side_effect = slow_send
+    calls = [asyncio.create_task(send_message("Disk full", idempotency_key="alert-1")) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert notify_bridge.await_count == 1
+    assert [result.get("idempotent_replay", False) for result in results] == [False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_key_reused_with_different_arguments(notify_bridge):
+    """Test that reusing a key for a different message is rejected."""
+    await send_message("Disk full", idempotency_key="alert-1")
+    with pytest.raises(WeComError, match="different arguments"):
+        await send_message("Disk OK", idempotency_key="alert-1")
+    assert notify_bridge.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_not_stored(notify_bridge):
+    """Test that a failed send can be retried with the same key."""
+    notify_bridge.side_effect = [ConnectionError("timed out"), notify_bridge.return_value]
+    with pytest.raises(WeComError):
+        await send_message("Disk full", idempotency_key="alert-1")
+    result = await send_message("Disk full", idempotency_key="alert-1")
+
+    assert result["status"] == "success"
+    assert "idempotent_replay" not in result
+    assert notify_bridge.await_count == 2
+
+
+def test_idempotency_store_from_environment(monkeypatch, tmp_path):
+    """Test that WECOM_IDEMPOTENCY_DB selects the SQLite store."""
+    monkeypatch.setenv("WECOM_IDEMPOTENCY_DB", str(tmp_path / "keys.db"))
+    monkeypatch.setenv("WECOM_IDEMPOTENCY_TTL", "60")
+    store = get_idempotency_store()
+
+    assert isinstance(store, SQLiteIdempotencyStore)
+    assert store.ttl == 60
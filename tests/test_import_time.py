@@ -0,0 +1,29 @@
+"""Import-time budget of the package.
+
+Wall-clock import time varies with the machine and its load, so the package's own
+import time is measured against that of the MCP SDK it is built on, imported in the
+same interpreter: the ratio stays put when the whole machine is slower. Which
+modules are deferred is checked exactly in ``tests/test_lazy.py``.
+"""
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from tests.benchmarks.harness import import_times
+
+# The package's own import time, as a share of the MCP SDK's (about 0.2 when written)
+IMPORT_BUDGET_RATIO = 0.3
+
+
+def test_import_time_budget():
+    """Test that the package's own import time stays within budget."""
+    # Best of three runs to reduce noise from a busy machine
+    ratios = []
+    for _ in range(3):
+        times = import_times("wecom_bot_mcp_server")
+        ratios.append((times["wecom_bot_mcp_server"] - times["mcp"]) / times["mcp"])
+    if min(ratios) > IMPORT_BUDGET_RATIO:
+        pytest.fail(
+            f"Package import took {min(ratios):.0%} of the MCP SDK's import time (budget {IMPORT_BUDGET_RATIO:.0%})"
+        )
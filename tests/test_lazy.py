@@ -0,0 +1,57 @@
+"""Tests for lazy imports (the import-time budget is checked in ``test_import_time.py``)."""
+
+# Import built-in modules
+import sys
+from unittest.mock import patch
+
+# Import local modules
+from tests.benchmarks.harness import import_times
+from wecom_bot_mcp_server.lazy import LazyImport
+
+# Dependencies, and modules only used while sending, that must not be imported until a tool needs them
+DEFERRED_MODULES = (
+    "PIL",
+    "aiohttp",
+    "notify_bridge",
+    "ftfy",
+    "wecom_bot_mcp_server.digest",
+    "wecom_bot_mcp_server.timer_wheel",
+    "wecom_bot_mcp_server.send_queue",
+    "wecom_bot_mcp_server.pool",
+    "wecom_bot_mcp_server.ratelimit",
+    "wecom_bot_mcp_server.routing",
+    "wecom_bot_mcp_server.dedup",
+    "wecom_bot_mcp_server.failover",
+    "wecom_bot_mcp_server.fanout",
+    "wecom_bot_mcp_server.log_config",
+    "wecom_bot_mcp_server.log_sink",
+    "sqlite3",
+)
+
+
+def test_lazy_import_defers_until_use():
+    """Test that the proxy imports its target on first use only."""
+    sys.modules.pop("colorsys", None)
+    colorsys = LazyImport("colorsys")
+    assert "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
+    assert "colorsys" in sys.modules
+
+    ordered_dict = LazyImport("collections", "OrderedDict")
+    assert ordered_dict(a=1) == {"a": 1}
+
+
+def test_lazy_import_supports_patching_attributes():
+    """Test that mock.patch through a proxy patches the real module and restores it."""
+    proxy = LazyImport("json")
+    original = proxy.dumps
+    with patch.object(proxy, "dumps", return_value="patched"):
+        assert proxy.dumps({}) == "patched"
+    assert proxy.dumps is original
+
+
+def test_startup_does_not_import_heavy_dependencies():
+    """Test that importing the package registers tools without importing heavy dependencies."""
+    times = import_times("wecom_bot_mcp_server")
+    imported = sorted(name for name in DEFERRED_MODULES if name in times)
+    assert imported == [], f"Imported at startup: {imported}"
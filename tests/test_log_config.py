@@ -92,3 +92,117 @@ def test_setup_logging_with_custom_level():
         # Verify logger is properly configured
         assert isinstance(logger_wrapper, log_config_module.LoggerWrapper)
         assert logger_wrapper.name == "mcp_wechat_server"
+
+
+@pytest.mark.parametrize(
+    ("mode", "expected"),
+    [
+        ("full", "x" * 100),
+        ("truncate", "x" * 80 + "... (100 chars)"),
+        ("hash", "sha256:09ecb6ebc8bcefc7 (100 chars)"),
+    ],
+)
+def test_redact_content(monkeypatch, mode, expected):
+    """Test that message content is truncated, hashed or kept for logging."""
+    # Import local modules
+    import wecom_bot_mcp_server.log_config as log_config_module
+
+    monkeypatch.setattr(log_config_module, "LOG_CONTENT", mode)
+    assert log_config_module.redact_content("x" * 100) == expected
+    assert log_config_module.redact_content("short") == (
+        "short" if mode != "hash" else "sha256:f9b0078b5df596d2 (5 chars)"
+    )
+
+
+def test_log_success_sampling(monkeypatch):
+    """Test that only 1 in N success lines is logged, per message."""
+    # Import third-party modules
+    from loguru import logger
+
+    # Import local modules
+    import wecom_bot_mcp_server.log_config as log_config_module
+
+    monkeypatch.setattr(log_config_module, "LOG_SUCCESS_SAMPLE", 3)
+    monkeypatch.setattr(log_config_module, "_success_counts", {})
+    records = []
+    handler_id = logger.add(lambda message: records.append(message.record), level="INFO")
+    try:
+        for _ in range(7):
+            log_config_module.log_success("Message sent successfully")
+        log_config_module.log_success("Image sent successfully")
+    finally:
+        logger.remove(handler_id)
+
+    assert [record["message"] for record in records] == ["Message sent successfully"] * 3 + ["Image sent successfully"]
+    assert all(record["extra"]["sampled"] == 3 for record in records)
+    assert records[0]["function"] == "test_log_success_sampling"
+
+
+def test_json_format():
+    """Test that the JSON format writes one object per line with the bound fields."""
+    # Import built-in modules
+    import io
+    import json
+
+    # Import third-party modules
+    from loguru import logger
+
+    # Import local modules
+    import wecom_bot_mcp_server.log_config as log_config_module
+
+    stream = io.StringIO()
+    handler_id = logger.add(stream, format=log_config_module._format_json)
+    try:
+        logger.bind(tool="send_message", errcode="45009").error('Failed: "quoted" {braces}')
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Crashed")
+    finally:
+        logger.remove(handler_id)
+
+    first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert first["level"] == "ERROR"
+    assert first["message"] == 'Failed: "quoted" {braces}'
+    assert first["tool"] == "send_message"
+    assert first["errcode"] == "45009"
+    assert "json" not in first
+    assert second["exception"] == "ValueError: boom"
+
+
+@pytest.mark.asyncio
+async def test_tool_error_logged_once(monkeypatch):
+    """Test that a failed tool call logs one error carrying its tool, bot and errcode."""
+    # Import third-party modules
+    from loguru import logger
+
+    # Import local modules
+    from wecom_bot_mcp_server.errors import WeComError
+    from wecom_bot_mcp_server.message import send_message
+    from wecom_bot_mcp_server.metrics import add_call_fields
+    from wecom_bot_mcp_server.simulator import SimulatorConfig
+    from wecom_bot_mcp_server.simulator import WeComSimulator
+
+    monkeypatch.setenv("WECOM_RATE_LIMIT_PER_MINUTE", "0")
+    monkeypatch.delenv("WECOM_BOTS", raising=False)
+    records = []
+    logger.configure(patcher=add_call_fields)
+    handler_id = logger.add(lambda message: records.append(message.record), level="DEBUG")
+    try:
+        async with WeComSimulator(SimulatorConfig(rate_limit=1)) as simulator:
+            monkeypatch.setenv("WECOM_WEBHOOK_URL", simulator.webhook_url("local"))
+            await send_message("first", msg_type="markdown")
+            with pytest.raises(WeComError):
+                await send_message("second", msg_type="markdown")
+    finally:
+        logger.remove(handler_id)
+        logger.configure(patcher=None)
+
+    errors = [record for record in records if record["level"].name == "ERROR"]
+    assert len(errors) == 1
+    assert errors[0]["extra"]["tool"] == "send_message"
+    assert errors[0]["extra"]["bot"] == "default"
+    assert errors[0]["extra"]["errcode"] == "45009"
+    assert "errcode 45009" in errors[0]["message"]
+    # Records logged during the call are tagged with its tool
+    assert all(record["extra"].get("tool") == "send_message" for record in records)
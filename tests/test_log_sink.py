@@ -0,0 +1,120 @@
+"""Tests for the batched log sinks."""
+
+# Import built-in modules
+import threading
+import zipfile
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+import wecom_bot_mcp_server.log_config as log_config_module
+from wecom_bot_mcp_server.log_sink import BatchingSink
+from wecom_bot_mcp_server.log_sink import RotatingFileWriter
+from wecom_bot_mcp_server.log_sink import parse_size
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [("10 MB", 10_000_000), ("512KiB", 524_288), ("1.5 GB", 1_500_000_000), ("100 B", 100)],
+)
+def test_parse_size(size, expected):
+    """Test parsing rotation sizes."""
+    assert parse_size(size) == expected
+
+
+def test_parse_size_invalid():
+    """Test that times are not accepted as sizes."""
+    with pytest.raises(ValueError, match="Invalid size"):
+        parse_size("1 day")
+
+
+def test_batching_sink_writes_batches():
+    """Test that lines are written in batches and flushed once per batch."""
+    writes = []
+    flushes = []
+    sink = BatchingSink(writes.append, lambda: flushes.append(True), batch_size=3, flush_interval=60)
+    for n in range(7):
+        sink.write(f"line {n}\n")
+    sink.stop()
+
+    assert "".join(writes) == "".join(f"line {n}\n" for n in range(7))
+    assert len(writes) < 7
+    assert len(flushes) == len(writes)
+    assert sink.written == 7
+
+
+def test_batching_sink_flush_interval():
+    """Test that a partial batch is written after the flush interval."""
+    written = threading.Event()
+    sink = BatchingSink(lambda text: written.set(), batch_size=100, flush_interval=0.01)
+    sink.write("line\n")
+    assert written.wait(2)
+    sink.stop()
+
+
+def test_batching_sink_drops_oldest_when_full():
+    """Test that a full buffer drops the oldest lines instead of blocking."""
+    release = threading.Event()
+    writes = []
+
+    def slow_write(text: str) -> None:
+        release.wait(5)
+        writes.append(text)
+
+    sink = BatchingSink(slow_write, max_buffer=3, batch_size=1, flush_interval=60)
+    sink.write("first\n")  # picked up by the writer, which then blocks
+    for n in range(10):
+        sink.write(f"line {n}\n")
+    release.set()
+    sink.stop()
+
+    output = "".join(writes)
+    assert "dropped" in output
+    assert "line 9\n" in output
+    assert "line 0\n" not in output
+
+
+def test_batching_sink_survives_write_errors(capsys):
+    """Test that a failing target reports the error and keeps the sink usable."""
+
+    def broken(text: str) -> None:
+        raise OSError("disk full")
+
+    sink = BatchingSink(broken, flush_interval=60)
+    sink.write("line\n")
+    sink.stop()
+    assert "disk full" in capsys.readouterr().err
+
+
+def test_rotating_file_writer(tmp_path):
+    """Test rotation by size, background compression and retention."""
+    path = tmp_path / "app.log"
+    writer = RotatingFileWriter(path, max_bytes=100, retention=2)
+    for n in range(5):
+        writer.write(f"{n}" * 60 + "\n")
+    writer.close()
+
+    assert path.read_text(encoding="utf-8") == "4" * 60 + "\n"
+    rotated = writer.rotated_files()
+    assert len(rotated) == 2
+    assert all(file.suffix == ".zip" for file in rotated)
+    with zipfile.ZipFile(rotated[-1]) as archive:
+        assert archive.read(archive.namelist()[0]) == b"3" * 60 + b"\n"
+
+
+def test_setup_logging_uses_batching_sink(monkeypatch, tmp_path):
+    """Test that setup_logging writes the log file through the batching sink."""
+    # Import third-party modules
+    from loguru import logger
+
+    monkeypatch.setattr(log_config_module, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(log_config_module, "LOG_FILE", tmp_path / "mcp_wecom.log")
+    monkeypatch.setattr(log_config_module, "LOG_CONSOLE_ENABLED", False)
+    monkeypatch.setattr(log_config_module, "LOG_ASYNC", True)
+    monkeypatch.setattr(log_config_module, "LOG_LEVEL", "INFO")
+    log_config_module.setup_logging()
+    logger.info("batched line")
+    logger.remove()
+
+    assert "batched line" in (tmp_path / "mcp_wecom.log").read_text(encoding="utf-8")
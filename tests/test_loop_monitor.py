@@ -0,0 +1,103 @@
+"""Tests for the event loop lag monitor and blocking-call detector."""
+
+# Import built-in modules
+import asyncio
+import time
+
+# Import third-party modules
+from PIL import Image
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server import loop_monitor
+from wecom_bot_mcp_server.image import _process_image_path
+from wecom_bot_mcp_server.loop_monitor import LoopMonitor
+from wecom_bot_mcp_server.loop_monitor import create_loop_monitor
+from wecom_bot_mcp_server.metrics import LOOP_BLOCKS
+from wecom_bot_mcp_server.metrics import LOOP_LAG
+from wecom_bot_mcp_server.utils import get_allowed_root
+
+
+def _block_the_loop() -> None:
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_records_lag():
+    """Test that lag samples are recorded and a stall shows up as lag."""
+    monitor = LoopMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    _block_the_loop()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert LOOP_LAG.count() > 0
+    assert monitor.max_lag >= 0.2
+    assert monitor.blocks == []
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_detects_blocking_call():
+    """Test that a blocking call is reported with the stack of the loop thread."""
+    reported = []
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.05, on_block=reported.append)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    _block_the_loop()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    assert len(monitor.blocks) == 1
+    assert reported == monitor.blocks
+    assert monitor.blocks[0].duration >= 0.2
+    assert "_block_the_loop" in monitor.blocks[0].stack
+    assert LOOP_BLOCKS.value() == 1
+
+
+@pytest.mark.parametrize(
+    ("mode", "enabled", "detects_blocks"),
+    [("on", True, False), ("debug", True, True), ("off", False, False), ("bogus", True, False)],
+)
+def test_create_loop_monitor(mode, enabled, detects_blocks, monkeypatch):
+    """Test the monitor modes and WECOM_LOOP_* settings."""
+    monkeypatch.setenv("WECOM_LOOP_LAG_INTERVAL_MS", "50")
+    monkeypatch.setenv("WECOM_LOOP_BLOCK_MS", "200")
+    monitor = create_loop_monitor(mode)
+
+    assert (monitor is not None) == enabled
+    if monitor is not None:
+        assert monitor.interval == 0.05
+        assert monitor.block_threshold == (0.2 if detects_blocks else None)
+
+
+@pytest.mark.asyncio
+async def test_monitor_event_loop_is_shared_by_sessions(monkeypatch):
+    """Test that concurrent sessions share one monitor, stopped with the last session."""
+    monkeypatch.setenv("WECOM_LOOP_MONITOR", "on")
+    async with loop_monitor.monitor_event_loop() as first:
+        async with loop_monitor.monitor_event_loop() as second:
+            assert first is second is not None
+        assert loop_monitor._monitor is first
+    assert loop_monitor._monitor is None
+    assert loop_monitor._sessions == 0
+
+
+@pytest.mark.asyncio
+async def test_image_validation_does_not_block_the_loop(no_loop_blocking, tmp_path, monkeypatch):
+    """Test that validating an image runs its file system and Pillow calls off the loop."""
+    image = tmp_path / "image.png"
+    Image.new("RGB", (10, 10)).save(image)
+    monkeypatch.setenv("WECOM_MCP_ALLOWED_ROOT", str(tmp_path))
+    get_allowed_root.cache_clear()
+    slow_open = Image.open
+
+    def slow_image_open(*args, **kwargs):
+        time.sleep(0.3)
+        return slow_open(*args, **kwargs)
+
+    monkeypatch.setattr(Image, "open", slow_image_open)
+    try:
+        assert await _process_image_path(str(image)) == image
+    finally:
+        get_allowed_root.cache_clear()
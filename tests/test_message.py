@@ -13,9 +13,13 @@ SRC_DIR = ROOT_DIR / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
-for name in list(sys.modules):
-    if name == "wecom_bot_mcp_server" or name.startswith("wecom_bot_mcp_server."):
-        del sys.modules[name]
+# Drop a copy of the package imported from elsewhere; the local one, imported by other
+# test modules already, is kept so that their module-level imports stay the ones patched
+_loaded = sys.modules.get("wecom_bot_mcp_server")
+if _loaded is not None and SRC_DIR.resolve() not in Path(_loaded.__file__ or "").resolve().parents:
+    for name in list(sys.modules):
+        if name == "wecom_bot_mcp_server" or name.startswith("wecom_bot_mcp_server."):
+            del sys.modules[name]
 
 # Import third-party modules
 import pytest  # noqa: E402
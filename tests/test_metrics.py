@@ -0,0 +1,170 @@
+"""Tests for the metrics registry and the stats endpoints."""
+
+# Import built-in modules
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.app import mcp
+from wecom_bot_mcp_server.bot_config import BotConfig
+from wecom_bot_mcp_server.bot_config import get_bot_registry
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.file import send_wecom_file
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.metrics import BYTES_SENT
+from wecom_bot_mcp_server.metrics import Histogram
+from wecom_bot_mcp_server.metrics import INFLIGHT
+from wecom_bot_mcp_server.metrics import MetricsRegistry
+from wecom_bot_mcp_server.metrics import RATE_LIMIT_WAIT
+from wecom_bot_mcp_server.metrics import REQUESTS
+from wecom_bot_mcp_server.metrics import STAGE_DURATION
+from wecom_bot_mcp_server.metrics import bot_label
+from wecom_bot_mcp_server.metrics import record_bytes_sent
+from wecom_bot_mcp_server.metrics import stage
+from wecom_bot_mcp_server.stats import STATS_RESOURCE_KEY
+from wecom_bot_mcp_server.utils import get_allowed_root
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    """Test the text exposition format of counters and histograms."""
+    registry = MetricsRegistry()
+    counter = registry.counter("sends_total", "Sends.", ("bot",))
+    histogram = registry.histogram("latency_seconds", "Latency.", ("bot",), buckets=(0.1, 1.0))
+    counter.inc(bot='a"b')
+    counter.inc(2, bot="c")
+    histogram.observe(0.05, bot="c")
+    histogram.observe(0.5, bot="c")
+    histogram.observe(5, bot="c")
+
+    text = registry.render()
+    assert "# TYPE sends_total counter" in text
+    assert 'sends_total{bot="a\\"b"} 1' in text
+    assert 'sends_total{bot="c"} 2' in text
+    assert 'latency_seconds_bucket{bot="c",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{bot="c",le="1"} 2' in text
+    assert 'latency_seconds_bucket{bot="c",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{bot="c"} 5.55' in text
+    assert 'latency_seconds_count{bot="c"} 3' in text
+    assert histogram.count(bot="c") == 3
+
+
+def test_histogram_quantile_interpolates_buckets():
+    """Test quantile estimation from the histogram buckets."""
+    histogram = Histogram("latency_seconds", "Latency.", ("bot",), buckets=(1.0, 2.0))
+    for value in (0.5, 1.5, 1.5, 1.5):
+        histogram.observe(value, bot="a")
+    assert histogram.quantile(0.25, bot="a") == pytest.approx(1.0)
+    assert histogram.quantile(0.5, bot="a") == pytest.approx(1 + 1 / 3)
+    assert histogram.quantile(0.5, bot="missing") == 0.0
+
+
+def test_helpers_are_noops_outside_a_tool_call():
+    """Test that stage timers and counters record nothing without a running tool call."""
+    with stage("http"):
+        record_bytes_sent(10)
+    assert STAGE_DURATION.snapshot() == []
+    assert BYTES_SENT.snapshot() == []
+
+
+@pytest.mark.asyncio
+async def test_send_message_records_metrics():
+    """Test that send_message records outcome, stage latency, bytes and rate-limit wait."""
+    nb_instance = AsyncMock()
+    nb_instance.send_async.return_value = SimpleNamespace(success=True, data={"errcode": 0, "errmsg": "ok"})
+    with (
+        patch("wecom_bot_mcp_server.message._get_webhook_url", return_value="https://example.com/hook"),
+        patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge,
+    ):
+        mock_notify_bridge.return_value.__aenter__.return_value = nb_instance
+        await send_message("héllo")
+
+    labels = {"tool": "send_message", "bot": "default"}
+    assert REQUESTS.value(**labels, outcome="success", errcode="0") == 1
+    for stage_name in ("validate", "encode", "http", "total"):
+        assert STAGE_DURATION.count(**labels, stage=stage_name) == 1
+    assert BYTES_SENT.value(**labels) == len("héllo".encode())
+    assert RATE_LIMIT_WAIT.count(**labels) == 1
+    assert INFLIGHT.value(tool="send_message") == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_send_records_errcode():
+    """Test that a rejected send is counted as an error with the WeCom errcode."""
+    nb_instance = AsyncMock()
+    nb_instance.send_async.return_value = SimpleNamespace(
+        success=True, data={"errcode": 45009, "errmsg": "api freq out of limit"}
+    )
+    with (
+        patch("wecom_bot_mcp_server.message._get_webhook_url", return_value="https://example.com/hook"),
+        patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge,
+    ):
+        mock_notify_bridge.return_value.__aenter__.return_value = nb_instance
+        with pytest.raises(WeComError):
+            await send_message("hello")
+
+    assert REQUESTS.value(tool="send_message", bot="default", outcome="error", errcode="45009") == 1
+
+
+def test_bot_label_maps_unknown_ids_to_one_label():
+    """Test that only configured bots and groups get a bot label of their own."""
+    get_bot_registry().register(
+        "ops", BotConfig(name="Ops", webhook_url="https://example.com/send?key=ops", metadata={"tags": ["oncall"]})
+    )
+    assert bot_label(None) == "default"
+    assert bot_label("OPS") == "ops"
+    assert bot_label("@group:OnCall") == "@group:oncall"
+    assert bot_label("ops-typo") == "unknown"
+    assert bot_label("@group:nobody") == "unknown"
+
+
+@pytest.mark.asyncio
+async def test_send_to_unknown_bot_is_counted_as_unknown():
+    """Test that a client-supplied bot id adds no label series."""
+    with pytest.raises(WeComError):
+        await send_message("hello", bot_id="no-such-bot-1234")
+
+    assert [sample["bot"] for sample in REQUESTS.snapshot()] == ["unknown"]
+
+
+@pytest.mark.asyncio
+async def test_failed_file_send_records_no_bytes(tmp_path, monkeypatch):
+    """Test that file bytes are counted only once the send got a response."""
+    monkeypatch.setenv("WECOM_MCP_ALLOWED_ROOT", str(tmp_path))
+    get_allowed_root.cache_clear()
+    report = tmp_path / "report.txt"
+    report.write_text("weekly report")
+
+    nb_instance = AsyncMock()
+    nb_instance.send_async.side_effect = Exception("connection reset")
+    with (
+        patch(
+            "wecom_bot_mcp_server.file._get_webhook_url",
+            return_value="https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=abc",
+        ),
+        patch("wecom_bot_mcp_server.file.NotifyBridge") as mock_notify_bridge,
+    ):
+        mock_notify_bridge.return_value.__aenter__.return_value = nb_instance
+        try:
+            with pytest.raises(WeComError):
+                await send_wecom_file(str(report))
+        finally:
+            get_allowed_root.cache_clear()
+
+    assert BYTES_SENT.snapshot() == []
+
+
+@pytest.mark.asyncio
+async def test_stats_resource_reports_metrics_and_health():
+    """Test the wecom://stats resource."""
+    REQUESTS.inc(tool="send_message", bot="default", outcome="success", errcode="0")
+    contents = await mcp.read_resource(STATS_RESOURCE_KEY)
+    stats = json.loads(contents[0].content)
+    assert stats["metrics"]["wecom_requests_total"] == [
+        {"tool": "send_message", "bot": "default", "outcome": "success", "errcode": "0", "value": 1.0}
+    ]
+    assert stats["health"] == {}
@@ -0,0 +1,219 @@
+"""Tests for webhook pools and client-side rate limiting."""
+
+# Import built-in modules
+import asyncio
+from collections import Counter
+import json
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Import third-party modules
+from aiohttp import ClientSession
+from aiohttp import web
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server import ratelimit
+from wecom_bot_mcp_server.bot_config import BotConfig
+from wecom_bot_mcp_server.bot_config import BotRegistry
+from wecom_bot_mcp_server.bot_config import get_bot_registry
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.pool import WebhookEndpoint
+from wecom_bot_mcp_server.pool import WebhookPool
+from wecom_bot_mcp_server.ratelimit import RateLimiter
+
+
+class FakeClock:
+    """Manually advanced clock for rate limiter tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_limiter_sliding_window():
+    """Test that the limiter allows `limit` sends per window and reports the delay."""
+    clock = FakeClock()
+    limiter = RateLimiter(limit=2, window=60, clock=clock)
+    limiter.record("a")
+    clock.now = 10
+    limiter.record("a")
+
+    assert limiter.remaining("a") == 0
+    assert limiter.delay("a") == pytest.approx(50)
+    assert limiter.remaining("b") == 2
+
+    clock.now = 60
+    assert limiter.remaining("a") == 1
+    assert limiter.delay("a") == 0
+
+
+def test_rate_limiter_disabled():
+    """Test that a limit of 0 disables limiting."""
+    limiter = RateLimiter(limit=0)
+    for _ in range(100):
+        limiter.record("a")
+    assert limiter.delay("a") == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_acquire_waits():
+    """Test that acquire waits for the window to free up."""
+    limiter = RateLimiter(limit=1, window=0.05)
+    assert await limiter.acquire("a") == 0
+    limiter.release("a")
+    assert await limiter.acquire("a") > 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_slot_restamps_on_completion():
+    """Test that a slot is held while in flight and counts from the end of the request."""
+    clock = FakeClock()
+    limiter = RateLimiter(limit=1, window=60, clock=clock)
+    async with limiter.slot("a"):
+        assert limiter.remaining("a") == 0
+        clock.now = 5
+    assert limiter.delay("a") == pytest.approx(60)
+
+
+def test_pool_spreads_by_weight():
+    """Test weighted round-robin over members with budget."""
+    pool = WebhookPool(
+        [WebhookEndpoint("https://example.com/a"), WebhookEndpoint("https://example.com/b", weight=3)],
+        limiter=RateLimiter(limit=0),
+    )
+    counts = Counter(pool.select() for _ in range(40))
+    assert counts == {"https://example.com/a": 10, "https://example.com/b": 30}
+
+
+def test_pool_skips_exhausted_members():
+    """Test that members without rate budget are skipped until all are exhausted."""
+    limiter = RateLimiter(limit=1, window=60)
+    pool = WebhookPool([WebhookEndpoint("https://example.com/a"), WebhookEndpoint("https://example.com/b")], limiter)
+
+    limiter.record("https://example.com/a")
+    assert [pool.select() for _ in range(3)] == ["https://example.com/b"] * 3
+
+    limiter.record("https://example.com/b")
+    # Both exhausted: queued sends are spread over all members
+    assert {pool.select() for _ in range(2)} == {"https://example.com/a", "https://example.com/b"}
+
+
+def test_pool_sticky_conversation():
+    """Test that a conversation key always maps to the same member."""
+    pool = WebhookPool([WebhookEndpoint(f"https://example.com/{i}") for i in range(4)])
+    for key in ("incident-1", "incident-2", "thread-42"):
+        assert len({pool.select(key) for _ in range(10)}) == 1
+    assert len({pool.select(f"conversation-{i}") for i in range(100)}) == 4
+
+
+def test_endpoint_validation():
+    """Test invalid pool members are rejected."""
+    with pytest.raises(WeComError):
+        WebhookEndpoint("ftp://example.com")
+    with pytest.raises(WeComError):
+        WebhookEndpoint("https://example.com", weight=0)
+
+
+def test_registry_loads_webhook_pool():
+    """Test that WECOM_BOTS webhook_urls configure a pool."""
+    bots = {
+        "alerts": {
+            "name": "Alerts",
+            "webhook_urls": ["https://example.com/a", {"url": "https://example.com/b", "weight": 2}],
+        }
+    }
+    with patch.dict(os.environ, {"WECOM_BOTS": json.dumps(bots)}, clear=True):
+        registry = BotRegistry()
+        config = registry.get("alerts")
+        assert config.webhook_url == "https://example.com/a"
+        assert [e.weight for e in config.webhook_urls] == [1, 2]
+        assert registry.list_bots()[0]["pool_size"] == 2
+        urls = {registry.get_webhook_url("alerts") for _ in range(6)}
+        assert urls == {"https://example.com/a", "https://example.com/b"}
+
+
+class WeComStub:
+    """Local WeCom webhook stub enforcing a per-key rate limit (errcode 45009)."""
+
+    def __init__(self, limit: int, window: float) -> None:
+        self.limit = limit
+        self.window = window
+        self.sends: dict[str, list[float]] = {}
+        self.delivered: Counter[str] = Counter()
+        self.rejected = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        key = request.query.get("key", "")
+        now = time.monotonic()
+        recent = [t for t in self.sends.get(key, []) if t > now - self.window]
+        if len(recent) >= self.limit:
+            self.rejected += 1
+            return web.json_response({"errcode": 45009, "errmsg": "api freq out of limit"})
+        recent.append(now)
+        self.sends[key] = recent
+        self.delivered[key] += 1
+        return web.json_response({"errcode": 0, "errmsg": "ok"})
+
+
+class StubNotifyBridge:
+    """Minimal NotifyBridge replacement posting straight to the stub.
+
+    notify-bridge's own per-call setup cost would otherwise dominate the timings.
+    """
+
+    async def __aenter__(self) -> "StubNotifyBridge":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    async def send_async(self, channel: str, webhook_url: str, **kwargs) -> SimpleNamespace:
+        async with ClientSession() as session, session.post(webhook_url, json=kwargs) as response:
+            data = await response.json()
+        return SimpleNamespace(success=True, data=data)
+
+
+@pytest.mark.asyncio
+async def test_pool_throughput_scales_with_members():
+    """Test that a pool of N webhooks delivers about N times faster without 45009 errors."""
+    limit, window, messages = 5, 0.2, 30
+    stub = WeComStub(limit, window)
+    app = web.Application()
+    app.router.add_post("/cgi-bin/webhook/send", stub.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base = f"http://127.0.0.1:{port}/cgi-bin/webhook/send?key="
+
+    async def run(bot_id: str) -> float:
+        ratelimit._rate_limiter = ratelimit.RateLimiter(limit=limit, window=window)
+        start = time.monotonic()
+        results = await asyncio.gather(*(send_message(f"message {i}", bot_id=bot_id) for i in range(messages)))
+        assert all(result["status"] == "success" for result in results)
+        return time.monotonic() - start
+
+    try:
+        registry = get_bot_registry()
+        registry.register("single", BotConfig(name="single", webhook_url=base + "solo"))
+        pooled = [WebhookEndpoint(base + f"k{i}") for i in range(3)]
+        registry.register("pooled", BotConfig(name="pooled", webhook_url=pooled[0].url, webhook_urls=pooled))
+
+        with patch("wecom_bot_mcp_server.message.NotifyBridge", StubNotifyBridge):
+            single_elapsed = await run("single")
+            pooled_elapsed = await run("pooled")
+    finally:
+        await runner.cleanup()
+
+    assert stub.rejected == 0
+    assert stub.delivered["solo"] == messages
+    assert all(stub.delivered[f"k{i}"] >= messages // 3 - 2 for i in range(3))
+    # One key needs 6 windows for 30 messages, three keys need 2
+    assert pooled_elapsed < single_elapsed / 2
@@ -0,0 +1,105 @@
+"""Tests for per-call profiling."""
+
+# Import built-in modules
+import asyncio
+import json
+from pathlib import Path
+import pstats
+import time
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server import profiling
+from wecom_bot_mcp_server.metrics import instrument_tool
+
+
+@pytest.fixture(autouse=True)
+def disable_profiling():
+    """Disable profiling again after each test."""
+    yield
+    profiling.set_profile_settings(None)
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_disabled_by_default(monkeypatch: pytest.MonkeyPatch):
+    """Test that profiling is off unless WECOM_PROFILE is set."""
+    monkeypatch.delenv("WECOM_PROFILE", raising=False)
+    assert profiling.configure_profiling() is False
+    assert not profiling.is_enabled()
+    assert profiling.profile_call("send_message") is profiling._NOOP
+
+
+def test_configure_from_env(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    """Test reading the profiling settings from the environment."""
+    monkeypatch.setenv("WECOM_PROFILE", "Sample")
+    monkeypatch.setenv("WECOM_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("WECOM_PROFILE_SLOW_MS", "250")
+    monkeypatch.setenv("WECOM_PROFILE_KEEP", "3")
+    assert profiling.configure_profiling() is True
+    assert profiling._settings == profiling.ProfileSettings("sample", tmp_path, slow_ms=250, keep=3)
+
+    assert profiling.configure_profiling("flamegraph") is False
+
+
+def test_cprofile_slow_call_writes_pstats(tmp_path: Path):
+    """Test that a slow call leaves a loadable pstats file and a fast one does not."""
+    profiling.set_profile_settings(profiling.ProfileSettings("cprofile", tmp_path, slow_ms=20))
+    with profiling.profile_call("send_message"):
+        pass
+    assert not list(tmp_path.iterdir())
+
+    with profiling.profile_call("send_message"):
+        _busy(0.03)
+    (path,) = tmp_path.iterdir()
+    assert "_send_message_" in path.name
+    assert path.suffix == ".pstats"
+    stats = pstats.Stats(str(path))
+    assert any(func[2] == "_busy" for func in stats.stats)
+
+
+def test_sampler_writes_speedscope(tmp_path: Path):
+    """Test that the sampling profiler writes a speedscope profile of the calling thread."""
+    profiling.set_profile_settings(profiling.ProfileSettings("sample", tmp_path, slow_ms=0, interval_ms=1))
+    with profiling.profile_call("send_wecom_file"):
+        _busy(0.05)
+
+    (path,) = tmp_path.iterdir()
+    assert path.name.endswith(".speedscope.json")
+    document = json.loads(path.read_text(encoding="utf-8"))
+    profile = document["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"]) > 0
+    frame_names = {frame["name"] for frame in document["shared"]["frames"]}
+    assert "_busy" in frame_names
+
+
+def test_keeps_newest_profiles(tmp_path: Path):
+    """Test that only the newest WECOM_PROFILE_KEEP profiles stay on disk."""
+    profiling.set_profile_settings(profiling.ProfileSettings("cprofile", tmp_path, slow_ms=0, keep=2))
+    for _ in range(4):
+        with profiling.profile_call("send_message"):
+            pass
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+@pytest.mark.asyncio
+async def test_one_call_profiled_at_a_time(tmp_path: Path):
+    """Test that concurrent tool calls are not profiled while another one is."""
+    profiling.set_profile_settings(profiling.ProfileSettings("cprofile", tmp_path, slow_ms=0))
+
+    @instrument_tool("slow_tool")
+    async def slow_tool(bot_id: str | None = None) -> dict:
+        await asyncio.sleep(0.02)
+        return {"status": "success"}
+
+    await asyncio.gather(*(slow_tool() for _ in range(3)))
+    profiles = list(tmp_path.iterdir())
+    assert len(profiles) == 1
+    assert "_slow_tool_" in profiles[0].name
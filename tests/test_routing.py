@@ -0,0 +1,157 @@
+"""Tests for rule-based bot routing."""
+
+# Import built-in modules
+import json
+import time
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+
+def _router(*rules):
+    # Import local modules
+    from wecom_bot_mcp_server.routing import Router
+    from wecom_bot_mcp_server.routing import RoutingRule
+
+    return Router([RoutingRule.from_dict(i, rule) for i, rule in enumerate(rules)])
+
+
+def test_keyword_rule_is_case_insensitive():
+    """Test keyword rules match case-insensitively."""
+    router = _router({"name": "db", "keywords": ["postgres", "MySQL"], "bot_id": "dba"})
+    match = router.route("Replication lag on mysql-02")
+    assert match is not None
+    assert (match.rule, match.bot_id) == ("db", "dba")
+    assert router.route("all good") is None
+
+
+def test_regex_rule():
+    """Test regex rules."""
+    router = _router({"name": "deploy", "regex": r"deploy(ed|ing)? to prod", "bot_id": "release"})
+    assert router.route("v1.2 deployed to prod").bot_id == "release"
+    assert router.route("deployed to staging") is None
+
+
+def test_severity_rule_matches_level_and_above():
+    """Test severity rules match their level and more severe words."""
+    router = _router({"severity": "error", "bot_id": "oncall"})
+    assert router.route("[CRITICAL] disk full").bot_id == "oncall"
+    assert router.route("Build failed").bot_id == "oncall"
+    assert router.route("warning: cert expires soon") is None
+    # Whole words only
+    assert router.route("errorless run") is None
+
+
+def test_first_rule_in_table_order_wins():
+    """Test priority follows table order, not match position."""
+    router = _router(
+        {"name": "specific", "keyword": "bc", "bot_id": "a"},
+        {"name": "general", "keyword": "abc", "bot_id": "b"},
+    )
+    # "abc" starts earlier, but the overlapping higher-priority rule must still win
+    assert router.route("xabc").rule == "specific"
+    assert router.route("abd abc").rule == "specific"
+
+
+def test_invalid_rules_are_rejected():
+    """Test invalid rule definitions raise validation errors."""
+    # Import local modules
+    from wecom_bot_mcp_server.errors import WeComError
+    from wecom_bot_mcp_server.routing import RoutingRule
+
+    for bad in (
+        {"keyword": "x"},
+        {"bot_id": "a"},
+        {"bot_id": "a", "regex": "("},
+        {"bot_id": "a", "regex": "(?P<x>y)"},
+        {"bot_id": "a", "regex": r"(a)\1"},
+        {"bot_id": "a", "regex": "(?i)deploy"},
+        {"bot_id": "a", "severity": "bogus"},
+    ):
+        with pytest.raises(WeComError):
+            RoutingRule.from_dict(0, bad)
+
+
+def test_regex_rule_with_scoped_flags():
+    """Test scoped inline flags, and that a rule the combined regex rejects is skipped rather than failing the router."""
+    # Import local modules
+    from wecom_bot_mcp_server.routing import Router
+    from wecom_bot_mcp_server.routing import RoutingRule
+
+    router = _router({"name": "deploy", "regex": "(?i:deploy)", "bot_id": "release"})
+    assert router.route("DEPLOY finished").bot_id == "release"
+
+    global_flags = RoutingRule(name="global", bot_id="ops", kind="regex", terms=("(?i)deploy",))
+    fallback = RoutingRule(name="fallback", bot_id="ci", kind="keyword", terms=("deploy",))
+    router = Router([global_flags, fallback])
+    assert [rule.name for rule in router.rules] == ["fallback"]
+    assert router.route("Deploy finished").bot_id == "ci"
+
+
+def test_router_from_environment_skips_invalid_rules(monkeypatch):
+    """Test loading WECOM_ROUTES skips invalid entries."""
+    # Import local modules
+    from wecom_bot_mcp_server.routing import Router
+
+    monkeypatch.setenv(
+        "WECOM_ROUTES",
+        json.dumps([{"keyword": "x"}, {"name": "ok", "keyword": "deploy", "bot_id": "ci"}, "nope"]),
+    )
+    router = Router.from_environment()
+    assert [rule.name for rule in router.rules] == ["ok"]
+
+    monkeypatch.setenv("WECOM_ROUTES", "{not json")
+    assert Router.from_environment().rules == []
+
+
+def test_routing_scales_with_many_rules():
+    """Test routing hundreds of rules stays a single fast scan."""
+    rules = [{"name": f"svc-{i}", "keyword": f"service-{i:04d}", "bot_id": f"team-{i}"} for i in range(500)]
+    router = _router(*rules)
+    content = "lorem ipsum " * 300 + "alert from service-0499"
+
+    start = time.perf_counter()
+    for _ in range(20):
+        match = router.route(content)
+    elapsed = (time.perf_counter() - start) / 20
+
+    assert match.rule == "svc-499"
+    assert elapsed < 0.05
+
+
+@pytest.mark.asyncio
+@patch("wecom_bot_mcp_server.message.NotifyBridge")
+@patch("wecom_bot_mcp_server.message.get_bot_registry")
+@patch("wecom_bot_mcp_server.routing.get_router")
+async def test_send_message_uses_routing_when_bot_id_omitted(
+    mock_get_router, mock_get_bot_registry, mock_notify_bridge
+):
+    """Test send_message consults the router and reports the matched rule."""
+    # Import local modules
+    from wecom_bot_mcp_server.message import send_message
+
+    mock_get_router.return_value = _router({"name": "db", "keyword": "postgres", "bot_id": "dba"})
+    mock_registry = MagicMock()
+    mock_registry.get_webhook_url.return_value = "https://example.com/dba"
+    mock_get_bot_registry.return_value = mock_registry
+
+    mock_response = MagicMock()
+    mock_response.success = True
+    mock_response.data = {"errcode": 0, "errmsg": "ok"}
+    mock_nb_instance = AsyncMock()
+    mock_nb_instance.send_async.return_value = mock_response
+    mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+    result = await send_message("postgres is down")
+    assert result["routed_by"] == "db"
+    assert result["bot_id"] == "dba"
+    mock_registry.get_webhook_url.assert_called_once_with("dba")
+
+    # An explicit bot_id bypasses routing
+    mock_registry.get_webhook_url.reset_mock()
+    result = await send_message("postgres is down", bot_id="alert")
+    assert "routed_by" not in result
+    mock_registry.get_webhook_url.assert_called_once_with("alert")
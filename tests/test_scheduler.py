@@ -0,0 +1,208 @@
+"""Tests for scheduled message delivery."""
+
+# Import built-in modules
+import asyncio
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.scheduler import MessageScheduler
+from wecom_bot_mcp_server.scheduler import ScheduledMessage
+from wecom_bot_mcp_server.scheduler import cancel_scheduled
+from wecom_bot_mcp_server.scheduler import get_scheduler
+from wecom_bot_mcp_server.scheduler import list_scheduled
+from wecom_bot_mcp_server.scheduler import parse_send_at
+from wecom_bot_mcp_server.scheduler import schedule_message
+
+
+@pytest.fixture
+def sent():
+    """Collect the messages delivered by a MessageScheduler."""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    send.messages = messages
+    return send
+
+
+def _message(message_id, send_at, content="Reminder", bot_id=None):
+    return ScheduledMessage(id=message_id, send_at=send_at, content=content, bot_id=bot_id)
+
+
+def test_parse_send_at():
+    """Test ISO 8601 times, the Z suffix and times of day."""
+    assert parse_send_at("2026-10-20T01:00:00Z") == datetime(2026, 10, 20, 1, tzinfo=timezone.utc).timestamp()
+    assert parse_send_at("2026-10-20T09:00:00+08:00") == datetime(2026, 10, 20, 1, tzinfo=timezone.utc).timestamp()
+
+    now = datetime(2026, 10, 19, 10, 30).astimezone()
+    assert parse_send_at("11:00", now) == now.replace(hour=11, minute=0).timestamp()
+    # A time of day that has passed means tomorrow
+    assert parse_send_at("09:00", now) == (now.replace(hour=9, minute=0) + timedelta(days=1)).timestamp()
+
+    for invalid in ("tomorrow", "25:00"):
+        with pytest.raises(WeComError):
+            parse_send_at(invalid, now)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_delivers_in_time_order(tmp_path, sent):
+    """Test that messages are sent in delivery order, and cancelled ones are not sent."""
+    # Import built-in modules
+    import time
+
+    scheduler = MessageScheduler(tmp_path / "schedule.db", sent)
+    now = time.time()
+    await scheduler.schedule(_message("later", now + 0.15))
+    await scheduler.schedule(_message("cancelled", now + 0.05))
+    await scheduler.schedule(_message("sooner", now + 0.1))
+    assert [message.id for message in scheduler.pending()] == ["cancelled", "sooner", "later"]
+    assert (await scheduler.cancel("cancelled")).id == "cancelled"
+    assert await scheduler.cancel("cancelled") is None
+
+    await asyncio.sleep(0.4)
+    await scheduler.stop()
+    assert [message.id for message in sent.messages] == ["sooner", "later"]
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_persists_across_restarts(tmp_path, sent):
+    """Test that pending messages are reloaded, and overdue ones are sent unless too late."""
+    # Import built-in modules
+    import time
+
+    path = tmp_path / "schedule.db"
+    scheduler = MessageScheduler(path, sent)
+    now = time.time()
+    await scheduler.schedule(_message("pending", now + 7200, bot_id="alert"))
+    await scheduler.schedule(_message("overdue", now + 3000))
+    await scheduler.schedule(_message("missed", now + 600))
+    await scheduler.stop()
+    assert sent.messages == []
+
+    # Restart after an hour of downtime: "overdue" is 1000s late, "missed" 3400s
+    restarted = MessageScheduler(path, sent, max_lateness=1800, clock=lambda: now + 4000)
+    await restarted.start()
+    await asyncio.sleep(0.1)
+    assert [message.id for message in restarted.pending()] == ["pending"]
+    assert [message.id for message in restarted.pending(bot_id="ALERT")] == ["pending"]
+    assert restarted.pending(bot_id="default") == []
+    await restarted.stop()
+    assert [message.id for message in sent.messages] == ["overdue"]
+
+    # Both delivered and dropped messages are removed from the database
+    restarted = MessageScheduler(path, sent, clock=lambda: now)
+    await restarted.start()
+    assert [message.id for message in restarted.pending()] == ["pending"]
+    await restarted.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_starts_once_for_concurrent_calls(tmp_path, sent):
+    """Test that concurrent first calls load the database and start the delivery loop only once."""
+    # Import built-in modules
+    import time
+
+    scheduler = MessageScheduler(tmp_path / "schedule.db", sent)
+    now = time.time()
+    with patch.object(scheduler, "_open", wraps=scheduler._open) as mock_open:
+        await asyncio.gather(*(scheduler.schedule(_message(f"m{index}", now + 0.05)) for index in range(5)))
+    assert mock_open.call_count == 1
+    assert len(scheduler) == 5
+    loops = [task for task in asyncio.all_tasks() if task.get_name() == "wecom-scheduler"]
+    assert len(loops) == 1
+
+    await asyncio.sleep(0.2)
+    await scheduler.stop()
+    assert sorted(message.id for message in sent.messages) == [f"m{index}" for index in range(5)]
+    assert all(task.done() for task in loops)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_retries_failed_sends(tmp_path):
+    """Test that a failed send is kept and retried, and invalid messages are dropped."""
+    # Import built-in modules
+    import time
+
+    attempts = []
+
+    async def flaky_send(message):
+        attempts.append(message.id)
+        if message.id == "invalid":
+            raise WeComError("Bot not found", ErrorCode.VALIDATION_ERROR)
+        if attempts.count(message.id) < 3:
+            raise WeComError("Connection reset", ErrorCode.NETWORK_ERROR)
+
+    path = tmp_path / "schedule.db"
+    scheduler = MessageScheduler(path, flaky_send, retry_delay=0.1)
+    now = time.time()
+    await scheduler.schedule(_message("flaky", now))
+    await scheduler.schedule(_message("invalid", now))
+    await asyncio.sleep(0.05)
+    # The failed message is still pending, and persisted, until a retry succeeds
+    await scheduler.pause()
+    assert [message.id for message in scheduler.pending()] == ["flaky"]
+    restarted = MessageScheduler(path, flaky_send, retry_delay=0.1)
+    await restarted.start()
+    assert [(message.id, message.attempts) for message in restarted.pending()] == [("flaky", 1)]
+    await restarted.pause()
+
+    await scheduler.start()
+    await asyncio.sleep(0.5)
+    await scheduler.stop()
+    await restarted.stop()
+    assert attempts.count("flaky") == 3
+    assert attempts.count("invalid") == 1
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_schedule_message_tools():
+    """Test scheduling, listing, cancelling and delivering through the tool functions."""
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+    with patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge:
+        mock_nb_instance = AsyncMock()
+        mock_nb_instance.send_async.return_value = response
+        mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+        kept = await schedule_message("Deploy finished", delay_seconds=0.1)
+        dropped = await schedule_message("Standup", send_at="2099-01-01T09:00:00Z")
+        assert kept["status"] == dropped["status"] == "scheduled"
+
+        listed = await list_scheduled()
+        assert [message["id"] for message in listed["scheduled"]] == [kept["id"], dropped["id"]]
+        assert (await cancel_scheduled(dropped["id"]))["status"] == "cancelled"
+        with pytest.raises(WeComError):
+            await cancel_scheduled(dropped["id"])
+
+        await asyncio.sleep(0.3)
+        await get_scheduler().stop()
+
+    mock_nb_instance.send_async.assert_awaited_once()
+    assert mock_nb_instance.send_async.await_args.kwargs["content"] == "Deploy finished"
+
+
+@pytest.mark.asyncio
+async def test_schedule_message_validates_input():
+    """Test that invalid schedules are rejected."""
+    with pytest.raises(WeComError):
+        await schedule_message("Reminder")
+    with pytest.raises(WeComError):
+        await schedule_message("Reminder", send_at="09:00", delay_seconds=60)
+    with pytest.raises(WeComError):
+        await schedule_message("Reminder", send_at="2020-01-01T00:00:00Z")
+    with pytest.raises(WeComError):
+        await schedule_message("Reminder", delay_seconds=60, msg_type="text")
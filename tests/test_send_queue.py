@@ -0,0 +1,314 @@
+"""Tests for the bounded send queue."""
+
+# Import built-in modules
+import asyncio
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.bot_config import BotConfig
+from wecom_bot_mcp_server.bot_config import BotRegistry
+from wecom_bot_mcp_server.deadline import run_with_deadline
+from wecom_bot_mcp_server.errors import ErrorCode
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.errors import WeComExpiredError
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.errors import WeComTimeoutError
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.metrics import EXPIRED
+from wecom_bot_mcp_server.metrics import QUEUE_DEPTH
+from wecom_bot_mcp_server.metrics import QUEUE_OVERFLOWS
+from wecom_bot_mcp_server.ratelimit import get_rate_limiter
+from wecom_bot_mcp_server.ratelimit import rate_limited
+from wecom_bot_mcp_server.send_queue import SendQueue
+from wecom_bot_mcp_server.send_queue import get_send_queue
+from wecom_bot_mcp_server.send_queue import mark_dispatched
+from wecom_bot_mcp_server.send_queue import queued_send
+
+
+async def _hold(started: asyncio.Event, dispatch: bool = False) -> None:
+    async with queued_send("default"):
+        if dispatch:
+            mark_dispatched()
+        started.set()
+        await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+async def test_reject_policy_limits_each_scope():
+    """Test that a full bot or session rejects new sends, and others are still admitted."""
+    queue = SendQueue(max_total=3, max_per_bot=1, max_per_session=2)
+    first = await queue.admit("Default", "session-a")
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await queue.admit("default", "session-b")
+    assert exc_info.value.scope == "bot"
+    assert exc_info.value.error_code is ErrorCode.QUEUE_FULL
+
+    await queue.admit("alert", "session-a")
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await queue.admit("ops", "session-a")
+    assert exc_info.value.scope == "session"
+
+    await queue.admit("ops", "session-b")
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await queue.admit("dev", "session-c")
+    assert exc_info.value.scope == "total"
+
+    assert len(queue) == 3
+    assert QUEUE_DEPTH.value(bot="default") == 1
+    assert QUEUE_OVERFLOWS.value(bot="default", scope="bot", action="rejected") == 1
+
+    queue.release(first)
+    assert queue.depth("default") == 0
+    assert QUEUE_DEPTH.value(bot="default") == 0
+    await queue.admit("default", "session-b")
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_policy_drops_waiting_sends_only(monkeypatch):
+    """Test that the oldest waiting send is dropped for a new one, but a dispatched send is not."""
+    monkeypatch.setenv("WECOM_QUEUE_MAX_PER_BOT", "1")
+    monkeypatch.setenv("WECOM_QUEUE_POLICY", "drop_oldest")
+
+    started = asyncio.Event()
+    oldest = asyncio.create_task(_hold(started))
+    await started.wait()
+
+    newest = await get_send_queue().admit("default")
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await oldest
+    assert exc_info.value.scope == "dropped"
+    assert QUEUE_OVERFLOWS.value(bot="default", scope="bot", action="dropped") == 1
+    get_send_queue().release(newest)
+
+    started.clear()
+    dispatched = asyncio.create_task(_hold(started, dispatch=True))
+    await started.wait()
+    with pytest.raises(WeComQueueFullError):
+        await get_send_queue().admit("default")
+    dispatched.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await dispatched
+    assert len(get_send_queue()) == 0
+
+
+@pytest.mark.asyncio
+async def test_block_policy_waits_for_room_within_the_deadline(monkeypatch):
+    """Test that a blocked send is admitted when room is freed, or times out in the queue stage."""
+    monkeypatch.setenv("WECOM_QUEUE_MAX_PER_BOT", "1")
+    monkeypatch.setenv("WECOM_QUEUE_POLICY", "block")
+    queue = get_send_queue()
+
+    first = await queue.admit("default")
+    with pytest.raises(WeComTimeoutError) as exc_info:
+        await run_with_deadline("send_message", 0.05, lambda: queue.admit("default"))
+    assert exc_info.value.stage == "queue"
+    assert len(queue) == 1
+
+    blocked = asyncio.create_task(queue.admit("default"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    queue.release(first)
+    second = await asyncio.wait_for(blocked, 1)
+    assert queue.depth("default") == 1
+    queue.release(second)
+    assert len(queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_send_message_rejected_when_queue_is_full(monkeypatch):
+    """Test that send_message fails with QUEUE_FULL while the bot's queue is full, and recovers."""
+    monkeypatch.setenv("WECOM_QUEUE_MAX_PER_BOT", "1")
+    release = asyncio.Event()
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+
+    async def _send(*args, **kwargs):
+        await release.wait()
+        return response
+
+    with patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge:
+        mock_nb_instance = AsyncMock()
+        mock_nb_instance.send_async.side_effect = _send
+        mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+        first = asyncio.create_task(send_message("Deploy started"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(WeComQueueFullError) as exc_info:
+            await send_message("Deploy finished")
+        assert exc_info.value.error_code is ErrorCode.QUEUE_FULL
+
+        release.set()
+        assert (await first)["status"] == "success"
+        assert (await send_message("Deploy finished"))["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_lanes_deliver_in_admission_order_per_bot():
+    """Test that sends to one bot reach WeCom in admission order while other bots proceed in parallel."""
+    delivered = []
+
+    async def _send(bot, name, prepare_s):
+        async with queued_send(bot) as ticket:
+            await asyncio.sleep(prepare_s)
+            async with rate_limited(f"https://example.com/{bot}"):
+                delivered.append(name)
+            return ticket.seq
+
+    # The first send to "default" is the slowest to prepare, but is still delivered first
+    first = asyncio.create_task(_send("default", "first", 0.05))
+    second = asyncio.create_task(_send("default", "second", 0))
+    other = asyncio.create_task(_send("alert", "other", 0))
+    assert await asyncio.gather(first, second, other) == [1, 2, 1]
+    assert delivered == ["other", "first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_failed_send_passes_its_turn_on():
+    """Test that a send failing before its request does not hold up the sends behind it."""
+    failing_started = asyncio.Event()
+
+    async def _fail():
+        async with queued_send("default"):
+            failing_started.set()
+            await asyncio.sleep(0.02)
+            raise ValueError("invalid image")
+
+    async def _send():
+        async with queued_send("default") as ticket:
+            async with rate_limited("https://example.com/default"):
+                return ticket.seq
+
+    failing = asyncio.create_task(_fail())
+    await failing_started.wait()
+    assert await asyncio.wait_for(_send(), 1) == 2
+    with pytest.raises(ValueError):
+        await failing
+
+
+@pytest.mark.asyncio
+async def test_send_message_returns_sequence(monkeypatch):
+    """Test that send_message numbers messages per bot and concurrent sends keep their order."""
+    monkeypatch.setenv("WECOM_BOTS", '{"alert": "https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=alert"}')
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+    with patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge:
+        mock_nb_instance = AsyncMock()
+        mock_nb_instance.send_async.return_value = response
+        mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+        results = await asyncio.gather(*(send_message(f"Step ({i}/3)") for i in range(1, 4)))
+        assert [result["sequence"] for result in results] == [1, 2, 3]
+        sent = [call.kwargs["content"] for call in mock_nb_instance.send_async.await_args_list]
+        assert sent == ["Step (1/3)", "Step (2/3)", "Step (3/3)"]
+
+        assert (await send_message("Disk full", bot_id="alert"))["sequence"] == 1
+
+
+def test_registry_loads_ttl(monkeypatch):
+    """Test that per-bot TTLs are parsed from WECOM_BOTS, listed, and overridden by ttl_s."""
+    # Import built-in modules
+    import json
+
+    bots = {
+        "alert": {"webhook_url": "https://example.com/a", "ttl_s": 300},
+        "broken": {"webhook_url": "https://example.com/b", "ttl_s": "soon"},
+    }
+    monkeypatch.setenv("WECOM_BOTS", json.dumps(bots))
+    registry = BotRegistry()
+    assert registry.get_ttl("ALERT") == 300
+    assert registry.list_bots()[0]["ttl_s"] == 300
+    assert not registry.has_bot("broken")
+    assert registry.get_ttl("@group:ops") is None
+    assert registry.get_ttl("missing") is None
+    with pytest.raises(WeComError):
+        BotConfig(name="alert", webhook_url="https://example.com/a", ttl_s=0)
+
+
+@pytest.mark.asyncio
+async def test_expired_sends_are_discarded_and_noted(monkeypatch):
+    """Test that a send outliving its TTL in the lane is discarded, and the next message notes it."""
+    release = asyncio.Event()
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+
+    async def _send(*args, **kwargs):
+        await release.wait()
+        return response
+
+    with patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge:
+        mock_nb_instance = AsyncMock()
+        mock_nb_instance.send_async.side_effect = _send
+        mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+        first = asyncio.create_task(send_message("Deploy started"))
+        stale = asyncio.create_task(send_message("CPU high", ttl_s=0.05))
+        await asyncio.sleep(0.1)
+        release.set()
+        await first
+        with pytest.raises(WeComExpiredError) as exc_info:
+            await stale
+        assert exc_info.value.error_code is ErrorCode.EXPIRED
+        assert exc_info.value.ttl == 0.05
+        assert EXPIRED.value(tool="send_message", bot="default") == 1
+        # The discarded send did not use up rate budget
+        assert [len(sends) for sends in get_rate_limiter()._sends.values()] == [1]
+
+        await send_message("CPU normal")
+        assert mock_nb_instance.send_async.await_args.kwargs["content"] == "CPU normal\n\n(1 stale messages dropped)"
+        await send_message("Deploy finished")
+        assert mock_nb_instance.send_async.await_args.kwargs["content"] == "Deploy finished"
+
+
+@pytest.mark.asyncio
+async def test_send_expiring_during_rate_limit_wait_fails_at_once(monkeypatch):
+    """Test that a send whose TTL would pass while waiting for the rate limit is discarded without waiting."""
+    # Import built-in modules
+    import time
+
+    monkeypatch.setenv("WECOM_RATE_LIMIT_PER_MINUTE", "1")
+    monkeypatch.setenv("WECOM_BOTS", '{"default": {"webhook_url": "https://example.com/d", "ttl_s": 5}}')
+    response = MagicMock()
+    response.success = True
+    response.data = {"errcode": 0, "errmsg": "ok"}
+    with patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge:
+        mock_nb_instance = AsyncMock()
+        mock_nb_instance.send_async.return_value = response
+        mock_notify_bridge.return_value.__aenter__.return_value = mock_nb_instance
+
+        await send_message("First")
+        start = time.perf_counter()
+        with pytest.raises(WeComExpiredError):
+            await send_message("Second")
+        assert time.perf_counter() - start < 1
+        assert mock_nb_instance.send_async.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_closed_queue_refuses_sends_and_drains():
+    """Test that closing the queue fails blocked and new sends, and drain returns the sends still queued."""
+    queue = SendQueue(max_per_bot=1, policy="block")
+    first = await queue.admit("default")
+    blocked = asyncio.create_task(queue.admit("default"))
+    await asyncio.sleep(0)
+
+    queue.close()
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await blocked
+    assert exc_info.value.scope == "shutdown"
+    with pytest.raises(WeComQueueFullError):
+        await queue.admit("alert")
+
+    assert await queue.drain(0.01) == [first]
+    asyncio.get_running_loop().call_later(0.01, queue.release, first)
+    assert await queue.drain(1) == []
+
+    queue.open()
+    await queue.admit("default")
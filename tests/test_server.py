@@ -1,14 +1,23 @@
 """Tests for server module."""
 
 # Import built-in modules
+import asyncio
 import unittest
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
 from unittest.mock import patch
 
 # Import third-party modules
 import pytest
+import uvicorn
 
 # Import local modules
+from wecom_bot_mcp_server.server import DrainingServer
 from wecom_bot_mcp_server.server import main
+from wecom_bot_mcp_server.server import parse_args
+from wecom_bot_mcp_server.server import run_http
+from wecom_bot_mcp_server.server import serve_stdio
+from wecom_bot_mcp_server.server import transport_security
 
 
 class TestServer(unittest.TestCase):
@@ -16,16 +25,110 @@ class TestServer(unittest.TestCase):
 
     @patch("wecom_bot_mcp_server.server.setup_logging")
     @patch("wecom_bot_mcp_server.server.logger")
-    @patch("wecom_bot_mcp_server.server.mcp")
-    def test_main(self, mock_mcp, mock_logger, mock_setup_logging):
+    @patch("wecom_bot_mcp_server.server.anyio")
+    def test_main(self, mock_anyio, mock_logger, mock_setup_logging):
         """Test main function."""
         # Call function
-        main()
+        main([])
 
         # Assertions
         mock_setup_logging.assert_called_once()
         mock_logger.info.assert_called()  # Check that logger.info was called
-        mock_mcp.run.assert_called_once()
+        mock_anyio.run.assert_called_once_with(serve_stdio)
+
+    @patch("wecom_bot_mcp_server.server.setup_logging")
+    @patch("wecom_bot_mcp_server.server.run_http")
+    @patch("wecom_bot_mcp_server.server.mcp")
+    def test_main_http_transport(self, mock_mcp, mock_run_http, mock_setup_logging):
+        """Test that --transport http serves over HTTP instead of stdio."""
+        main(
+            [
+                "--transport",
+                "http",
+                "--host",
+                "0.0.0.0",
+                "--port",
+                "9000",
+                "--max-concurrency",
+                "64",
+                "--allowed-hosts",
+                "mcp.example.com, 10.0.0.5:9000",
+            ]
+        )
+
+        mock_run_http.assert_called_once_with("http", "0.0.0.0", 9000, 64, ["mcp.example.com", "10.0.0.5:9000"])
+        mock_mcp.run.assert_not_called()
+
+    @patch("wecom_bot_mcp_server.bench.main")
+    @patch("wecom_bot_mcp_server.server.mcp")
+    def test_main_bench_subcommand(self, mock_mcp, mock_bench_main):
+        """Test that the bench subcommand runs the load generator instead of the server."""
+        main(["bench", "load.yaml", "--qps", "5"])
+
+        mock_bench_main.assert_called_once_with(["load.yaml", "--qps", "5"])
+        mock_mcp.run.assert_not_called()
+
+    def test_parse_args_defaults(self):
+        """Test default command line arguments."""
+        with patch.dict("os.environ", {}, clear=True):
+            args = parse_args([])
+        self.assertEqual(args.transport, "stdio")
+        self.assertEqual(args.host, "127.0.0.1")
+        self.assertEqual(args.port, 8000)
+
+    def test_parse_args_rejects_unknown_transport(self):
+        """Test that an unknown transport is rejected."""
+        with pytest.raises(SystemExit):
+            parse_args(["--transport", "websocket"])
+
+    @patch("wecom_bot_mcp_server.server.DrainingServer")
+    @patch("wecom_bot_mcp_server.server.mcp")
+    def test_run_http_configures_uvicorn(self, mock_mcp, mock_server):
+        """Test that run_http passes host, port and concurrency limit to uvicorn."""
+        mock_mcp.settings.log_level = "INFO"
+        run_http("sse", "0.0.0.0", 9001, 32, ["mcp.example.com"])
+
+        mock_mcp.sse_app.assert_called_once()
+        config = mock_server.call_args.args[0]
+        self.assertEqual((config.host, config.port, config.limit_concurrency), ("0.0.0.0", 9001, 32))
+        # DNS rebinding protection stays on, extended to the allowed hosts
+        security = mock_mcp.settings.transport_security
+        self.assertTrue(security.enable_dns_rebinding_protection)
+        self.assertIn("mcp.example.com:*", security.allowed_hosts)
+        mock_server.return_value.run.assert_called_once()
+
+    def test_server_drains_sends_before_closing_connections(self):
+        """Test that the HTTP server drains the send queue before uvicorn closes its connections."""
+        calls = MagicMock()
+        server = DrainingServer(uvicorn.Config(MagicMock()))
+        with (
+            patch("wecom_bot_mcp_server.shutdown.drain_sends", AsyncMock(side_effect=lambda: calls.drain())),
+            patch.object(uvicorn.Server, "shutdown", AsyncMock(side_effect=lambda sockets: calls.close(sockets))),
+        ):
+            asyncio.run(server.shutdown(None))
+        self.assertEqual([name for name, _, _ in calls.mock_calls], ["drain", "close"])
+
+    def test_transport_security(self):
+        """Test the Host header patterns allowed by DNS rebinding protection, and the explicit opt-out."""
+        security = transport_security("10.0.0.5", ["mcp.example.com", "gateway:8443", "fe80::2"])
+        self.assertTrue(security.enable_dns_rebinding_protection)
+        self.assertEqual(
+            security.allowed_hosts,
+            [
+                "127.0.0.1:*",
+                "localhost:*",
+                "[::1]:*",
+                "10.0.0.5:*",
+                "mcp.example.com:*",
+                "gateway:8443",
+                "[fe80::2]:*",
+            ],
+        )
+        self.assertIn("https://mcp.example.com:*", security.allowed_origins)
+
+        # A wildcard listen address is not a Host header, so only loopback names are allowed by default
+        self.assertEqual(transport_security("0.0.0.0", []).allowed_hosts, ["127.0.0.1:*", "localhost:*", "[::1]:*"])
+        self.assertFalse(transport_security("0.0.0.0", ["*"]).enable_dns_rebinding_protection)
 
 
 class TestFastMCPIntegration(unittest.TestCase):
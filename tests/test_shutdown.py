@@ -0,0 +1,90 @@
+"""Tests for the graceful shutdown of the background services."""
+
+# Import built-in modules
+import asyncio
+import json
+import sqlite3
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.app import background_services
+from wecom_bot_mcp_server.errors import WeComQueueFullError
+from wecom_bot_mcp_server.message import send_message
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_sends_and_closes_the_shared_bridge(notify_bridge_class):
+    """Test that queued sends finish before the services stop, sharing one bridge, and later sends are refused."""
+    bridge = notify_bridge_class.return_value.__aenter__.return_value
+
+    async def slow_send(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        return bridge.send_async.return_value
+
+    bridge.send_async.side_effect = slow_send
+    async with background_services():
+        sends = [asyncio.create_task(send_message(f"Deploy step {step}")) for step in range(3)]
+        await asyncio.sleep(0.01)
+
+    results = await asyncio.gather(*sends)
+    assert [result["status"] for result in results] == ["success"] * 3
+    assert bridge.send_async.await_count == 3
+    # One bridge served every send, and it was closed at shutdown
+    assert notify_bridge_class.call_count == 1
+    notify_bridge_class.return_value.__aexit__.assert_awaited_once()
+
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await send_message("Too late")
+    assert exc_info.value.scope == "shutdown"
+
+
+@pytest.mark.asyncio
+async def test_shutdown_saves_unsent_messages_to_the_outbox(notify_bridge_class, monkeypatch, tmp_path):
+    """Test that sends still waiting after the grace period are saved for the next start, unless they have a TTL."""
+    monkeypatch.setenv("WECOM_RATE_LIMIT_PER_MINUTE", "1")
+    monkeypatch.setenv("WECOM_SHUTDOWN_GRACE", "0.05")
+    async with background_services():
+        assert (await send_message("First"))["status"] == "success"
+        # Both wait for the webhook's rate limit
+        waiting = asyncio.create_task(send_message("Second", mentioned_list=["zhangsan"]))
+        expiring = asyncio.create_task(send_message("Third", ttl_s=300))
+        await asyncio.sleep(0.01)
+
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await waiting
+    assert exc_info.value.scope == "shutdown"
+    assert "saved to the outbox" in str(exc_info.value)
+    with pytest.raises(WeComQueueFullError) as exc_info:
+        await expiring
+    assert "not delivered" in str(exc_info.value)
+
+    with sqlite3.connect(tmp_path / "schedule.db") as db:
+        rows = db.execute("SELECT payload FROM scheduled").fetchall()
+    saved = [json.loads(payload) for (payload,) in rows]
+    assert [(message["content"], message["mentioned_list"]) for message in saved] == [("Second", ["zhangsan"])]
+
+
+@pytest.mark.asyncio
+async def test_services_admit_sends_again_after_restart(notify_bridge_class):
+    """Test that the send queue reopens when the background services start again."""
+    async with background_services():
+        pass
+    async with background_services():
+        assert (await send_message("Back online"))["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_shutdown_sends_pending_digests(notify_bridge_class):
+    """Test that digests pending at shutdown are sent before the send queue closes."""
+    bridge = notify_bridge_class.return_value.__aenter__.return_value
+    async with background_services():
+        assert (await send_message("Build 1 failed", group_key="g1"))["status"] == "queued"
+        assert (await send_message("Build 2 failed", group_key="g1"))["status"] == "queued"
+        bridge.send_async.assert_not_called()
+
+    bridge.send_async.assert_awaited_once()
+    content = bridge.send_async.await_args.kwargs["content"]
+    assert "Build 1 failed" in content
+    assert "Build 2 failed" in content
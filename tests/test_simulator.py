@@ -0,0 +1,139 @@
+"""Tests for the local WeCom webhook simulator."""
+
+# Import built-in modules
+import base64
+import hashlib
+
+# Import third-party modules
+from aiohttp import ClientSession
+from aiohttp import ClientTimeout
+from aiohttp import FormData
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.message import send_message
+from wecom_bot_mcp_server.simulator import SimulatorConfig
+from wecom_bot_mcp_server.simulator import WeComSimulator
+
+
+class FakeClock:
+    """Manually advanced clock for rate limit tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _post(url: str, payload: dict) -> dict:
+    async with ClientSession() as session, session.post(url, json=payload) as response:
+        return await response.json()
+
+
+def _markdown(content: str) -> dict:
+    return {"msgtype": "markdown", "markdown": {"content": content}}
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_key():
+    """Test that each key gets 20 messages per minute and the excess gets errcode 45009."""
+    clock = FakeClock()
+    async with WeComSimulator(clock=clock) as simulator:
+        for _ in range(20):
+            assert (await _post(simulator.webhook_url("a"), _markdown("hi")))["errcode"] == 0
+        assert (await _post(simulator.webhook_url("a"), _markdown("hi")))["errcode"] == 45009
+        # Other keys have their own budget
+        assert (await _post(simulator.webhook_url("b"), _markdown("hi")))["errcode"] == 0
+        clock.now = 60
+        assert (await _post(simulator.webhook_url("a"), _markdown("hi")))["errcode"] == 0
+
+    assert simulator.delivered == {"a": 21, "b": 1}
+    assert simulator.errors == {45009: 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("payload", "errcode"),
+    [
+        ({"msgtype": "sticker", "sticker": {}}, 40008),
+        (_markdown(""), 44004),
+        (_markdown("x" * 4097), 40058),
+        ({"msgtype": "text", "text": {"content": "字" * 683}}, 40058),
+        ({"msgtype": "image", "image": {"base64": base64.b64encode(b"png").decode(), "md5": "0" * 32}}, 40058),
+        ({"msgtype": "file", "file": {"media_id": "unknown"}}, 40007),
+        ({"msgtype": "news", "news": {"articles": []}}, 40058),
+        ({"msgtype": "template_card", "template_card": {"card_type": "text_notice", "main_title": {}}}, 40058),
+    ],
+)
+async def test_payload_validation(payload, errcode):
+    """Test that invalid payloads are rejected with WeCom's errcodes."""
+    async with WeComSimulator() as simulator:
+        assert (await _post(simulator.webhook_url(), payload))["errcode"] == errcode
+    assert not simulator.delivered
+
+
+@pytest.mark.asyncio
+async def test_upload_media_then_send_file():
+    """Test that media ids from upload_media are only valid for the same key."""
+    async with WeComSimulator() as simulator, ClientSession() as session:
+        form = FormData()
+        form.add_field("media", b"report contents", filename="report.txt")
+        upload_url = f"{simulator.base_url}/cgi-bin/webhook/upload_media?key=a&type=file"
+        async with session.post(upload_url, data=form) as response:
+            media_id = (await response.json())["media_id"]
+
+        payload = {"msgtype": "file", "file": {"media_id": media_id}}
+        assert (await _post(simulator.webhook_url("a"), payload))["errcode"] == 0
+        assert (await _post(simulator.webhook_url("b"), payload))["errcode"] == 40007
+
+        form = FormData()
+        form.add_field("media", b"tiny", filename="tiny.txt")
+        async with session.post(upload_url, data=form) as response:
+            assert (await response.json())["errcode"] == 40006
+
+
+@pytest.mark.asyncio
+async def test_valid_image():
+    """Test that a correctly encoded image is accepted."""
+    data = b"\x89PNG fake image bytes"
+    payload = {
+        "msgtype": "image",
+        "image": {"base64": base64.b64encode(data).decode(), "md5": hashlib.md5(data).hexdigest()},
+    }
+    async with WeComSimulator() as simulator:
+        assert (await _post(simulator.webhook_url(), payload))["errcode"] == 0
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_and_timeouts():
+    """Test injected HTTP errors and hanging requests."""
+    async with WeComSimulator(SimulatorConfig(error_rate=1.0)) as simulator, ClientSession() as session:
+        async with session.post(simulator.webhook_url(), json=_markdown("hi")) as response:
+            assert response.status == 503
+    assert simulator.errors == {"http_503": 1}
+
+    config = SimulatorConfig(timeout_rate=1.0, timeout_delay=0.5)
+    async with WeComSimulator(config) as simulator, ClientSession(timeout=ClientTimeout(total=0.2)) as session:
+        with pytest.raises(TimeoutError):
+            async with session.post(simulator.webhook_url(), json=_markdown("hi")):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_send_message_through_simulator(monkeypatch: pytest.MonkeyPatch):
+    """Test that the real send path works against the simulator and sees its rate limit."""
+    monkeypatch.setenv("WECOM_RATE_LIMIT_PER_MINUTE", "0")
+    monkeypatch.delenv("WECOM_BOTS", raising=False)
+    async with WeComSimulator(SimulatorConfig(rate_limit=1)) as simulator:
+        monkeypatch.setenv("WECOM_WEBHOOK_URL", simulator.webhook_url("local"))
+        result = await send_message("**hello**", msg_type="markdown")
+        assert result["status"] == "success"
+        with pytest.raises(WeComError, match="api freq out of limit"):
+            await send_message("again", msg_type="markdown")
+
+    key, payload = simulator.messages[0]
+    assert key == "local"
+    assert payload["msgtype"] == "markdown"
+    assert payload["markdown"]["content"] == "**hello**"
@@ -0,0 +1,180 @@
+"""Tests for optional tracing."""
+
+# Import built-in modules
+from contextlib import contextmanager
+import importlib.util
+import subprocess
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from wecom_bot_mcp_server import tracing
+from wecom_bot_mcp_server.app import background_services
+from wecom_bot_mcp_server.errors import WeComError
+from wecom_bot_mcp_server.message import send_message
+
+
+class FakeSpan:
+    """Recorded span."""
+
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class FakeTracer:
+    """Tracer recording spans in memory, with the ``start_as_current_span`` interface of OpenTelemetry."""
+
+    def __init__(self):
+        self.spans = []
+        self._stack = []
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = FakeSpan(name, attributes, self._stack[-1] if self._stack else None)
+        self.spans.append(span)
+        self._stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = e
+            raise
+        finally:
+            self._stack.pop()
+
+
+@pytest.fixture
+def tracer():
+    """Enable tracing with an in-memory tracer."""
+    fake = FakeTracer()
+    tracing.set_tracer(fake)
+    yield fake
+    tracing.set_tracer(None)
+
+
+def _mock_notify_bridge(data):
+    nb_instance = AsyncMock()
+    nb_instance.send_async.return_value = SimpleNamespace(success=True, data=data)
+    return nb_instance
+
+
+@pytest.mark.asyncio
+async def test_send_message_spans(tracer):
+    """Test that a send is traced as a tool span with a child span per stage."""
+    with (
+        patch("wecom_bot_mcp_server.message._get_webhook_url", return_value="https://example.com/hook"),
+        patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge,
+    ):
+        mock_notify_bridge.return_value.__aenter__.return_value = _mock_notify_bridge({"errcode": 0, "errmsg": "ok"})
+        await send_message("hello")
+
+    root, *stages = tracer.spans
+    assert root.name == "wecom.send_message"
+    assert root.parent is None
+    assert root.attributes == {
+        "wecom.tool": "send_message",
+        "wecom.bot_id": "default",
+        "wecom.bytes": 5,
+        "wecom.errcode": "0",
+        "wecom.outcome": "success",
+    }
+    assert [span.name for span in stages] == ["wecom.validate", "wecom.encode", "wecom.http"]
+    assert all(span.parent is root and span.attributes["wecom.bot_id"] == "default" for span in stages)
+
+
+@pytest.mark.asyncio
+async def test_failed_send_span_records_errcode(tracer):
+    """Test that the tool span of a rejected send carries the errcode and the exception."""
+    with (
+        patch("wecom_bot_mcp_server.message._get_webhook_url", return_value="https://example.com/hook"),
+        patch("wecom_bot_mcp_server.message.NotifyBridge") as mock_notify_bridge,
+    ):
+        mock_notify_bridge.return_value.__aenter__.return_value = _mock_notify_bridge(
+            {"errcode": 93000, "errmsg": "invalid webhook url"}
+        )
+        with pytest.raises(WeComError):
+            await send_message("hello")
+
+    root = tracer.spans[0]
+    assert root.attributes["wecom.errcode"] == "93000"
+    assert isinstance(root.error, WeComError)
+
+
+def test_disabled_tracing_is_a_noop():
+    """Test that spans cost nothing and record nothing while tracing is disabled."""
+    assert not tracing.is_enabled()
+    assert tracing.span("wecom.http") is tracing.span("wecom.encode")
+    with tracing.span("wecom.http") as span:
+        tracing.set_attribute("wecom.bytes", 1)
+    assert span is None
+
+
+def test_configure_tracing_without_exporter():
+    """Test that tracing stays disabled unless an exporter is configured."""
+    with patch.dict("os.environ", {"WECOM_TRACING": "none"}):
+        assert not tracing.configure_tracing()
+    assert not tracing.configure_tracing("bogus")
+    assert not tracing.is_enabled()
+
+
+@pytest.mark.skipif(importlib.util.find_spec("opentelemetry.sdk") is not None, reason="OpenTelemetry SDK installed")
+def test_configure_tracing_without_sdk():
+    """Test that a missing OpenTelemetry SDK disables tracing instead of failing startup."""
+    assert not tracing.configure_tracing("console")
+    assert not tracing.is_enabled()
+
+
+@pytest.mark.skipif(importlib.util.find_spec("opentelemetry.sdk") is None, reason="OpenTelemetry SDK not installed")
+def test_reconfigured_tracing_exports_with_the_new_provider(capsys):
+    """Test that configuring tracing again records spans with the new exporter, not the first global provider."""
+    # Import third-party modules
+    from opentelemetry import trace
+
+    try:
+        assert tracing.configure_tracing("console")
+        first = tracing._provider
+        assert tracing.configure_tracing("console")
+        assert tracing._provider is not first
+        with tracing.span("wecom.reconfigured"):
+            pass
+    finally:
+        tracing.shutdown_tracing()
+    assert trace.get_tracer_provider() is first
+    assert '"name": "wecom.reconfigured"' in capsys.readouterr().err
+
+
+def test_startup_does_not_import_opentelemetry():
+    """Test that OpenTelemetry is not imported while tracing is disabled."""
+    code = "import sys, wecom_bot_mcp_server; print(any(m.startswith('opentelemetry') for m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+
+
+@pytest.mark.asyncio
+async def test_buffered_spans_are_exported_at_shutdown(tracer):
+    """Test that buffered spans are flushed when the services stop and the provider is shut down at exit."""
+    provider = MagicMock()
+    tracing.set_provider(provider)
+    try:
+        async with background_services():
+            provider.force_flush.assert_not_called()
+        provider.force_flush.assert_called_once_with(tracing.FLUSH_TIMEOUT_MS)
+        provider.shutdown.assert_not_called()
+    finally:
+        tracing.shutdown_tracing()
+
+    provider.shutdown.assert_called_once_with()
+    assert not tracing.is_enabled()
+    tracing.shutdown_tracing()
+    provider.shutdown.assert_called_once_with()